@@ -0,0 +1,134 @@
+"""
+Recall@k vs latency for reduced embeddings and approximate FAISS indexes.
+
+Ground truth is exact cosine over raw TF-IDF, i.e. what the flat index
+returns today. Every configuration (SVD dimension x index type x
+nprobe/efSearch) is scored by recall@k, per-query latency, index size and
+build time, so an operating point can be chosen for large catalogs.
+``overlap_with_flat`` separates the approximation loss of the ANN index
+from the loss of the reduced embedding itself.
+
+Recall is tie-aware: a retrieved internship counts as a hit when its exact
+score is at least the k-th ground-truth score, since synthetic catalogs
+contain many identical postings.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.AnnRecallReport --rows 100000 --svd 64,128,256
+"""
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from Benchmarks import Standin
+from DB.VectorDB import AnnIndex
+from DB.VectorDB.SparseIndex import SparseIndex
+from Constants.config import SEARCH_CONFIG
+
+
+def _sweeps(args):
+    """(index_type, config overrides) pairs to evaluate per embedding."""
+    yield "flat", {}
+    for nprobe in (int(v) for v in args.nprobe.split(",")):
+        yield "ivf", {"nprobe": nprobe}
+    for ef in (int(v) for v in args.ef_search.split(",")):
+        yield "hnsw", {"ef_search": ef}
+    for nprobe in (int(v) for v in args.nprobe.split(",")):
+        yield "ivfpq", {"nprobe": nprobe}
+
+
+def _recall(found, exact_scores, kth_scores, k):
+    hits = 0
+    for row, positions in enumerate(found):
+        positions = positions[positions >= 0]
+        hits += int(np.sum(exact_scores[row, positions] >= kth_scores[row] - 1e-5))
+    return hits / (len(found) * k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--svd", default="64,128,256", help="comma-separated SVD dimensions; 0 = raw TF-IDF")
+    parser.add_argument("--nprobe", default="1,4,16,64")
+    parser.add_argument("--ef-search", default="16,32,64,128")
+    parser.add_argument("--extra-vocab", type=int, default=5000, help="distinct description words")
+    parser.add_argument("--extra-words", type=int, default=12, help="description words per internship")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = Standin.synthetic_texts(args.rows, args.extra_vocab, args.extra_words, args.seed)
+    queries = Standin.synthetic_queries(args.queries, args.seed + 1)
+    vectorizer = TfidfVectorizer(stop_words="english").fit(texts)
+    docs = normalize(vectorizer.transform(texts)).astype(np.float32)
+    q_sparse = normalize(vectorizer.transform(queries)).astype(np.float32)
+    del texts
+
+    # Exact ground truth over raw TF-IDF (identical to the flat index).
+    exact_scores = (q_sparse @ docs.T).toarray()
+    gt_scores, _ = SparseIndex.from_documents(docs).search(q_sparse, args.k)
+    kth_scores = gt_scores[:, -1]
+
+    report = {"config": vars(args), "vocab_size": docs.shape[1], "results": []}
+    for dim in (int(d) for d in args.svd.split(",")):
+        t0 = time.perf_counter()
+        if dim:
+            svd = TruncatedSVD(n_components=dim, algorithm="randomized", random_state=42).fit(docs)
+            vectors = svd.transform(docs).astype(np.float32)
+            q_dense = svd.transform(q_sparse).astype(np.float32)
+        else:
+            vectors = docs.toarray()
+            q_dense = q_sparse.toarray()
+        svd_s = time.perf_counter() - t0
+        faiss.normalize_L2(vectors)
+        faiss.normalize_L2(q_dense)
+
+        built = {}
+        flat_found = None
+        for index_type, overrides in _sweeps(args):
+            config = {**SEARCH_CONFIG, "index_type": index_type, **overrides}
+            if index_type not in built:
+                t0 = time.perf_counter()
+                built[index_type] = (AnnIndex.build(vectors, config), time.perf_counter() - t0)
+            index, build_s = built[index_type]
+            AnnIndex.configure_search(index, config)
+
+            latencies = []
+            found = np.empty((len(q_dense), args.k), dtype=np.int64)
+            for row in range(len(q_dense)):
+                t0 = time.perf_counter()
+                _, idx = index.search(q_dense[row:row + 1], args.k)
+                latencies.append(time.perf_counter() - t0)
+                found[row] = idx[0]
+            latencies.sort()
+            if index_type == "flat":
+                flat_found = found
+            # Share of the same-embedding flat results the ANN index recovers,
+            # i.e. the loss due to approximation alone.
+            vs_flat = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(found, flat_found)])
+
+            result = {
+                "embedding": f"svd{dim}" if dim else "tfidf",
+                "index_type": index_type,
+                **overrides,
+                f"recall@{args.k}": round(_recall(found, exact_scores, kth_scores, args.k), 4),
+                "overlap_with_flat": round(float(vs_flat), 4),
+                "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+                "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+                "index_mb": round(faiss.serialize_index(index).nbytes / 2**20, 2),
+                "build_s": round(build_s + svd_s, 2),
+            }
+            report["results"].append(result)
+            print(json.dumps(result), flush=True)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
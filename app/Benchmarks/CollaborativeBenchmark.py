@@ -0,0 +1,157 @@
+"""
+Training cost and effect of the collaborative model.
+
+Builds an index over the SQLite stand-in, logs ``--interactions`` synthetic
+views and applications of ``--students`` students (``Standin.synthetic_interactions``:
+taste groups within a domain that the student profiles cannot tell apart),
+then reports:
+
+- ``full``: a full training run (``train_collaborative(full=True)``) over the
+  log: seconds per stage (read, aggregate, ALS, publish), sweeps run and
+  ``peak_rss_mb``, how far the process's resident memory rose above its
+  level before the run (sampled every 10 ms from ``/proc``; Linux only)
+- ``incremental``: folding ``--incremental`` further events into that model
+  the same way
+- ``search_ms``: p50/p95/p99 of ``search_hits`` for one student, with the
+  query text alone (``content``) and blended with the student's vector
+  (``blended``; one extra search over the item factors)
+- ``hit_rate``: the share of ``--eval`` students whose next internship (a
+  later event, not one already in their history) is in the top ``--k``,
+  for both; ``after_full_retrain`` re-evaluates after a full run over the
+  same log, to show what the bounded incremental sweeps leave on the table
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.CollaborativeBenchmark --rows 20000 --interactions 1000000 --students 100000
+    COLLAB_FACTORS=64 python -m Benchmarks.CollaborativeBenchmark --interactions 200000 --students 20000
+"""
+import os
+import resource
+import threading
+import time
+
+from Benchmarks import Evaluate, Standin
+from Constants.config import COLLAB_CONFIG
+from Schemas.StudentDetails import StudentDetails
+
+
+def _rss() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _train(full: bool) -> dict:
+    from DB.VectorDB.CollaborativeTraining import train_collaborative
+
+    baseline, peak = _rss(), [0]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.01):
+            peak[0] = max(peak[0], _rss() - baseline)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        report = train_collaborative(full=full)
+    finally:
+        done.set()
+        sampler.join()
+    keys = ("mode", "new_interactions", "students", "items", "interactions", "iterations", "stage_seconds", "seconds")
+    entry = {key: report.get(key) for key in keys}
+    entry["seconds_per_sweep"] = round(report["stage_seconds"]["train"] / max(report["iterations"], 1), 3)
+    entry["peak_rss_mb"] = round(peak[0] / 2**20, 1)
+    return entry
+
+
+def _held_out(history, future, payloads, n: int):
+    """Up to ``n`` (payload, internship_id) pairs: a student's first future internship not in their history."""
+    seen = {}
+    for student_id, internship_id, _ in history:
+        seen.setdefault(student_id, set()).add(internship_id)
+    by_id = {p["student_id"]: p for p in payloads}
+    pairs, used = [], set()
+    for student_id, internship_id, _ in future:
+        if student_id in used or student_id not in seen or internship_id in seen[student_id]:
+            continue
+        used.add(student_id)
+        pairs.append((by_id[student_id], internship_id))
+        if len(pairs) == n:
+            break
+    return pairs
+
+
+def _evaluate(pairs, k: int) -> dict:
+    from DB.VectorDB.Search import search_hits
+    from Services.RecommendationService import _build_query_text
+
+    texts = [_build_query_text(StudentDetails.model_validate(payload)) for payload, _ in pairs]
+    results = {}
+    for name, personal in (("content", False), ("blended", True)):
+        def search(row: int):
+            student_ids = [pairs[row][0]["student_id"]] if personal else None
+            return search_hits([texts[row]], k=k, student_ids=student_ids)[0]
+
+        samples, found = Evaluate.timed(search, range(len(pairs)))
+        hits = sum(
+            any(int(hit.internship_id) == internship_id for hit in row_hits)
+            for row_hits, (_, internship_id) in zip(found, pairs)
+        )
+        results[name] = {
+            "hit_rate": round(hits / max(len(pairs), 1), 4),
+            "search_ms": Evaluate.percentiles(samples, suffix=""),
+        }
+    return results
+
+
+def main():
+    parser = Evaluate.benchmark_parser(__doc__)
+    parser.add_argument("--interactions", type=int, default=1000000)
+    parser.add_argument("--students", type=int, default=100000)
+    parser.add_argument("--groups", type=int, default=2000)
+    parser.add_argument("--incremental", type=int, default=50000)
+    parser.add_argument("--eval", type=int, default=1000)
+    parser.add_argument("--skip-full-retrain", action="store_true")
+    args = parser.parse_args()
+
+    COLLAB_CONFIG["enabled"] = True
+    workdir = Evaluate.prepare(args)
+    db_path = str(workdir / Standin.DATABASE_FILE)
+    internships = Standin.synthetic_internships(args.rows, args.seed)
+
+    future_events = args.eval * 20
+    events, payloads = Standin.synthetic_interactions(
+        internships,
+        args.interactions + args.incremental + future_events,
+        args.students,
+        groups=args.groups,
+        seed=args.seed + 2,
+    )
+    history = events[: args.interactions]
+    increment = events[args.interactions: args.interactions + args.incremental]
+    future = events[args.interactions + args.incremental:]
+
+    start = time.perf_counter()
+    Standin.insert_interactions(db_path, history)
+    report = Evaluate.report(
+        args, workdir, factors=COLLAB_CONFIG["factors"], insert_seconds=round(time.perf_counter() - start, 3)
+    )
+    report["full"] = _train(full=True)
+
+    Standin.insert_interactions(db_path, increment)
+    report["incremental"] = _train(full=False)
+
+    pairs = _held_out(history + increment, future, payloads, args.eval)
+    report["eval_students"] = len(pairs)
+    report["search"] = _evaluate(pairs, args.k)
+
+    if not args.skip_full_retrain:
+        report["full_retrain"] = _train(full=True)
+        report["after_full_retrain"] = {
+            name: result["hit_rate"] for name, result in _evaluate(pairs, args.k).items()
+        }
+    report["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    Evaluate.emit(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Cost and effect of diversity-aware top-k (MMR and the per-company cap).
+
+Builds an index over the SQLite stand-in, then for each candidate pool size
+runs the same queries through ``search_hits`` with diversity off, with
+``company`` and with ``mmr``, and reports:
+
+- ``added_ms``: p50/p95/p99 of the diversification step alone, on
+  candidates searched up front; for MMR split into reconstructing the
+  candidate vectors, the pairwise similarity product and the greedy picks
+- ``search_ms``: p50/p95/p99 of the whole ``search_hits`` call
+- ``distinct_companies`` and ``intra_list_similarity`` (mean pairwise
+  cosine of the top k): how much of the top k is near-duplicates
+- ``loop_mmr_ms``: the same MMR with similarities computed pair by pair
+  in Python, on the first ``--loop-queries`` queries, for comparison
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.DiversityBenchmark --rows 100000 --candidates 100 500 1000
+    SEARCH_EMBEDDING=svd python -m Benchmarks.DiversityBenchmark --rows 100000
+"""
+import time
+
+import numpy as np
+
+from Benchmarks import Evaluate, Standin
+from Constants.config import DIVERSITY_CONFIG, RERANK_CONFIG
+
+
+def _summary(samples) -> dict:
+    return Evaluate.percentiles(samples, suffix="")
+
+
+def _dense(vectors) -> np.ndarray:
+    return vectors.toarray() if hasattr(vectors, "toarray") else vectors
+
+
+def _loop_mmr(relevance, vectors, k: int, mmr_lambda: float):
+    """MMR as usually written: each candidate's redundancy from one dot product per picked hit."""
+    picked = []
+    for _ in range(min(k, len(relevance))):
+        best, best_gain = None, -np.inf
+        for i in range(len(relevance)):
+            if i in picked:
+                continue
+            redundancy = max([0.0] + [float(np.dot(vectors[i], vectors[j])) for j in picked])
+            gain = mmr_lambda * relevance[i] - (1 - mmr_lambda) * redundancy
+            if gain > best_gain:
+                best, best_gain = i, gain
+        picked.append(best)
+    return picked
+
+
+def main():
+    parser = Evaluate.benchmark_parser(__doc__, rows=100000)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[500])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--loop-queries", type=int, default=10, help="queries timed with the Python-loop MMR")
+    args = parser.parse_args()
+
+    workdir = Evaluate.prepare(args)
+
+    from DB.VectorDB import Search
+    from DB.VectorDB.Diversity import DiversityQuery, diversify, pairwise_similarities
+    from Schemas.StudentDetails import StudentDetails
+    from Services.RecommendationService import _build_query_text, _rerank_query
+
+    Search.preload_artifacts()
+    artifacts = Search._load_artifacts()
+    students = [StudentDetails(**p) for p in Standin.synthetic_students(args.queries, args.seed + 1)]
+    texts = [_build_query_text(student) for student in students]
+    rerank_queries = [_rerank_query(student) for student in students] if RERANK_CONFIG["enabled"] else None
+
+    def quality(hit_lists) -> dict:
+        companies, similarity = [], []
+        for hits in hit_lists:
+            positions = np.array([hit.position for hit in hits])
+            companies.append(len(set(artifacts.metadata.company_codes(positions).tolist())))
+            sims = pairwise_similarities(Search._candidate_vectors(artifacts, positions))
+            n = len(positions)
+            similarity.append((sims.sum() - np.trace(sims)) / max(1, n * (n - 1)))
+        return {
+            "distinct_companies": round(float(np.mean(companies)), 2),
+            "intra_list_similarity": round(float(np.mean(similarity)), 4),
+        }
+
+    report = Evaluate.report(
+        args,
+        workdir,
+        index={key: artifacts.manifest.get(key) for key in ("backend", "embedding", "index_type", "items")},
+        rerank=RERANK_CONFIG["enabled"],
+        max_per_company=DIVERSITY_CONFIG["max_per_company"],
+        mmr_lambda=DIVERSITY_CONFIG["mmr_lambda"],
+        candidates={},
+    )
+    for pool in args.candidates:
+        DIVERSITY_CONFIG["candidates"] = pool
+        # the candidates each diversified search chooses from, re-ranked as in the search
+        candidates = []
+        for row, text in enumerate(texts):
+            row_rerank = [rerank_queries[row]] if rerank_queries else None
+            hits = Search.search_hits([text], k=pool, rerank_queries=row_rerank)[0]
+            candidates.append((np.array([h.position for h in hits]), np.array([h.score for h in hits])))
+
+        modes = {}
+        for mode in ("off", "company", "mmr"):
+            query = DiversityQuery.create(None if mode == "off" else mode)
+            added, steps = [], {"reconstruct": [], "similarities": [], "pick": []}
+            if query is not None:
+                for positions, scores in candidates:
+                    t0 = time.perf_counter()
+                    similarities = None
+                    if query.mode == "mmr":
+                        vectors = Search._candidate_vectors(artifacts, positions)
+                        t1 = time.perf_counter()
+                        similarities = pairwise_similarities(vectors)
+                        t2 = time.perf_counter()
+                        steps["reconstruct"].append(t1 - t0)
+                        steps["similarities"].append(t2 - t1)
+                    t3 = time.perf_counter()
+                    companies = artifacts.metadata.company_codes(positions)
+                    diversify(positions, scores, query, args.k, similarities, companies)
+                    steps["pick"].append(time.perf_counter() - t3)
+                    added.append(time.perf_counter() - t0)
+
+            def search(row: int):
+                row_rerank = [rerank_queries[row]] if rerank_queries else None
+                return Search.search_hits([texts[row]], k=args.k, rerank_queries=row_rerank, diversity=query)[0]
+
+            latency, results = Evaluate.timed(search, range(len(texts)), warmup=20)
+            modes[mode] = {"search_ms": _summary(latency), **quality(results)}
+            if added:
+                modes[mode]["added_ms"] = _summary(added)
+                if query.mode == "mmr":
+                    modes[mode]["steps_ms"] = {name: _summary(samples) for name, samples in steps.items()}
+
+        loop = []
+        for positions, scores in candidates[: args.loop_queries]:
+            vectors = _dense(Search._candidate_vectors(artifacts, positions))
+            t0 = time.perf_counter()
+            _loop_mmr(scores.tolist(), vectors, args.k, DIVERSITY_CONFIG["mmr_lambda"])
+            loop.append(time.perf_counter() - t0)
+        if loop:
+            modes["mmr"]["loop_mmr_ms"] = _summary(loop)
+        report["candidates"][pool] = modes
+        Evaluate.progress(pool, modes)
+    Evaluate.emit(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+End-to-end evaluation: build cost, latency and recall of the recommender.
+
+Generates synthetic internships into the SQLite stand-in (or, with
+``--postgres``, into the ``internships`` table of the configured database,
+which is emptied first) and builds the index with ``build_index``. Then
+the same synthetic students are sent through three layers in turn:
+
+- ``search``:  ``Search.search_hits`` as the service calls it
+- ``service``: ``recommend_for_student``
+- ``http``:    ``POST /recommendations/`` through the FastAPI app, in process
+
+Each layer reports QPS (sequential, one request at a time) and p50/p95/p99
+latency; ``Benchmarks.LoadTest`` covers concurrent clients. The build
+reports wall time and the bytes of every artifact in the generation.
+
+Recall@k is measured against brute force over the whole corpus:
+
+- ``index``:  the index alone (no re-ranking) vs exact TF-IDF cosine
+- ``service``: ``recommend_for_student`` vs the re-ranker's blended score
+  over every internship, not just the fetched candidates (equals
+  ``index`` recall when re-ranking is off)
+
+Recall is tie-aware: a result counts when its exact score reaches the k-th
+best exact score, since synthetic catalogs contain identical postings.
+
+The report is JSON (``--output`` writes it to a file). With ``--baseline``
+it is compared to an earlier report: slower latency, lower QPS or lower
+recall beyond the tolerances are listed under ``regressions`` and the exit
+status is 1.
+
+The module also holds the harness the other benchmarks share: the common
+command-line options, the stand-in workspace and index, the timing loop,
+percentile summaries and the JSON report.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.Evaluate --rows 50000 --output eval.json
+    FAISS_INDEX_TYPE=hnsw python -m Benchmarks.Evaluate --rows 50000 --baseline eval.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+from Benchmarks import Standin
+from Constants.config import RERANK_CONFIG, SERVICE_CONFIG
+
+SCHEMA_POSTGRES = """
+CREATE TABLE IF NOT EXISTS internships (
+    internship_id SERIAL PRIMARY KEY,
+    internship_title VARCHAR(255),
+    company VARCHAR(255),
+    domain VARCHAR(100),
+    required_skills TEXT,
+    stipend NUMERIC,
+    is_active BOOLEAN DEFAULT TRUE,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+# metric name suffix -> direction that counts as a regression
+_LOWER_IS_WORSE = ("qps",)
+_HIGHER_IS_WORSE = ("_ms", "build_seconds")
+
+
+def benchmark_parser(doc: str, rows: int = 20000, k=10) -> argparse.ArgumentParser:
+    """Argument parser with the options every benchmark takes: ``--rows``, ``--k`` and ``--seed``.
+
+    A list ``k`` makes ``--k`` take several values.
+    """
+    parser = argparse.ArgumentParser(description=doc, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=rows)
+    parser.add_argument("--k", type=int, default=k, nargs="+" if isinstance(k, list) else None)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def prepare(args, workdir: Optional[str] = None) -> Path:
+    """Switch to a scratch workspace and build the index over ``args.rows`` stand-in internships."""
+    workdir = Standin.use_workspace(workdir)
+    Standin.prepare_index(args.rows, seed=args.seed)
+    return workdir
+
+
+def percentiles(samples: Sequence[float], suffix: str = "_ms") -> dict:
+    """p50/p95/p99 of ``samples`` (seconds), in milliseconds."""
+    ms = np.array(samples) * 1000
+    return {f"p{p}{suffix}": round(float(np.percentile(ms, p)), 3) for p in (50, 95, 99)}
+
+
+def timed(fn: Callable, items: Sequence, warmup: int = 0) -> Tuple[List[float], list]:
+    """Seconds and result of ``fn(item)`` for each item, after ``fn`` ran on the first ``warmup`` items."""
+    for item in items[:warmup]:
+        fn(item)
+    samples, results = [], []
+    for item in items:
+        t0 = time.perf_counter()
+        results.append(fn(item))
+        samples.append(time.perf_counter() - t0)
+    return samples, results
+
+
+def latency(fn: Callable, items: Sequence, warmup: int = 0) -> dict:
+    """Sequential QPS and latency percentiles of ``fn`` over ``items``."""
+    samples, _ = timed(fn, items, warmup)
+    return {"requests": len(items), "qps": round(len(items) / sum(samples), 1), **percentiles(samples)}
+
+
+def report(args, workdir: Path, **sections) -> dict:
+    """A benchmark report: its options, where it ran, and its ``sections``."""
+    return {"config": vars(args), "workdir": str(workdir), **sections}
+
+
+def progress(key, part: dict) -> None:
+    """One finished part of a long run, as a single JSON line."""
+    print(json.dumps({key: part}), flush=True)
+
+
+def emit(report: dict, output: Optional[Path] = None) -> None:
+    text = json.dumps(report, indent=2)
+    if output is not None:
+        output.write_text(text + "\n")
+    print(text)
+
+
+def _load_postgres(rows) -> None:
+    """Replace the configured database's internships with ``rows``."""
+    from DB.Postgres import get_pool
+
+    with get_pool().connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(SCHEMA_POSTGRES)
+            cur.execute("TRUNCATE internships")
+            cur.executemany(
+                "INSERT INTO internships (internship_id, internship_title, company, domain, "
+                "required_skills, stipend, is_active) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                rows,
+            )
+        finally:
+            cur.close()
+        conn.commit()
+
+
+def _tie_aware_recall(found, exact, k) -> float:
+    """Share of ``found`` positions (one array per query) scoring at least the k-th best ``exact`` score."""
+    hits = 0
+    for row, positions in enumerate(found):
+        kth = np.partition(exact[row], -k)[-k] if exact.shape[1] > k else exact[row].min()
+        hits += int(np.sum(exact[row, positions] >= kth - 1e-5))
+    return round(hits / (len(found) * k), 4)
+
+
+def _compare(report: dict, baseline: dict, tolerance: float, recall_tolerance: float, path=()) -> list:
+    """Metrics of ``report`` that got worse than ``baseline`` by more than the tolerance."""
+    regressions = []
+    for key, base in baseline.items():
+        value = report.get(key)
+        if isinstance(base, dict) and isinstance(value, dict):
+            regressions += _compare(value, base, tolerance, recall_tolerance, path + (key,))
+            continue
+        if not isinstance(base, (int, float)) or not isinstance(value, (int, float)) or isinstance(base, bool):
+            continue
+        name = ".".join(path + (key,))
+        if key.endswith("recall_at_k"):
+            worse = value < base - recall_tolerance
+        elif key.endswith(_LOWER_IS_WORSE):
+            worse = value < base * (1 - tolerance)
+        elif key.endswith(_HIGHER_IS_WORSE):
+            worse = value > base * (1 + tolerance)
+        else:
+            continue
+        if worse:
+            regressions.append({"metric": name, "baseline": base, "current": value})
+    return regressions
+
+
+def main():
+    parser = benchmark_parser(__doc__)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--postgres", action="store_true", help="load into the configured database (empties internships)")
+    parser.add_argument("--workdir", help="artifact directory (default: a fresh temporary one)")
+    parser.add_argument("--output", help="also write the JSON report here")
+    parser.add_argument("--baseline", help="earlier report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative latency/QPS change")
+    parser.add_argument("--recall-tolerance", type=float, default=0.01, help="allowed absolute recall drop")
+    args = parser.parse_args()
+    output = Path(args.output).resolve() if args.output else None
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+
+    SERVICE_CONFIG["enable_caching"] = False  # every request does the full work
+    workdir = Standin.use_workspace(args.workdir)
+    rows = Standin.synthetic_internships(args.rows, args.seed)
+    if args.postgres:
+        _load_postgres(rows)
+    else:
+        Standin.install(Standin.create_database(Standin.DATABASE_FILE, rows))
+
+    from fastapi.testclient import TestClient
+
+    import main as app_main
+    from DB.VectorDB import Artifacts, Search
+    from DB.VectorDB.BuildIndex import build_index, encode_texts, row_text
+    from DB.VectorDB.Reranker import rerank
+    from Schemas.StudentDetails import StudentDetails
+    from Services import RecommendationService as service
+
+    started = time.perf_counter()
+    build_index()
+    build_seconds = time.perf_counter() - started
+    Search.preload_artifacts()
+    artifacts = Search._load_artifacts()
+    files = artifacts.manifest["files"]
+
+    payloads = Standin.synthetic_students(args.queries, args.seed + 1)
+    students = [StudentDetails(student_id=f"S{i}", **p) for i, p in enumerate(payloads)]
+    texts = [service._build_query_text(s) for s in students]
+    rerank_queries = [service._rerank_query(s) for s in students]
+    rows_idx = list(range(len(students)))
+
+    def search(i):
+        rq = [rerank_queries[i]] if RERANK_CONFIG["enabled"] else None
+        return Search.search_hits([texts[i]], k=args.k, rerank_queries=rq)
+
+    latencies = {
+        "search": latency(search, rows_idx, args.warmup),
+        "service": latency(lambda i: service.recommend_for_student(students[i], top_k=args.k), rows_idx, args.warmup),
+    }
+    with TestClient(app_main.app) as client:
+        def http(i):
+            resp = client.post("/recommendations/", params={"top_k": args.k}, json=payloads[i])
+            resp.raise_for_status()
+
+        latencies["http"] = latency(http, rows_idx, args.warmup)
+
+    # brute force over the indexed corpus, encoded exactly as the build did
+    corpus = [(r[0], row_text(r)) for r in rows if r[6] and row_text(r)]
+    assert [iid for iid, _ in corpus] == artifacts.ids.tolist(), "index rows differ from the generated corpus"
+    doc_mat = encode_texts(artifacts.vectorizer, [text for _, text in corpus])
+    exact = (encode_texts(artifacts.vectorizer, texts) @ doc_mat.T).toarray()
+    position_of = {iid: pos for pos, iid in enumerate(artifacts.ids.tolist())}
+
+    _, found = Search._search(artifacts, texts, args.k)
+    recall = {"index_recall_at_k": _tie_aware_recall([f[f >= 0] for f in found], exact, args.k)}
+    truth = exact
+    if RERANK_CONFIG["enabled"]:
+        # the re-ranker's blended score for every internship, in position order
+        everything = np.arange(len(corpus))
+        truth = np.empty_like(exact, dtype=np.float64)
+        for i in rows_idx:
+            positions, scores = rerank(artifacts.metadata, everything, exact[i], rerank_queries[i], len(corpus))
+            truth[i, positions] = scores
+    served = [
+        np.array([position_of[int(r.internship_id)] for r in service.recommend_for_student(s, top_k=args.k).recommendatons])
+        for s in students
+    ]
+    recall["service_recall_at_k"] = _tie_aware_recall(served, truth, args.k)
+
+    manifest = artifacts.manifest
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "faiss": faiss.__version__,
+            "app_version": app_main.app.version,
+        },
+        "search": {
+            "backend": manifest["backend"],
+            "embedding": manifest.get("embedding"),
+            "index_type": manifest.get("index_type"),
+            "shards": manifest.get("shards", 1),
+            "rerank": RERANK_CONFIG["enabled"],
+            "rerank_candidates": RERANK_CONFIG["candidates"],
+            "database": "postgres" if args.postgres else "sqlite-standin",
+        },
+        "build": {
+            "build_seconds": round(build_seconds, 3),
+            "items": manifest["items"],
+            "index_bytes": sum(
+                f["bytes"] for name, f in files.items()
+                if name.startswith((Artifacts.INDEX_FILE, Artifacts.SHARDS_DIR, Artifacts.SPARSE_INDEX_DIR))
+            ),
+            "metadata_bytes": sum(f["bytes"] for name, f in files.items() if name.startswith(Artifacts.METADATA_DIR)),
+            "total_bytes": sum(f["bytes"] for f in files.values()),
+        },
+        "latency": latencies,
+        "recall": recall,
+        "workdir": str(workdir),
+    }
+    if baseline is not None:
+        report["regressions"] = _compare(report, baseline, args.tolerance, args.recall_tolerance)
+
+    emit(report, output)
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Pre-filtered search vs over-fetching and filtering the results.
+
+Builds an index over the SQLite stand-in and runs the same queries under
+filters of decreasing selectivity (none, broad stipend floor, one domain,
+domain + high stipend, one exact stipend in one domain). For each it
+reports the share of internships selected, latency percentiles of
+``search_hits(filters=...)``, and the same for the old approach: an
+unfiltered search for ``k * oversample`` hits filtered in Python, with how
+often that came back with fewer than ``k`` results. Filtered hits are
+checked against the filter.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.FilteredSearchBenchmark --rows 50000 --index-type flat
+    python -m Benchmarks.FilteredSearchBenchmark --rows 50000 --backend sparse
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from Benchmarks import Standin
+from Constants.config import SEARCH_CONFIG
+from DB.VectorDB.MetadataStore import count_positions
+
+FILTERS = {
+    "none": None,
+    "broad: stipend >= 5000": ((), 5000, None),
+    "one domain": (("Data Science",), None, None),
+    "selective: domain + stipend >= 45000": (("Finance",), 45000, None),
+    "very selective: domain + stipend == 50000": (("Design",), 50000, 50000),
+}
+
+
+def _percentiles(samples):
+    arr = np.array(samples) * 1000
+    return {f"p{p}_ms": round(float(np.percentile(arr, p)), 3) for p in (50, 95, 99)}
+
+
+def _matches(meta, spec) -> bool:
+    domains, low, high = spec
+    return (
+        (not domains or meta.domain in domains)
+        and (low is None or meta.stipend >= low)
+        and (high is None or meta.stipend <= high)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--backend", choices=("dense", "sparse"), default="dense")
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--oversample", type=int, default=10, help="over-fetch factor of the post-filter baseline")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    SEARCH_CONFIG["backend"] = args.backend
+    SEARCH_CONFIG["index_type"] = args.index_type
+    from DB.VectorDB import Search
+
+    workdir = Standin.use_workspace()
+    Standin.prepare_index(args.rows, seed=args.seed)
+    Search.preload_artifacts()
+    artifacts = Search._load_artifacts()
+    meta = artifacts.metadata
+    live = count_positions(artifacts.live)
+    queries = Standin.synthetic_queries(args.queries, args.seed + 1)
+
+    results = {}
+    for name, spec in FILTERS.items():
+        filters = Search.SearchFilter.create(*spec) if spec else None
+        for q in queries[:20]:
+            Search.search_hits([q], k=args.k, filters=filters)
+
+        samples, violations, short = [], 0, 0
+        for q in queries:
+            started = time.perf_counter()
+            hits = Search.search_hits([q], k=args.k, filters=filters)[0]
+            samples.append(time.perf_counter() - started)
+            if spec:
+                violations += sum(not _matches(meta.get(h.position), spec) for h in hits)
+        selected = count_positions(Search._select(artifacts, filters)) if filters else live
+        expected = min(args.k, selected)
+        entry = {"selected_pct": round(100 * selected / live, 2), "filtered": _percentiles(samples)}
+
+        if spec:
+            post, short = [], 0
+            for q in queries:
+                started = time.perf_counter()
+                hits = Search.search_hits([q], k=args.k * args.oversample)[0]
+                kept = [h for h in hits if _matches(meta.get(h.position), spec)][: args.k]
+                post.append(time.perf_counter() - started)
+                short += len(kept) < expected
+            entry["post_filter"] = {**_percentiles(post), "queries_short_of_k": short}
+            entry["filter_violations"] = violations
+        results[name] = entry
+
+    report = {"config": vars(args), "workdir": str(workdir), "live": live, "filters": results}
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
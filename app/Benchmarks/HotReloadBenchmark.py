@@ -0,0 +1,99 @@
+"""
+Search latency and errors while new artifact generations are swapped in.
+
+Query threads search continuously while the main thread publishes fresh
+generations (full rebuilds) and swaps them in. Reports failed searches,
+latency percentiles for the whole run and for searches overlapping a
+swap, and the load time of each generation.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.HotReloadBenchmark --rows 20000 --swaps 5
+"""
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+
+from Benchmarks import Standin
+
+
+def _percentiles(samples):
+    if not samples:
+        return {}
+    arr = np.array(samples) * 1000
+    return {f"p{p}_ms": round(float(np.percentile(arr, p)), 3) for p in (50, 95, 99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--swaps", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from DB.VectorDB import BuildIndex, Search
+
+    workdir = Standin.use_workspace()
+    Standin.prepare_index(args.rows, seed=args.seed)
+    Search.preload_artifacts()
+    queries = Standin.synthetic_queries(200, args.seed + 1)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    samples, errors, swap_windows = [], [], []
+
+    def worker(offset):
+        i = offset
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                Search.search_hits([queries[i % len(queries)]], k=args.k)
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+            else:
+                with lock:
+                    samples.append((started, time.perf_counter()))
+            i += 1
+
+    threads = [threading.Thread(target=worker, args=(t * 37,)) for t in range(args.threads)]
+    for t in threads:
+        t.start()
+
+    load_seconds = []
+    for _ in range(args.swaps):
+        time.sleep(0.2)
+        swap_started = time.perf_counter()
+        BuildIndex.build_index()  # publishes and swaps in a new generation
+        swap_windows.append((swap_started, time.perf_counter()))
+        load_seconds.append(round(Search.get_artifact_status()["load_seconds"], 4))
+    time.sleep(0.2)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    overlapping = [
+        end - start
+        for start, end in samples
+        if any(start < w_end and end > w_start for w_start, w_end in swap_windows)
+    ]
+    report = {
+        "config": vars(args),
+        "workdir": str(workdir),
+        "searches": len(samples),
+        "errors": len(errors),
+        "error_examples": errors[:3],
+        "latency": _percentiles([end - start for start, end in samples]),
+        "latency_during_swaps": _percentiles(overlapping),
+        "generation_load_seconds": load_seconds,
+        "final_generation": Search.get_artifact_status()["generation"],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Incremental index sync vs full rebuild.
+
+Builds the index from a synthetic internships table, then inserts, edits
+and deactivates a slice of rows (bumping ``updated_at``), times
+``sync_index()`` and a forced full rebuild over the same data, and checks
+that both return the same top-k for a sample of queries.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.IndexSyncBenchmark --rows 100000 --backend dense
+"""
+import argparse
+import json
+import random
+import sqlite3
+import time
+
+from Benchmarks import Standin
+from Constants.config import SEARCH_CONFIG
+
+CHANGED_AT = "2030-01-01 00:00:00"
+
+
+def _apply_changes(db_path: str, n_rows: int, new: int, edits: int, deactivations: int, seed: int) -> None:
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    extra = Standin.synthetic_internships(new, seed + 7)
+    conn.executemany(
+        "INSERT INTO internships (internship_id, internship_title, company, domain, required_skills, "
+        "stipend, is_active, updated_at) VALUES (?, ?, ?, ?, ?, ?, 1, ?)",
+        [(n_rows + i + 1, *row[1:6], CHANGED_AT) for i, row in enumerate(extra)],
+    )
+    touched = rng.sample(range(1, n_rows + 1), edits + deactivations)
+    donors = Standin.synthetic_internships(edits, seed + 11)
+    conn.executemany(
+        "UPDATE internships SET required_skills = ?, domain = ?, is_active = 1, updated_at = ? WHERE internship_id = ?",
+        [(donor[4], donor[3], CHANGED_AT, iid) for donor, iid in zip(donors, touched[:edits])],
+    )
+    conn.executemany(
+        "UPDATE internships SET is_active = 0, updated_at = ? WHERE internship_id = ?",
+        [(CHANGED_AT, iid) for iid in touched[edits:]],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _top_sets(queries, k):
+    from DB.VectorDB.Search import search_hits
+
+    results = []
+    for hits in search_hits(queries, k=k):
+        cutoff = hits[-1].score + 1e-5 if hits else 0.0
+        # Hits tied at the k-th score may legitimately differ between builds.
+        results.append(sorted(h.internship_id for h in hits if h.score > cutoff))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--backend", choices=("dense", "sparse"), default="dense")
+    parser.add_argument("--new", type=int, default=1000)
+    parser.add_argument("--edits", type=int, default=500)
+    parser.add_argument("--deactivations", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    SEARCH_CONFIG["backend"] = args.backend
+    from DB.VectorDB.IndexSync import sync_index
+
+    workdir = Standin.use_workspace()
+    t0 = time.perf_counter()
+    db_path = Standin.prepare_index(args.rows, seed=args.seed)
+    initial_build_s = time.perf_counter() - t0
+
+    _apply_changes(str(db_path), args.rows, args.new, args.edits, args.deactivations, args.seed)
+    queries = Standin.synthetic_queries(args.queries, args.seed + 1)
+
+    incremental = sync_index()
+    after_incremental = _top_sets(queries, args.k)
+    full = sync_index(force_full=True)
+    after_full = _top_sets(queries, args.k)
+
+    report = {
+        "config": vars(args),
+        "workdir": str(workdir),
+        "initial_build_s": round(initial_build_s, 3),
+        "incremental": incremental,
+        "full_rebuild": full,
+        "speedup": round(full["seconds"] / max(incremental["seconds"], 1e-9), 2),
+        "queries_matching_full_rebuild": sum(a == b for a, b in zip(after_incremental, after_full)),
+        "queries": len(queries),
+    }
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
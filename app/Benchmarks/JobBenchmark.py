@@ -0,0 +1,103 @@
+"""
+Throughput of matching jobs for cohorts of 10k and 100k students.
+
+Builds an index over the SQLite stand-in, writes each cohort as CSV and
+runs it through the API in-process: ``POST /jobs/`` (timed as
+``upload_seconds``), then polling ``GET /jobs/{id}`` until the job is done.
+Reports per cohort and chunk size:
+
+- ``students_per_second``: matched and spooled students per second of the
+  job's run (the ``students_per_second`` the API reports)
+- ``spool_mb``: size of ``results.npz``
+- ``download``: seconds and MB/s of ``GET /jobs/{id}/results`` as ``npz``
+  (the spool file) and ``ndjson`` (rendered while streaming)
+- ``batch_endpoint_students_per_second``: the same cohort through
+  ``POST /recommendations/batch`` for comparison, on the first
+  ``--batch-students`` students (the whole cohort in one request body)
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.JobBenchmark --rows 20000 --students 10000 100000
+    python -m Benchmarks.JobBenchmark --students 100000 --chunk-size 500 1000 5000
+"""
+import secrets
+import time
+from pathlib import Path
+
+from Benchmarks import Evaluate, Standin
+from Constants.config import ADMIN_CONFIG, JOBS_CONFIG
+
+
+def _write_cohort(path: Path, n: int, seed: int) -> None:
+    with open(path, "w") as f:
+        f.write("student_id,name,skills,domain\n")
+        for i, student in enumerate(Standin.synthetic_students(n, seed)):
+            f.write(f'S{i},{student["name"]},"{"; ".join(student["skills"])}",{student["domain"]}\n')
+
+
+def main():
+    parser = Evaluate.benchmark_parser(__doc__, k=5)
+    parser.add_argument("--students", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--chunk-size", type=int, nargs="+", default=[JOBS_CONFIG["chunk_size"]])
+    parser.add_argument("--batch-students", type=int, default=10000)
+    args = parser.parse_args()
+
+    JOBS_CONFIG.update(workers=1, poll_interval=0.1)
+    ADMIN_CONFIG["token"] = secrets.token_hex(16)
+    workdir = Evaluate.prepare(args)
+
+    from fastapi.testclient import TestClient
+
+    import main as app_main
+
+    report = Evaluate.report(args, workdir, cohorts={})
+    with TestClient(app_main.app, headers={ADMIN_CONFIG["header"]: ADMIN_CONFIG["token"]}) as client:
+        for n in args.students:
+            cohort = Path(f"cohort-{n}.csv")
+            _write_cohort(cohort, n, args.seed + 1)
+            runs = {}
+            for chunk_size in args.chunk_size:
+                JOBS_CONFIG["chunk_size"] = chunk_size
+                started = time.perf_counter()
+                with open(cohort, "rb") as f:
+                    resp = client.post("/jobs/", content=f, params={"format": "csv", "top_k": args.k})
+                resp.raise_for_status()
+                upload_seconds = time.perf_counter() - started
+                job_id = resp.json()["job_id"]
+                while (job := client.get(f"/jobs/{job_id}").json())["status"] in ("queued", "running"):
+                    time.sleep(0.05)
+                assert job["status"] == "done", job
+
+                spool_mb = Path(JOBS_CONFIG["directory"], job_id, "results.npz").stat().st_size / 2**20
+                download = {}
+                for fmt in ("npz", "ndjson"):
+                    started = time.perf_counter()
+                    body = client.get(f"/jobs/{job_id}/results", params={"format": fmt}).content
+                    seconds = time.perf_counter() - started
+                    download[fmt] = {
+                        "seconds": round(seconds, 2),
+                        "mb": round(len(body) / 2**20, 1),
+                        "mb_per_second": round(len(body) / 2**20 / seconds, 1),
+                    }
+                runs[chunk_size] = {
+                    "upload_seconds": round(upload_seconds, 2),
+                    "run_seconds": round(job["finished_at"] - job["started_at"], 2),
+                    "students_per_second": job["students_per_second"],
+                    "spool_mb": round(spool_mb, 1),
+                    "download": download,
+                }
+                Evaluate.progress(n, {chunk_size: runs[chunk_size]})
+                client.delete(f"/jobs/{job_id}")
+
+            students = [
+                dict(s, student_id=f"S{i}")
+                for i, s in enumerate(Standin.synthetic_students(min(n, args.batch_students), args.seed + 1))
+            ]
+            started = time.perf_counter()
+            client.post("/recommendations/batch", json=students, params={"top_k": args.k}).raise_for_status()
+            batch_rate = len(students) / (time.perf_counter() - started)
+            report["cohorts"][n] = {"chunk_size": runs, "batch_endpoint_students_per_second": round(batch_rate, 1)}
+    Evaluate.emit(report)
+
+
+if __name__ == "__main__":
+    main()
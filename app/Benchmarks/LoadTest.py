@@ -0,0 +1,185 @@
+"""
+Concurrent-client load test for ``POST /recommendations/``.
+
+Starts the API with uvicorn on a local port in a separate process, backed
+by a synthetic index and the SQLite stand-in database, then drives it with
+concurrent async clients while a probe polls ``GET /health``. The server,
+the clients and the probe each run in their own process (and GIL), so the
+probe times the server's event loop rather than contention with the client
+loop. Two execution models are compared:
+
+* ``inline``   - the search runs directly on the event loop (old behaviour)
+* ``executor`` - the search runs on the bounded executor (current behaviour)
+
+The probe latency shows whether the event loop stays responsive; 503s show
+back-pressure kicking in once the queue-depth limit is reached.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.LoadTest --clients 32 --requests 20 --db-latency-ms 5
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from Benchmarks import Standin
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+
+class _InlineExecutor:
+    """Runs work on the calling thread, i.e. directly on the event loop."""
+
+    async def run(self, fn, *args, **kwargs):
+        return fn(*args, **kwargs)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * q))] * 1000, 2)
+
+
+def _health_probe(base_url: str, stop, results) -> None:
+    """Poll ``GET /health`` every 10 ms until ``stop`` is set; send the latencies back."""
+    probe = []
+    with httpx.Client(base_url=base_url, timeout=60) as http:
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            http.get("/health")
+            probe.append(time.perf_counter() - t0)
+            time.sleep(0.01)
+    results.send(probe)
+
+
+async def _drive(base_url: str, clients: int, per_client: int, students) -> dict:
+    latencies, statuses = [], {}
+
+    async def client(cid: int):
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as http:
+            for i in range(per_client):
+                payload = students[(cid * per_client + i) % len(students)]
+                t0 = time.perf_counter()
+                resp = await http.post("/recommendations/", json=payload, params={"top_k": 5})
+                latencies.append(time.perf_counter() - t0)
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+    # Warm-up so lazy artifact loading is not counted against either mode.
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as http:
+        await http.post("/recommendations/", json=students[0])
+
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    receive, send = context.Pipe(duplex=False)
+    prober = context.Process(target=_health_probe, args=(base_url, stop, send), daemon=True)
+    prober.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(clients)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    probe = receive.recv()
+    prober.join()
+
+    return {
+        "requests": len(latencies),
+        "status_codes": statuses,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": _percentile(latencies, 0.50),
+        "p95_ms": _percentile(latencies, 0.95),
+        "p99_ms": _percentile(latencies, 0.99),
+        "health_probe_p99_ms": _percentile(probe, 0.99),
+    }
+
+
+def _serve(args) -> None:
+    """Server side of one mode (``--serve``): the app over the stand-in DB, with the mode's executor."""
+    import uvicorn
+
+    import main
+    import Routes.recommendations as routes
+    from Services import Executor
+
+    if args.serve == "inline":
+        routes.get_executor = lambda: _InlineExecutor()
+    Executor.EXECUTOR_CONFIG["max_workers"] = args.workers
+    Executor.EXECUTOR_CONFIG["max_queue"] = args.max_queue
+    Standin.install(args.db_path, maxconn=args.workers + 2, query_latency=args.db_latency_ms / 1000.0)
+    uvicorn.run(main.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def _run_mode(mode: str, args, students, db_path) -> dict:
+    port = _free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "Benchmarks.LoadTest", "--serve", mode, "--port", str(port),
+            "--db-path", str(db_path), "--workers", str(args.workers), "--max-queue", str(args.max_queue),
+            "--db-latency-ms", str(args.db_latency_ms),
+        ],
+        env=dict(os.environ, PYTHONPATH=str(APP_DIR), ARTIFACT_WATCH_INTERVAL="0"),
+        stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + args.startup_timeout
+        while True:
+            try:
+                if httpx.get(f"{base_url}/ready", timeout=5).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline or server.poll() is not None:
+                raise RuntimeError(f"uvicorn ({mode}) did not start")
+            time.sleep(0.05)
+        return asyncio.run(_drive(base_url, args.clients, args.requests, students))
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--db-latency-ms", type=float, default=5.0)
+    parser.add_argument("--modes", default="inline,executor")
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    # internal: run the server side of one mode in this process
+    parser.add_argument("--serve", choices=["inline", "executor"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--db-path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        _serve(args)
+        return
+
+    workdir = Standin.use_workspace()
+    db_path = Standin.prepare_index(args.rows)
+    students = Standin.synthetic_students(500)
+
+    config = {key: value for key, value in vars(args).items() if key not in ("serve", "port", "db_path")}
+    report = {"config": config, "workdir": str(workdir)}
+    for mode in args.modes.split(","):
+        report[mode] = _run_mode(mode, args, students, db_path)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Requests/sec of the internship lookup query with and without connection pooling.
+
+Runs the same ``internship_id = ANY(%s)`` lookup that the recommendation
+service issues, from a number of concurrent threads, first opening a fresh
+connection per call (the old ``DB/Postgres.py`` behaviour) and then through
+the shared pool. The stand-in database adds ``--connect-latency-ms`` to every
+new connection to model the TCP + auth handshake of a remote Postgres.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.PoolBenchmark --threads 8 --requests 400
+"""
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from Benchmarks import Standin
+from DB import Postgres
+
+LOOKUP_QUERY = """
+    SELECT internship_id, internship_title, company, domain, required_skills, stipend
+    FROM internships
+    WHERE internship_id = ANY(%s)
+"""
+
+
+def _per_call_fetch(connect, ids):
+    conn = connect()
+    cur = conn.cursor()
+    cur.execute(LOOKUP_QUERY, (ids,))
+    rows = cur.fetchall()
+    cur.close()
+    conn.close()
+    return rows
+
+
+def _run(fetch, threads: int, requests: int, n_rows: int, top_k: int) -> dict:
+    per_thread = max(1, requests // threads)
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = []
+        for _ in range(per_thread):
+            ids = rng.sample(range(1, n_rows + 1), top_k)
+            t0 = time.perf_counter()
+            fetch(ids)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 4),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--pool-max", type=int, default=8)
+    parser.add_argument("--connect-latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Standin.create_database(
+            str(Path(tmp) / "internships.sqlite"), Standin.synthetic_internships(args.rows)
+        )
+        latency = args.connect_latency_ms / 1000.0
+        connect = Standin.make_connect(db_path, latency)
+
+        before = _run(lambda ids: _per_call_fetch(connect, ids), args.threads, args.requests, args.rows, args.top_k)
+
+        pool = Standin.install(db_path, minconn=1, maxconn=args.pool_max, connect_latency=latency)
+        after = _run(lambda ids: Postgres.fetch_all(LOOKUP_QUERY, (ids,)), args.threads, args.requests, args.rows, args.top_k)
+        stats = pool.stats()
+        Postgres.close_pool()
+
+    report = {
+        "config": vars(args),
+        "per_call_connect": before,
+        "pooled": after,
+        "speedup": round(after["requests_per_sec"] / before["requests_per_sec"], 2),
+        "pool_stats": stats,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
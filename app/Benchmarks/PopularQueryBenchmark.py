@@ -0,0 +1,111 @@
+"""
+Hit rate and latency of the precomputed popular query table.
+
+Builds an index over the SQLite stand-in, then replays a skewed workload:
+students are drawn from a pool of distinct profiles with Zipf-distributed
+popularity, the way a few common skill sets dominate real traffic. A first
+("yesterday's") sample of that workload is written to the query log and
+the index rebuilt, so the table holds the per-domain seeds plus the
+queries mined from the log. A second sample from the same distribution is
+then served through ``recommend_for_student`` with the table disabled and
+enabled, reporting the hit rate and latency of table hits, misses and the
+search path, plus the table's size and build time.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.PopularQueryBenchmark --rows 50000 --requests 5000
+"""
+import time
+
+import numpy as np
+
+from Benchmarks import Evaluate, Standin
+from Constants.config import POPULAR_CONFIG, SERVICE_CONFIG
+
+
+def _summary(samples) -> dict:
+    if not samples:
+        return {"requests": 0}
+    return {"requests": len(samples), **Evaluate.percentiles(samples)}
+
+
+def main():
+    parser = Evaluate.benchmark_parser(__doc__, rows=50000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--profiles", type=int, default=20000, help="distinct student profiles")
+    parser.add_argument("--zipf", type=float, default=1.2, help="popularity skew of the profiles")
+    args = parser.parse_args()
+
+    SERVICE_CONFIG["enable_caching"] = False  # measure the table, not the result cache
+    POPULAR_CONFIG.update(enabled=True, query_log="queries.jsonl")  # in the workspace
+    workdir = Evaluate.prepare(args)
+
+    from DB.VectorDB import Artifacts, Search
+    from DB.VectorDB.BuildIndex import build_index, write_popular_table
+    from Schemas.StudentDetails import StudentDetails
+    from Services.RecommendationService import recommend_for_student
+
+    profiles = [StudentDetails(student_id=f"S{i}", **p) for i, p in enumerate(Standin.synthetic_students(args.profiles, args.seed + 1))]
+    rng = np.random.default_rng(args.seed)
+
+    def workload():
+        return [profiles[i] for i in (rng.zipf(args.zipf, size=args.requests) - 1) % len(profiles)]
+
+    history, replay = workload(), workload()
+    for student in history:  # fills the query log
+        recommend_for_student(student, top_k=args.k)
+
+    started = time.perf_counter()
+    build_index()
+    build_seconds = time.perf_counter() - started
+    POPULAR_CONFIG["query_log"] = ""  # the replay is measured without logging
+    Search.preload_artifacts()
+    artifacts = Search._load_artifacts()
+    bundle = Artifacts.generation_dir(artifacts.generation)
+    table_bytes = sum(p.stat().st_size for p in (bundle / Artifacts.POPULAR_DIR).iterdir())
+    staging = Artifacts.stage(artifacts.generation)
+    started = time.perf_counter()
+    write_popular_table(staging, artifacts.index, artifacts.manifest)  # the same table again, timed alone
+    table_seconds = time.perf_counter() - started
+    Artifacts.discard(staging)
+
+    def recommend(student):
+        return recommend_for_student(student, top_k=args.k)
+
+    POPULAR_CONFIG["enabled"] = False
+    off, _ = Evaluate.timed(recommend, replay, warmup=50)
+
+    POPULAR_CONFIG["enabled"] = True
+    table = Search.get_popular_table()
+
+    def recommend_counted(student):
+        before = table.stats()["hits"]
+        recommend(student)
+        return table.stats()["hits"] > before
+
+    on, was_hit = Evaluate.timed(recommend_counted, replay)
+    hits = [elapsed for elapsed, hit in zip(on, was_hit) if hit]
+    misses = [elapsed for elapsed, hit in zip(on, was_hit) if not hit]
+
+    distinct = len({(s.domain, tuple(sorted(s.skills))) for s in replay})
+    report = Evaluate.report(
+        args,
+        workdir,
+        table={
+            **{key: value for key, value in table.stats().items() if key in ("entries", "k")},
+            "bytes": table_bytes,
+            "build_seconds": round(table_seconds, 3),
+            "index_build_seconds": round(build_seconds, 3),
+        },
+        replay={"requests": len(replay), "distinct_queries": distinct, "hit_rate": round(len(hits) / len(replay), 4)},
+        latency={
+            "table_disabled": _summary(off),
+            "table_enabled": _summary(on),
+            "table_hits": _summary(hits),
+            "table_misses": _summary(misses),
+        },
+    )
+    Evaluate.emit(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Query encoding: sklearn path vs ``QueryEncoder``.
+
+The sklearn path is what search used to do per request:
+``normalize(vectorizer.transform(texts)).astype("float32")`` followed by
+``.toarray()`` + ``faiss.normalize_L2`` (dense), or ``svd.transform`` +
+``faiss.normalize_L2`` (SVD). Reports microseconds per single-query call for
+each output form, and checks parity over every corpus document: same
+non-zero terms and values within float32 rounding.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.QueryEncoderBenchmark --docs 20000 --queries 2000
+"""
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from Benchmarks import Standin
+from RecommenderModel.CompactTfidf import CompactTfidfVectorizer
+from RecommenderModel.QueryEncoder import QueryEncoder
+
+TOLERANCE = 1e-6
+
+
+def _per_call_us(fn, queries) -> float:
+    for q in queries[:50]:
+        fn([q])
+    started = time.perf_counter()
+    for q in queries:
+        fn([q])
+    return round((time.perf_counter() - started) / len(queries) * 1e6, 1)
+
+
+def _parity(vectorizer, encoder, svd, corpus, batch: int, dense_sample: int) -> dict:
+    worst_sparse = worst_svd = worst_dense = 0.0
+    structure_mismatches = 0
+    for start in range(0, len(corpus), batch):
+        texts = corpus[start:start + batch]
+        expected = normalize(vectorizer.transform(texts)).astype("float32")
+        actual = encoder.encode_csr(texts)
+        if not (np.array_equal(expected.indptr, actual.indptr) and np.array_equal(expected.indices, actual.indices)):
+            structure_mismatches += 1
+            continue
+        worst_sparse = max(worst_sparse, float(np.abs(expected.data - actual.data).max(initial=0.0)))
+
+        expected_svd = svd.transform(expected).astype("float32")
+        faiss.normalize_L2(expected_svd)
+        worst_svd = max(worst_svd, float(np.abs(expected_svd - encoder.project(texts, svd.components_)).max()))
+
+    # one document per call, so every call reuses the previous call's buffer
+    for text in corpus[:dense_sample]:
+        expected = normalize(vectorizer.transform([text])).astype("float32").toarray()
+        faiss.normalize_L2(expected)
+        worst_dense = max(worst_dense, float(np.abs(expected - encoder.encode_dense([text])).max()))
+    return {
+        "documents": len(corpus),
+        "batches_with_different_terms": structure_mismatches,
+        "max_abs_diff_tfidf": worst_sparse,
+        "max_abs_diff_svd": worst_svd,
+        "max_abs_diff_dense_single_calls": worst_dense,
+        "within_tolerance": structure_mismatches == 0 and max(worst_sparse, worst_svd, worst_dense) <= TOLERANCE,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--svd-components", type=int, default=128)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = Standin.synthetic_texts(args.docs, seed=args.seed)
+    vectorizer = TfidfVectorizer(stop_words="english").fit(corpus)
+    encoder = QueryEncoder(CompactTfidfVectorizer.from_sklearn(vectorizer))
+    tfidf = normalize(vectorizer.transform(corpus)).astype("float32")
+    svd = TruncatedSVD(n_components=args.svd_components, random_state=args.seed).fit(tfidf)
+    queries = Standin.synthetic_queries(args.queries, args.seed + 1)
+
+    def sklearn_csr(texts):
+        return normalize(vectorizer.transform(texts)).astype("float32")
+
+    def sklearn_dense(texts):
+        vec = sklearn_csr(texts).toarray()
+        faiss.normalize_L2(vec)
+        return vec
+
+    def sklearn_svd(texts):
+        vec = svd.transform(sklearn_csr(texts)).astype("float32")
+        faiss.normalize_L2(vec)
+        return vec
+
+    report = {
+        "config": vars(args),
+        "vocabulary_size": encoder.dim,
+        "us_per_query": {
+            "sparse": {"sklearn": _per_call_us(sklearn_csr, queries), "encoder": _per_call_us(encoder.encode_csr, queries)},
+            "dense": {"sklearn": _per_call_us(sklearn_dense, queries), "encoder": _per_call_us(encoder.encode_dense, queries)},
+            "svd": {
+                "sklearn": _per_call_us(sklearn_svd, queries),
+                "encoder": _per_call_us(lambda t: encoder.project(t, svd.components_), queries),
+            },
+        },
+        "parity": _parity(vectorizer, encoder, svd, corpus, batch=1000, dense_sample=2000),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Cost and effect of the second-stage re-ranker.
+
+Builds an index over the SQLite stand-in and queries it the way the
+service does, first plain (index returns ``k``), then with re-ranking over
+each candidate count. For every setting it reports per-request latency
+percentiles and the added p50 over the plain search, split into the extra
+candidates fetched from the index and the re-rank stage itself (timed
+alone on pre-fetched candidates). Also reports the mean required-skill
+coverage and domain match rate of the returned top ``k``.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.RerankBenchmark --rows 50000 --candidates 200 2000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from Benchmarks import Standin
+from Constants.config import RERANK_CONFIG
+from DB.VectorDB.MetadataStore import domain_key
+from DB.VectorDB.Reranker import RerankQuery, rerank
+from Utils.SkillNormalizer import canonical_skills
+
+
+def _timed(fn, items):
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - started)
+    return np.array(samples) * 1000
+
+
+def _summary(ms: np.ndarray) -> dict:
+    return {f"p{p}_ms": round(float(np.percentile(ms, p)), 3) for p in (50, 95, 99)}
+
+
+def _quality(metadata, hit_lists, queries) -> dict:
+    coverage, domain = [], []
+    for hits, query in zip(hit_lists, queries):
+        positions = np.array([h.position for h in hits], dtype=np.int64)
+        coverage.extend(metadata.skill_coverage(positions, metadata.skill_mask(query.skills)))
+        domain.extend(metadata.domain_matches(positions, query.domain))
+    return {"mean_skill_coverage": round(float(np.mean(coverage)), 4), "domain_match_rate": round(float(np.mean(domain)), 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--candidates", type=int, nargs="+", default=[200, 2000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from DB.VectorDB import Search
+
+    workdir = Standin.use_workspace()
+    Standin.prepare_index(args.rows, seed=args.seed)
+    Search.preload_artifacts()
+    artifacts = Search._load_artifacts()
+
+    # built the way RecommendationService builds them
+    texts, queries = [], []
+    for student in Standin.synthetic_students(args.queries, args.seed + 1):
+        skills = canonical_skills(student["skills"])
+        texts.append(" ".join([student["domain"], *skills]))
+        queries.append(RerankQuery(domain_key(student["domain"]), tuple(skills)))
+    rows = list(range(len(texts)))
+
+    def plain(i):
+        return Search.search_hits([texts[i]], k=args.k)
+
+    _timed(plain, rows[:30])
+    plain_ms = _timed(plain, rows)
+    report = {
+        "config": vars(args),
+        "workdir": str(workdir),
+        "weights": {key: RERANK_CONFIG[key] for key in ("weight_cosine", "weight_skills", "weight_domain")},
+        "plain": {**_summary(plain_ms), **_quality(artifacts.metadata, [plain(i)[0] for i in rows], queries)},
+    }
+
+    for candidates in args.candidates:
+        RERANK_CONFIG["candidates"] = candidates
+
+        def reranked(i):
+            return Search.search_hits([texts[i]], k=args.k, rerank_queries=[queries[i]])
+
+        def fetch_only(i):
+            return Search._search(artifacts, [texts[i]], candidates)
+
+        fetched = [fetch_only(i) for i in rows]
+
+        def rerank_only(i):
+            scores, positions = fetched[i]
+            return rerank(artifacts.metadata, positions[0], scores[0], queries[i], args.k)
+
+        _timed(reranked, rows[:30])
+        total_ms = _timed(reranked, rows)
+        fetch_ms = _timed(fetch_only, rows)
+        stage_ms = _timed(rerank_only, rows)
+        report[f"rerank_{candidates}"] = {
+            **_summary(total_ms),
+            "added_p50_ms": round(float(np.median(total_ms) - np.median(plain_ms)), 3),
+            "candidate_fetch_p50_ms": round(float(np.median(fetch_ms)), 3),
+            "rerank_stage_p50_ms": round(float(np.median(stage_ms)), 3),
+            "rerank_stage_p99_ms": round(float(np.percentile(stage_ms, 99)), 3),
+            **_quality(artifacts.metadata, [reranked(i)[0] for i in rows], queries),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Cost of building and serializing recommendation responses.
+
+Compares the model-per-row path (a ``RecommendationResponse`` per hit, a
+``StudentRecommendation`` around them, then serialization) with the
+preformatted path (internship fields read as stored JSON fragments and
+concatenated around the scores). Two measurements per ``k``:
+
+- ``response``: search hits are computed once up front; timed is only
+  resolving details and producing the JSON body, i.e. the work the fast
+  path replaces (``model_dump_json`` stands in for FastAPI's serializer)
+- ``http``: requests/sec of ``POST /recommendations/`` in-process with
+  ``RESPONSE_PREFORMATTED`` off and on. The recommendation cache is on and
+  the students come from a small pool, so most requests skip the search and
+  the response work is a large share of each request
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.ResponseBenchmark --rows 20000 --k 5 20
+"""
+import json
+import time
+
+from Benchmarks import Evaluate, Standin
+from Constants.config import RESPONSE_CONFIG, SERVICE_CONFIG
+
+
+def _per_second(fn, items, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            fn(item)
+    return repeat * len(items) / (time.perf_counter() - started)
+
+
+def main():
+    parser = Evaluate.benchmark_parser(__doc__, k=[5, 20])
+    parser.add_argument("--students", type=int, default=200, help="distinct student profiles")
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the students for the response timing")
+    parser.add_argument("--requests", type=int, default=2000, help="HTTP requests per mode")
+    args = parser.parse_args()
+
+    SERVICE_CONFIG["enable_caching"] = True
+    workdir = Evaluate.prepare(args)
+
+    from fastapi.testclient import TestClient
+
+    import main as app_main
+    from Schemas.StudentDetails import StudentDetails
+    from Services import RecommendationService as service
+    from Utils import Json
+
+    profiles = list(Standin.synthetic_students(args.students, args.seed + 1))
+    students = [StudentDetails(student_id=f"S{i}", **p) for i, p in enumerate(profiles)]
+    report = Evaluate.report(args, workdir, encoder="orjson" if Json.orjson else "json", k={})
+
+    with TestClient(app_main.app) as client:
+        for k in args.k:
+            hits = {s.student_id: service._cached_search_hits([s], k)[0] for s in students}
+
+            def per_row(student):
+                details = service._resolve_details(hits[student.student_id])
+                return service._build_recommendation(student, hits[student.student_id], details).model_dump_json()
+
+            def preformatted(student):
+                fragments = service._resolve_fragments(hits[student.student_id])
+                return service._render_recommendation(student, hits[student.student_id], fragments)
+
+            assert all(json.loads(per_row(s)) == json.loads(preformatted(s)) for s in students)
+            response = {}
+            for name, fn in (("per_row", per_row), ("preformatted", preformatted)):
+                fn(students[0])
+                rate = _per_second(fn, students, args.repeat)
+                response[name] = {"per_second": round(rate), "us_per_response": round(1e6 / rate, 1)}
+            response["speedup"] = round(response["preformatted"]["per_second"] / response["per_row"]["per_second"], 2)
+
+            http = {}
+            for name, preformatted_on in (("per_row", False), ("preformatted", True)):
+                RESPONSE_CONFIG["preformatted"] = preformatted_on
+                bodies = [{"name": p["name"], "skills": p["skills"], "domain": p["domain"]} for p in profiles]
+                started = time.perf_counter()
+                for i in range(args.requests):
+                    resp = client.post("/recommendations/", json=bodies[i % len(bodies)], params={"top_k": k})
+                    resp.raise_for_status()
+                http[name] = {"requests_per_second": round(args.requests / (time.perf_counter() - started), 1)}
+            http["speedup"] = round(http["preformatted"]["requests_per_second"] / http["per_row"]["requests_per_second"], 2)
+            report["k"][k] = {"response": response, "http": http}
+    Evaluate.emit(report)
+
+
+if __name__ == "__main__":
+    main()
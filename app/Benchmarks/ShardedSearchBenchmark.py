@@ -0,0 +1,89 @@
+"""
+Search latency and throughput as the dense index is split into 1-8 shards.
+
+Builds the index over the SQLite stand-in once per shard count (1 is the
+unsharded index), served with one worker process per shard
+(``SEARCH_SHARD_WORKERS=0``). For each it reports sequential single-query
+latency (p50/p95/p99) and the QPS of ``--clients`` concurrent threads,
+both through ``search_hits`` without re-ranking, so the numbers are the
+index search plus the fan-out and merge. Results are checked against the
+unsharded index: the score lists must be identical (see ``ShardedIndex``
+on ties).
+
+Shards only add throughput up to the number of cores: on a machine with
+fewer cores than shards the workers take turns and the fan-out is pure
+overhead. The report includes ``os.cpu_count()`` for that reason.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.ShardedSearchBenchmark --rows 200000 --shards 1 2 4 8
+    SEARCH_EMBEDDING=svd python -m Benchmarks.ShardedSearchBenchmark --rows 500000
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Benchmarks import Evaluate, Standin
+from Constants.config import SEARCH_CONFIG
+
+
+def main():
+    parser = Evaluate.benchmark_parser(__doc__, rows=200000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--shard-by", choices=["hash", "domain"], default="hash")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--clients", type=int, default=8, help="concurrent threads for the QPS run")
+    args = parser.parse_args()
+
+    SEARCH_CONFIG.update(shards=1, shard_by=args.shard_by, shard_workers=0)
+    workdir = Evaluate.prepare(args)
+
+    from DB.VectorDB import Search
+    from DB.VectorDB.BuildIndex import build_index
+    from DB.VectorDB.ShardedIndex import ShardedIndex
+
+    texts = Standin.synthetic_queries(args.queries, args.seed + 1)
+    report = Evaluate.report(
+        args,
+        workdir,
+        cpu_count=os.cpu_count(),
+        index={key: SEARCH_CONFIG[key] for key in ("embedding", "index_type")},
+        shards={},
+    )
+    reference = None
+    for shards in args.shards:
+        SEARCH_CONFIG["shards"] = shards
+        started = time.perf_counter()
+        build_index()
+        build_seconds = time.perf_counter() - started
+        Search.preload_artifacts()
+        artifacts = Search._load_artifacts()
+
+        def search(text):
+            return Search.search_hits([text], k=args.k)[0]
+
+        latency, results = Evaluate.timed(search, texts, warmup=20)
+        with ThreadPoolExecutor(args.clients) as clients:
+            started = time.perf_counter()
+            list(clients.map(search, texts))
+            qps = len(texts) / (time.perf_counter() - started)
+
+        scores = [[hit.score for hit in hits] for hits in results]
+        if reference is None:
+            reference = scores
+        index = artifacts.index
+        report["shards"][shards] = {
+            "build_seconds": round(build_seconds, 2),
+            "shard_sizes": artifacts.manifest.get("shard_sizes", [artifacts.manifest["items"]]),
+            "workers": index.workers if isinstance(index, ShardedIndex) else 0,
+            "latency": Evaluate.percentiles(latency),
+            "qps": round(qps, 1),
+            "same_scores_as_unsharded": scores == reference,
+        }
+        Evaluate.progress(shards, report["shards"][shards])
+        if isinstance(index, ShardedIndex):
+            index.close()
+    Evaluate.emit(report)
+
+
+if __name__ == "__main__":
+    main()
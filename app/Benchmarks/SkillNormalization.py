@@ -0,0 +1,118 @@
+"""
+Skill canonicalization: throughput, vocabulary reduction and query consistency.
+
+Rewrites the skills of a synthetic corpus into the spellings seen in real
+listings (case changes, hyphens, aliases from the skill table such as "ML"
+or "k8s"), then reports:
+
+- canonicalization throughput in skills/second, memoized (the service
+  path) and with every skill normalized and looked up afresh, next to a
+  plain ``split(",")`` baseline;
+- TF-IDF vocabulary size (the dense index dimension) fitted on the raw and
+  on the canonicalized texts, plus the distinct skill spellings of each;
+- for student profiles asked in several spellings, how many distinct query
+  texts (and so cache keys and search results) each profile produces.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.SkillNormalization --docs 50000 --profiles 2000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from Benchmarks import Standin
+from Constants.config import SKILL_CONFIG
+from Utils.SkillNormalizer import SkillCanonicalizer, load_alias_table
+
+
+def _spellings(aliases: dict) -> dict:
+    """Every way the benchmark may write a canonical skill."""
+    variants = {}
+    for skill in {s for pool in Standin.DOMAINS.values() for s in pool}:
+        forms = {skill, skill.title(), skill.upper(), skill.replace(" ", "-"), skill.replace(" ", "_").title()}
+        forms.update(aliases.get(skill, []))
+        forms.update(a.upper() for a in aliases.get(skill, []))
+        variants[skill] = sorted(forms)
+    return variants
+
+
+def _noisy(skills: list, variants: dict, rng: random.Random, rate: float) -> list:
+    return [rng.choice(variants[s]) if rng.random() < rate else s for s in skills]
+
+
+def _throughput(fn, skill_fields, repeats: int = 1) -> float:
+    count = sum(len(f.split(",")) for f in skill_fields) * repeats
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for field in skill_fields:
+            fn(field)
+    return round(count / (time.perf_counter() - started))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--profiles", type=int, default=2000)
+    parser.add_argument("--spellings-per-profile", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.5, help="share of skills written in a variant spelling")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    aliases = load_alias_table(SKILL_CONFIG["aliases_path"])
+    variants = _spellings(aliases)
+
+    rows = []
+    for _, title, company, domain, skills, _, _ in Standin.synthetic_internships(args.docs, args.seed):
+        noisy = ", ".join(_noisy([s.strip() for s in skills.split(",")], variants, rng, args.noise))
+        rows.append((title, company, domain, noisy))
+    fields = [r[3] for r in rows]
+
+    compile_started = time.perf_counter()
+    canonicalizer = SkillCanonicalizer(aliases)
+    compile_ms = (time.perf_counter() - compile_started) * 1000
+    memoized = _throughput(canonicalizer.canonicalize_all, fields, repeats=3)
+    unmemoized = _throughput(
+        lambda f: [canonicalizer.table.get(k, k) for k in map(canonicalizer.normalize, f.split(","))], fields
+    )
+    baseline = _throughput(lambda f: [s.strip() for s in f.split(",") if s.strip()], fields, repeats=3)
+
+    raw_texts = [" ".join((t, c, d, s)) for t, c, d, s in rows]
+    canonical_texts = [" ".join((t, c, d, canonicalizer.skill_text(s))) for t, c, d, s in rows]
+    raw_vocab = len(TfidfVectorizer(stop_words="english").fit(raw_texts).vocabulary_)
+    canonical_vocab = len(TfidfVectorizer(stop_words="english").fit(canonical_texts).vocabulary_)
+    raw_skills = {s.strip().lower() for f in fields for s in f.split(",")}
+    canonical_skills = {s for f in fields for s in canonicalizer.canonicalize_all(f)}
+
+    raw_keys, canonical_keys = [], []
+    for student in Standin.synthetic_students(args.profiles, args.seed + 1):
+        asked = [_noisy(student["skills"], variants, rng, 1.0) for _ in range(args.spellings_per_profile)]
+        # the service's cache key form: lowercased, whitespace-collapsed query text
+        raw_keys.append(len({" ".join([student["domain"], *s]).lower() for s in asked}))
+        canonical_keys.append(len({" ".join([student["domain"], *canonicalizer.canonicalize_all(s)]).lower() for s in asked}))
+
+    report = {
+        "config": vars(args),
+        "alias_table": {"canonical_skills": len(aliases), "lookup_entries": len(canonicalizer.table), "compile_ms": round(compile_ms, 2)},
+        "skills_per_second": {"split_only": baseline, "canonicalize_memoized": memoized, "normalize_and_lookup": unmemoized},
+        "distinct_skills": {"raw_lowercased": len(raw_skills), "canonical": len(canonical_skills)},
+        "tfidf_vocabulary": {
+            "raw": raw_vocab,
+            "canonical": canonical_vocab,
+            "reduction_pct": round(100 * (raw_vocab - canonical_vocab) / raw_vocab, 1),
+        },
+        "query_texts_per_profile": {
+            "spellings_asked": args.spellings_per_profile,
+            "raw_mean": round(statistics.mean(raw_keys), 2),
+            "canonical_mean": round(statistics.mean(canonical_keys), 2),
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
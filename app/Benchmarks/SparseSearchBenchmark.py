@@ -0,0 +1,116 @@
+"""
+Memory and query latency of the dense FAISS backend vs the sparse inverted index.
+
+Synthetic internships are generated at each catalog size, with extra
+description words drawn from a Zipf distribution so the vocabulary looks like
+free text rather than a closed skill list. For every size the script reports
+index memory, build time and per-query latency for both backends, plus a
+parity check (same positions, scores within float32 tolerance) wherever the
+dense index fits under ``--dense-max-gb``. Larger sizes only report the
+estimated dense footprint.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.SparseSearchBenchmark --sizes 10000,100000,1000000
+"""
+import argparse
+import json
+import time
+
+import faiss
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from Benchmarks import Standin
+from DB.VectorDB.SparseIndex import SparseIndex
+
+
+def _latency(search, queries, k):
+    times = []
+    for q in queries:
+        t0 = time.perf_counter()
+        search(q, k)
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return {
+        "p50_ms": round(times[len(times) // 2] * 1000, 3),
+        "p99_ms": round(times[int(len(times) * 0.99) - 1] * 1000, 3),
+    }
+
+
+def _parity(dense_index, sparse_index, encoded, k):
+    d_scores, d_idx = dense_index.search(encoded.toarray(), k)
+    s_scores, s_idx = sparse_index.search(encoded, k)
+    scores_match = bool(np.allclose(d_scores, s_scores, atol=1e-5))
+    # Order among equal scores is arbitrary, so only hits scoring strictly
+    # above the k-th score must be the same set in both backends.
+    mismatched_rows = 0
+    for row in range(len(d_idx)):
+        cutoff = d_scores[row, -1] + 1e-5
+        dense_set = set(d_idx[row][d_scores[row] > cutoff].tolist())
+        sparse_set = set(s_idx[row][s_scores[row] > cutoff].tolist())
+        mismatched_rows += dense_set != sparse_set
+    return {"scores_match": scores_match, "mismatched_rows": mismatched_rows}
+
+
+def run_size(n: int, args) -> dict:
+    texts = Standin.synthetic_texts(n, args.extra_vocab, args.extra_words, args.seed)
+    vectorizer = TfidfVectorizer(stop_words="english").fit(texts)
+    matrix = normalize(vectorizer.transform(texts)).astype(np.float32)
+    del texts
+    vocab = len(vectorizer.vocabulary_)
+    queries = Standin.synthetic_queries(args.queries, args.seed + 1)
+
+    def encode(q):
+        return normalize(vectorizer.transform([q])).astype(np.float32)
+
+    result = {"internships": n, "vocab_size": vocab, "nnz_per_doc": round(matrix.nnz / n, 2)}
+
+    t0 = time.perf_counter()
+    sparse_index = SparseIndex.from_documents(matrix)
+    result["sparse"] = {
+        "index_mb": round(sparse_index.nbytes / 2**20, 2),
+        "build_s": round(time.perf_counter() - t0, 3),
+        **_latency(lambda q, k: sparse_index.search(encode(q), k), queries, args.k),
+    }
+
+    dense_bytes = n * vocab * 4
+    result["dense"] = {"index_mb": round(dense_bytes / 2**20, 2)}
+    if dense_bytes > args.dense_max_gb * 2**30:
+        result["dense"]["skipped"] = f"exceeds --dense-max-gb {args.dense_max_gb}"
+        return result
+
+    t0 = time.perf_counter()
+    dense_index = faiss.IndexFlatIP(vocab)
+    for start in range(0, n, 10000):
+        dense_index.add(matrix[start:start + 10000].toarray())
+    result["dense"]["build_s"] = round(time.perf_counter() - t0, 3)
+    result["dense"].update(
+        _latency(lambda q, k: dense_index.search(encode(q).toarray(), k), queries, args.k)
+    )
+    encoded = normalize(vectorizer.transform(queries[: args.parity_queries])).astype(np.float32)
+    result["parity"] = _parity(dense_index, sparse_index, encoded, args.k)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--extra-vocab", type=int, default=5000, help="distinct description words")
+    parser.add_argument("--extra-words", type=int, default=12, help="description words per internship")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--parity-queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dense-max-gb", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = {"config": vars(args), "results": []}
+    for n in (int(s) for s in args.sizes.split(",")):
+        report["results"].append(run_size(n, args))
+        print(json.dumps(report["results"][-1]), flush=True)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
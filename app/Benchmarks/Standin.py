@@ -0,0 +1,337 @@
+"""
+Local stand-in for the internships Postgres database.
+
+Backs the ``DB.Postgres`` pool with SQLite so benchmarks and offline tooling
+can run without a database server. Queries written for psycopg2 (``%s``
+placeholders, ``= ANY(%s)`` list parameters) are translated on the fly, and an
+optional per-connect delay mimics the TCP + auth handshake of a real server.
+"""
+import json
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from DB.Postgres import ConnectionPool, set_pool
+
+DOMAINS = {
+    "Data Science": ["python", "machine learning", "pandas", "statistics", "sql", "deep learning", "tensorflow", "numpy"],
+    "Web Development": ["javascript", "react", "html", "css", "node.js", "typescript", "django", "rest api"],
+    "Mobile Development": ["kotlin", "swift", "android", "ios", "flutter", "react native", "firebase", "java"],
+    "Cloud Computing": ["aws", "docker", "kubernetes", "linux", "terraform", "azure", "ci/cd", "networking"],
+    "Cyber Security": ["networking", "linux", "penetration testing", "cryptography", "python", "siem", "firewalls", "risk analysis"],
+    "Marketing": ["seo", "content writing", "social media", "google analytics", "copywriting", "branding", "email marketing", "excel"],
+    "Finance": ["excel", "financial modeling", "accounting", "valuation", "sql", "power bi", "statistics", "tally"],
+    "Design": ["figma", "photoshop", "illustrator", "ui design", "ux research", "prototyping", "typography", "sketch"],
+}
+DATABASE_FILE = "internships.sqlite"  # in the workspace
+_ROLES = ["Intern", "Trainee", "Analyst Intern", "Engineer Intern", "Associate Intern"]
+_COMPANIES = [f"{a} {b}" for a in ("Tech", "Blue", "Nova", "Quantum", "Bright", "Apex", "Green", "Pixel")
+              for b in ("Corp", "Labs", "Solutions", "Systems", "Works", "Digital")]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS internships (
+    internship_id INTEGER PRIMARY KEY,
+    internship_title TEXT,
+    company TEXT,
+    domain TEXT,
+    required_skills TEXT,
+    stipend REAL,
+    is_active BOOLEAN DEFAULT 1,
+    updated_at TEXT DEFAULT '2024-01-01 00:00:00'
+)
+"""
+
+INTERACTIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS interactions (
+    interaction_id INTEGER PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    internship_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+_ANY_RE = re.compile(r"=\s*ANY\(\s*%s\s*\)", re.IGNORECASE)
+_PLACEHOLDER_RE = re.compile(r"(=\s*ANY\(\s*)?%s", re.IGNORECASE)
+
+
+def synthetic_internships(n: int, seed: int = 0) -> List[Tuple]:
+    """Generate ``n`` internship rows shaped like the production table."""
+    rng = random.Random(seed)
+    domains = list(DOMAINS)
+    rows = []
+    for iid in range(1, n + 1):
+        domain = rng.choice(domains)
+        pool = DOMAINS[domain]
+        # Mostly in-domain skills with the occasional cross-domain one.
+        skills = rng.sample(pool, rng.randint(2, 5))
+        if rng.random() < 0.3:
+            skills.append(rng.choice(DOMAINS[rng.choice(domains)]))
+        title = f"{domain} {rng.choice(_ROLES)}"
+        rows.append(
+            (
+                iid,
+                title,
+                rng.choice(_COMPANIES),
+                domain,
+                ", ".join(dict.fromkeys(skills)),
+                float(rng.choice(range(0, 50001, 2500))),
+                rng.random() > 0.05,
+            )
+        )
+    return rows
+
+
+def synthetic_texts(n: int, extra_vocab: int = 5000, extra_words: int = 12, seed: int = 0) -> List[str]:
+    """Index-ready internship texts with Zipf-distributed description words.
+
+    The description words widen the vocabulary so it resembles free text
+    rather than the closed skill lists of ``synthetic_internships``.
+    """
+    rng = np.random.default_rng(seed)
+    words = rng.zipf(1.3, size=(n, extra_words)) % extra_vocab
+    texts = []
+    for (_, title, company, domain, skills, _, _), extra in zip(synthetic_internships(n, seed), words):
+        desc = " ".join(f"w{w}" for w in extra)
+        texts.append(" ".join((title, company, domain, skills, desc)))
+    return texts
+
+
+def synthetic_queries(n: int, seed: int = 1) -> List[str]:
+    """Query texts built the way the service joins domain and skills."""
+    return [" ".join([s["domain"], *s["skills"]]) for s in synthetic_students(n, seed)]
+
+
+def synthetic_students(n: int, seed: int = 1) -> List[dict]:
+    """Generate ``n`` student payloads matching ``StudentDetails``."""
+    rng = random.Random(seed)
+    domains = list(DOMAINS)
+    students = []
+    for i in range(n):
+        domain = rng.choice(domains)
+        students.append(
+            {
+                "name": f"Student {i}",
+                "skills": rng.sample(DOMAINS[domain], rng.randint(1, 4)),
+                "domain": domain,
+            }
+        )
+    return students
+
+
+def synthetic_interactions(
+    internships: List[Tuple],
+    n: int,
+    students: int,
+    groups: int = 500,
+    taste: int = 40,
+    explore: float = 0.2,
+    apply_rate: float = 0.2,
+    seed: int = 2,
+) -> Tuple[List[Tuple], List[dict]]:
+    """Generate ``n`` interaction rows (student_id, internship_id, kind) and the students' payloads.
+
+    Every student belongs to one of ``groups`` taste groups. A group sits in
+    one domain and favours ``taste`` of its internships (Zipf-weighted), which
+    its students' profiles cannot tell apart from the domain's others; a
+    share ``explore`` of events goes to any internship by global Zipf
+    popularity. Events are in random order, so any prefix is a history and
+    the rest its future.
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.array([row[0] for row in internships], dtype=np.int64)
+    domains = list(DOMAINS)
+    domain_of = np.array([domains.index(row[3]) for row in internships])
+
+    group_domain = rng.integers(len(domains), size=groups)
+    tastes = np.empty((groups, taste), dtype=np.int64)
+    for g in range(groups):
+        pool = ids[domain_of == group_domain[g]]
+        tastes[g] = rng.choice(pool, size=taste, replace=len(pool) < taste)
+    taste_p = 1.0 / np.arange(1, taste + 1)
+    taste_p /= taste_p.sum()
+    popularity = 1.0 / np.arange(1, len(ids) + 1)
+    popularity /= popularity.sum()
+    popular_order = rng.permutation(ids)
+
+    group_of = rng.integers(groups, size=students)
+    who = rng.integers(students, size=n)
+    items = tastes[group_of[who], rng.choice(taste, size=n, p=taste_p)]
+    roam = rng.random(n) < explore
+    items[roam] = popular_order[rng.choice(len(ids), size=int(roam.sum()), p=popularity)]
+    kinds = np.where(rng.random(n) < apply_rate, "apply", "view")
+    rows = [(f"S{s}", int(i), str(k)) for s, i, k in zip(who.tolist(), items.tolist(), kinds.tolist())]
+
+    payload_rng = random.Random(seed)
+    payloads = []
+    for s in range(students):
+        domain = domains[group_domain[group_of[s]]]
+        payloads.append(
+            {
+                "student_id": f"S{s}",
+                "name": f"Student {s}",
+                "skills": payload_rng.sample(DOMAINS[domain], payload_rng.randint(1, 4)),
+                "domain": domain,
+            }
+        )
+    return rows, payloads
+
+
+def _translate(query: str, params):
+    """Rewrite a psycopg2-style query and params for sqlite3."""
+    if params is None:
+        return query, ()
+    params = list(params)
+    for pos, match in enumerate(_PLACEHOLDER_RE.finditer(query)):
+        if match.group(1):
+            params[pos] = json.dumps([p.item() if hasattr(p, "item") else p for p in params[pos]])
+    query = _ANY_RE.sub("IN (SELECT value FROM json_each(%s))", query)
+    return query.replace("%s", "?"), tuple(params)
+
+
+class StandinCursor:
+    def __init__(self, cursor: sqlite3.Cursor, query_latency: float = 0.0):
+        self._cursor = cursor
+        self._query_latency = query_latency
+
+    def execute(self, query: str, params=None):
+        if self._query_latency:
+            time.sleep(self._query_latency)
+        sql, args = _translate(query, params)
+        self._cursor.execute(sql, args)
+        return self
+
+    def executemany(self, query: str, seq):
+        rows = list(seq)
+        sql, _ = _translate(query, rows[0] if rows else None)
+        self._cursor.executemany(sql, [_translate(query, r)[1] for r in rows])
+        return self
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size: int):
+        return self._cursor.fetchmany(size)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def close(self):
+        self._cursor.close()
+
+
+class StandinConnection:
+    """Minimal psycopg2-like connection over sqlite3."""
+
+    def __init__(self, path: str, query_latency: float = 0.0):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._query_latency = query_latency
+        self.closed = 0
+
+    def cursor(self, name=None):
+        return StandinCursor(self._conn.cursor(), self._query_latency)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        if not self.closed:
+            self._conn.close()
+            self.closed = 1
+
+
+def make_connect(
+    db_path: str, connect_latency: float = 0.0, query_latency: float = 0.0
+) -> Callable[[], StandinConnection]:
+    """Connection factory.
+
+    ``connect_latency`` seconds simulate a server handshake and
+    ``query_latency`` seconds the network round trip of every statement.
+    """
+
+    def connect():
+        if connect_latency:
+            time.sleep(connect_latency)
+        return StandinConnection(db_path, query_latency)
+
+    return connect
+
+
+def create_database(db_path: str, rows: List[Tuple]) -> str:
+    """(Re)create the stand-in database populated with ``rows``."""
+    path = Path(db_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+    conn = sqlite3.connect(str(path))
+    conn.execute(SCHEMA)
+    conn.execute(INTERACTIONS_SCHEMA)
+    conn.executemany(
+        "INSERT INTO internships (internship_id, internship_title, company, domain, "
+        "required_skills, stipend, is_active) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def insert_interactions(db_path: str, rows: List[Tuple]) -> None:
+    """Append (student_id, internship_id, kind) rows to the interaction log, as the API would."""
+    conn = sqlite3.connect(db_path)
+    conn.execute(INTERACTIONS_SCHEMA)
+    conn.executemany("INSERT INTO interactions (student_id, internship_id, kind) VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def install(
+    db_path: str,
+    minconn: int = 1,
+    maxconn: int = 10,
+    connect_latency: float = 0.0,
+    query_latency: float = 0.0,
+) -> ConnectionPool:
+    """Point ``DB.Postgres`` at the stand-in database and return the new pool."""
+    pool = ConnectionPool(
+        connect=make_connect(db_path, connect_latency, query_latency),
+        minconn=minconn,
+        maxconn=maxconn,
+    )
+    previous = set_pool(pool)
+    if previous is not None:
+        previous.closeall()
+    return pool
+
+
+def use_workspace(path: str | None = None) -> Path:
+    """Switch into a scratch working directory.
+
+    Artifact paths (``DB/vectordb/...``, ``Constants/vectorizer``) are
+    relative to the working directory, so this keeps benchmark builds away
+    from the real artifacts. Returns the directory in use.
+    """
+    workdir = Path(path) if path else Path(tempfile.mkdtemp(prefix="recommender-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    os.chdir(workdir)
+    return workdir
+
+
+def prepare_index(n_rows: int, seed: int = 0, **install_kwargs) -> Path:
+    """Populate a stand-in DB in the current directory and build the index from it."""
+    from DB.VectorDB.BuildIndex import build_index
+
+    db_path = create_database(DATABASE_FILE, synthetic_internships(n_rows, seed))
+    install(db_path, **install_kwargs)
+    build_index()
+    return Path(db_path).resolve()
@@ -0,0 +1,152 @@
+"""
+Time to first response of a freshly started API process.
+
+Builds an index over the SQLite stand-in, then starts ``uvicorn main:app``
+``--repeat`` times per setting and measures from the spawn:
+
+- ``health_s``: until ``GET /health`` first answers (the server accepts
+  connections once its lifespan, i.e. loading and warm-up, is done)
+- ``ready_s``: until ``GET /ready`` answers 200
+- ``first_response_s``: until the first ``POST /recommendations/`` came back;
+  ``first_request_ms`` is its latency and ``repeat_request_ms`` the median
+  latency of the same request sent again (the cold-start cost that lands on
+  the first request), ``next_requests_p50_ms`` the median of ``--requests``
+  other students
+- ``server``: the process's own ``/ready`` timings (load, checksums and
+  warm-up, ready and first response counted from its start)
+
+Settings: ``sequential`` loads the artifacts one at a time without
+warm-up (``ARTIFACT_LOAD_THREADS=1``, ``ARTIFACT_WARMUP_QUERIES=0``);
+``default`` is the default configuration. ``import_main_s`` is the bare
+``import main`` time and whether sklearn was imported on the way.
+
+Without ``--drop-caches`` the artifacts (and Python's modules) stay in the
+page cache between runs. With it, the page cache is dropped before every
+start, as after a reboot or on a new node; that needs root on Linux.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.StartupBenchmark --rows 200000 --repeat 3
+    sudo python -m Benchmarks.StartupBenchmark --rows 200000 --drop-caches
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from Benchmarks import Evaluate, Standin
+from Benchmarks.LoadTest import _free_port
+
+APP_DIR = Path(__file__).resolve().parent.parent
+SETTINGS = {
+    "sequential": {"ARTIFACT_LOAD_THREADS": "1", "ARTIFACT_WARMUP_QUERIES": "0"},
+    "default": {},
+}
+
+
+def _drop_caches() -> None:
+    os.sync()
+    with open("/proc/sys/vm/drop_caches", "w") as f:
+        f.write("1\n")
+
+
+def _import_main() -> dict:
+    code = (
+        "import sys, time; t = time.perf_counter(); import main; "
+        "print(time.perf_counter() - t, 'sklearn' in sys.modules)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], env=dict(os.environ, PYTHONPATH=str(APP_DIR)),
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return {"import_main_s": round(float(out[-2]), 3), "sklearn_imported": out[-1] == "True"}
+
+
+def _run(env_overrides: dict, args, students) -> dict:
+    if args.drop_caches:
+        _drop_caches()
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=str(APP_DIR), ARTIFACT_WATCH_INTERVAL="0", **env_overrides)
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=base_url, timeout=60) as client:
+            deadline = time.monotonic() + args.startup_timeout
+            while True:
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if time.monotonic() > deadline or server.poll() is not None:
+                    raise RuntimeError("uvicorn did not start")
+                time.sleep(0.01)
+            health = time.perf_counter() - started
+            while client.get("/ready").status_code != 200:
+                time.sleep(0.01)
+            ready = time.perf_counter() - started
+
+            def post(student):
+                client.post("/recommendations/", params={"top_k": args.k}, json=student).raise_for_status()
+
+            (first,), _ = Evaluate.timed(post, students[:1])
+            first_response = time.perf_counter() - started
+            repeat, _ = Evaluate.timed(post, students[:1] * 5)
+            latency, _ = Evaluate.timed(post, students[1: args.requests + 1])
+            server_status = client.get("/ready").json()
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+    return {
+        "health_s": health,
+        "ready_s": ready,
+        "first_response_s": first_response,
+        "first_request_ms": first * 1000,
+        "repeat_request_ms": statistics.median(repeat) * 1000,
+        "next_requests_p50_ms": statistics.median(latency) * 1000,
+        "server": {**server_status["timings"], "first_response_after": server_status["first_response_after"]},
+    }
+
+
+def _median(runs) -> dict:
+    keys = [key for key in runs[0] if key != "server"]
+    summary = {key: round(statistics.median(run[key] for run in runs), 3) for key in keys}
+    summary["server"] = {
+        key: round(statistics.median(run["server"][key] for run in runs), 4)
+        for key in runs[0]["server"]
+        if runs[0]["server"][key] is not None
+    }
+    return summary
+
+
+def main():
+    parser = Evaluate.benchmark_parser(__doc__, rows=200000, k=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=50, help="requests after the first, for the warm median")
+    parser.add_argument("--settings", nargs="+", choices=list(SETTINGS), default=list(SETTINGS))
+    parser.add_argument("--drop-caches", action="store_true", help="drop the page cache before every start (root)")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    workdir = Evaluate.prepare(args)
+    students = Standin.synthetic_students(args.requests + 1, args.seed + 1)
+
+    report = Evaluate.report(args, workdir, **_import_main(), settings={})
+    for name in args.settings:
+        runs = [_run(SETTINGS[name], args, students) for _ in range(args.repeat)]
+        report["settings"][name] = _median(runs)
+        Evaluate.progress(name, report["settings"][name])
+    Evaluate.emit(report)
+
+
+if __name__ == "__main__":
+    main()
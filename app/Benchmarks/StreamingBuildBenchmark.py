@@ -0,0 +1,148 @@
+"""
+Wall time and peak memory of the streaming index build vs the in-memory one.
+
+Generates synthetic internships into the SQLite stand-in, with Zipf
+distributed description words in the titles so the vocabulary resembles
+free text rather than the closed skill lists. Each build runs in a fresh
+subprocess, which reports its wall time and peak RSS (``ru_maxrss``, so
+the figure is that process's own high-water mark) and, for the streaming
+build, the largest peak of its worker processes:
+
+- ``in-memory``: the previous ``build_index``, replayed here: every row,
+  text and vector held at once, the vectorizer fitted by sklearn on the
+  whole corpus, the dense matrix densified in one piece
+- ``streaming, N workers``: ``build_index`` with ``BUILD_WORKERS=N``
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.StreamingBuildBenchmark --rows 20000 100000 --workers 1 2
+    FAISS_EMBEDDING=svd python -m Benchmarks.StreamingBuildBenchmark --rows 200000
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from Benchmarks import Evaluate, Standin
+
+
+def _rows(n: int, extra_vocab: int, seed: int):
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(extra_vocab)]
+    weights = [1 / (i + 1) ** 1.1 for i in range(extra_vocab)]
+    rows = []
+    for iid, title, *rest in Standin.synthetic_internships(n, seed):
+        description = " ".join(rng.choices(words, weights, k=6))
+        rows.append((iid, f"{title} {description}", *rest))
+    return rows
+
+
+def _in_memory_build() -> None:
+    """The pre-streaming build: fetch everything, fit, encode, densify, then write."""
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    from Constants.config import SEARCH_CONFIG
+    from DB.Postgres import fetch_all
+    from DB.VectorDB import AnnIndex, Artifacts
+    from DB.VectorDB import BuildIndex as b
+    from DB.VectorDB.MetadataStore import MetadataStore
+    from DB.VectorDB.SparseIndex import SparseIndex
+    from RecommenderModel import Vectorizer
+    from RecommenderModel.CompactTfidf import CompactTfidfVectorizer
+
+    corpus = [t for t in map(Vectorizer._corpus_text, fetch_all(Vectorizer._CORPUS_QUERY)) if t is not None]
+    CompactTfidfVectorizer.from_sklearn(TfidfVectorizer(stop_words="english").fit(corpus)).save(Vectorizer._VECTORIZER_PATH)
+    del corpus
+    vectorizer = Vectorizer.load_vectorizer(retrain_if_missing=False)
+
+    rows = fetch_all(f"SELECT {b.INTERNSHIP_COLUMNS} FROM internships WHERE is_active = true")
+    indexed = [(row, text) for row, text in ((row, b.row_text(row)) for row in rows) if text is not None]
+    ids = np.array([row[0] for row, _ in indexed], dtype="int64")
+    sparse_mat = b.encode_texts(vectorizer, [text for _, text in indexed])
+
+    bundle = Artifacts.stage()
+    vectorizer.save(bundle / Artifacts.VECTORIZER_DIR)
+    if SEARCH_CONFIG["backend"] == "sparse":
+        index = SparseIndex.from_documents(sparse_mat)
+    else:
+        svd = None
+        if SEARCH_CONFIG["embedding"] == "svd":
+            svd = Vectorizer.train_svd(sparse_mat, SEARCH_CONFIG["svd_components"])
+            b.save_pickle(bundle / Artifacts.SVD_FILE, svd)
+        mat = b.embed_dense(sparse_mat, svd)
+        index = AnnIndex.build(mat, SEARCH_CONFIG, ids=np.arange(len(ids), dtype="int64"))
+    b.write_index_file(bundle, index)
+    b.save_ids(bundle, ids)
+    MetadataStore.write(bundle / Artifacts.METADATA_DIR, [row for row, _ in indexed])
+    b.write_sync_state(bundle, {"high_water_mark": None, "max_internship_id": int(max(r[0] for r in rows)), "live": len(ids), "tombstones": 0})
+    Artifacts.publish(bundle, b.bundle_info(index, len(ids)))
+
+
+def _child(mode: str, db_path: str) -> None:
+    """Run one build in this (fresh) process and print its measurements."""
+    Standin.use_workspace()
+    Standin.install(db_path)
+    started = time.perf_counter()
+    if mode == "in-memory":
+        _in_memory_build()
+    else:
+        from DB.VectorDB.BuildIndex import build_index
+
+        build_index()
+    seconds = time.perf_counter() - started
+    # ru_maxrss is in KiB on Linux
+    result = {
+        "seconds": round(seconds, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "worker_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    }
+    print("RESULT " + json.dumps(result))
+
+
+def _run(mode: str, db_path: Path, env: dict) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "Benchmarks.StreamingBuildBenchmark", "--child", mode, "--db", str(db_path)],
+        cwd=Path(__file__).resolve().parent.parent,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    line = next(line for line in out.stdout.splitlines() if line.startswith("RESULT "))
+    return json.loads(line[len("RESULT "):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--extra-vocab", type=int, default=2000, help="distinct description words")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args.child, args.db)
+        return
+
+    workdir = Standin.use_workspace()
+    report = Evaluate.report(args, workdir, builds={})
+    for n in args.rows:
+        db_path = Path(Standin.create_database(f"internships-{n}.sqlite", _rows(n, args.extra_vocab, args.seed))).resolve()
+        builds = {"in-memory": _run("in-memory", db_path, {})}
+        for workers in args.workers:
+            env = {"BUILD_WORKERS": str(workers), "BUILD_CHUNK_SIZE": str(args.chunk_size), "BUILD_PROGRESS_INTERVAL": "0"}
+            builds[f"streaming, {workers} workers"] = _run("streaming", db_path, env)
+        report["builds"][n] = builds
+        Evaluate.progress(n, builds)
+    Evaluate.emit(report)
+
+
+if __name__ == "__main__":
+    main()
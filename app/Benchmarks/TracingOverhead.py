@@ -0,0 +1,79 @@
+"""
+Overhead of the request tracing instrumentation.
+
+Times one instrumented stage (``with stage(...)``) in isolation, then
+``POST /recommendations/`` through the app (in process) with tracing
+disabled, enabled, and enabled with the sampling profiler running (its
+threshold set high enough that nothing is written). Modes are interleaved
+per round so drift affects them equally.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.TracingOverhead --rows 20000 --requests 300
+"""
+import time
+
+import numpy as np
+
+from Benchmarks import Evaluate, Standin
+from Constants.config import TRACING_CONFIG
+
+MODES = {
+    "disabled": {"enabled": False, "profile_threshold_ms": 0},
+    "enabled": {"enabled": True, "profile_threshold_ms": 0},
+    "enabled+profiler": {"enabled": True, "profile_threshold_ms": 60_000},
+}
+
+
+def _stage_ns(n: int) -> float:
+    from Utils.Tracing import stage
+
+    started = time.perf_counter()
+    for _ in range(n):
+        with stage("bench"):
+            pass
+    return round((time.perf_counter() - started) / n * 1e9, 1)
+
+
+def main():
+    parser = Evaluate.benchmark_parser(__doc__)
+    parser.add_argument("--requests", type=int, default=300, help="requests per mode and round")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+
+    workdir = Evaluate.prepare(args)
+    import main as app_main
+    from Utils import Tracing
+
+    micro = {}
+    for mode in ("disabled", "enabled"):
+        TRACING_CONFIG.update(MODES[mode])
+        micro[mode] = _stage_ns(200_000)
+
+    students = Standin.synthetic_students(args.requests, seed=args.seed + 1)
+    samples = {mode: [] for mode in MODES}
+    with TestClient(app_main.app) as client:
+        def post(student):
+            client.post("/recommendations/", params={"top_k": args.k}, json=student)
+
+        for student in students[:30]:
+            post(student)
+        for _ in range(args.rounds):
+            for mode, settings in MODES.items():
+                TRACING_CONFIG.update(settings)
+                samples[mode] += Evaluate.timed(post, students)[0]
+                Tracing.stop_profiler()
+
+    requests = {}
+    base = np.median(samples["disabled"])
+    for mode, values in samples.items():
+        requests[mode] = {
+            **Evaluate.percentiles(values),
+            "p50_overhead_pct": round(100 * (np.median(values) - base) / base, 2),
+        }
+    Evaluate.emit(Evaluate.report(args, workdir, stage_ns=micro, http=requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Cold-load time and memory: pickled ``TfidfVectorizer`` vs the compact format.
+
+Fits a vectorizer on a synthetic corpus, writes it both as a pickle and as
+a ``CompactTfidfVectorizer`` directory, then loads each in fresh processes
+(libraries imported beforehand, so only the artifact load is timed) and
+reports the median load time, the first ``transform`` latency and the heap
+growth. Also checks that the compact form transforms the whole corpus
+identically to sklearn.
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.VectorizerStartup --docs 50000 --extra-vocab 200000
+"""
+import argparse
+import json
+import pickle
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from Benchmarks import Standin
+from RecommenderModel.CompactTfidf import CompactTfidfVectorizer
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+_PROBE = """
+import json, pickle, sys, time
+import numpy, scipy.sparse, sklearn.feature_extraction.text, sklearn.preprocessing
+from RecommenderModel.CompactTfidf import CompactTfidfVectorizer
+
+def anon_mb():
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Anonymous:"):
+                return int(line.split()[1]) / 1024
+
+fmt, path, query = sys.argv[1:4]
+before = anon_mb()
+t0 = time.perf_counter()
+if fmt == "pickle":
+    with open(path, "rb") as f:
+        vectorizer = pickle.load(f)
+else:
+    vectorizer = CompactTfidfVectorizer.load(path)
+t1 = time.perf_counter()
+vectorizer.transform([query])
+t2 = time.perf_counter()
+print(json.dumps({"load_ms": (t1 - t0) * 1000, "first_transform_ms": (t2 - t1) * 1000, "anon_mb": anon_mb() - before}))
+"""
+
+
+def _probe(fmt: str, path: Path, query: str, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _PROBE, fmt, str(path), query],
+            cwd=APP_DIR, capture_output=True, text=True, check=True,
+        )
+        samples.append(json.loads(out.stdout))
+    return {key: round(statistics.median(s[key] for s in samples), 3) for key in samples[0]}
+
+
+def _size_mb(path: Path) -> float:
+    files = path.rglob("*") if path.is_dir() else [path]
+    return round(sum(p.stat().st_size for p in files if p.is_file()) / 2**20, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=50000)
+    parser.add_argument("--extra-vocab", type=int, default=200000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = Standin.use_workspace()
+    corpus = Standin.synthetic_texts(args.docs, extra_vocab=args.extra_vocab, seed=args.seed)
+    vectorizer = TfidfVectorizer(stop_words="english").fit(corpus)
+    compact = CompactTfidfVectorizer.from_sklearn(vectorizer)
+
+    pickle_path, compact_path = workdir / "vectorizer.pkl", workdir / "vectorizer"
+    with open(pickle_path, "wb") as f:
+        pickle.dump(vectorizer, f)
+    compact.save(compact_path)
+
+    expected = vectorizer.transform(corpus)
+    actual = CompactTfidfVectorizer.load(compact_path).transform(corpus)
+    identical = (
+        expected.shape == actual.shape
+        and np.array_equal(expected.indptr, actual.indptr)
+        and np.array_equal(expected.indices, actual.indices)
+        and np.array_equal(expected.data, actual.data)
+    )
+
+    query = Standin.synthetic_queries(1, args.seed + 1)[0]
+    report = {
+        "config": vars(args),
+        "workdir": str(workdir),
+        "vocabulary_size": compact.vocabulary_size,
+        "corpus_transform_identical": bool(identical),
+        "pickle": {"size_mb": _size_mb(pickle_path), **_probe("pickle", pickle_path, query, args.runs)},
+        "compact": {"size_mb": _size_mb(compact_path), **_probe("compact", compact_path, query, args.runs)},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
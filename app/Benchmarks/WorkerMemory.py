@@ -0,0 +1,150 @@
+"""
+Per-worker memory of ``uvicorn --workers N`` with and without memory-mapped artifacts.
+
+Builds a synthetic index, then for each ``SEARCH_MMAP`` setting and worker
+count starts ``uvicorn main:app --workers N``, sends enough searches that
+every worker touches its index, and reads ``/proc/<pid>/smaps_rollup`` of each
+worker process:
+
+* ``rss``  - resident pages, counting shared page-cache pages in full
+* ``pss``  - proportional set size; shared pages are split between sharers,
+  so the sum over workers is the real footprint
+* ``anon`` - private heap; what a copied (non-mapped) index adds per worker
+
+Linux only (needs ``/proc``).
+
+Usage (from the ``app`` directory):
+    python -m Benchmarks.WorkerMemory --rows 50000 --workers 1,4,16
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from Benchmarks import Standin
+from Benchmarks.LoadTest import _free_port
+
+APP_DIR = Path(__file__).resolve().parent.parent
+_FIELDS = {"Rss:": "rss", "Pss:": "pss", "Anonymous:": "anon"}
+
+
+def _memory_mb(pid: int) -> dict:
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in _FIELDS:
+                usage[_FIELDS[parts[0]]] = int(parts[1]) / 1024
+    return usage
+
+
+def _children(pid: int):
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except (OSError, IndexError):
+            continue
+        if ppid == pid:
+            children.append((int(entry), cmdline))
+    return children
+
+
+def _worker_pids(server_pid: int, workers: int):
+    # With --workers > 1 uvicorn's supervisor spawns one process per worker
+    # (next to multiprocessing's resource tracker); otherwise it serves itself.
+    if workers == 1:
+        return [server_pid]
+    return [pid for pid, cmdline in _children(server_pid) if b"spawn_main" in cmdline]
+
+
+def _measure(workers: int, mmap: bool, args, students) -> dict:
+    port = _free_port()
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(APP_DIR),
+        SEARCH_MMAP="true" if mmap else "false",
+        ARTIFACT_WATCH_INTERVAL="0",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + args.startup_timeout
+        while True:
+            try:
+                if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline or server.poll() is not None:
+                raise RuntimeError(f"uvicorn with {workers} workers did not start")
+            time.sleep(0.25)
+
+        pids = _worker_pids(server.pid, workers)
+        while len(pids) < workers and time.monotonic() < deadline:
+            time.sleep(0.25)
+            pids = _worker_pids(server.pid, workers)
+        # Workers only accept connections once their lifespan (and artifact
+        # load) finished; new connections spread searches across all of them.
+        time.sleep(args.settle)
+        for i in range(args.requests_per_worker * workers):
+            httpx.post(f"{base_url}/recommendations/", json=students[i % len(students)], timeout=60)
+
+        per_worker = [_memory_mb(pid) for pid in pids]
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    def avg(key):
+        return round(sum(w[key] for w in per_worker) / len(per_worker), 1)
+
+    return {
+        "workers": len(per_worker),
+        "rss_mb_per_worker": avg("rss"),
+        "pss_mb_per_worker": avg("pss"),
+        "anon_mb_per_worker": avg("anon"),
+        "pss_mb_total": round(sum(w["pss"] for w in per_worker), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--workers", default="1,4,16")
+    parser.add_argument("--modes", default="mmap,copy", help="mmap = SEARCH_MMAP=true, copy = false")
+    parser.add_argument("--requests-per-worker", type=int, default=8)
+    parser.add_argument("--settle", type=float, default=1.0, help="seconds to wait after startup")
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    workdir = Standin.use_workspace()
+    Standin.prepare_index(args.rows)
+    students = Standin.synthetic_students(200)
+    artifacts = Path("DB/vectordb/generations")
+    artifact_mb = sum(p.stat().st_size for p in artifacts.rglob("*") if p.is_file()) / 2**20
+
+    report = {"config": vars(args), "workdir": str(workdir), "artifacts_mb": round(artifact_mb, 1)}
+    for mode in args.modes.split(","):
+        report[mode] = [
+            _measure(int(n), mode == "mmap", args, students) for n in args.workers.split(",")
+        ]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,15 +13,154 @@ load_dotenv(dotenv_path=env_path)
 # Model Configuration
 MODEL_CONFIG = {
     'model_path': os.getenv('MODEL_PATH', 'Constants/trained_model.pkl'),
-    'vectorizer_path': os.getenv('VECTORIZER_PATH', 'Constants/vectorizer.pkl'),
+    'vectorizer_path': os.getenv('VECTORIZER_PATH', 'Constants/vectorizer'),  # compact vocab + IDF directory
     'default_top_n': 5,
     'metric': 'cosine',
 }
 
+# Vector Search Configuration
+SEARCH_CONFIG = {
+    # 'dense': FAISS IndexFlatIP over densified TF-IDF rows
+    # 'sparse': inverted-index cosine scoring directly on the sparse TF-IDF matrix
+    'backend': os.getenv('SEARCH_BACKEND', 'dense'),
+    # Dense backend only. 'tfidf' indexes raw TF-IDF dimensions; 'svd' first
+    # reduces them with TruncatedSVD (LSA) to 'svd_components' dimensions.
+    'embedding': os.getenv('SEARCH_EMBEDDING', 'tfidf'),
+    'svd_components': int(os.getenv('SVD_COMPONENTS', 256)),
+    # FAISS index type: flat (exact), ivf, hnsw, pq, ivfpq
+    'index_type': os.getenv('FAISS_INDEX_TYPE', 'flat'),
+    'nlist': int(os.getenv('FAISS_NLIST', 0)),  # IVF cells; 0 = 4 * sqrt(N)
+    'nprobe': int(os.getenv('FAISS_NPROBE', 16)),  # IVF cells visited per query
+    'hnsw_m': int(os.getenv('FAISS_HNSW_M', 32)),
+    'ef_construction': int(os.getenv('FAISS_EF_CONSTRUCTION', 200)),
+    'ef_search': int(os.getenv('FAISS_EF_SEARCH', 64)),
+    'pq_m': int(os.getenv('FAISS_PQ_M', 16)),  # sub-quantizers (adjusted to divide the dimension)
+    'pq_nbits': int(os.getenv('FAISS_PQ_NBITS', 8)),
+    # Serve index + IDs from read-only memory maps so uvicorn workers share one copy
+    'mmap': os.getenv('SEARCH_MMAP', 'true').lower() in ('1', 'true', 'yes'),
+    # Filtered searches selecting at most this many internships on HNSW/PQ
+    # indexes are scored exactly instead of by a filtered graph walk
+    'filter_exact_max': int(os.getenv('FILTER_EXACT_MAX', 1024)),
+    # Dense backend only: split the index into this many shards (1 = one index),
+    # assigned by 'hash' of internship_id or by 'domain'
+    'shards': int(os.getenv('SEARCH_SHARDS', 1)),
+    'shard_by': os.getenv('SEARCH_SHARD_BY', 'hash'),
+    # processes searching the shards; 0 = one per shard, 1 = in the serving process
+    'shard_workers': int(os.getenv('SEARCH_SHARD_WORKERS', 0)),
+}
+
+# Index Build Configuration
+BUILD_CONFIG = {
+    'chunk_size': int(os.getenv('BUILD_CHUNK_SIZE', 10000)),  # rows per server-side cursor fetch and worker task
+    'workers': int(os.getenv('BUILD_WORKERS', 0)),  # encoding processes; 0 = one per CPU, 1 = in-process
+    # rows the SVD and IVF/PQ quantizers are trained on (the first ones streamed);
+    # training holds train_size x dimension float32 in memory
+    'train_size': int(os.getenv('BUILD_TRAIN_SIZE', 20000)),
+    'progress_interval': float(os.getenv('BUILD_PROGRESS_INTERVAL', 5)),  # seconds between progress lines; 0 = quiet
+}
+
+# Re-ranking Configuration
+# The index returns 'candidates' hits per query, re-scored as
+# cosine * weight_cosine + required-skill coverage * weight_skills
+# + domain match * weight_domain; the top_k of those are returned.
+RERANK_CONFIG = {
+    'enabled': os.getenv('RERANK_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+    'candidates': int(os.getenv('RERANK_CANDIDATES', 200)),
+    'weight_cosine': float(os.getenv('RERANK_WEIGHT_COSINE', 0.7)),
+    'weight_skills': float(os.getenv('RERANK_WEIGHT_SKILLS', 0.2)),
+    'weight_domain': float(os.getenv('RERANK_WEIGHT_DOMAIN', 0.1)),
+}
+
+# Diversity Configuration
+# Requests asking for diversity=mmr or diversity=company choose their top_k
+# from the 'candidates' best (re-ranked) hits. MMR picks, one at a time, the
+# candidate maximizing mmr_lambda * relevance - (1 - mmr_lambda) * its
+# highest similarity to those already picked; 'company' keeps the relevance
+# order. Both keep at most 'max_per_company' hits per company (0 = no cap).
+DIVERSITY_CONFIG = {
+    'candidates': int(os.getenv('DIVERSITY_CANDIDATES', 500)),
+    'mmr_lambda': float(os.getenv('DIVERSITY_MMR_LAMBDA', 0.7)),
+    'max_per_company': int(os.getenv('DIVERSITY_MAX_PER_COMPANY', 2)),
+}
+
+# Precomputed Popular Query Configuration
+# Every generation stores the unfiltered top 'top_k' results of the
+# 'max_queries' most frequent queries in 'query_log' (seen 'min_count'+
+# times), plus each domain alone and with each of its 'seed_skills' most
+# required skills. Matching requests are answered from that table. Builds
+# mine only the newest 'query_log_max_mb' of the log and then rotate a log
+# larger than that to '<query_log>.1' (replacing the previous one).
+POPULAR_CONFIG = {
+    'enabled': os.getenv('POPULAR_QUERIES_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+    'top_k': int(os.getenv('POPULAR_TOP_K', 20)),  # largest top_k the API accepts
+    'max_queries': int(os.getenv('POPULAR_MAX_QUERIES', 10000)),
+    'min_count': int(os.getenv('POPULAR_MIN_COUNT', 2)),
+    'seed_skills': int(os.getenv('POPULAR_SEED_SKILLS', 10)),
+    'query_log': os.getenv('QUERY_LOG_PATH', ''),  # JSON lines of served unfiltered queries; empty disables
+    'query_log_max_mb': float(os.getenv('QUERY_LOG_MAX_MB', 64)),
+}
+
+# Collaborative Filtering Configuration
+# Views and applications logged in the interactions table are factorized
+# (implicit-feedback ALS) into student and internship vectors. For a student
+# with a vector, the 'candidates' internships it scores highest join the
+# content candidates, and each candidate's score becomes
+# (1 - weight) * content score + weight * collaborative score.
+COLLAB_CONFIG = {
+    # opt-in: blending changes the ranking and similarity_score of known students
+    'enabled': os.getenv('COLLAB_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+    'weight': float(os.getenv('COLLAB_WEIGHT', 0.3)),
+    'candidates': int(os.getenv('COLLAB_CANDIDATES', 50)),
+    'factors': int(os.getenv('COLLAB_FACTORS', 32)),
+    'regularization': float(os.getenv('COLLAB_REGULARIZATION', 0.1)),
+    'alpha': float(os.getenv('COLLAB_ALPHA', 10)),  # confidence = 1 + alpha * summed interaction weights
+    'view_weight': float(os.getenv('COLLAB_VIEW_WEIGHT', 1)),
+    'apply_weight': float(os.getenv('COLLAB_APPLY_WEIGHT', 4)),
+    'iterations': int(os.getenv('COLLAB_ITERATIONS', 10)),  # ALS sweeps of a full training run
+    'incremental_iterations': int(os.getenv('COLLAB_INCREMENTAL_ITERATIONS', 3)),  # warm-started sweeps for new interactions
+    'cg_steps': int(os.getenv('COLLAB_CG_STEPS', 3)),
+    'max_seconds': float(os.getenv('COLLAB_MAX_SECONDS', 300)),  # no further sweep starts after this
+    'train_interval': int(os.getenv('COLLAB_TRAIN_INTERVAL', 0)),  # seconds between incremental runs; 0 disables
+    # events POST /interactions/ accepts per client address per minute, per process; 0 disables
+    'interactions_per_minute': int(os.getenv('INTERACTIONS_PER_MINUTE', 600)),
+    # key of the 'student_token_header' a front-end sends to vouch for a student_id
+    # (HMAC-SHA256 of the ID, see Services.InteractionService.student_token); unset, only the admin token does
+    'student_token_secret': os.getenv('STUDENT_TOKEN_SECRET', ''),
+    'student_token_header': 'X-Student-Token',
+}
+
+# Incremental Index Sync Configuration
+SYNC_CONFIG = {
+    'interval_seconds': int(os.getenv('INDEX_SYNC_INTERVAL', 0)),  # 0 disables the background schedule
+    'max_change_ratio': float(os.getenv('INDEX_SYNC_MAX_CHANGE_RATIO', 0.25)),  # above this, rebuild fully
+    'max_tombstone_ratio': float(os.getenv('INDEX_SYNC_MAX_TOMBSTONE_RATIO', 0.2)),  # dead slots before compaction
+}
+
+# Search Artifact Bundle Configuration
+ARTIFACT_CONFIG = {
+    'watch_interval': float(os.getenv('ARTIFACT_WATCH_INTERVAL', 5)),  # seconds between CURRENT checks; 0 disables
+    'keep_generations': int(os.getenv('ARTIFACT_KEEP_GENERATIONS', 3)),  # published bundles kept on disk
+    'verify_checksums': os.getenv('ARTIFACT_VERIFY_CHECKSUMS', 'true').lower() in ('1', 'true', 'yes'),
+    'load_threads': int(os.getenv('ARTIFACT_LOAD_THREADS', 4)),  # files checksummed / artifacts loaded concurrently
+    'warmup_queries': int(os.getenv('ARTIFACT_WARMUP_QUERIES', 8)),  # searches run before a generation serves; 0 = none
+}
+
+# Startup Configuration
+# Without a published index the first build runs on a background thread
+# ('background_build'), so the process answers /health (and /ready with 503)
+# meanwhile; a failed startup is retried every 'retry_interval' seconds.
+STARTUP_CONFIG = {
+    'background_build': os.getenv('STARTUP_BACKGROUND_BUILD', 'true').lower() in ('1', 'true', 'yes'),
+    'retry_interval': float(os.getenv('STARTUP_RETRY_INTERVAL', 30)),
+    'retry_after': int(os.getenv('STARTUP_RETRY_AFTER', 5)),  # Retry-After of requests refused while not ready
+}
+
 # Service Configuration
 SERVICE_CONFIG = {
-    'enable_caching': False,
-    'cache_ttl': 3600,  # seconds
+    'enable_caching': os.getenv('ENABLE_CACHING', 'false').lower() in ('1', 'true', 'yes'),
+    'cache_ttl': int(os.getenv('CACHE_TTL', 3600)),  # seconds
+    'cache_max_entries': int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
+    'cache_max_bytes': int(os.getenv('CACHE_MAX_BYTES', 64 * 1024 * 1024)),
     'batch_size': 100,  # For batch processing
 }
 
@@ -33,12 +172,70 @@ DB_CONFIG = {
     "port": int(os.getenv("DB_PORT", 5432))
 }
 
+# Connection Pool Configuration
+POOL_CONFIG = {
+    'minconn': int(os.getenv('DB_POOL_MIN', 1)),
+    'maxconn': int(os.getenv('DB_POOL_MAX', 10)),
+    'acquire_timeout': float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', 10)),  # seconds
+    'health_check_interval': float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 30)),  # seconds idle before probing
+    'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 10)),  # seconds
+    'statement_timeout_ms': int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 15000)),  # 0 disables
+}
+
+# Request Executor Configuration
+EXECUTOR_CONFIG = {
+    'max_workers': int(os.getenv('RECOMMENDER_WORKERS', 4)),  # concurrent searches per process
+    'max_queue': int(os.getenv('RECOMMENDER_MAX_QUEUE', 32)),  # waiting requests before 503
+    'retry_after': 1,  # seconds, sent with 503 responses
+}
+
+# Admin Configuration
+# Mutating /admin routes (cache clear, index sync, collaborative training)
+# require this token in the 'header' request header; without a token they
+# are disabled (403). Read-only /admin routes stay open.
+ADMIN_CONFIG = {
+    'token': os.getenv('ADMIN_TOKEN', ''),
+    'header': 'X-Admin-Token',
+}
+
+# Matching Job Configuration
+# Cohort-sized runs submitted to /jobs are queued in a SQLite database under
+# 'directory' (shared by every process serving it), matched 'chunk_size'
+# students at a time by 'workers' background threads per process, and their
+# results spooled to NPZ files next to it.
+JOBS_CONFIG = {
+    'directory': os.getenv('JOBS_DIR', 'DB/jobs'),
+    'workers': int(os.getenv('JOBS_WORKERS', 1)),  # 0 = this process only accepts and serves jobs
+    'chunk_size': int(os.getenv('JOBS_CHUNK_SIZE', 1000)),
+    'max_upload_mb': int(os.getenv('JOBS_MAX_UPLOAD_MB', 256)),
+    'max_pending': int(os.getenv('JOBS_MAX_PENDING', 10)),  # queued + running jobs before submissions get 429
+    'max_disk_mb': int(os.getenv('JOBS_MAX_DISK_MB', 4096)),  # inputs + results of every kept job
+    'poll_interval': float(os.getenv('JOBS_POLL_INTERVAL', 1)),  # seconds between queue checks when idle
+    'stale_seconds': float(os.getenv('JOBS_STALE_SECONDS', 300)),  # running jobs silent this long are taken over
+    'keep_days': float(os.getenv('JOBS_KEEP_DAYS', 7)),  # finished jobs and their files are deleted after this
+}
+
+# Request Tracing Configuration
+TRACING_CONFIG = {
+    # per-stage timers feeding the /metrics histograms and the Server-Timing header
+    'enabled': os.getenv('TRACING_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+    'server_timing': os.getenv('SERVER_TIMING', 'true').lower() in ('1', 'true', 'yes'),
+    'buckets': (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),  # seconds
+    # Sampling profiler: requests slower than this dump folded stacks
+    # (flamegraph.pl / speedscope input) to 'profile_dir'; 0 disables sampling
+    'profile_threshold_ms': float(os.getenv('PROFILE_THRESHOLD_MS', 0)),
+    'profile_interval_ms': float(os.getenv('PROFILE_INTERVAL_MS', 5)),
+    'profile_dir': os.getenv('PROFILE_DIR', 'profiles'),
+}
+
 # Skill Processing Configuration
 SKILL_CONFIG = {
     'normalize': True,
     'lowercase': True,
     'remove_duplicates': True,
     'min_skill_length': 2,
+    # {canonical: [aliases]} JSON applied to corpus skills and queries alike; empty disables aliases
+    'aliases_path': os.getenv('SKILL_ALIASES_PATH', str(Path(__file__).parent / 'skill_aliases.json')),
 }
 
 # Response Configuration
@@ -46,6 +243,8 @@ RESPONSE_CONFIG = {
     'include_explanation': False,
     'round_similarity_to': 4,  # decimal places
     'include_internship_details': True,
+    # assemble response JSON from fragments stored with the index instead of per-row models
+    'preformatted': os.getenv('RESPONSE_PREFORMATTED', 'true').lower() in ('1', 'true', 'yes'),
 }
 
 # Logging Configuration
@@ -60,11 +259,81 @@ def get_model_config():
     return MODEL_CONFIG.copy()
 
 
+def get_search_config():
+    """Get vector search configuration."""
+    return SEARCH_CONFIG.copy()
+
+
+def get_build_config():
+    """Get index build configuration."""
+    return BUILD_CONFIG.copy()
+
+
+def get_rerank_config():
+    """Get re-ranking configuration."""
+    return RERANK_CONFIG.copy()
+
+
+def get_diversity_config():
+    """Get diversity-aware top-k configuration."""
+    return DIVERSITY_CONFIG.copy()
+
+
+def get_popular_config():
+    """Get precomputed popular query configuration."""
+    return POPULAR_CONFIG.copy()
+
+
+def get_collab_config():
+    """Get collaborative filtering configuration."""
+    return COLLAB_CONFIG.copy()
+
+
+def get_sync_config():
+    """Get incremental index sync configuration."""
+    return SYNC_CONFIG.copy()
+
+
+def get_artifact_config():
+    """Get search artifact bundle configuration."""
+    return ARTIFACT_CONFIG.copy()
+
+
+def get_startup_config():
+    """Get startup and readiness configuration."""
+    return STARTUP_CONFIG.copy()
+
+
 def get_service_config():
     """Get service configuration."""
     return SERVICE_CONFIG.copy()
 
 
+def get_pool_config():
+    """Get database connection pool configuration."""
+    return POOL_CONFIG.copy()
+
+
+def get_executor_config():
+    """Get request executor configuration."""
+    return EXECUTOR_CONFIG.copy()
+
+
+def get_admin_config():
+    """Get admin endpoint configuration."""
+    return ADMIN_CONFIG.copy()
+
+
+def get_jobs_config():
+    """Get matching job configuration."""
+    return JOBS_CONFIG.copy()
+
+
+def get_tracing_config():
+    """Get request tracing configuration."""
+    return TRACING_CONFIG.copy()
+
+
 def get_skill_config():
     """Get skill processing configuration."""
     return SKILL_CONFIG.copy()
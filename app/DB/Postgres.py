@@ -1,40 +1,327 @@
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+
 import psycopg2
-from Constants.config import DB_CONFIG
+from Constants.config import DB_CONFIG, POOL_CONFIG
+
+
+class PoolTimeoutError(RuntimeError):
+    """Raised when no pooled connection frees up within the acquire timeout."""
+
 
 def get_connection():
     """
     Returns a new PostgreSQL connection.
     Use cursor() on the returned connection.
     """
+    options = None
+    if POOL_CONFIG["statement_timeout_ms"]:
+        options = f"-c statement_timeout={int(POOL_CONFIG['statement_timeout_ms'])}"
     return psycopg2.connect(
         host=DB_CONFIG["host"],
         database=DB_CONFIG["database"],
         user=DB_CONFIG["user"],
         password=DB_CONFIG["password"],
-        port=DB_CONFIG["port"]
+        port=DB_CONFIG["port"],
+        connect_timeout=POOL_CONFIG["connect_timeout"],
+        options=options,
     )
 
 
+class ConnectionPool:
+    """Bounded, thread-safe pool of DB-API connections.
+
+    ``minconn`` connections are opened up front and more are created lazily
+    up to ``maxconn``; returned connections stay open for reuse. Callers
+    block for at most ``acquire_timeout`` seconds when every connection is
+    checked out.
+    Connections that sat idle longer than ``health_check_interval`` are
+    probed with ``SELECT 1`` before being handed out, and broken ones are
+    replaced transparently.
+    """
+
+    def __init__(
+        self,
+        connect: Callable = get_connection,
+        minconn: int = 1,
+        maxconn: int = 10,
+        acquire_timeout: float = 10.0,
+        health_check_interval: float = 30.0,
+    ):
+        if minconn < 0 or maxconn < 1 or minconn > maxconn:
+            raise ValueError("Pool sizes must satisfy 0 <= minconn <= maxconn and maxconn >= 1")
+
+        self._connect = connect
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._idle: List[tuple] = []  # (connection, last_used_monotonic)
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "checkouts": 0,
+            "health_check_failures": 0,
+            "acquire_timeouts": 0,
+            "total_wait_seconds": 0.0,
+        }
+
+        for _ in range(minconn):
+            self._idle.append((self._new_connection(), time.monotonic()))
+
+    def _new_connection(self):
+        conn = self._connect()
+        with self._lock:
+            self._stats["connections_created"] += 1
+        return conn
+
+    def _discard(self, conn) -> None:
+        with self._lock:
+            self._stats["connections_discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, conn, idle_for: float) -> bool:
+        if getattr(conn, "closed", 0):
+            return False
+        if idle_for < self.health_check_interval:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchall()
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            with self._lock:
+                self._stats["health_check_failures"] += 1
+            return False
+
+    def getconn(self):
+        """Check out a connection, blocking up to ``acquire_timeout`` seconds."""
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self._stats["acquire_timeouts"] += 1
+            raise PoolTimeoutError(
+                f"Timed out after {self.acquire_timeout}s waiting for a DB connection"
+            )
+
+        try:
+            conn = None
+            while conn is None:
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    conn = self._new_connection()
+                    break
+                candidate, last_used = entry
+                if self._is_healthy(candidate, time.monotonic() - last_used):
+                    conn = candidate
+                else:
+                    self._discard(candidate)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._stats["checkouts"] += 1
+            self._stats["total_wait_seconds"] += time.monotonic() - started
+        return conn
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        """Return a connection to the pool, closing it if broken or surplus."""
+        with self._lock:
+            self._in_use -= 1
+            keep = (
+                not discard
+                and not self._closed
+                and not getattr(conn, "closed", 0)
+                and len(self._idle) < self.maxconn
+            )
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+        if not keep:
+            self._discard(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled connection.
+
+        The transaction is rolled back if the block raises, and connections
+        that fail at the driver level are dropped instead of being reused.
+        """
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard)
+
+    def closeall(self) -> None:
+        """Close every idle connection and refuse further checkouts."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self) -> Dict[str, float]:
+        """Snapshot of pool sizing and usage counters."""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update(
+                {
+                    "minconn": self.minconn,
+                    "maxconn": self.maxconn,
+                    "in_use": self._in_use,
+                    "idle": len(self._idle),
+                    "closed": self._closed,
+                }
+            )
+        return snapshot
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    connect=get_connection,
+                    minconn=POOL_CONFIG["minconn"],
+                    maxconn=POOL_CONFIG["maxconn"],
+                    acquire_timeout=POOL_CONFIG["acquire_timeout"],
+                    health_check_interval=POOL_CONFIG["health_check_interval"],
+                )
+    return _pool
+
+
+def set_pool(pool: ConnectionPool | None) -> ConnectionPool | None:
+    """Swap the process-wide pool (used by tooling and stand-in databases).
+
+    Returns the previous pool; closing it is left to the caller.
+    """
+    global _pool
+
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    return previous
+
+
+def close_pool() -> None:
+    """Close the process-wide pool if it was ever opened."""
+    previous = set_pool(None)
+    if previous is not None:
+        previous.closeall()
+
+
+def get_pool_stats() -> Dict[str, float] | None:
+    """Pool statistics, or None when no query has opened the pool yet."""
+    pool = _pool
+    return pool.stats() if pool is not None else None
+
+
 def fetch_all(query: str, params=None):
     """
     Utility function to fetch all rows.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(query, params)
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    with get_pool().connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+        finally:
+            cur.close()
+        # End the read transaction so the connection goes back idle.
+        conn.rollback()
     return rows
 
 
+_cursor_names = itertools.count()
+
+
+def fetch_chunks(query: str, params=None, chunk_size: int = 10000) -> Iterator[List[tuple]]:
+    """
+    Yield the rows of ``query`` in lists of up to ``chunk_size``.
+
+    Uses a server-side (named) cursor, so only one chunk is held client-side
+    at a time. The pooled connection stays checked out until the generator
+    is exhausted or closed.
+    """
+    with get_pool().connection() as conn:
+        cur = conn.cursor(name=f"fetch_chunks_{next(_cursor_names)}")
+        try:
+            cur.itersize = chunk_size
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cur.close()
+            # also ends the transaction when the caller stops early
+            conn.rollback()
+
+
 def execute(query: str, params=None):
     """
     Utility function for INSERT / UPDATE / DELETE.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(query, params)
-    conn.commit()
-    cur.close()
-    conn.close()
+    with get_pool().connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute(query, params)
+        finally:
+            cur.close()
+        conn.commit()
+
+
+def execute_many(query: str, rows) -> int:
+    """
+    Run ``query`` once per parameter tuple in ``rows``, in one transaction.
+    Returns the number of rows.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    with get_pool().connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.executemany(query, rows)
+        finally:
+            cur.close()
+        conn.commit()
+    return len(rows)
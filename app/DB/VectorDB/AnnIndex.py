@@ -0,0 +1,245 @@
+# FAISS index construction for the dense search backend
+import math
+import threading
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "pq", "ivfpq")
+
+
+def _pq_subquantizers(dim: int, requested: int) -> int:
+    """Largest divisor of ``dim`` not above ``requested`` (PQ needs m | d)."""
+    for m in range(min(requested, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def _nlist(n_items: int, config: dict, n_train: int) -> int:
+    nlist = config.get("nlist") or int(4 * math.sqrt(n_items))
+    # FAISS wants ~39 training points per centroid; clamp for small catalogs.
+    return max(1, min(nlist, n_train // 39 or 1))
+
+
+def _pq_nbits(n_items: int, requested: int) -> int:
+    # k-means for each sub-quantizer needs at least 2**nbits training points.
+    return max(1, min(requested, int(math.log2(max(n_items, 2)))))
+
+
+def create_index(dim: int, n_items: int, config: dict, n_train: int | None = None) -> faiss.Index:
+    """Create an empty (untrained) inner-product index of the configured type.
+
+    ``n_items`` sizes the IVF lists; ``n_train`` (default ``n_items``) is the
+    number of training vectors, which caps the lists and PQ code size.
+    """
+    n_train = n_items if n_train is None else n_train
+    index_type = config.get("index_type", "flat")
+    metric = faiss.METRIC_INNER_PRODUCT
+
+    if index_type == "flat":
+        return faiss.IndexFlatIP(dim)
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config["hnsw_m"], metric)
+        index.hnsw.efConstruction = config["ef_construction"]
+        return index
+    if index_type == "pq":
+        m = _pq_subquantizers(dim, config["pq_m"])
+        return faiss.IndexPQ(dim, m, _pq_nbits(n_train, config["pq_nbits"]), metric)
+
+    nlist = _nlist(n_items, config, n_train)
+    quantizer = faiss.IndexFlatIP(dim)
+    if index_type == "ivf":
+        return faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+    if index_type == "ivfpq":
+        m = _pq_subquantizers(dim, config["pq_m"])
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, m, _pq_nbits(n_train, config["pq_nbits"]), metric)
+
+    raise ValueError(f"Unknown index_type {index_type!r}; expected one of {INDEX_TYPES}")
+
+
+def configure_search(index: faiss.Index, config: dict) -> faiss.Index:
+    """Apply query-time knobs (nprobe / efSearch) to a loaded index."""
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(base, faiss.IndexIVF):
+        base.nprobe = min(config["nprobe"], base.nlist)
+    elif isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = config["ef_search"]
+    return index
+
+
+def reserve(index: faiss.Index, n_items: int) -> faiss.Index:
+    """Pre-size the code storage of flat-coded indexes (flat, PQ, HNSW) for ``n_items`` vectors.
+
+    Adding in batches otherwise grows it by doubling, which briefly holds
+    the old and the new buffer: up to ~3x the final index size.
+    """
+    base = faiss.downcast_index(index)
+    if isinstance(base, faiss.IndexHNSW):
+        base = faiss.downcast_index(base.storage)
+    if isinstance(base, faiss.IndexFlatCodes):
+        # std::vector keeps its capacity when shrunk back
+        size = base.codes.size()
+        base.codes.resize(max(n_items * base.code_size, size))
+        base.codes.resize(size)
+    return index
+
+
+def read(path: str, mmap: bool = True) -> faiss.Index:
+    """Load an index written by ``faiss.write_index``.
+
+    With ``mmap`` the vectors / codes (and IVF lists, HNSW storage) are
+    served from a read-only mapping of the file instead of being copied to
+    the heap, so every worker process reading the same file shares one
+    page-cache copy. A mapped index cannot be modified.
+    """
+    if not mmap:
+        return faiss.read_index(path)
+    # IO_FLAG_MMAP_IFC (faiss >= 1.9) maps flat codes too; IO_FLAG_MMAP alone only maps IVF lists.
+    flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+    return faiss.read_index(path, flag | faiss.IO_FLAG_READ_ONLY)
+
+
+def build(vectors: np.ndarray, config: dict, ids: np.ndarray | None = None) -> faiss.Index:
+    """Create, train (when needed) and fill an index with L2-normalized vectors.
+
+    With ``ids`` the index is wrapped in ``IndexIDMap2`` so vectors can later
+    be removed or appended under explicit IDs.
+    """
+    index = create_index(vectors.shape[1], vectors.shape[0], config)
+    if not index.is_trained:
+        index.train(vectors)
+    if ids is None:
+        index.add(vectors)
+    else:
+        index = faiss.IndexIDMap2(index)
+        index.add_with_ids(vectors, ids)
+    return configure_search(index, config)
+
+
+def remove_ids(index: faiss.Index, positions: np.ndarray) -> int:
+    """``index.remove_ids(positions)``, keeping an ID-mapped IVF index consistent.
+
+    ``IndexIDMap`` assumes the wrapped index renumbers the vectors after the
+    removed ones, as flat-coded indexes do, and compacts its ID map to
+    match. IVF lists keep their internal IDs instead, so without the
+    renumbering here the IDs of later additions would collide with them.
+    """
+    positions = np.ascontiguousarray(positions, dtype=np.int64)
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else None
+    if not isinstance(base, faiss.IndexIVF):
+        return index.remove_ids(positions)
+    removed = np.flatnonzero(np.isin(faiss.vector_to_array(index.id_map), positions))
+    count = index.remove_ids(positions)
+    invlists = base.invlists
+    for list_no in range(base.nlist) if count else ():
+        size = invlists.list_size(list_no)
+        if size:
+            ids = faiss.rev_swig_ptr(invlists.get_ids(list_no), size)
+            ids -= np.searchsorted(removed, ids)
+    return count
+
+
+_direct_map_lock = threading.Lock()
+
+
+def reconstruct(index: faiss.Index, positions: np.ndarray) -> np.ndarray:
+    """The vectors stored at ``positions`` as one float32 (n, d) block.
+
+    PQ indexes return their decoded (approximate) vectors. IVF indexes need
+    a direct map from ID to list entry for this; it is built on first use,
+    in memory (8 bytes per vector) even when the lists are memory-mapped.
+    """
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(base, faiss.IndexIVF) and base.direct_map.type == faiss.DirectMap.NoMap:
+        with _direct_map_lock:
+            if base.direct_map.type == faiss.DirectMap.NoMap:
+                base.make_direct_map()
+    return index.reconstruct_batch(np.ascontiguousarray(positions, dtype=np.int64))
+
+
+# Vectors reconstructed per batch when a filtered subset is scored exactly
+_EXACT_BATCH = 1024
+
+
+def _filter_params(base: faiss.Index, selector, nprobe: int = 0) -> faiss.SearchParameters:
+    # the query-time knobs must be repeated: params replace the index's own
+    if isinstance(base, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe or base.nprobe)
+    if isinstance(base, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=base.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def _selected(bitmap: np.ndarray, found: np.ndarray) -> np.ndarray:
+    positions = np.maximum(found, 0)
+    return (found >= 0) & ((bitmap[positions >> 3] >> (positions & 7)) & 1).astype(bool)
+
+
+def _search_exact(index: faiss.Index, queries: np.ndarray, k: int, positions: np.ndarray):
+    """Exact top-k inner products over ``positions``, from reconstructed vectors."""
+    scores = np.full((len(queries), k), -np.finfo(np.float32).max, dtype=np.float32)
+    found = np.full((len(queries), k), -1, dtype=np.int64)
+    for start in range(0, len(positions), _EXACT_BATCH):
+        batch = positions[start:start + _EXACT_BATCH]
+        sims = queries @ index.reconstruct_batch(batch).T
+        all_scores = np.concatenate([scores, sims], axis=1)
+        all_found = np.concatenate([found, np.broadcast_to(batch, sims.shape)], axis=1)
+        top = np.argsort(-all_scores, axis=1, kind="stable")[:, :k]
+        scores = np.take_along_axis(all_scores, top, axis=1)
+        found = np.take_along_axis(all_found, top, axis=1)
+    return scores, found
+
+
+def _search_overfetch(index: faiss.Index, queries: np.ndarray, k: int, bitmap: np.ndarray, count: int):
+    """Unfiltered search deep enough to expect ``2k`` selected hits, filtered afterwards."""
+    fetch = min(index.ntotal, 2 * k * math.ceil(index.ntotal / count))
+    all_scores, all_found = index.search(queries, fetch)
+    keep = _selected(bitmap, all_found)
+    scores = np.full((len(queries), k), -np.finfo(np.float32).max, dtype=np.float32)
+    found = np.full((len(queries), k), -1, dtype=np.int64)
+    for row in range(len(queries)):
+        row_found, row_scores = all_found[row][keep[row]][:k], all_scores[row][keep[row]][:k]
+        found[row, :len(row_found)], scores[row, :len(row_scores)] = row_found, row_scores
+    return scores, found
+
+
+def search_filtered(index: faiss.Index, queries: np.ndarray, k: int, bitmap: np.ndarray, count: int, exact_max: int):
+    """``index.search`` restricted to the positions set in ``bitmap``.
+
+    ``bitmap`` is packed little-endian (FAISS ``IDSelectorBitmap`` layout)
+    with ``count`` bits set. Flat, IVF and HNSW indexes take it as a FAISS
+    selector and skip unselected vectors, so a selective filter on a flat
+    index costs less than a full search; IVF probes enough lists to expect
+    ``2k`` selected vectors. Selections of at most ``exact_max`` positions on
+    HNSW/PQ are scored exactly from reconstructed vectors, as a filtered
+    graph walk can come back short; larger PQ selections (no selector
+    support) over-fetch. Rows still short of ``min(k, count)`` hits are
+    re-run over every IVF list, or exactly.
+    """
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+
+    def positions():
+        return np.flatnonzero(np.unpackbits(bitmap, bitorder="little")).astype(np.int64)
+
+    bitmap = np.ascontiguousarray(bitmap, dtype=np.uint8)
+    selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+    if isinstance(base, (faiss.IndexPQ, faiss.IndexHNSW)) and count <= exact_max:
+        return _search_exact(index, queries, k, positions())
+    if isinstance(base, faiss.IndexPQ):
+        scores, found = _search_overfetch(index, queries, k, bitmap, count)
+    elif isinstance(base, faiss.IndexIVF):
+        nprobe = min(base.nlist, max(base.nprobe, math.ceil(2 * k * base.nlist / count)))
+        scores, found = index.search(queries, k, params=_filter_params(base, selector, nprobe))
+    else:
+        scores, found = index.search(queries, k, params=_filter_params(base, selector))
+
+    short = np.flatnonzero((found >= 0).sum(axis=1) < min(k, count))
+    if not len(short) or isinstance(base, faiss.IndexFlat):
+        return scores, found
+    if isinstance(base, faiss.IndexIVF):
+        retry = index.search(queries[short], k, params=_filter_params(base, selector, base.nlist))
+    else:
+        retry = _search_exact(index, queries[short], k, positions())
+    scores[short], found[short] = retry
+    return scores, found
@@ -0,0 +1,288 @@
+# Versioned search artifact bundles
+"""
+Every build or sync publishes a complete, immutable *generation* of the
+search artifacts::
+
+    DB/vectordb/
+        CURRENT                      # name of the active generation
+        generations/<generation>/
+            manifest.json            # checksums + build info, written last
+            faiss.index | shards/ | tfidf_postings/
+            internship_ids.npy
+            vectorizer/              # compact vocab + IDF (RecommenderModel.CompactTfidf)
+            svd.pkl                  # only for SEARCH_EMBEDDING=svd
+            sync_state.json
+            metadata/
+            popular/                 # precomputed results of frequent queries
+            collaborative/           # interaction factors + their FAISS index, once trained
+
+A generation is assembled in a hidden staging directory, renamed into
+place once complete, and only then named in ``CURRENT`` (itself replaced
+atomically), so readers never see a partial bundle.
+
+Writers (builds, syncs, collaborative training, publish and prune) hold
+``exclusive()``, a lock file next to ``CURRENT``, so the uvicorn workers of
+one deployment never derive competing generations from the same one.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: the lock only covers this process's threads
+    fcntl = None
+
+from Constants.config import ARTIFACT_CONFIG
+
+VECTORDB_DIR = Path("DB/vectordb")
+GENERATIONS_DIR = VECTORDB_DIR / "generations"
+CURRENT_PATH = VECTORDB_DIR / "CURRENT"
+
+INDEX_FILE = "faiss.index"
+SHARDS_DIR = "shards"  # a sharded dense index (DB.VectorDB.ShardedIndex) instead of INDEX_FILE
+SPARSE_INDEX_DIR = "tfidf_postings"
+IDS_FILE = "internship_ids.npy"
+VECTORIZER_DIR = "vectorizer"
+SVD_FILE = "svd.pkl"
+SYNC_STATE_FILE = "sync_state.json"
+METADATA_DIR = "metadata"
+POPULAR_DIR = "popular"
+COLLABORATIVE_DIR = "collaborative"
+MANIFEST_FILE = "manifest.json"
+
+# 2: mmap-able sparse postings, 3: compact vectorizer, 4: domain filter
+# bitmaps, 5: skill bitsets in the metadata store, 6: JSON response fragments
+# in the metadata store, 7: company codes in the metadata store
+FORMAT_VERSION = 7
+_STAGING_PREFIX = ".staging-"
+
+
+class BundleError(RuntimeError):
+    """Raised when a generation is missing files or fails its checksums."""
+
+
+class LockBusyError(RuntimeError):
+    """Raised by a non-blocking ``exclusive()`` when another thread or process holds the lock."""
+
+
+_process_locks: Dict[str, threading.Lock] = {}
+_process_locks_guard = threading.Lock()
+_held = threading.local()  # lock name -> depth, for the thread holding it
+
+
+@contextmanager
+def exclusive(name: str = "writer", blocking: bool = True) -> Iterator[None]:
+    """Hold lock ``name`` across every thread and process sharing ``DB/vectordb``.
+
+    An ``fcntl.flock`` on ``DB/vectordb/<name>.lock``, taken after a
+    per-process lock (flock does not order the threads of one process
+    sharing a descriptor). Reentrant within a thread, so a sync can run a
+    full build and a build can publish. Non-blocking, raises
+    ``LockBusyError`` when held elsewhere. The kernel drops the lock with
+    the process, so a crashed writer never leaves it behind.
+    """
+    depth = getattr(_held, name, 0)
+    if depth:
+        setattr(_held, name, depth + 1)
+        try:
+            yield
+        finally:
+            setattr(_held, name, depth)
+        return
+
+    with _process_locks_guard:
+        lock = _process_locks.setdefault(name, threading.Lock())
+    if not lock.acquire(blocking=blocking):
+        raise LockBusyError(f"{name} lock is held by another thread")
+    try:
+        VECTORDB_DIR.mkdir(parents=True, exist_ok=True)
+        with open(VECTORDB_DIR / f"{name}.lock", "a") as f:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise LockBusyError(f"{name} lock is held by another process") from None
+            setattr(_held, name, 1)
+            try:
+                yield
+            finally:
+                setattr(_held, name, 0)
+                # closing the file releases the flock
+    finally:
+        lock.release()
+
+
+def _new_name() -> str:
+    # Sorts chronologically; the suffix keeps same-second publishes distinct.
+    return f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:6]}"
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _files(directory: Path):
+    for path in sorted(directory.rglob("*")):
+        name = path.relative_to(directory).as_posix()
+        if path.is_file() and name != MANIFEST_FILE:
+            yield name, path
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    # Hard links are free; writers replace files rather than rewrite them,
+    # so the source generation is never modified through the link.
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def generation_dir(generation: str) -> Path:
+    return GENERATIONS_DIR / generation
+
+
+def current_generation() -> Optional[str]:
+    """Name of the published generation, or None before the first build."""
+    try:
+        name = CURRENT_PATH.read_text().strip()
+    except FileNotFoundError:
+        return None
+    return name or None
+
+
+def read_manifest(generation: str) -> dict:
+    path = generation_dir(generation) / MANIFEST_FILE
+    if not path.exists():
+        raise BundleError(f"Generation {generation} has no manifest at {path}")
+    manifest = json.loads(path.read_text())
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise BundleError(
+            f"Generation {generation} has bundle format {manifest.get('format_version')}, "
+            f"expected {FORMAT_VERSION}; rebuild the index"
+        )
+    return manifest
+
+
+def is_usable(generation: Optional[str]) -> bool:
+    """Whether ``generation`` is a complete bundle in the current format."""
+    if generation is None:
+        return False
+    try:
+        read_manifest(generation)
+    except BundleError:
+        return False
+    return True
+
+
+def _check_file(generation: str, name: str, expected: dict) -> None:
+    path = generation_dir(generation) / name
+    if not path.exists():
+        raise BundleError(f"Generation {generation} is missing {name}")
+    if path.stat().st_size != expected["bytes"] or _sha256(path) != expected["sha256"]:
+        raise BundleError(f"Checksum mismatch for {name} in generation {generation}")
+
+
+def verify(generation: str) -> dict:
+    """Check every file of ``generation`` against its manifest; returns the manifest."""
+    manifest = read_manifest(generation)
+    for name, expected in manifest["files"].items():
+        _check_file(generation, name, expected)
+    return manifest
+
+
+def verify_files(generation: str, manifest: dict, pool: Executor) -> List[Future]:
+    """``verify`` on ``pool``: one task per file, largest first; each future raises ``BundleError`` on a mismatch.
+
+    Hashing releases the GIL, so the files are read in parallel (which also
+    brings them into the page cache before the mapped artifacts are used).
+    """
+    files = sorted(manifest["files"].items(), key=lambda item: -item[1]["bytes"])
+    return [pool.submit(_check_file, generation, name, expected) for name, expected in files]
+
+
+def stage(base: Optional[str] = None) -> Path:
+    """Create a staging directory for a new generation.
+
+    With ``base``, the files of that generation are linked in first so an
+    incremental sync only rewrites what changed.
+    """
+    staging = GENERATIONS_DIR / f"{_STAGING_PREFIX}{_new_name()}"
+    staging.mkdir(parents=True)
+    if base is not None:
+        for name, path in _files(generation_dir(base)):
+            _link_or_copy(path, staging / name)
+    return staging
+
+
+def link_in(staging: Path, base: str, name: str) -> bool:
+    """Link file or directory ``name`` of generation ``base`` into ``staging``; False if it has none."""
+    source = generation_dir(base) / name
+    if source.is_file():
+        _link_or_copy(source, staging / name)
+        return True
+    # everything in it, its own manifest included
+    files = [path for path in sorted(source.rglob("*")) if path.is_file()] if source.is_dir() else []
+    for path in files:
+        _link_or_copy(path, staging / name / path.relative_to(source))
+    return bool(files)
+
+
+def discard(staging: Path) -> None:
+    """Remove a staging directory after a failed build."""
+    shutil.rmtree(staging, ignore_errors=True)
+
+
+def publish(staging: Path, info: Dict) -> str:
+    """Seal ``staging`` with a manifest, make it the current generation and return its name."""
+    generation = staging.name[len(_STAGING_PREFIX):]
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "generation": generation,
+        "created_at": time.time(),
+        **info,
+        "files": {name: {"bytes": path.stat().st_size, "sha256": _sha256(path)} for name, path in _files(staging)},
+    }
+    (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    with exclusive():
+        os.rename(staging, generation_dir(generation))
+
+        tmp = CURRENT_PATH.with_name(f"{CURRENT_PATH.name}.tmp")
+        tmp.write_text(generation)
+        os.replace(tmp, CURRENT_PATH)
+
+        prune(ARTIFACT_CONFIG["keep_generations"])
+    return generation
+
+
+def prune(keep: int) -> None:
+    """Delete all but the ``keep`` newest generations (never the current one).
+
+    Processes still serving a deleted generation keep their open maps.
+    """
+    with exclusive():
+        _prune_locked(keep)
+
+
+def _prune_locked(keep: int) -> None:
+    current = current_generation()
+    published = sorted(
+        (p for p in GENERATIONS_DIR.iterdir() if p.is_dir() and not p.name.startswith(_STAGING_PREFIX)),
+        key=lambda p: p.name,
+    )
+    for path in published[: max(0, len(published) - max(1, keep))]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
@@ -1,67 +1,426 @@
 # Build FAISS vector index from database
+import json
+import math
+import os
+import pickle
+import shutil
+import time
 import numpy as np
 import faiss
+import scipy.sparse as sp
 from pathlib import Path
-from DB.Postgres import fetch_all
-from RecommenderModel.Vectorizer import load_vectorizer
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from Constants.config import BUILD_CONFIG, POPULAR_CONFIG, RERANK_CONFIG, SEARCH_CONFIG
+from DB.Postgres import fetch_all, fetch_chunks
+from DB.VectorDB import AnnIndex, Artifacts, Collaborative, Search
+from DB.VectorDB.MetadataStore import MetadataWriter
+from DB.VectorDB.PopularQueries import (
+    PopularTable,
+    mine_queries,
+    query_hash,
+    query_text,
+    rotate_query_log,
+    seed_queries,
+)
+from DB.VectorDB.Reranker import RerankQuery
+from DB.VectorDB.ShardedIndex import ShardedIndex, ShardLayout
+from DB.VectorDB.SparseIndex import SparseIndex
+from RecommenderModel.Vectorizer import load_vectorizer, train_and_save_vectorizer, train_svd
+from Utils.Parallel import ChunkPool
+from Utils.SkillNormalizer import get_skill_canonicalizer, skill_text
 
-INDEX_PATH = "DB/vectordb/faiss.index"
-IDS_PATH = "DB/vectordb/internship_ids.npy"
+INTERNSHIP_COLUMNS = "internship_id, internship_title, company, domain, required_skills, stipend"
+# dense vectors materialized at once when adding to the index
+_ADD_BATCH_BYTES = 64 * 1024 * 1024
 
-def build_index():
-    # load or train vectorizer
-    vectorizer = load_vectorizer(retrain_if_missing=True)
-
-    # fetch active internships
-    rows = fetch_all(
-        """
-        SELECT internship_id, internship_title, company, domain, required_skills
-        FROM internships
-        WHERE is_active = true
-        """
-    )
-
-    ids = []
-    texts = []
-    for iid, title, company, domain, skills in rows:
-        parts = [str(p) for p in (title, company, domain, skills) if p]
-        if not parts:
-            continue
-        ids.append(iid)
-        texts.append(" ".join(parts))
-
-    if not texts:
-        raise RuntimeError("No internship records to index.")
-
-    # vectorize to dense float32
-    mat = vectorizer.transform(texts).toarray().astype("float32")
-
-    # L2 normalize for cosine/IP search
+
+def row_text(row) -> Optional[str]:
+    """Index text for an internship row, or None if it has nothing to index."""
+    _, title, company, domain, skills = row[:5]
+    parts = [str(p) for p in (title, company, domain, skill_text(skills)) if p]
+    return " ".join(parts) if parts else None
+
+
+def encode_texts(vectorizer, texts):
+    """L2-normalized sparse TF-IDF rows for cosine/IP search."""
+    from sklearn.preprocessing import normalize  # not imported by the API unless it builds
+
+    return normalize(vectorizer.transform(texts)).astype("float32")
+
+
+def embed_dense(sparse_mat, svd=None) -> np.ndarray:
+    """Dense float32 vectors for the FAISS backend, reduced with ``svd`` (LSA) if given."""
+    if svd is not None:
+        mat = svd.transform(sparse_mat).astype("float32")
+    else:
+        mat = sparse_mat.toarray()
     faiss.normalize_L2(mat)
+    return mat
+
+
+def _replace(path: Path, write) -> None:
+    # Write next to the target and rename over it: staged files may be hard
+    # links into the previous generation, which must stay untouched.
+    tmp = path.with_name(f"{path.name}.tmp")
+    write(str(tmp))
+    os.replace(tmp, path)
+
+
+def write_index_file(bundle: Path, index) -> Path:
+    """Persist the index into ``bundle``; returns its path."""
+    if isinstance(index, SparseIndex):
+        # replaces each of its files atomically itself
+        path = bundle / Artifacts.SPARSE_INDEX_DIR
+        index.write(str(path))
+    elif isinstance(index, ShardedIndex):
+        path = bundle / Artifacts.SHARDS_DIR
+        index.write(path)
+    else:
+        path = bundle / Artifacts.INDEX_FILE
+        _replace(path, lambda tmp: faiss.write_index(index, tmp))
+    return path
+
+
+def save_ids(bundle: Path, ids: np.ndarray) -> None:
+    def write(tmp):
+        with open(tmp, "wb") as f:
+            np.save(f, ids)
+    _replace(bundle / Artifacts.IDS_FILE, write)
+
+
+def save_pickle(path: Path, obj) -> None:
+    def write(tmp):
+        with open(tmp, "wb") as f:
+            pickle.dump(obj, f)
+    _replace(path, write)
+
+
+def read_sync_state(bundle: Path) -> Optional[dict]:
+    path = bundle / Artifacts.SYNC_STATE_FILE
+    return json.loads(path.read_text()) if path.exists() else None
+
+
+def write_sync_state(bundle: Path, state: dict) -> None:
+    _replace(bundle / Artifacts.SYNC_STATE_FILE, lambda tmp: Path(tmp).write_text(json.dumps(state, indent=2)))
+
+
+def bundle_info(index, live: int) -> dict:
+    """Build settings recorded in the manifest; a sync only extends matching bundles."""
+    info = {
+        "backend": "sparse" if isinstance(index, SparseIndex) else "dense",
+        "items": int(index.ntotal),
+        "live": live,
+        "skill_table": get_skill_canonicalizer().fingerprint,
+    }
+    if info["backend"] == "dense":
+        info["embedding"] = SEARCH_CONFIG["embedding"]
+        info["index_type"] = SEARCH_CONFIG["index_type"]
+    if isinstance(index, ShardedIndex):
+        info["shards"] = index.layout.count
+        info["shard_by"] = index.layout.by
+        info["shard_sizes"] = index.shard_sizes()
+    return info
+
+
+def write_popular_table(bundle: Path, index, info: dict) -> Optional[int]:
+    """Precompute the results of frequent queries against the staged ``bundle``.
+
+    Runs once the index, IDs, vectorizer and metadata are in ``bundle``;
+    ``info`` is its ``bundle_info``. Returns the number of entries, or None
+    when the table is disabled.
+    """
+    directory = bundle / Artifacts.POPULAR_DIR
+    shutil.rmtree(directory, ignore_errors=True)  # a sync links in the previous generation's
+    if not POPULAR_CONFIG["enabled"]:
+        return None
+    artifacts = Search.load_bundle(bundle, info, bundle.name, 0, index=index)
+    queries = []
+    if artifacts.metadata is not None:
+        queries += seed_queries(artifacts.metadata, POPULAR_CONFIG["seed_skills"], artifacts.live)
+    if POPULAR_CONFIG["query_log"]:
+        queries += mine_queries(POPULAR_CONFIG["query_log"], POPULAR_CONFIG["max_queries"], POPULAR_CONFIG["min_count"])
+        # the mined window stays available in the rotation if this build fails
+        rotate_query_log(POPULAR_CONFIG["query_log"])
+    queries = list(dict.fromkeys(queries))[: POPULAR_CONFIG["max_queries"]]
+
+    k = POPULAR_CONFIG["top_k"]
+    results = []
+    for start in range(0, len(queries), 256):
+        batch = queries[start:start + 256]
+        rerank_queries = [RerankQuery(*q) for q in batch] if RERANK_CONFIG["enabled"] else None
+        for hits in Search._search_hits(artifacts, [query_text(q) for q in batch], k, None, rerank_queries):
+            results.append(
+                (np.array([h.position for h in hits], dtype="int64"), np.array([h.score for h in hits], dtype="float64"))
+            )
+    PopularTable.write(directory, [query_hash(*q) for q in queries], results, k)
+    return len(queries)
+
+
+def current_high_water_mark() -> Tuple[Optional[str], List[int]]:
+    """Latest ``updated_at`` in the table and the IDs of the rows carrying it.
+
+    Syncs select ``updated_at >= mark`` minus those IDs, so a row stamped
+    with the same instant but committed after the mark was read is not
+    skipped. ``(None, [])`` if the column is unavailable.
+    """
+    try:
+        rows = fetch_all(
+            """
+            SELECT internship_id, updated_at
+            FROM internships
+            WHERE updated_at = (SELECT max(updated_at) FROM internships)
+            """
+        )
+    except Exception as e:
+        print(f"[vectordb] updated_at unavailable ({e}); incremental sync will only pick up new IDs.")
+        return None, []
+    if not rows:
+        return None, []
+    value = rows[0][1]
+    mark = value.isoformat() if hasattr(value, "isoformat") else str(value)
+    return mark, sorted(int(row[0]) for row in rows)
+
+
+class EncodedChunk(NamedTuple):
+    rows: List[tuple]  # the chunk's indexable rows, in order
+    vectors: sp.csr_matrix  # their L2-normalized TF-IDF rows
+    max_id: Optional[int]  # highest internship_id in the chunk, indexable or not
 
-    # build index
-    index = faiss.IndexFlatIP(mat.shape[1])
-    index.add(mat)
 
-    # persist
-    Path("DB/vectordb").mkdir(parents=True, exist_ok=True)
-    faiss.write_index(index, INDEX_PATH)
-    np.save(IDS_PATH, np.array(ids))
-    print(f"Built index with {index.ntotal} items -> {INDEX_PATH}")
+_worker_vectorizers: Dict[str, object] = {}
+
+
+def encode_chunk(task: Tuple[str, List[tuple]]) -> EncodedChunk:
+    """Index text and TF-IDF rows for one streamed chunk; runs in build workers."""
+    vectorizer_dir, rows = task
+    vectorizer = _worker_vectorizers.get(vectorizer_dir)
+    if vectorizer is None:
+        vectorizer = _worker_vectorizers[vectorizer_dir] = load_vectorizer(path=Path(vectorizer_dir))
+    indexed, texts = [], []
+    for row in rows:
+        text = row_text(row)
+        if text is not None:
+            indexed.append(row)
+            texts.append(text)
+    vectors = encode_texts(vectorizer, texts) if texts else None
+    return EncodedChunk(indexed, vectors, max((r[0] for r in rows), default=None))
+
+
+class _Progress:
+    """Prints ``[build]`` progress lines at most every ``BUILD_CONFIG['progress_interval']`` seconds."""
+
+    def __init__(self, stage: str, total: int):
+        self.stage = stage
+        self.total = total
+        self.started = self.last = time.perf_counter()
+
+    def __call__(self, done: int) -> None:
+        interval = BUILD_CONFIG["progress_interval"]
+        now = time.perf_counter()
+        if interval <= 0 or (now - self.last < interval and done < self.total):
+            return
+        self.last = now
+        share = f" ({100 * done / self.total:.1f}%)" if self.total else ""
+        print(f"[build] {self.stage}: {done}/{self.total} rows{share}, {now - self.started:.1f}s")
+
+
+def _add_dense(index, vectors: sp.csr_matrix, first_position: int, svd) -> None:
+    """Densify (or project) ``vectors`` in slices of ~``_ADD_BATCH_BYTES`` and add them."""
+    dim = svd.n_components if svd is not None else vectors.shape[1]
+    step = max(1, _ADD_BATCH_BYTES // (4 * dim))
+    for start in range(0, vectors.shape[0], step):
+        part = vectors[start:start + step]
+        positions = np.arange(first_position + start, first_position + start + part.shape[0], dtype="int64")
+        index.add_with_ids(embed_dense(part, svd), positions)
+
+
+def build_index():
+    """Build and publish a new generation from every active internship.
+
+    The table is streamed through a server-side cursor in
+    ``BUILD_CONFIG['chunk_size']`` chunks. Chunks are encoded on a pool of
+    worker processes and added to the index (and metadata store) as they
+    arrive, so memory holds the index being built plus a few chunks rather
+    than every row, text and dense vector at once. IVF/PQ quantizers and the
+    SVD are trained on the first ``BUILD_CONFIG['train_size']`` rows.
+
+    Holds the ``Artifacts.exclusive()`` writer lock throughout, so no sync
+    or collaborative run in any worker publishes in between.
+    """
+    with Artifacts.exclusive():
+        return _build_locked()
+
+
+def _build_locked():
+    total = int(fetch_all("SELECT count(*) FROM internships WHERE is_active = true")[0][0])
+    with ChunkPool.for_tasks(BUILD_CONFIG["workers"], math.ceil(total / BUILD_CONFIG["chunk_size"])) as pool:
+        # load or train vectorizer; its vocabulary follows the skill alias table,
+        # so refit it when the published generation was built under another one
+        published = Artifacts.current_generation()
+        vectorizer = None
+        if not (
+            Artifacts.is_usable(published)
+            and Artifacts.read_manifest(published).get("skill_table") != get_skill_canonicalizer().fingerprint
+        ):
+            try:
+                vectorizer = load_vectorizer(retrain_if_missing=False)
+            except FileNotFoundError:
+                pass
+        if vectorizer is None:
+            vectorizer = train_and_save_vectorizer(force=True, pool=pool, progress=_Progress("fit vectorizer", total))
+
+        # taken before the scan so rows updated mid-build are re-synced later
+        high_water_mark, high_water_ids = current_high_water_mark()
+
+        # everything goes into a fresh generation, published only once complete
+        bundle = Artifacts.stage()
+        try:
+            vectorizer.save(bundle / Artifacts.VECTORIZER_DIR)
+            chunks = fetch_chunks(
+                f"""
+                SELECT {INTERNSHIP_COLUMNS}
+                FROM internships
+                WHERE is_active = true
+                """,
+                chunk_size=BUILD_CONFIG["chunk_size"],
+            )
+            vectorizer_dir = str(bundle / Artifacts.VECTORIZER_DIR)
+            encoded = pool.map(encode_chunk, ((vectorizer_dir, rows) for rows in chunks))
+            index, ids, max_id = _fill(bundle, encoded, total, vectorizer.vocabulary_size, _Progress("index", total))
+            if not len(ids):
+                raise RuntimeError("No internship records to index.")
+
+            # persist
+            write_index_file(bundle, index)
+            save_ids(bundle, ids)
+            # interactions are not rebuilt from scratch: keep the trained model, indexed for the new positions
+            Collaborative.carry_over(bundle, Artifacts.current_generation(), ids)
+            info = bundle_info(index, len(ids))
+            write_popular_table(bundle, index, info)
+            write_sync_state(
+                bundle,
+                {
+                    "high_water_mark": high_water_mark,
+                    "high_water_ids": high_water_ids,
+                    "max_internship_id": int(max_id),
+                    "live": len(ids),
+                    "tombstones": 0,
+                },
+            )
+            generation = Artifacts.publish(bundle, info)
+        except BaseException:
+            Artifacts.discard(bundle)
+            raise
+    print(f"Built {_describe()} index with {index.ntotal} items -> generation {generation}")
+
+    # let an in-process search layer swap to the new generation
+    Search.reload_artifacts()
+
+
+def _fill(bundle: Path, encoded: Iterator[EncodedChunk], total: int, dim: int, progress: _Progress):
+    """Consume encoded chunks into the index and the metadata store; returns (index, ids, max internship_id).
+
+    With ``SEARCH_CONFIG['shards']`` > 1 (dense backend) the index is a
+    ``ShardedIndex``: rows are assigned to shards as they arrive, and the
+    shards are cloned from the base index once it is trained.
+    """
+    sparse = SEARCH_CONFIG["backend"] == "sparse"
+    layout = None
+    if not sparse and SEARCH_CONFIG["shards"] > 1:
+        layout = ShardLayout(SEARCH_CONFIG["shards"], SEARCH_CONFIG["shard_by"])
+    svd = base = index = None
+
+    def id_mapped(base):
+        # FAISS IDs are row positions so incremental syncs can remove and append rows
+        if layout is not None:
+            return ShardedIndex.create(base, layout, total)
+        return faiss.IndexIDMap2(AnnIndex.reserve(base, total))
+
+    if not sparse and SEARCH_CONFIG["embedding"] != "svd":
+        base = AnnIndex.create_index(dim, total, SEARCH_CONFIG, n_train=min(total, BUILD_CONFIG["train_size"]))
+        if base.is_trained:
+            index = id_mapped(base)
+    pending: List[sp.csr_matrix] = []  # dense: the first chunks, until there is enough to train on
+    parts: List[sp.csr_matrix] = []  # sparse: the postings are the index
+    ids: List[np.ndarray] = []
+    count, max_id = 0, None
+
+    def start(matrices):
+        # fit the SVD / train the quantizers on the first rows, then add them
+        nonlocal svd, base, index
+        sample = sp.vstack(matrices).tocsr()
+        if SEARCH_CONFIG["embedding"] == "svd":
+            svd = train_svd(sample, SEARCH_CONFIG["svd_components"])
+            save_pickle(bundle / Artifacts.SVD_FILE, svd)
+            base = AnnIndex.create_index(svd.n_components, total, SEARCH_CONFIG, n_train=sample.shape[0])
+        if not base.is_trained:
+            base.train(embed_dense(sample, svd))
+        index = id_mapped(base)
+        _add_dense(index, sample, 0, svd)
+
+    with MetadataWriter(bundle / Artifacts.METADATA_DIR) as metadata:
+        for chunk in encoded:
+            if chunk.max_id is not None:
+                max_id = chunk.max_id if max_id is None else max(max_id, chunk.max_id)
+            if not chunk.rows:
+                continue
+            # display fields for the search path, row-aligned with the IDs file
+            metadata.add(chunk.rows)
+            if layout is not None:
+                layout.add(chunk.rows)
+            ids.append(np.fromiter((r[0] for r in chunk.rows), dtype="int64", count=len(chunk.rows)))
+            if sparse:
+                parts.append(chunk.vectors)
+            elif index is not None:
+                _add_dense(index, chunk.vectors, count, svd)
+            else:
+                pending.append(chunk.vectors)
+                if count + len(chunk.rows) >= BUILD_CONFIG["train_size"]:
+                    start(pending)
+                    pending = []
+            count += len(chunk.rows)
+            progress(count)
+
+    if not count:
+        return None, np.zeros(0, dtype="int64"), max_id
+    if sparse:
+        index = SparseIndex.from_documents(sp.vstack(parts).tocsr())
+    else:
+        if index is None:
+            start(pending)  # fewer rows than train_size
+        if isinstance(index, ShardedIndex):
+            index.configure_search(SEARCH_CONFIG)
+        else:
+            AnnIndex.configure_search(index, SEARCH_CONFIG)
+    return index, np.concatenate(ids), max_id
+
+
+def _describe() -> str:
+    if SEARCH_CONFIG["backend"] == "sparse":
+        return "sparse"
+    if SEARCH_CONFIG["shards"] > 1:
+        return f"{SEARCH_CONFIG['embedding']}/{SEARCH_CONFIG['index_type']} x{SEARCH_CONFIG['shards']} shards"
+    return f"{SEARCH_CONFIG['embedding']}/{SEARCH_CONFIG['index_type']}"
 
 if __name__ == "__main__":
     build_index()
 
 def ensure_index_built() -> None:
-    """Build the FAISS index if artifacts are missing.
+    """Build the search index if no artifact generation has been published.
 
-    Checks for both the index file and the internship IDs file. If either
-    is missing, it triggers a fresh build using the latest data.
+    Checks that ``DB/vectordb/CURRENT`` names a generation with a manifest
+    in the current bundle format; the manifest is written last, so its
+    presence means the bundle is complete. Otherwise it triggers a fresh
+    build using the latest data.
+
+    The check runs under ``Artifacts.exclusive()``: when several workers
+    start without an index, one builds and the others wait for it, then
+    find its generation and skip the build.
     """
-    index_exists = Path(INDEX_PATH).exists()
-    ids_exists = Path(IDS_PATH).exists()
-    if not (index_exists and ids_exists):
-        print("[vectordb] Index artifacts missing. Building FAISS index...")
-        build_index()
-    else:
-        print(f"[vectordb] Index OK at {INDEX_PATH} (IDs at {IDS_PATH}).")
\ No newline at end of file
+    with Artifacts.exclusive():
+        generation = Artifacts.current_generation()
+        if not Artifacts.is_usable(generation):
+            print("[vectordb] Index artifacts missing. Building search index...")
+            build_index()
+        else:
+            print(f"[vectordb] Index OK at {Artifacts.generation_dir(generation)}.")
@@ -0,0 +1,186 @@
+# Collaborative-filtering factors stored with each generation
+"""
+Student and internship vectors factorized from the interaction log
+(``DB.VectorDB.CollaborativeTraining``), kept in ``collaborative/`` of a
+bundle::
+
+    students.npy          int64 keys of the students (``student_key``), sorted
+    student_factors.npy   float32 (students, f), row i for students[i]
+    items.npy             int64 internship IDs, sorted
+    item_factors.npy      float32 (items, f), row i for items[i]
+    interactions.npz      summed interaction weights, students x items (CSR)
+    faiss.index           IndexFlatIP over item vectors by position in internship_ids.npy
+    manifest.json         training settings, interaction high-water mark, counts (written last)
+
+Everything but ``faiss.index`` is training state, keyed by IDs so it
+survives index rebuilds and syncs. ``faiss.index`` has one row per
+position of the generation's ``internship_ids.npy`` (zero for internships
+nobody interacted with and removed slots), so the positions it returns and
+reconstructs are the content index's. Every build and sync rewrites it for
+its own positions (``write_index``); searching it with a student's vector
+returns the internships the factorization scores highest.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+import scipy.sparse as sp
+
+from Constants.config import SEARCH_CONFIG
+from DB.VectorDB import AnnIndex, Artifacts
+from DB.VectorDB.MetadataStore import count_positions
+
+FORMAT_VERSION = 1
+INDEX_FILE = "faiss.index"
+MANIFEST_FILE = "manifest.json"
+
+
+def student_key(student_id: str) -> int:
+    """Stable 64-bit key of a student ID, the same in every process."""
+    digest = hashlib.blake2b(str(student_id).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+def _atomic_save(path: Path, write) -> None:
+    # the staged file may be a hard link into the previous generation
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+class TrainingState(NamedTuple):
+    """What an incremental training run continues from."""
+
+    students: np.ndarray  # sorted student keys
+    student_factors: np.ndarray
+    items: np.ndarray  # sorted internship IDs
+    item_factors: np.ndarray
+    weights: sp.csr_matrix  # students x items
+    manifest: dict
+
+
+def read_state(directory: Path) -> Optional[TrainingState]:
+    """The training state in ``directory``, or None if nothing was trained there."""
+    directory = Path(directory)
+    if not (directory / MANIFEST_FILE).exists():
+        return None
+    manifest = json.loads((directory / MANIFEST_FILE).read_text())
+    if manifest.get("format_version") != FORMAT_VERSION:
+        return None
+    return TrainingState(
+        students=np.load(directory / "students.npy"),
+        student_factors=np.load(directory / "student_factors.npy"),
+        items=np.load(directory / "items.npy"),
+        item_factors=np.load(directory / "item_factors.npy"),
+        weights=sp.load_npz(directory / "interactions.npz").tocsr(),
+        manifest=manifest,
+    )
+
+
+def write_state(directory: Path, state: TrainingState) -> None:
+    """Persist ``state``; its manifest is written last and marks the directory complete."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name in ("students", "student_factors", "items", "item_factors"):
+        array = getattr(state, name)
+        _atomic_save(directory / f"{name}.npy", lambda f, array=array: np.save(f, array))
+    _atomic_save(directory / "interactions.npz", lambda f: sp.save_npz(f, state.weights))
+    manifest = {"format_version": FORMAT_VERSION, **state.manifest}
+    _atomic_save(directory / MANIFEST_FILE, lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+
+
+def write_index(bundle: Path, ids: np.ndarray) -> bool:
+    """(Re)write ``faiss.index`` of ``bundle`` for its positions ``ids``; False if it has no trained state."""
+    directory = Path(bundle) / Artifacts.COLLABORATIVE_DIR
+    if not (directory / MANIFEST_FILE).exists():
+        return False
+    items = np.load(directory / "items.npy")
+    item_factors = np.load(directory / "item_factors.npy", mmap_mode="r")
+    vectors = np.zeros((len(ids), item_factors.shape[1]), dtype=np.float32)
+    rows = np.minimum(np.searchsorted(items, ids), max(len(items) - 1, 0))
+    known = np.flatnonzero((ids >= 0) & (items[rows] == ids)) if len(items) else np.zeros(0, dtype=np.int64)
+    vectors[known] = item_factors[rows[known]]
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(vectors)
+    tmp = directory / f"{INDEX_FILE}.tmp"
+    faiss.write_index(index, str(tmp))
+    os.replace(tmp, directory / INDEX_FILE)
+    return True
+
+
+def carry_over(bundle: Path, base: Optional[str], ids: np.ndarray) -> bool:
+    """Link the trained state of generation ``base`` into ``bundle`` and index it for ``ids``.
+
+    For builds, which stage a fresh bundle; a sync's bundle already links
+    everything in and only needs ``write_index``.
+    """
+    if base is None or not Artifacts.link_in(bundle, base, Artifacts.COLLABORATIVE_DIR):
+        return False
+    return write_index(bundle, ids)
+
+
+class CollaborativeModel:
+    """The student vectors and item index of one generation, memory-mapped for serving."""
+
+    def __init__(self, directory: Path, mmap: bool = True):
+        directory = Path(directory)
+        self.manifest = json.loads((directory / MANIFEST_FILE).read_text())
+        mode = "r" if mmap else None
+        self._students = np.load(directory / "students.npy", mmap_mode=mode)
+        self._student_factors = np.load(directory / "student_factors.npy", mmap_mode=mode)
+        self.index = AnnIndex.read(str(directory / INDEX_FILE), mmap=mmap)
+
+    @classmethod
+    def open(cls, directory: Path, mmap: bool = True) -> Optional["CollaborativeModel"]:
+        """Open the model, or None if the bundle has none (nothing trained yet)."""
+        directory = Path(directory)
+        if not (directory / MANIFEST_FILE).exists() or not (directory / INDEX_FILE).exists():
+            return None
+        if json.loads((directory / MANIFEST_FILE).read_text()).get("format_version") != FORMAT_VERSION:
+            print(f"[vectordb] Collaborative model in {directory} has an unsupported format; not used.")
+            return None
+        return cls(directory, mmap)
+
+    @property
+    def factors(self) -> int:
+        return int(self.index.d)
+
+    def student_vectors(self, student_ids: Sequence[Optional[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """(vectors, known): a (n, f) float32 block, zero where ``known`` is False (no ID or not trained on)."""
+        vectors = np.zeros((len(student_ids), self.factors), dtype=np.float32)
+        known = np.zeros(len(student_ids), dtype=bool)
+        if not len(self._students):
+            return vectors, known
+        given = [i for i, sid in enumerate(student_ids) if sid]
+        if not given:
+            return vectors, known
+        keys = np.array([student_key(student_ids[i]) for i in given], dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self._students, keys), len(self._students) - 1)
+        found = self._students[rows] == keys
+        given = np.array(given, dtype=np.int64)[found]
+        known[given] = True
+        vectors[given] = self._student_factors[rows[found]]
+        return vectors, known
+
+    def item_vectors(self, positions: np.ndarray) -> np.ndarray:
+        """The item vectors at ``positions`` (content index positions)."""
+        return AnnIndex.reconstruct(self.index, positions)
+
+    def search(self, vectors: np.ndarray, k: int, selection: Optional[np.ndarray] = None):
+        """(scores, positions) of the ``k`` highest inner products, restricted to the ``selection`` bitmap if given."""
+        if selection is None:
+            return self.index.search(vectors, k)
+        count = count_positions(selection)
+        return AnnIndex.search_filtered(self.index, vectors, k, selection, count, SEARCH_CONFIG["filter_exact_max"])
+
+    def stats(self) -> dict:
+        return {
+            "factors": self.factors,
+            "students": int(len(self._students)),
+            **{key: self.manifest.get(key) for key in ("items", "interactions", "high_water_mark", "trained_at", "mode")},
+        }
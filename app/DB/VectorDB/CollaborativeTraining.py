@@ -0,0 +1,281 @@
+# Collaborative model training from the interaction log
+"""
+Reads the ``interactions`` table (views and applications, see
+``Services.InteractionService``), factorizes the summed interaction weights
+with implicit-feedback ALS (``RecommenderModel.ImplicitALS``) and publishes
+the factors as ``collaborative/`` of a new generation derived from the
+published one (``DB.VectorDB.Collaborative``).
+
+Training is incremental: a run reads only the interactions logged after
+the previous run's high-water mark (the largest ``interaction_id`` seen),
+adds them to the stored weights and runs
+``COLLAB_CONFIG['incremental_iterations']`` ALS sweeps warm-started from the
+stored factors. A full run (requested, or when the stored model was
+trained under other settings) reads the whole log and runs
+``COLLAB_CONFIG['iterations']`` sweeps from random factors. Either way the
+cost is a fixed number of passes over the interaction matrix, and no sweep
+starts after ``COLLAB_CONFIG['max_seconds']``.
+
+``interaction_id`` is assumed to grow in commit order; rows committed late
+with a smaller ID than one already read are skipped until the next full run.
+"""
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from Constants.config import BUILD_CONFIG, COLLAB_CONFIG
+from DB.Postgres import fetch_chunks
+from DB.VectorDB import Artifacts, Collaborative, IndexSync, Search
+from DB.VectorDB.Collaborative import TrainingState
+from RecommenderModel import ImplicitALS
+
+
+class TrainingInProgressError(RuntimeError):
+    """Raised when a non-blocking training run is requested while another one runs."""
+
+
+_last_report: Optional[dict] = None
+
+
+def _settings() -> dict:
+    """Settings the stored factors depend on; a model trained under others is retrained in full."""
+    return {
+        key: COLLAB_CONFIG[key]
+        for key in ("factors", "alpha", "regularization", "view_weight", "apply_weight")
+    }
+
+
+def read_interactions(after: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[int]]:
+    """Interactions logged after ``interaction_id`` ``after``.
+
+    Returns (student keys, internship IDs, weights, highest interaction_id
+    read or None), one entry per interaction with a positive weight.
+    """
+    kind_weights = {"view": COLLAB_CONFIG["view_weight"], "apply": COLLAB_CONFIG["apply_weight"]}
+    keys_of = {}  # student_id -> key; students interact many times
+    keys, items, weights = [], [], []
+    high_water_mark = None
+    for rows in fetch_chunks(
+        """
+        SELECT interaction_id, student_id, internship_id, kind
+        FROM interactions
+        WHERE interaction_id > %s
+        ORDER BY interaction_id
+        """,
+        (after,),
+        chunk_size=BUILD_CONFIG["chunk_size"],
+    ):
+        _, student_ids, internship_ids, kinds = zip(*rows)
+        for student_id in set(student_ids).difference(keys_of):
+            keys_of[student_id] = Collaborative.student_key(student_id)
+        keys.append(np.array([keys_of[s] for s in student_ids], dtype=np.int64))
+        items.append(np.array(internship_ids, dtype=np.int64))
+        weights.append(np.array([kind_weights.get(k, 0.0) for k in kinds], dtype=np.float32))
+        high_water_mark = int(rows[-1][0])
+    if not keys:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, np.float32), None
+    keys, items, weights = np.concatenate(keys), np.concatenate(items), np.concatenate(weights)
+    keep = weights > 0
+    return keys[keep], items[keep], weights[keep], high_water_mark
+
+
+def _merge(
+    state: Optional[TrainingState], keys: np.ndarray, items: np.ndarray, weights: np.ndarray, rng: np.random.Generator
+) -> TrainingState:
+    """``state`` (None: nothing yet) with the new interactions added; new students and internships get random factors."""
+    factors = COLLAB_CONFIG["factors"]
+    prior_students = state.students if state is not None else np.zeros(0, np.int64)
+    prior_items = state.items if state is not None else np.zeros(0, np.int64)
+    students = np.union1d(prior_students, keys)
+    all_items = np.union1d(prior_items, items)
+
+    student_factors = ImplicitALS.init_factors(len(students), factors, rng)
+    item_factors = ImplicitALS.init_factors(len(all_items), factors, rng)
+    rows = [np.searchsorted(students, keys)]
+    cols = [np.searchsorted(all_items, items)]
+    values = [weights]
+    if state is not None:
+        student_rows = np.searchsorted(students, prior_students)
+        item_rows = np.searchsorted(all_items, prior_items)
+        student_factors[student_rows] = state.student_factors
+        item_factors[item_rows] = state.item_factors
+        prior = state.weights.tocoo()
+        rows.append(student_rows[prior.row])
+        cols.append(item_rows[prior.col])
+        values.append(prior.data.astype(np.float32))
+    # duplicates (repeat views, a view then an apply) are summed
+    matrix = sp.coo_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))), shape=(len(students), len(all_items))
+    ).tocsr()
+    return TrainingState(students, student_factors, all_items, item_factors, matrix, {})
+
+
+def _publish(state: TrainingState) -> str:
+    """Publish the published generation with ``state`` as its collaborative model."""
+    with IndexSync.paused():
+        base = Artifacts.current_generation()
+        manifest = Artifacts.read_manifest(base)
+        bundle = Artifacts.stage(base)
+        try:
+            Collaborative.write_state(bundle / Artifacts.COLLABORATIVE_DIR, state)
+            Collaborative.write_index(bundle, np.load(bundle / Artifacts.IDS_FILE))
+            info = {
+                key: value
+                for key, value in manifest.items()
+                if key not in ("format_version", "generation", "created_at", "files")
+            }
+            generation = Artifacts.publish(bundle, info)
+        except BaseException:
+            Artifacts.discard(bundle)
+            raise
+    Search.reload_artifacts()
+    return generation
+
+
+def _progress(done: int, elapsed: float) -> None:
+    if BUILD_CONFIG["progress_interval"] > 0:
+        print(f"[collab] ALS sweep {done}: {elapsed:.1f}s")
+
+
+def _train_locked(full: bool) -> dict:
+    started = time.perf_counter()
+    base = Artifacts.current_generation()
+    if not Artifacts.is_usable(base):
+        raise RuntimeError("No published index generation to add the collaborative model to; build the index first.")
+
+    state, reason = None, "requested"
+    if not full:
+        state = Collaborative.read_state(Artifacts.generation_dir(base) / Artifacts.COLLABORATIVE_DIR)
+        reason = "no previous model"
+        if state is not None and state.manifest.get("settings") != _settings():
+            state, reason = None, "settings changed"
+    after = state.manifest["high_water_mark"] if state is not None else 0
+    seconds = {}
+
+    step = time.perf_counter()
+    keys, items, weights, high_water_mark = read_interactions(after)
+    seconds["read"] = time.perf_counter() - step
+    report = {"mode": "full" if state is None else "incremental", "new_interactions": int(len(keys))}
+    if state is None:
+        report["reason"] = reason
+    if not len(keys):
+        return {**report, "generation": base, "seconds": round(time.perf_counter() - started, 3)}
+
+    step = time.perf_counter()
+    rng = np.random.default_rng(high_water_mark)
+    merged = _merge(state, keys, items, weights, rng)
+    seconds["aggregate"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    iterations = COLLAB_CONFIG["iterations"] if state is None else COLLAB_CONFIG["incremental_iterations"]
+    student_factors, item_factors, sweeps = ImplicitALS.fit(
+        merged.weights,
+        merged.student_factors,
+        merged.item_factors,
+        iterations,
+        alpha=COLLAB_CONFIG["alpha"],
+        regularization=COLLAB_CONFIG["regularization"],
+        cg_steps=COLLAB_CONFIG["cg_steps"],
+        max_seconds=COLLAB_CONFIG["max_seconds"],
+        progress=_progress,
+    )
+    seconds["train"] = time.perf_counter() - step
+
+    summary = {
+        "mode": report["mode"],
+        "settings": _settings(),
+        "high_water_mark": high_water_mark,
+        "students": int(len(merged.students)),
+        "items": int(len(merged.items)),
+        "interactions": int(merged.weights.nnz),
+        "events": int(len(keys)) + (state.manifest["events"] if state is not None else 0),
+        "iterations": sweeps,
+        "trained_at": time.time(),
+    }
+    step = time.perf_counter()
+    generation = _publish(merged._replace(student_factors=student_factors, item_factors=item_factors, manifest=summary))
+    seconds["publish"] = time.perf_counter() - step
+
+    return {
+        **report,
+        **{key: summary[key] for key in ("students", "items", "interactions", "events", "iterations", "high_water_mark")},
+        "generation": generation,
+        "stage_seconds": {key: round(value, 3) for key, value in seconds.items()},
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def train_collaborative(full: bool = False, blocking: bool = True) -> dict:
+    """Fold new interactions into the collaborative model and publish it with the index.
+
+    Incremental unless ``full`` (see the module docstring). Returns a
+    report of what was read and trained and how long each stage took.
+
+    Runs under the ``collaborative`` lock of ``Artifacts.exclusive``, so of
+    several workers' schedulers one trains and the others skip that round.
+    """
+    global _last_report
+
+    try:
+        with Artifacts.exclusive("collaborative", blocking=blocking):
+            report = _train_locked(full)
+    except Artifacts.LockBusyError:
+        raise TrainingInProgressError("A collaborative training run is already running")
+    report["finished_at"] = time.time()
+    _last_report = report
+    print(f"[collab] Training: {report}")
+    return report
+
+
+def get_last_report() -> Optional[dict]:
+    return _last_report
+
+
+class _TrainingScheduler(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(name="collab-training", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                train_collaborative(blocking=False)
+            except TrainingInProgressError:
+                pass
+            except Exception as e:
+                print(f"[collab] Scheduled training failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_scheduler: Optional[_TrainingScheduler] = None
+
+
+def start_training_scheduler() -> None:
+    """Run ``train_collaborative`` every ``COLLAB_CONFIG['train_interval']`` seconds (if > 0)."""
+    global _scheduler
+
+    interval = COLLAB_CONFIG["train_interval"]
+    if interval <= 0 or _scheduler is not None:
+        return
+    _scheduler = _TrainingScheduler(interval)
+    _scheduler.start()
+
+
+def stop_training_scheduler() -> None:
+    global _scheduler
+
+    if _scheduler is not None:
+        _scheduler.stop()
+        _scheduler = None
+
+
+if __name__ == "__main__":
+    import sys
+
+    train_collaborative(full="--full" in sys.argv)
@@ -0,0 +1,114 @@
+# Diversity-aware choice of the top k among search candidates
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from Constants.config import DIVERSITY_CONFIG
+
+MODES = ("mmr", "company")
+
+
+class DiversityQuery(NamedTuple):
+    """How a request's top k is diversified; hashable, so it can key the result cache."""
+
+    mode: str  # one of MODES
+    mmr_lambda: float  # weight of relevance against redundancy (MMR only)
+    max_per_company: int  # 0 = no cap
+
+    @classmethod
+    def create(
+        cls, mode: Optional[str], mmr_lambda: Optional[float] = None, max_per_company: Optional[int] = None
+    ) -> Optional["DiversityQuery"]:
+        """A query with ``DIVERSITY_CONFIG`` defaults for unset knobs, or None without a ``mode``."""
+        if not mode:
+            return None
+        if mode not in MODES:
+            raise ValueError(f"Unknown diversity mode {mode!r}; expected one of {MODES}")
+        mmr_lambda = DIVERSITY_CONFIG["mmr_lambda"] if mmr_lambda is None else float(mmr_lambda)
+        max_per_company = DIVERSITY_CONFIG["max_per_company"] if max_per_company is None else int(max_per_company)
+        if not 0.0 <= mmr_lambda <= 1.0:
+            raise ValueError("mmr_lambda must be between 0 and 1")
+        if max_per_company < 0:
+            raise ValueError("max_per_company must not be negative")
+        return cls(mode, mmr_lambda if mode == "mmr" else 1.0, max_per_company)
+
+
+def pairwise_similarities(vectors) -> np.ndarray:
+    """(n, n) inner products of the candidate ``vectors`` (dense or sparse rows) in one product."""
+    similarities = vectors @ vectors.T
+    if sp.issparse(similarities):
+        return similarities.toarray()
+    return similarities
+
+
+def _company_ranks(codes: np.ndarray) -> np.ndarray:
+    """For each candidate, how many earlier candidates share its company."""
+    order = np.argsort(codes, kind="stable")
+    grouped = codes[order]
+    starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+    ranks = np.empty(len(codes), dtype=np.int64)
+    ranks[order] = np.arange(len(codes)) - np.repeat(starts, np.diff(np.r_[starts, len(codes)]))
+    return ranks
+
+
+def _mmr(
+    relevance: np.ndarray,
+    similarities: np.ndarray,
+    k: int,
+    mmr_lambda: float,
+    companies: Optional[np.ndarray],
+    max_per_company: int,
+) -> np.ndarray:
+    """Greedy MMR: the indices of up to ``k`` candidates, in the order picked.
+
+    Each step is one vectorized pass over the candidates: the redundancy of
+    every candidate is its highest similarity to those picked so far
+    (negative similarity counts as none), updated with one row of
+    ``similarities`` per pick.
+    """
+    available = np.ones(len(relevance), dtype=bool)
+    redundancy = np.zeros(len(relevance))
+    weighted = mmr_lambda * relevance
+    picked = []
+    taken = {}
+    for _ in range(min(k, len(relevance))):
+        gain = np.where(available, weighted - (1.0 - mmr_lambda) * redundancy, -np.inf)
+        best = int(np.argmax(gain))
+        if not available[best]:
+            break  # every remaining candidate is capped
+        picked.append(best)
+        available[best] = False
+        np.maximum(redundancy, similarities[best], out=redundancy)
+        if max_per_company and companies is not None and companies[best] >= 0:
+            company = companies[best]
+            taken[company] = taken.get(company, 0) + 1
+            if taken[company] >= max_per_company:
+                available &= companies != company
+    return np.array(picked, dtype=np.int64)
+
+
+def diversify(
+    positions: np.ndarray,
+    scores: np.ndarray,
+    query: DiversityQuery,
+    k: int,
+    similarities: Optional[np.ndarray] = None,
+    companies: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """``k`` of the candidate ``positions`` (best first, with their relevance ``scores``) chosen for diversity.
+
+    ``similarities`` (``pairwise_similarities`` of the candidates' vectors)
+    is required for MMR; ``companies`` (company codes, -1 for none) enables
+    the per-company cap. The chosen hits keep their relevance scores, in the
+    order MMR picked them or, for the company cap, in relevance order.
+    """
+    if not len(positions):
+        return positions, scores
+    if query.mode == "mmr":
+        chosen = _mmr(scores.astype(np.float64), similarities, k, query.mmr_lambda, companies, query.max_per_company)
+    elif query.max_per_company and companies is not None:
+        chosen = np.flatnonzero((companies < 0) | (_company_ranks(companies) < query.max_per_company))[:k]
+    else:
+        chosen = np.arange(min(k, len(positions)))
+    return positions[chosen], scores[chosen]
@@ -0,0 +1,285 @@
+# Incremental index sync from the internships table
+import pickle
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from Constants.config import SEARCH_CONFIG, SYNC_CONFIG
+from DB.Postgres import fetch_all
+from DB.VectorDB import AnnIndex, Artifacts, BuildIndex, Collaborative, Search
+from DB.VectorDB.MetadataStore import MetadataStore
+from DB.VectorDB.ShardedIndex import ShardedIndex
+from DB.VectorDB.SparseIndex import SparseIndex
+from RecommenderModel.Vectorizer import load_vectorizer
+from Utils.SkillNormalizer import get_skill_canonicalizer
+
+
+class SyncInProgressError(RuntimeError):
+    """Raised when a non-blocking sync is requested while another one runs."""
+
+
+_last_report: Optional[dict] = None
+
+
+def _load_index(bundle: Path, manifest: dict):
+    # A private, writable copy; the new generation is written next to the old one.
+    if manifest["backend"] == "sparse":
+        return SparseIndex.read(str(bundle / Artifacts.SPARSE_INDEX_DIR), mmap=False)
+    if manifest.get("shards"):
+        return ShardedIndex.read(bundle / Artifacts.SHARDS_DIR, mmap=False, workers=1)
+    return AnnIndex.read(str(bundle / Artifacts.INDEX_FILE), mmap=False)
+
+
+def _load_pickle(path: Path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _config_mismatch(manifest: dict) -> Optional[str]:
+    """Why the published bundle can't be extended under the current SEARCH_CONFIG, if so."""
+    if manifest.get("backend") != SEARCH_CONFIG["backend"]:
+        return "search backend changed"
+    if manifest["backend"] == "dense" and (
+        manifest.get("embedding") != SEARCH_CONFIG["embedding"]
+        or manifest.get("index_type") != SEARCH_CONFIG["index_type"]
+    ):
+        return "embedding or index type changed"
+    if manifest["backend"] == "dense" and (
+        manifest.get("shards", 1) != max(1, SEARCH_CONFIG["shards"])
+        or (manifest.get("shards") and manifest.get("shard_by") != SEARCH_CONFIG["shard_by"])
+    ):
+        return "shard layout changed"
+    if manifest.get("skill_table") != get_skill_canonicalizer().fingerprint:
+        return "skill alias table changed"
+    return None
+
+
+def _full_rebuild(started: float, reason: str) -> dict:
+    BuildIndex.build_index()
+    generation = Artifacts.current_generation()
+    return {
+        "mode": "full",
+        "reason": reason,
+        "generation": generation,
+        "live": Artifacts.read_manifest(generation)["live"],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _changed_rows(state: dict):
+    """Rows touched since the last sync, with their ``is_active`` flag appended.
+
+    Rows stamped exactly at the high-water mark are re-read unless their
+    ID was recorded with it; states written before the IDs were tracked
+    re-read all of them.
+    """
+    if state.get("high_water_mark") is not None:
+        return fetch_all(
+            f"""
+            SELECT {BuildIndex.INTERNSHIP_COLUMNS}, is_active
+            FROM internships
+            WHERE updated_at > %s
+               OR (updated_at = %s AND NOT (internship_id = ANY(%s)))
+            """,
+            (state["high_water_mark"], state["high_water_mark"], state.get("high_water_ids", [])),
+        )
+    # Without updated_at only new IDs can be detected.
+    return fetch_all(
+        f"""
+        SELECT {BuildIndex.INTERNSHIP_COLUMNS}, is_active
+        FROM internships
+        WHERE internship_id > %s
+        """,
+        (state["max_internship_id"],),
+    )
+
+
+def _sync_locked(force_full: bool) -> dict:
+    started = time.perf_counter()
+    if force_full:
+        return _full_rebuild(started, "requested")
+
+    base = Artifacts.current_generation()
+    if base is None:
+        return _full_rebuild(started, "no previous build")
+    base_dir = Artifacts.generation_dir(base)
+    try:
+        manifest = Artifacts.read_manifest(base)
+    except Artifacts.BundleError:
+        return _full_rebuild(started, "previous generation incomplete")
+    mismatch = _config_mismatch(manifest)
+    if mismatch:
+        return _full_rebuild(started, mismatch)
+
+    state = BuildIndex.read_sync_state(base_dir)
+    index = _load_index(base_dir, manifest)
+    if not isinstance(index, (SparseIndex, ShardedIndex, faiss.IndexIDMap)):
+        return _full_rebuild(started, "index predates ID-mapped layout")
+
+    high_water_mark, high_water_ids = (
+        BuildIndex.current_high_water_mark() if state.get("high_water_mark") else (None, [])
+    )
+    rows = _changed_rows(state)
+    if not rows:
+        return {"mode": "incremental", "generation": base, "added": 0, "removed": 0, "live": state["live"],
+                "seconds": round(time.perf_counter() - started, 3)}
+
+    ids = np.load(base_dir / Artifacts.IDS_FILE).astype("int64")
+    changed_ids = np.array([row[0] for row in rows], dtype="int64")
+    remove_slots = np.nonzero(np.isin(ids, changed_ids))[0].astype("int64")
+    upserts = [row[:6] for row in rows if row[6] and BuildIndex.row_text(row) is not None]
+
+    live = state["live"] - len(remove_slots) + len(upserts)
+    tombstones = state["tombstones"] + len(remove_slots)
+    change_ratio = (len(remove_slots) + len(upserts)) / max(1, state["live"])
+    if change_ratio > SYNC_CONFIG["max_change_ratio"]:
+        return _full_rebuild(started, f"change ratio {change_ratio:.2f} above threshold")
+    if tombstones > SYNC_CONFIG["max_tombstone_ratio"] * max(1, live + tombstones):
+        return _full_rebuild(started, "compacting removed slots")
+
+    try:
+        if len(remove_slots) and isinstance(index, SparseIndex):
+            index.remove(remove_slots)
+        elif len(remove_slots) and isinstance(index, ShardedIndex):
+            index.remove_ids(remove_slots)
+        elif len(remove_slots):
+            AnnIndex.remove_ids(index, remove_slots)
+    except RuntimeError as e:
+        # e.g. HNSW cannot delete vectors
+        return _full_rebuild(started, f"index type cannot remove vectors ({e})")
+
+    if upserts:
+        # encode with the models of the generation being extended, not Constants/
+        vectorizer = load_vectorizer(path=base_dir / Artifacts.VECTORIZER_DIR)
+        sparse_mat = BuildIndex.encode_texts(vectorizer, [BuildIndex.row_text(r) for r in upserts])
+        new_slots = np.arange(len(ids), len(ids) + len(upserts), dtype="int64")
+        if isinstance(index, SparseIndex):
+            index.add(sparse_mat)
+        else:
+            svd_path = base_dir / Artifacts.SVD_FILE
+            svd = _load_pickle(svd_path) if svd_path.exists() else None
+            if isinstance(index, ShardedIndex):
+                index.layout.add(upserts)
+            index.add_with_ids(BuildIndex.embed_dense(sparse_mat, svd), new_slots)
+
+    ids[remove_slots] = -1
+    ids = np.concatenate([ids, np.array([r[0] for r in upserts], dtype="int64")])
+
+    # unchanged files (vectorizer, SVD, metadata columns) are hard-linked in
+    bundle = Artifacts.stage(base)
+    try:
+        BuildIndex.write_index_file(bundle, index)
+        BuildIndex.save_ids(bundle, ids)
+        MetadataStore.append(bundle / Artifacts.METADATA_DIR, upserts)
+        # the linked-in collaborative model, indexed for the new positions
+        Collaborative.write_index(bundle, ids)
+        info = BuildIndex.bundle_info(index, live)
+        # the previous generation's results may rank removed or outdated rows
+        BuildIndex.write_popular_table(bundle, index, info)
+        BuildIndex.write_sync_state(
+            bundle,
+            {
+                "high_water_mark": high_water_mark,
+                "high_water_ids": high_water_ids,
+                "max_internship_id": int(max(state["max_internship_id"], changed_ids.max())),
+                "live": live,
+                "tombstones": tombstones,
+            },
+        )
+        generation = Artifacts.publish(bundle, info)
+    except BaseException:
+        Artifacts.discard(bundle)
+        raise
+    Search.reload_artifacts()
+
+    return {
+        "mode": "incremental",
+        "generation": generation,
+        "added": len(upserts),
+        "removed": int(len(remove_slots)),
+        "live": live,
+        "tombstones": tombstones,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def sync_index(force_full: bool = False, blocking: bool = True) -> dict:
+    """Bring the index up to date with the internships table.
+
+    New rows are appended, deactivated rows removed and edited rows
+    re-embedded, based on an ``updated_at`` high-water mark recorded at
+    the previous build/sync. Falls back to a full rebuild when there is no
+    previous build, when too much changed, when removed slots pile up, or
+    when the index type cannot delete vectors (HNSW).
+
+    Holds the ``Artifacts.exclusive()`` writer lock, shared by every worker
+    process, so each scheduled sync runs once per deployment.
+    """
+    global _last_report
+
+    try:
+        with Artifacts.exclusive(blocking=blocking):
+            report = _sync_locked(force_full)
+    except Artifacts.LockBusyError:
+        raise SyncInProgressError("An index sync or build is already running") from None
+    report["finished_at"] = time.time()
+    _last_report = report
+    print(f"[vectordb] Index sync: {report}")
+    return report
+
+
+@contextmanager
+def paused():
+    """Hold off index syncs and builds, in every worker, while another writer derives a generation from the published one."""
+    with Artifacts.exclusive():
+        yield
+
+
+def get_last_report() -> Optional[dict]:
+    return _last_report
+
+
+class _SyncScheduler(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(name="index-sync", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                sync_index(blocking=False)
+            except SyncInProgressError:
+                pass
+            except Exception as e:
+                print(f"[vectordb] Scheduled index sync failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_scheduler: Optional[_SyncScheduler] = None
+
+
+def start_scheduler() -> None:
+    """Run ``sync_index`` every ``SYNC_CONFIG['interval_seconds']`` (if > 0)."""
+    global _scheduler
+
+    interval = SYNC_CONFIG["interval_seconds"]
+    if interval <= 0 or _scheduler is not None:
+        return
+    _scheduler = _SyncScheduler(interval)
+    _scheduler.start()
+
+
+def stop_scheduler() -> None:
+    global _scheduler
+
+    if _scheduler is not None:
+        _scheduler.stop()
+        _scheduler = None
@@ -0,0 +1,534 @@
+# Columnar internship metadata aligned with internship_ids.npy positions
+import json
+import mmap
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Utils.Json import dumps
+from Utils.SkillNormalizer import get_skill_canonicalizer
+
+STRING_COLUMNS = ("internship_title", "company", "domain")
+# preformatted JSON of each row's RecommendationResponse fields, see response_fragments
+FRAGMENT_COLUMNS = ("response_head", "response_tail")
+# 2: per-domain position bitmaps for filtered search, 3: skill bitsets, 4: response fragments,
+# 5: company codes
+FORMAT_VERSION = 5
+
+# set bits per byte value, for counting bits in packed bitmaps / bitsets
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+class InternshipMeta(NamedTuple):
+    internship_id: int
+    internship_title: str
+    company: str
+    domain: str
+    required_skills: List[str]
+    stipend: float
+
+
+def split_skills(skills) -> List[str]:
+    """Split the comma-separated ``required_skills`` column into a clean list."""
+    if skills is None:
+        return []
+    return [s.strip() for s in str(skills).split(",") if s.strip()]
+
+
+def meta_from_row(row: tuple) -> InternshipMeta:
+    """An (internship_id, title, company, domain, required_skills, stipend) row as stored."""
+    iid, title, company, domain, skills, stipend = row
+    return InternshipMeta(
+        internship_id=iid,
+        internship_title=title or "",
+        company=company or "",
+        domain=domain or "",
+        required_skills=split_skills(skills),
+        stipend=float(stipend) if stipend is not None else 0.0,
+    )
+
+
+def response_fragments(meta: InternshipMeta) -> Tuple[bytes, bytes]:
+    """The internship's fields of a ``RecommendationResponse`` as JSON object members.
+
+    The per-request ``rank`` and ``similarity_score`` go around them in
+    schema order: ``{"rank":1,<head>"similarity_score":0.8,<tail>}``.
+    """
+    head = b'"internship_id":%s,"internship_title":%s,"company":%s,' % (
+        dumps(str(meta.internship_id)), dumps(meta.internship_title), dumps(meta.company)
+    )
+    tail = b'"required_skills":%s,"stipend":%s,"domain":%s' % (
+        dumps(meta.required_skills), dumps(float(meta.stipend)), dumps(meta.domain)
+    )
+    return head, tail
+
+
+def domain_key(domain) -> str:
+    """Case- and spacing-insensitive form of a domain, as matched by filters."""
+    return " ".join(str(domain or "").lower().split())
+
+
+def _company_code(companies: Dict[str, int], company) -> int:
+    """Code of ``company`` (as ``domain_key`` normalizes it), assigned on first sight; -1 if blank."""
+    key = domain_key(company)
+    return companies.setdefault(key, len(companies)) if key else -1
+
+
+def pack_positions(mask: np.ndarray) -> np.ndarray:
+    """Boolean position mask -> packed bitmap (bit ``i & 7`` of byte ``i >> 3``), FAISS's layout."""
+    return np.packbits(mask, bitorder="little")
+
+
+def count_positions(bitmap: np.ndarray) -> int:
+    return int(_POPCOUNT[bitmap].sum())
+
+
+def _popcount_rows(words: np.ndarray) -> np.ndarray:
+    """Set bits per row of a 2-D uint64 array."""
+    if hasattr(np, "bitwise_count"):  # numpy >= 2
+        return np.bitwise_count(words).sum(axis=1)
+    return _POPCOUNT[np.ascontiguousarray(words).view(np.uint8)].sum(axis=1)
+
+
+def _atomic_save(path: Path, write) -> None:
+    # Readers may have the previous file memory-mapped; replacing the
+    # directory entry (instead of truncating in place) keeps their view valid.
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def _load_mapped(path: Path) -> np.ndarray:
+    # A plain ndarray view of the map: same pages, without np.memmap's
+    # per-indexing overhead on the hot path.
+    return np.load(path, mmap_mode="r").view(np.ndarray)
+
+
+def _offsets_for(encoded: List[bytes], base: int = 0) -> np.ndarray:
+    offsets = np.empty(len(encoded) + 1, dtype=np.int64)
+    offsets[0] = base
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    offsets[1:] += base
+    return offsets
+
+
+def _append_strings(directory: Path, name: str, values: Iterable[str]) -> None:
+    _append_blobs(directory, name, [(v or "").encode("utf-8") for v in values])
+
+
+def _append_blobs(directory: Path, name: str, encoded: List[bytes]) -> None:
+    old_offsets = _load_mapped(directory / f"{name}.offsets.npy")
+    offsets = np.concatenate([old_offsets, _offsets_for(encoded, int(old_offsets[-1]))[1:]])
+    _atomic_save(directory / f"{name}.offsets.npy", lambda f: np.save(f, offsets))
+
+    def write_blob(f):
+        with open(directory / f"{name}.bin", "rb") as old:
+            shutil.copyfileobj(old, f)
+        f.write(b"".join(encoded))
+
+    _atomic_save(directory / f"{name}.bin", write_blob)
+
+
+def _write_manifest(directory: Path, size: int) -> None:
+    # The manifest goes last so a reader never sees it ahead of the columns.
+    manifest = {"format_version": FORMAT_VERSION, "size": size}
+    _atomic_save(directory / "manifest.json", lambda f: f.write(json.dumps(manifest).encode()))
+
+
+class _StringColumn:
+    """UTF-8 blob + int64 offsets, both memory-mapped."""
+
+    def __init__(self, directory: Path, name: str):
+        self._offsets = _load_mapped(directory / f"{name}.offsets.npy")
+        with open(directory / f"{name}.bin", "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.raw(i).decode("utf-8")
+
+    def raw(self, i: int) -> bytes:
+        return self._blob[self._offsets[i]:self._offsets[i + 1]]
+
+
+class MetadataWriter:
+    """Writes a new metadata store from rows added in chunks.
+
+    Strings go straight to their blob files; per row only offsets, the
+    numeric columns, a domain code and the skill columns are kept until
+    ``close``, so a streamed build never holds the rows themselves. The
+    output is identical to ``MetadataStore.write`` of all rows at once.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.size = 0
+        self._blobs = {name: open(self.directory / f"{name}.bin.tmp", "wb") for name in (*STRING_COLUMNS, *FRAGMENT_COLUMNS, "skills")}
+        self._lengths: Dict[str, List[np.ndarray]] = {name: [] for name in self._blobs}
+        self._ids: List[np.ndarray] = []
+        self._stipend: List[np.ndarray] = []
+        self._skill_counts: List[np.ndarray] = []
+        self._domains: Dict[str, int] = {}
+        self._domain_codes: List[np.ndarray] = []
+        self._companies: Dict[str, int] = {}
+        self._company_codes: List[np.ndarray] = []
+        self._skill_columns: Dict[str, int] = {}
+        self._bit_rows: List[np.ndarray] = []
+        self._bit_columns: List[np.ndarray] = []
+        self._canonicalizer = get_skill_canonicalizer()
+
+    def _write_strings(self, name: str, values: Iterable[str]) -> None:
+        self._write_blobs(name, [(v or "").encode("utf-8") for v in values])
+
+    def _write_blobs(self, name: str, encoded: List[bytes]) -> None:
+        self._blobs[name].write(b"".join(encoded))
+        self._lengths[name].append(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)))
+
+    def add(self, rows: Sequence[tuple]) -> None:
+        """Append ``rows`` (shape as for ``MetadataStore.write``) after those already added."""
+        start = self.size
+        self._ids.append(np.array([r[0] for r in rows], dtype=np.int64))
+        self._stipend.append(np.array([float(r[5]) if r[5] is not None else 0.0 for r in rows], dtype=np.float64))
+        for col, name in enumerate(STRING_COLUMNS, start=1):
+            self._write_strings(name, [r[col] for r in rows])
+        skill_lists = [split_skills(r[4]) for r in rows]
+        heads, tails = zip(*(response_fragments(meta_from_row(r)) for r in rows)) if rows else ((), ())
+        self._write_blobs("response_head", list(heads))
+        self._write_blobs("response_tail", list(tails))
+        self._skill_counts.append(np.array([len(s) for s in skill_lists], dtype=np.int64))
+        self._write_strings("skills", [s for skills in skill_lists for s in skills])
+        self._domain_codes.append(
+            np.array([self._domains.setdefault(domain_key(r[3]), len(self._domains)) for r in rows], dtype=np.int64)
+        )
+        self._company_codes.append(np.array([_company_code(self._companies, r[2]) for r in rows], dtype=np.int32))
+
+        columns = self._skill_columns
+        row_columns = [
+            {columns.setdefault(s, len(columns)) for s in self._canonicalizer.canonicalize_all(r[4])} for r in rows
+        ]
+        counts = np.array([len(c) for c in row_columns], dtype=np.int64)
+        self._bit_rows.append(np.repeat(np.arange(start, start + len(rows), dtype=np.int64), counts))
+        self._bit_columns.append(np.fromiter((c for cs in row_columns for c in cs), dtype=np.int64, count=int(counts.sum())))
+        self.size += len(rows)
+
+    def close(self) -> None:
+        """Write the remaining columns and the manifest, making the store readable."""
+        directory, size = self.directory, self.size
+        for name, blob in self._blobs.items():
+            blob.close()
+            os.replace(directory / f"{name}.bin.tmp", directory / f"{name}.bin")
+            offsets = np.zeros(sum(map(len, self._lengths[name])) + 1, dtype=np.int64)
+            if len(offsets) > 1:
+                np.cumsum(np.concatenate(self._lengths[name]), out=offsets[1:])
+            _atomic_save(directory / f"{name}.offsets.npy", lambda f: np.save(f, offsets))
+
+        def joined(parts, dtype):
+            return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+        _atomic_save(directory / "internship_id.npy", lambda f: np.save(f, joined(self._ids, np.int64)))
+        _atomic_save(directory / "stipend.npy", lambda f: np.save(f, joined(self._stipend, np.float64)))
+        skill_rows = np.concatenate([[0], np.cumsum(joined(self._skill_counts, np.int64))]).astype(np.int64)
+        _atomic_save(directory / "skills.rows.npy", lambda f: np.save(f, skill_rows))
+
+        codes = joined(self._domain_codes, np.int64)
+        bitmaps = np.zeros((len(self._domains), (size + 7) // 8), dtype=np.uint8)
+        for row in range(len(self._domains)):
+            bitmaps[row] = pack_positions(codes == row)
+        _atomic_save(directory / "domains.bitmaps.npy", lambda f: np.save(f, bitmaps))
+        _atomic_save(directory / "domains.json", lambda f: f.write(json.dumps(list(self._domains)).encode()))
+        company_codes = joined(self._company_codes, np.int32)
+        _atomic_save(directory / "company.codes.npy", lambda f: np.save(f, company_codes))
+        _atomic_save(directory / "companies.json", lambda f: f.write(json.dumps(list(self._companies)).encode()))
+
+        rows = joined(self._bit_rows, np.int64)
+        cols = joined(self._bit_columns, np.int64).astype(np.uint64)
+        bits = np.zeros((size, max(1, (len(self._skill_columns) + 63) // 64)), dtype=np.uint64)
+        np.bitwise_or.at(bits, (rows, (cols >> np.uint64(6)).astype(np.int64)), np.uint64(1) << (cols & np.uint64(63)))
+        counts = np.bincount(rows, minlength=size).astype(np.int32)
+        _atomic_save(directory / "skills.bits.npy", lambda f: np.save(f, bits))
+        _atomic_save(directory / "skills.counts.npy", lambda f: np.save(f, counts))
+        _atomic_save(directory / "skills.vocab.json", lambda f: f.write(json.dumps(list(self._skill_columns)).encode()))
+        _write_manifest(directory, size)
+
+    def __enter__(self) -> "MetadataWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            for blob in self._blobs.values():
+                blob.close()
+
+
+class MetadataStore:
+    """Read-only, memory-mapped internship details for the search path.
+
+    Row ``i`` describes the internship at position ``i`` of
+    ``internship_ids.npy``, so search hits resolve to display fields without a
+    DB round trip. Strings are stored as UTF-8 blobs with offset arrays and
+    ``required_skills`` is stored pre-split, so nothing is parsed per request.
+
+    For filtered search it also keeps one packed position bitmap per domain,
+    built with the columns, so a filter is a few bitwise ops over ``N / 8``
+    bytes rather than a scan of the rows. For re-ranking, each row's
+    canonical required skills are a bitset of packed uint64 words over the
+    store's skill vocabulary, so skill overlap is an AND plus a popcount.
+    For responses, each row also carries its fields preformatted as JSON
+    (``response_fragments``), so a response is assembled by concatenation.
+    For diversification, each row's company is an int32 code, so capping
+    results per company compares integers rather than strings.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        manifest = json.loads((self.directory / "manifest.json").read_text())
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported metadata format in {self.directory}")
+        self.size = manifest["size"]
+
+        self._ids = _load_mapped(self.directory / "internship_id.npy")
+        self._stipend = _load_mapped(self.directory / "stipend.npy")
+        self._strings = {name: _StringColumn(self.directory, name) for name in STRING_COLUMNS}
+        self._skill_offsets = _load_mapped(self.directory / "skills.rows.npy")
+        self._skills = _StringColumn(self.directory, "skills")
+        self._fragments = [_StringColumn(self.directory, name) for name in FRAGMENT_COLUMNS]
+        domains = json.loads((self.directory / "domains.json").read_text())
+        self._domain_rows = {key: row for row, key in enumerate(domains)}
+        self._domain_bitmaps = _load_mapped(self.directory / "domains.bitmaps.npy")
+        vocab = json.loads((self.directory / "skills.vocab.json").read_text())
+        self._skill_columns = {skill: col for col, skill in enumerate(vocab)}
+        self._skill_bits = _load_mapped(self.directory / "skills.bits.npy")
+        self._skill_counts = _load_mapped(self.directory / "skills.counts.npy")
+        self._company_codes = _load_mapped(self.directory / "company.codes.npy")
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def write(directory: Path, rows: Sequence[tuple]) -> None:
+        """Persist ``rows`` of (internship_id, title, company, domain, required_skills, stipend).
+
+        Row order must match the order of ``internship_ids.npy``.
+        """
+        with MetadataWriter(directory) as writer:
+            writer.add(rows)
+
+    @staticmethod
+    def append(directory: Path, rows: Sequence[tuple]) -> None:
+        """Append ``rows`` (same shape as ``write``) without re-encoding existing rows."""
+        directory = Path(directory)
+        ids = np.array([r[0] for r in rows], dtype=np.int64)
+        stipend = np.array([float(r[5]) if r[5] is not None else 0.0 for r in rows], dtype=np.float64)
+        skill_lists = [split_skills(r[4]) for r in rows]
+        skill_counts = np.array([len(s) for s in skill_lists], dtype=np.int64)
+
+        ids = np.concatenate([_load_mapped(directory / "internship_id.npy"), ids])
+        stipend = np.concatenate([_load_mapped(directory / "stipend.npy"), stipend])
+        old_skill_rows = _load_mapped(directory / "skills.rows.npy")
+        skill_rows = np.concatenate([old_skill_rows, old_skill_rows[-1] + np.cumsum(skill_counts)])
+
+        _atomic_save(directory / "internship_id.npy", lambda f: np.save(f, ids))
+        _atomic_save(directory / "stipend.npy", lambda f: np.save(f, stipend))
+        for col, name in enumerate(STRING_COLUMNS, start=1):
+            _append_strings(directory, name, (r[col] for r in rows))
+        _atomic_save(directory / "skills.rows.npy", lambda f: np.save(f, skill_rows))
+        _append_strings(directory, "skills", [s for skills in skill_lists for s in skills])
+        heads, tails = zip(*(response_fragments(meta_from_row(r)) for r in rows)) if rows else ((), ())
+        _append_blobs(directory, "response_head", list(heads))
+        _append_blobs(directory, "response_tail", list(tails))
+        MetadataStore._append_domain_bitmaps(directory, [domain_key(r[3]) for r in rows], len(ids))
+        MetadataStore._append_company_codes(directory, [r[2] for r in rows])
+        canonicalizer = get_skill_canonicalizer()
+        MetadataStore._append_skill_bitsets(directory, [canonicalizer.canonicalize_all(r[4]) for r in rows])
+        _write_manifest(directory, len(ids))
+
+    @staticmethod
+    def _append_domain_bitmaps(directory: Path, keys: List[str], size: int) -> None:
+        domains = json.loads((directory / "domains.json").read_text())
+        old_size = size - len(keys)
+        old = np.unpackbits(_load_mapped(directory / "domains.bitmaps.npy"), axis=1, count=old_size, bitorder="little")
+        rows = {key: row for row, key in enumerate(domains)}
+        for key in keys:
+            rows.setdefault(key, len(rows))
+        domains = list(rows)
+
+        members = np.zeros((len(domains), size), dtype=bool)
+        members[: old.shape[0], : old.shape[1]] = old
+        new_rows = np.fromiter((rows[key] for key in keys), dtype=np.int64, count=len(keys))
+        members[new_rows, np.arange(size - len(keys), size)] = True
+        bitmaps = np.packbits(members, axis=1, bitorder="little")
+
+        _atomic_save(directory / "domains.bitmaps.npy", lambda f: np.save(f, bitmaps))
+        _atomic_save(directory / "domains.json", lambda f: f.write(json.dumps(domains).encode()))
+
+    @staticmethod
+    def _append_company_codes(directory: Path, companies: List[str]) -> None:
+        known = {key: code for code, key in enumerate(json.loads((directory / "companies.json").read_text()))}
+        new = np.array([_company_code(known, company) for company in companies], dtype=np.int32)
+        codes = np.concatenate([_load_mapped(directory / "company.codes.npy"), new])
+        _atomic_save(directory / "company.codes.npy", lambda f: np.save(f, codes))
+        _atomic_save(directory / "companies.json", lambda f: f.write(json.dumps(list(known)).encode()))
+
+    @staticmethod
+    def _append_skill_bitsets(directory: Path, skill_lists: List[List[str]]) -> None:
+        vocab = json.loads((directory / "skills.vocab.json").read_text())
+        old_bits = _load_mapped(directory / "skills.bits.npy")
+        old_counts = _load_mapped(directory / "skills.counts.npy")
+        columns = {skill: col for col, skill in enumerate(vocab)}
+        row_columns = [{columns.setdefault(s, len(columns)) for s in skills} for skills in skill_lists]
+
+        n_old = len(old_counts)
+        width = max(1, (len(columns) + 63) // 64, old_bits.shape[1])
+        bits = np.zeros((n_old + len(skill_lists), width), dtype=np.uint64)
+        bits[:n_old, : old_bits.shape[1]] = old_bits
+        counts = np.array([len(c) for c in row_columns], dtype=np.int32)
+        rows = np.repeat(np.arange(n_old, n_old + len(skill_lists)), counts)
+        cols = np.fromiter((c for cs in row_columns for c in cs), dtype=np.uint64, count=int(counts.sum()))
+        np.bitwise_or.at(bits, (rows, (cols >> np.uint64(6)).astype(np.int64)), np.uint64(1) << (cols & np.uint64(63)))
+        counts = np.concatenate([old_counts, counts])
+
+        _atomic_save(directory / "skills.bits.npy", lambda f: np.save(f, bits))
+        _atomic_save(directory / "skills.counts.npy", lambda f: np.save(f, counts))
+        _atomic_save(directory / "skills.vocab.json", lambda f: f.write(json.dumps(list(columns)).encode()))
+
+    @classmethod
+    def open(cls, directory: Path) -> Optional["MetadataStore"]:
+        """Open the store, or return None if it has not been built."""
+        if not (Path(directory) / "manifest.json").exists():
+            return None
+        return cls(directory)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def get(self, position: int, internship_id: Optional[int] = None) -> Optional[InternshipMeta]:
+        """Details for the internship at ``position``, or None on a miss.
+
+        Passing ``internship_id`` guards against reading a store that is out of
+        step with the index (e.g. mid-rebuild); a mismatch counts as a miss.
+        """
+        if 0 <= position < self.size and (internship_id is None or self._ids[position] == internship_id):
+            skill_start, skill_end = self._skill_offsets[position], self._skill_offsets[position + 1]
+            meta = InternshipMeta(
+                internship_id=int(self._ids[position]),
+                internship_title=self._strings["internship_title"][position],
+                company=self._strings["company"][position],
+                domain=self._strings["domain"][position],
+                required_skills=[self._skills[j] for j in range(skill_start, skill_end)],
+                stipend=float(self._stipend[position]),
+            )
+            with self._lock:
+                self._hits += 1
+            return meta
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def fragments(self, position: int, internship_id: Optional[int] = None) -> Optional[Tuple[bytes, bytes]]:
+        """``response_fragments`` of the internship at ``position``, or None on a miss (as ``get``)."""
+        if 0 <= position < self.size and (internship_id is None or self._ids[position] == internship_id):
+            head, tail = self._fragments
+            fragments = head.raw(position), tail.raw(position)
+            with self._lock:
+                self._hits += 1
+            return fragments
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def select(
+        self,
+        domains: Sequence[str] = (),
+        min_stipend: Optional[float] = None,
+        max_stipend: Optional[float] = None,
+    ) -> np.ndarray:
+        """Packed bitmap of the positions matching every given filter.
+
+        ``domains`` match any of the listed domains (see ``domain_key``); the
+        stipend bounds are inclusive and a missing stipend counts as 0.
+        """
+        nbytes = (self.size + 7) // 8
+        if domains:
+            bitmap = np.zeros(nbytes, dtype=np.uint8)
+            for row in {self._domain_rows.get(domain_key(d)) for d in domains} - {None}:
+                bitmap |= self._domain_bitmaps[row]
+        else:
+            bitmap = pack_positions(np.ones(self.size, dtype=bool))
+        if min_stipend is not None or max_stipend is not None:
+            in_range = np.ones(self.size, dtype=bool)
+            if min_stipend is not None:
+                in_range &= self._stipend >= min_stipend
+            if max_stipend is not None:
+                in_range &= self._stipend <= max_stipend
+            bitmap &= pack_positions(in_range)
+        return bitmap
+
+    def skill_mask(self, skills: Iterable[str]) -> np.ndarray:
+        """Bitset of canonical ``skills`` in the layout of a row; skills no row lists are ignored."""
+        mask = np.zeros(self._skill_bits.shape[1], dtype=np.uint64)
+        for skill in skills:
+            col = self._skill_columns.get(skill)
+            if col is not None:
+                mask[col >> 6] |= np.uint64(1) << np.uint64(col & 63)
+        return mask
+
+    def skill_coverage(self, positions: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """Share of each row's required skills set in ``mask`` (0 for rows listing none)."""
+        counts = self._skill_counts[positions]
+        words = np.flatnonzero(mask)  # only words the student has skills in can overlap
+        if not len(words):
+            return np.zeros(len(positions))
+        shared = _popcount_rows(self._skill_bits[positions[:, None], words] & mask[words])
+        return np.divide(shared, counts, out=np.zeros(len(positions)), where=counts > 0)
+
+    def domain_matches(self, positions: np.ndarray, domain: str) -> np.ndarray:
+        """Whether each row's domain equals ``domain`` (see ``domain_key``)."""
+        row = self._domain_rows.get(domain_key(domain))
+        if row is None:
+            return np.zeros(len(positions), dtype=bool)
+        bitmap = self._domain_bitmaps[row]
+        return ((bitmap[positions >> 3] >> (positions & 7)) & 1).astype(bool)
+
+    def company_codes(self, positions: np.ndarray) -> np.ndarray:
+        """Each row's company as an int32 code (equal for equal ``domain_key`` forms, -1 if blank)."""
+        return self._company_codes[positions]
+
+    def domains(self) -> List[str]:
+        """Every domain in the store (``domain_key`` form)."""
+        return [key for key in self._domain_rows if key]
+
+    def top_skills(self, domain: str, limit: int, live: Optional[np.ndarray] = None) -> List[str]:
+        """The ``limit`` canonical skills most often required in ``domain``, most frequent first.
+
+        ``live`` (a packed position bitmap) restricts the count to those rows.
+        """
+        row = self._domain_rows.get(domain_key(domain))
+        if row is None or limit <= 0:
+            return []
+        bitmap = self._domain_bitmaps[row] if live is None else self._domain_bitmaps[row] & live
+        positions = np.flatnonzero(np.unpackbits(bitmap, count=self.size, bitorder="little"))
+        counts = np.zeros(self._skill_bits.shape[1] * 64, dtype=np.int64)
+        for start in range(0, len(positions), 4096):
+            # little-endian words: bit ``c`` of a row is bit ``c & 7`` of its byte ``c >> 3``
+            words = self._skill_bits[positions[start:start + 4096]]
+            counts += np.unpackbits(words.view(np.uint8), axis=1, bitorder="little").sum(axis=0, dtype=np.int64)
+        vocab = list(self._skill_columns)
+        ranked = sorted((col for col in np.flatnonzero(counts[: len(vocab)])), key=lambda c: (-counts[c], vocab[c]))
+        return [vocab[col] for col in ranked[:limit]]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": self.size, "hits": self._hits, "misses": self._misses}
@@ -0,0 +1,277 @@
+# Precomputed results for frequent queries, stored with each generation
+"""
+Most requests come from students with near-identical profiles in a handful
+of domains. Each generation therefore carries the unfiltered top
+``POPULAR_CONFIG['top_k']`` results of its most frequent queries, keyed by a
+64-bit hash of the query. A request for one of them is a dict lookup
+instead of an encode + search + re-rank.
+
+A query is a student's ``domain_key`` plus their canonical skills as a set.
+That is everything the search and the re-ranker see: TF-IDF is
+bag-of-words and skill coverage is set overlap, so order and repeats
+cannot change the results. The table lives in ``popular/`` of a bundle::
+
+    hashes.npy     int64 query hashes, one per entry
+    offsets.npy    int64, entry i's results are rows offsets[i]:offsets[i+1]
+    positions.npy  int64 positions in internship_ids.npy
+    scores.npy     float64 scores, as search_hits returns them
+    manifest.json  k, the settings the results depend on, entry count (written last)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Constants.config import POPULAR_CONFIG, RERANK_CONFIG, SEARCH_CONFIG
+from DB.VectorDB.MetadataStore import domain_key
+
+FORMAT_VERSION = 1
+
+# (domain_key, sorted canonical skills)
+PopularQuery = Tuple[str, Tuple[str, ...]]
+
+
+def normalize_query(domain: str, skills: Iterable[str]) -> PopularQuery:
+    return domain_key(domain), tuple(sorted(set(skills)))
+
+
+def query_hash(domain: str, skills: Iterable[str]) -> int:
+    """Stable 64-bit key of a query (``skills`` canonical), the same in every process."""
+    key, skill_set = normalize_query(domain, skills)
+    payload = "\x1f".join((key, *skill_set)).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(payload, digest_size=8).digest(), "little", signed=True)
+
+
+def query_text(query: PopularQuery) -> str:
+    """Search text of a query, as the service builds it from a student."""
+    domain, skills = query
+    return " ".join(p for p in (domain, *skills) if p)
+
+
+def result_settings() -> dict:
+    """Serving settings the stored results depend on; a table built under others is not served."""
+    return {
+        "rerank": [RERANK_CONFIG[key] for key in ("enabled", "candidates", "weight_cosine", "weight_skills", "weight_domain")],
+        "search": [SEARCH_CONFIG[key] for key in ("nprobe", "ef_search")],
+    }
+
+
+def _atomic_save(path: Path, write) -> None:
+    # the staged file may be a hard link into the previous generation
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+class PopularTable:
+    """The precomputed results of one generation, with hit/miss counters."""
+
+    def __init__(self, directory: Path):
+        directory = Path(directory)
+        manifest = json.loads((directory / "manifest.json").read_text())
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported popular query table format in {directory}")
+        self.k = manifest["k"]
+        self.settings = manifest["settings"]
+        hashes = np.load(directory / "hashes.npy")
+        self._rows: Dict[int, int] = dict(zip(hashes.tolist(), range(len(hashes))))
+        self._offsets = np.load(directory / "offsets.npy")
+        self._positions = np.load(directory / "positions.npy")
+        self._scores = np.load(directory / "scores.npy")
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @classmethod
+    def open(cls, directory: Path) -> Optional["PopularTable"]:
+        """Open the table, or None if the bundle has none or it was built under other settings."""
+        if not (Path(directory) / "manifest.json").exists():
+            return None
+        table = cls(directory)
+        if table.settings != result_settings():
+            print(f"[vectordb] Popular query table in {directory} was built under other search settings; not used.")
+            return None
+        return table
+
+    @staticmethod
+    def write(directory: Path, hashes: Sequence[int], results: Sequence[Tuple[np.ndarray, np.ndarray]], k: int) -> None:
+        """Persist ``results`` ((positions, scores) per entry, at most ``k`` each) under ``hashes``."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        offsets = np.zeros(len(results) + 1, dtype=np.int64)
+        np.cumsum([len(positions) for positions, _ in results], out=offsets[1:])
+        positions = np.concatenate([p for p, _ in results] or [np.zeros(0)]).astype(np.int64)
+        scores = np.concatenate([s for _, s in results] or [np.zeros(0)]).astype(np.float64)
+        _atomic_save(directory / "hashes.npy", lambda f: np.save(f, np.asarray(hashes, dtype=np.int64)))
+        _atomic_save(directory / "offsets.npy", lambda f: np.save(f, offsets))
+        _atomic_save(directory / "positions.npy", lambda f: np.save(f, positions))
+        _atomic_save(directory / "scores.npy", lambda f: np.save(f, scores))
+        manifest = {"format_version": FORMAT_VERSION, "k": k, "settings": result_settings(), "entries": len(results)}
+        _atomic_save(directory / "manifest.json", lambda f: f.write(json.dumps(manifest).encode()))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def lookup(self, key: int, k: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(positions, scores) of the top ``k`` for query hash ``key``, or None on a miss."""
+        row = self._rows.get(key) if k <= self.k else None
+        with self._lock:
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        start, end = self._offsets[row], self._offsets[row + 1]
+        end = min(end, start + k)
+        return self._positions[start:end], self._scores[start:end]
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        lookups = hits + misses
+        return {
+            "entries": len(self._rows),
+            "k": self.k,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# seconds between checks of whether a build rotated the log away from a writer
+_REOPEN_CHECK_INTERVAL = 1.0
+
+
+def rotated_path(path: Path) -> Path:
+    return Path(path).with_name(Path(path).name + ".1")
+
+
+class QueryLog:
+    """Appends served unfiltered queries to a JSON-lines file for ``mine_queries``.
+
+    Lines are short single writes in append mode, so several worker
+    processes can share one file. When a build rotates the file
+    (``rotate_query_log``), each writer reopens ``path`` within a second.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._checked = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reopen_if_rotated(self) -> None:
+        now = time.monotonic()
+        if now - self._checked < _REOPEN_CHECK_INTERVAL:
+            return
+        self._checked = now
+        try:
+            current = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            current = None
+        if current != os.fstat(self._file.fileno()).st_ino:
+            self._file.close()
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    def record(self, domain: str, skills: Iterable[str]) -> None:
+        key, skill_set = normalize_query(domain, skills)
+        line = json.dumps({"domain": key, "skills": skill_set}, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._reopen_if_rotated()
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+_query_log: Optional[QueryLog] = None
+_query_log_lock = threading.Lock()
+
+
+def get_query_log() -> Optional[QueryLog]:
+    """The process-wide log at ``POPULAR_CONFIG['query_log']``, or None when logging is off."""
+    global _query_log
+    if not POPULAR_CONFIG["query_log"]:
+        return None
+    if _query_log is None:
+        with _query_log_lock:
+            if _query_log is None:
+                _query_log = QueryLog(POPULAR_CONFIG["query_log"])
+    return _query_log
+
+
+def _tail_lines(path: Path, max_bytes: int) -> List[str]:
+    """The complete lines among the last ``max_bytes`` of ``path`` (none if it is missing)."""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return []
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        start = max(0, size - max_bytes)
+        f.seek(start)
+        data = f.read(size - start)
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    return lines[1:] if start > 0 else lines  # the first one was cut by the window
+
+
+def mine_queries(path: Path, limit: int, min_count: int, max_bytes: Optional[int] = None) -> List[PopularQuery]:
+    """The ``limit`` most frequent queries in a query log seen at least ``min_count`` times.
+
+    Reads the newest ``max_bytes`` (default ``POPULAR_CONFIG['query_log_max_mb']``)
+    of the log, continuing into its previous rotation when the log itself
+    is shorter.
+    """
+    path = Path(path)
+    if limit <= 0:
+        return []
+    if max_bytes is None:
+        max_bytes = int(POPULAR_CONFIG["query_log_max_mb"] * 2**20)
+    lines = _tail_lines(path, max_bytes)
+    remaining = max_bytes - (path.stat().st_size if path.exists() else 0)
+    if remaining > 0:
+        lines = _tail_lines(rotated_path(path), remaining) + lines
+    counts: Counter = Counter()
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue  # a line cut short by a crash
+        counts[normalize_query(entry.get("domain", ""), entry.get("skills", ()))] += 1
+    return [query for query, count in counts.most_common(limit) if count >= min_count]
+
+
+def rotate_query_log(path: Path, max_bytes: Optional[int] = None) -> bool:
+    """Move a log larger than ``max_bytes`` to ``<path>.1`` once a build has mined it.
+
+    Replaces the previous rotation, so the log and its rotation together
+    stay around two mining windows. Writers reopen ``path`` on their own.
+    """
+    path = Path(path)
+    if max_bytes is None:
+        max_bytes = int(POPULAR_CONFIG["query_log_max_mb"] * 2**20)
+    try:
+        if path.stat().st_size <= max_bytes:
+            return False
+    except FileNotFoundError:
+        return False
+    os.replace(path, rotated_path(path))
+    return True
+
+
+def seed_queries(metadata, per_domain: int, live: Optional[np.ndarray] = None) -> List[PopularQuery]:
+    """Per-domain defaults: each domain alone and with each of its ``per_domain`` most required skills."""
+    queries: List[PopularQuery] = []
+    for domain in metadata.domains():
+        queries.append((domain, ()))
+        queries.extend((domain, (skill,)) for skill in metadata.top_skills(domain, per_domain, live))
+    return queries
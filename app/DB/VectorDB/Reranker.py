@@ -0,0 +1,36 @@
+# Second-stage re-ranking of search candidates
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+from Constants.config import RERANK_CONFIG
+from DB.VectorDB.MetadataStore import MetadataStore
+
+
+class RerankQuery(NamedTuple):
+    """What the re-ranker compares candidates against, besides the query vector."""
+
+    domain: str
+    skills: Tuple[str, ...]  # canonical, as produced by Utils.SkillNormalizer
+
+
+def rerank(
+    metadata: MetadataStore, positions: np.ndarray, scores: np.ndarray, query: RerankQuery, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Top ``k`` of the candidate ``positions`` by the blended score, and those scores.
+
+    Blends each candidate's cosine ``score`` with the share of its required
+    skills the student has and whether its domain is the student's, weighted
+    by ``RERANK_CONFIG``. Every term is one vectorized pass over the
+    candidates; ties keep the index order.
+    """
+    if not len(positions):
+        return positions, scores
+    blended = RERANK_CONFIG["weight_cosine"] * scores.astype(np.float64)
+    if RERANK_CONFIG["weight_skills"]:
+        coverage = metadata.skill_coverage(positions, metadata.skill_mask(query.skills))
+        blended += RERANK_CONFIG["weight_skills"] * coverage
+    if RERANK_CONFIG["weight_domain"]:
+        blended += RERANK_CONFIG["weight_domain"] * metadata.domain_matches(positions, query.domain)
+    order = np.argsort(-blended, kind="stable")[:k]
+    return positions[order], blended[order]
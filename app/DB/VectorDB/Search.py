@@ -1,62 +1,594 @@
-import faiss
 import numpy as np
 import pickle
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple
-
-_index = None
-_ids = None
-_vectorizer = None
-
-INDEX_PATH = Path("DB/vectordb/faiss.index")
-IDS_PATH = Path("DB/vectordb/internship_ids.npy")
-VECTORIZER_PATH = Path("Constants/vectorizer.pkl")
-
-
-def _load_artifacts():
-    """Lazy load FAISS index, IDs, and vectorizer."""
-    global _index, _ids, _vectorizer
-    
-    if _index is None:
-        if not INDEX_PATH.exists():
-            raise FileNotFoundError(
-                f"FAISS index not found at {INDEX_PATH}. "
-                "Run DB/VectorDB/BuildIndex.py first."
-            )
-        _index = faiss.read_index(str(INDEX_PATH))
-    
-    if _ids is None:
-        if not IDS_PATH.exists():
-            raise FileNotFoundError(f"Internship IDs not found at {IDS_PATH}")
-        _ids = np.load(str(IDS_PATH))
-    
-    if _vectorizer is None:
-        if not VECTORIZER_PATH.exists():
-            raise FileNotFoundError(f"Vectorizer not found at {VECTORIZER_PATH}")
-        with open(VECTORIZER_PATH, "rb") as f:
-            _vectorizer = pickle.load(f)
-    
-    return _index, _ids, _vectorizer
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from Constants.config import ARTIFACT_CONFIG, COLLAB_CONFIG, DIVERSITY_CONFIG, RERANK_CONFIG, SEARCH_CONFIG
+from DB.VectorDB import Artifacts
+from DB.VectorDB import AnnIndex
+from DB.VectorDB.Collaborative import CollaborativeModel
+from DB.VectorDB.Diversity import DiversityQuery, diversify, pairwise_similarities
+from DB.VectorDB.MetadataStore import MetadataStore, count_positions, domain_key, pack_positions
+from DB.VectorDB.PopularQueries import PopularTable, query_hash, query_text
+from DB.VectorDB.Reranker import RerankQuery, rerank
+from DB.VectorDB.ShardedIndex import ShardedIndex
+from DB.VectorDB.SparseIndex import SparseIndex
+from RecommenderModel.QueryEncoder import QueryEncoder
+from RecommenderModel.Vectorizer import load_vectorizer
+from Utils.SkillNormalizer import canonical_skills
+from Utils.Tracing import stage
+
+
+class SearchHit(NamedTuple):
+    position: int  # row in internship_ids.npy / the metadata store
+    internship_id: int
+    score: float
+
+
+class SearchFilter(NamedTuple):
+    """Restricts a search to internships matching every given field."""
+
+    domains: Tuple[str, ...] = ()  # any of these (domain_key form)
+    min_stipend: Optional[float] = None  # inclusive
+    max_stipend: Optional[float] = None  # inclusive
+
+    @classmethod
+    def create(
+        cls,
+        domains: Optional[Iterable[str]] = None,
+        min_stipend: Optional[float] = None,
+        max_stipend: Optional[float] = None,
+    ) -> Optional["SearchFilter"]:
+        """A normalized filter (usable as a cache key), or None if nothing is filtered."""
+        keys = tuple(sorted({domain_key(d) for d in domains or ()} - {""}))
+        if not keys and min_stipend is None and max_stipend is None:
+            return None
+        return cls(keys, min_stipend, max_stipend)
+
+
+class LoadedArtifacts(NamedTuple):
+    """One fully loaded generation; never mutated after construction."""
+
+    generation: str
+    version: int  # process-local swap counter; keys result caches
+    index: object
+    ids: np.ndarray
+    live: np.ndarray  # packed bitmap of positions still holding an internship
+    vectorizer: object
+    encoder: QueryEncoder
+    svd: Optional[object]
+    metadata: Optional[MetadataStore]
+    popular: Optional[PopularTable]  # precomputed results of frequent queries
+    collaborative: Optional[CollaborativeModel]  # interaction factors, once trained
+    manifest: dict
+    loaded_at: float
+    load_seconds: float
+    warmup_seconds: float
+
+
+_WARMUP_K = 20  # the largest top_k the API serves
+
+# Requests read this reference once and use that bundle to the end, so a
+# swap never mixes generations within a search.
+_active: Optional[LoadedArtifacts] = None
+_load_lock = threading.Lock()
+_last_error: Optional[str] = None
+
+
+def _load_pickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _load_pool() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max(1, ARTIFACT_CONFIG["load_threads"]), thread_name_prefix="artifact-load")
+
+
+def load_generation(generation: str, version: int) -> LoadedArtifacts:
+    """Verify and load every artifact of ``generation``.
+
+    The artifacts load while their checksums are computed, all on
+    ``ARTIFACT_CONFIG['load_threads']`` threads; the bundle is only returned
+    if every file matched.
+    """
+    started = time.perf_counter()
+    manifest = Artifacts.read_manifest(generation)
+    with _load_pool() as pool:
+        loaded = load_bundle(Artifacts.generation_dir(generation), manifest, generation, version, pool=pool)
+        if ARTIFACT_CONFIG["verify_checksums"]:
+            for check in Artifacts.verify_files(generation, manifest, pool):
+                check.result()
+    return loaded._replace(load_seconds=time.perf_counter() - started)
+
+
+def _read_index(bundle: Path, manifest: dict, mmap: bool):
+    if manifest["backend"] == "sparse":
+        return SparseIndex.read(str(bundle / Artifacts.SPARSE_INDEX_DIR), mmap=mmap)
+    if manifest.get("shards"):
+        # with shard workers, the shards are mapped (and configured) in those processes
+        return ShardedIndex.read(
+            bundle / Artifacts.SHARDS_DIR, mmap=mmap, workers=SEARCH_CONFIG["shard_workers"], config=SEARCH_CONFIG.copy()
+        )
+    return AnnIndex.read(str(bundle / Artifacts.INDEX_FILE), mmap=mmap)
+
+
+def load_bundle(
+    bundle: Path, manifest: dict, generation: str, version: int, index=None, pool: Optional[Executor] = None
+) -> LoadedArtifacts:
+    """Load the artifacts in ``bundle``, a published generation or one still being staged.
+
+    The index, IDs, vectorizer, metadata, popular table and collaborative
+    model are independent files and load concurrently on ``pool`` (or a pool of
+    ``ARTIFACT_CONFIG['load_threads']``). A build passes the ``index`` it
+    holds in memory rather than mapping the file it just wrote.
+    """
+    if pool is None:
+        with _load_pool() as pool:
+            return load_bundle(bundle, manifest, generation, version, index, pool)
+
+    started = time.perf_counter()
+    # Mapped read-only, so worker processes share the page cache.
+    mmap = SEARCH_CONFIG["mmap"]
+    svd_path = bundle / Artifacts.SVD_FILE
+    loading = {
+        "ids": pool.submit(np.load, bundle / Artifacts.IDS_FILE, mmap_mode="r" if mmap else None),
+        "vectorizer": pool.submit(load_vectorizer, path=bundle / Artifacts.VECTORIZER_DIR),
+        "svd": pool.submit(_load_pickle, svd_path) if svd_path.exists() else None,
+        "metadata": pool.submit(MetadataStore.open, bundle / Artifacts.METADATA_DIR),
+        "popular": pool.submit(PopularTable.open, bundle / Artifacts.POPULAR_DIR),
+        "collaborative": pool.submit(CollaborativeModel.open, bundle / Artifacts.COLLABORATIVE_DIR, mmap),
+    }
+    if index is None:
+        index = _read_index(bundle, manifest, mmap)
+    if isinstance(index, ShardedIndex):
+        index = index.configure_search(SEARCH_CONFIG)
+    elif manifest["backend"] == "dense":
+        index = AnnIndex.configure_search(index, SEARCH_CONFIG)
+    loaded = {name: future.result() if future is not None else None for name, future in loading.items()}
+    ids = loaded["ids"].view(np.ndarray)
+    collaborative = loaded["collaborative"]
+    if collaborative is not None and collaborative.index.ntotal != len(ids):
+        print(f"[vectordb] Collaborative index of {generation} does not match its positions; not used.")
+        collaborative = None
+
+    return LoadedArtifacts(
+        generation=generation,
+        version=version,
+        index=index,
+        ids=ids,
+        live=pack_positions(ids >= 0),
+        vectorizer=loaded["vectorizer"],
+        encoder=QueryEncoder(loaded["vectorizer"]),
+        svd=loaded["svd"],
+        metadata=loaded["metadata"],
+        popular=loaded["popular"],
+        collaborative=collaborative,
+        manifest=manifest,
+        loaded_at=time.time(),
+        load_seconds=time.perf_counter() - started,
+        warmup_seconds=0.0,
+    )
+
+
+def warm_up(artifacts: LoadedArtifacts) -> LoadedArtifacts:
+    """Run ``ARTIFACT_CONFIG['warmup_queries']`` searches on ``artifacts`` before they serve.
+
+    The first searches on a freshly mapped generation fault in the index,
+    vectorizer and metadata pages and set up FAISS's threads, which would
+    otherwise land on the first requests. The queries are the domains and
+    skills of postings spread over the catalog, searched one at a time like
+    requests, with re-ranking and the hits' response fragments read.
+    """
+    count = ARTIFACT_CONFIG["warmup_queries"]
+    live = np.flatnonzero(artifacts.ids >= 0)
+    if count <= 0 or not len(live):
+        return artifacts
+    started = time.perf_counter()
+    if artifacts.metadata is not None:
+        queries = []
+        for position in np.unique(live[np.linspace(0, len(live) - 1, count).astype(np.int64)]).tolist():
+            meta = artifacts.metadata.get(position)
+            queries.append((domain_key(meta.domain), tuple(canonical_skills(meta.required_skills))))
+    else:
+        queries = [("", (term.decode("utf-8"),)) for term in artifacts.vectorizer.vocab[:count].tolist()]
+    for domain, skills in queries:
+        rerank_queries = [RerankQuery(domain, skills)] if RERANK_CONFIG["enabled"] else None
+        hits = _search_hits(artifacts, [query_text((domain, skills))], _WARMUP_K, None, rerank_queries)[0]
+        if artifacts.metadata is not None:
+            for hit in hits:
+                artifacts.metadata.fragments(hit.position, hit.internship_id)
+    return artifacts._replace(warmup_seconds=time.perf_counter() - started)
+
+
+def _swap_to_current(force: bool) -> bool:
+    """Load the published generation and swap it in; caller holds ``_load_lock``."""
+    global _active, _last_error
+
+    generation = Artifacts.current_generation()
+    if generation is None:
+        raise FileNotFoundError(
+            f"No search artifacts published at {Artifacts.CURRENT_PATH}. "
+            "Run DB/VectorDB/BuildIndex.py first."
+        )
+    active = _active
+    if active is not None and active.generation == generation and not force:
+        return False
+    try:
+        loaded = warm_up(load_generation(generation, (active.version + 1) if active else 1))
+    except Exception as e:
+        _last_error = f"generation {generation}: {e}"
+        raise
+    _active = loaded  # the swap: a single reference assignment
+    _last_error = None
+    print(
+        f"[vectordb] Serving generation {generation} "
+        f"(loaded in {loaded.load_seconds:.3f}s, warmed up in {loaded.warmup_seconds:.3f}s)"
+    )
+    return True
+
+
+def _load_artifacts() -> LoadedArtifacts:
+    """The active artifacts, loading the published generation on first use."""
+    active = _active
+    if active is not None:
+        return active
+    with _load_lock:
+        if _active is None:
+            _swap_to_current(force=False)
+        return _active
+
+
+def get_metadata_store() -> Optional[MetadataStore]:
+    """The memory-mapped metadata store, or None if the build did not write one."""
+    return _load_artifacts().metadata
+
+
+def get_popular_table() -> Optional[PopularTable]:
+    """The active generation's precomputed popular query table, or None if it has no usable one."""
+    return _load_artifacts().popular
+
+
+def get_collaborative_model() -> Optional[CollaborativeModel]:
+    """The active generation's collaborative model, or None before the first training run."""
+    return _load_artifacts().collaborative
+
+
+def collaborative_students(student_ids: Sequence[Optional[str]]) -> List[Optional[str]]:
+    """Each ID the active collaborative model has a vector for, None for the others (all None when it is off)."""
+    model = _load_artifacts().collaborative
+    if model is None or not COLLAB_CONFIG["enabled"]:
+        return [None] * len(student_ids)
+    _, known = model.student_vectors(student_ids)
+    return [sid if found else None for sid, found in zip(student_ids, known.tolist())]
+
+
+def preload_artifacts() -> None:
+    """Load (memory-map) every search artifact now instead of on first request."""
+    _load_artifacts()
+
+
+def reload_artifacts(force: bool = False) -> bool:
+    """Swap to the published generation if it differs from the active one.
+
+    A no-op until something has been loaded, so offline builds don't load
+    what they just wrote. Returns True if a new generation was swapped in.
+    """
+    if _active is None:
+        return False
+    with _load_lock:
+        return _swap_to_current(force)
+
+
+def get_generation() -> int:
+    """Counter bumped whenever a new generation is swapped in; keys result caches."""
+    active = _active
+    return active.version if active is not None else 0
+
+
+def get_artifact_status() -> dict:
+    """Active generation, its load time and whether a newer one is pending."""
+    active = _active
+    published = Artifacts.current_generation()
+    status = {
+        "published_generation": published,
+        "watch_interval": ARTIFACT_CONFIG["watch_interval"],
+        "last_error": _last_error,
+    }
+    if active is None:
+        return {"status": "not loaded", **status}
+    return {
+        "status": "loaded" if active.generation == published else "stale",
+        "generation": active.generation,
+        "version": active.version,
+        "created_at": active.manifest["created_at"],
+        "loaded_at": active.loaded_at,
+        "load_seconds": round(active.load_seconds, 4),
+        "warmup_seconds": round(active.warmup_seconds, 4),
+        "backend": active.manifest["backend"],
+        "items": active.manifest["items"],
+        "live": active.manifest["live"],
+        **status,
+    }
+
+
+class _ArtifactWatcher(threading.Thread):
+    def __init__(self, interval: float):
+        super().__init__(name="artifact-watcher", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                reload_artifacts()
+            except Exception as e:
+                # keep serving the old generation; retried on the next tick
+                print(f"[vectordb] Failed to load new generation: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_watcher: Optional[_ArtifactWatcher] = None
+
+
+def start_watcher() -> None:
+    """Poll ``CURRENT`` every ``ARTIFACT_CONFIG['watch_interval']`` seconds (if > 0)."""
+    global _watcher
+
+    interval = ARTIFACT_CONFIG["watch_interval"]
+    if interval <= 0 or _watcher is not None:
+        return
+    _watcher = _ArtifactWatcher(interval)
+    _watcher.start()
+
+
+def stop_watcher() -> None:
+    global _watcher
+
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
+
+
+def _select(artifacts: LoadedArtifacts, filters: SearchFilter) -> np.ndarray:
+    """Packed bitmap of live positions matching ``filters``, from the precomputed metadata bitmaps."""
+    if artifacts.metadata is None:
+        raise RuntimeError(f"Generation {artifacts.generation} has no metadata store to filter on.")
+    return artifacts.metadata.select(*filters) & artifacts.live
+
+
+def _search(
+    artifacts: LoadedArtifacts, texts: List[str], k: int, selection: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode ``texts`` and return (scores, positions) from ``artifacts``.
+
+    With a ``selection`` bitmap, only the selected positions are searched.
+    """
+    encoder = artifacts.encoder
+    index = artifacts.index
+    if isinstance(index, SparseIndex):
+        mask = None
+        if selection is not None:
+            mask = np.unpackbits(selection, count=index.ntotal, bitorder="little").view(bool)
+        with stage("encode"):
+            queries = encoder.encode_csr(texts)
+        with stage("search"):
+            return index.search(queries, k, mask=mask)
+    with stage("encode"):
+        if artifacts.svd is not None:
+            queries = encoder.project(texts, artifacts.svd.components_)
+        else:
+            # a per-thread buffer: consumed by the search before this thread encodes again
+            queries = encoder.encode_dense(texts)
+    with stage("search"):
+        if selection is None:
+            return index.search(queries, k)
+        if isinstance(index, ShardedIndex):
+            return index.search_filtered(queries, k, selection, SEARCH_CONFIG["filter_exact_max"])
+        count = count_positions(selection)
+        return AnnIndex.search_filtered(index, queries, k, selection, count, SEARCH_CONFIG["filter_exact_max"])
+
+
+def _candidate_vectors(artifacts: LoadedArtifacts, positions: np.ndarray):
+    """The vectors the index holds at ``positions``: an (n, d) float32 block (sparse rows for the sparse backend)."""
+    index = artifacts.index
+    if isinstance(index, (SparseIndex, ShardedIndex)):
+        return index.reconstruct_batch(positions)
+    return AnnIndex.reconstruct(index, positions)
+
+
+def _query_scores(artifacts: LoadedArtifacts, text: str, positions: np.ndarray) -> np.ndarray:
+    """What the index scores ``positions`` for ``text``: inner products of its query vector with theirs."""
+    vectors = _candidate_vectors(artifacts, positions)
+    encoder = artifacts.encoder
+    if isinstance(artifacts.index, SparseIndex):
+        return np.asarray((vectors @ encoder.encode_csr([text]).T).todense(), dtype=np.float32).ravel()
+    if artifacts.svd is not None:
+        query = encoder.project([text], artifacts.svd.components_)
+    else:
+        query = encoder.encode_dense([text])
+    return vectors @ query[0]
 
 
 def recommend_top_5(student_text: str):
-    index, ids, vectorizer = _load_artifacts()
-    
-    query_vec = vectorizer.transform([student_text]).toarray().astype("float32")
-    faiss.normalize_L2(query_vec)
+    artifacts = _load_artifacts()
 
-    scores, idx = index.search(query_vec, 5)
-    return ids[idx[0]].tolist()
+    _, idx = _search(artifacts, [student_text], 5)
+    return artifacts.ids[idx[0]].tolist()
 
 
-def search_with_scores(student_text: str, k: int = 5) -> List[Tuple[int, float]]:
+def search_with_scores(student_text: str, k: int = 5, filters: Optional[SearchFilter] = None) -> List[Tuple[int, float]]:
     """Return (internship_id, similarity_score) pairs sorted by score desc."""
-    index, ids, vectorizer = _load_artifacts()
-    
-    query_vec = vectorizer.transform([student_text]).toarray().astype("float32")
-    faiss.normalize_L2(query_vec)
-    scores, idx = index.search(query_vec, k)
-    top_ids = ids[idx[0]].tolist()
-    top_scores = scores[0].tolist()
-    return list(zip(top_ids, top_scores))
+    return search_batch_with_scores([student_text], k=k, filters=filters)[0]
+
+
+def search_batch_with_scores(
+    student_texts: List[str], k: int = 5, filters: Optional[SearchFilter] = None
+) -> List[List[Tuple[int, float]]]:
+    """Batched ``search_with_scores``: one vectorizer call and one multi-row search."""
+    return [
+        [(hit.internship_id, hit.score) for hit in hits]
+        for hits in search_hits(student_texts, k=k, filters=filters)
+    ]
+
+
+def search_hits(
+    student_texts: List[str],
+    k: int = 5,
+    filters: Optional[SearchFilter] = None,
+    rerank_queries: Optional[Sequence[RerankQuery]] = None,
+    diversity: Optional[DiversityQuery] = None,
+    student_ids: Optional[Sequence[Optional[str]]] = None,
+) -> List[List[SearchHit]]:
+    """Like ``search_batch_with_scores`` but also returns each hit's index position.
+
+    ``filters`` restrict the search itself rather than its results, so every
+    row still gets ``k`` hits when ``k`` internships match. With
+    ``rerank_queries`` (one per text) the index returns
+    ``RERANK_CONFIG['candidates']`` hits per row, and the top ``k`` by the
+    re-ranker's blended score are returned with that score. With
+    ``diversity`` the ``k`` hits are chosen from at least
+    ``DIVERSITY_CONFIG['candidates']`` (re-ranked) candidates by
+    ``Diversity.diversify``, keeping their scores. Rows whose entry in
+    ``student_ids`` has a collaborative vector are ranked by the blend of
+    content and collaborative scores (see ``_blend``).
+    """
+    if not student_texts:
+        return []
+    return _search_hits(_load_artifacts(), student_texts, k, filters, rerank_queries, diversity, student_ids)
+
+
+def _search_hits(
+    artifacts: LoadedArtifacts,
+    student_texts: List[str],
+    k: int,
+    filters: Optional[SearchFilter],
+    rerank_queries: Optional[Sequence[RerankQuery]],
+    diversity: Optional[DiversityQuery] = None,
+    student_ids: Optional[Sequence[Optional[str]]] = None,
+) -> List[List[SearchHit]]:
+    """``search_hits`` against the given artifacts."""
+    ids = artifacts.ids
+    model = artifacts.collaborative if COLLAB_CONFIG["enabled"] else None
+    vectors = known = None
+    if student_ids is not None and model is not None:
+        vectors, known = model.student_vectors(student_ids)
+
+    selection = None
+    if filters is not None:
+        with stage("filter"):
+            selection = _select(artifacts, filters)
+        if not selection.any():
+            return [[] for _ in student_texts]
+
+    if rerank_queries is not None and artifacts.metadata is None:
+        rerank_queries = None  # nothing to re-rank on; plain cosine order
+    fetch = max(k, RERANK_CONFIG["candidates"]) if rerank_queries is not None else k
+    if diversity is not None:
+        fetch = max(fetch, DIVERSITY_CONFIG["candidates"])
+
+    scores, idx = _search(artifacts, student_texts, fetch, selection)
+    personal = {}
+    if known is not None and known.any():
+        # the one extra search: every personalized row's collaborative candidates at once
+        rows = np.flatnonzero(known)
+        with stage("collaborative"):
+            cf_scores, cf_idx = model.search(vectors[rows], COLLAB_CONFIG["candidates"], selection)
+        personal = {row: (vectors[row], cf_scores[j], cf_idx[j]) for j, row in enumerate(rows.tolist())}
+    results = []
+    with stage("rank"):
+        for row, (row_scores, row_idx) in enumerate(zip(scores, idx)):
+            valid = row_idx >= 0
+            positions, row_scores = row_idx[valid], row_scores[valid]
+            live = ids[positions] >= 0  # slot removed by an incremental sync
+            positions, row_scores = positions[live], row_scores[live]
+            if row in personal:
+                keep = k if diversity is None else None
+                rerank_query = rerank_queries[row] if rerank_queries is not None else None
+                positions, row_scores = _blend(
+                    artifacts, student_texts[row], positions, row_scores, *personal[row], rerank_query, keep
+                )
+            elif rerank_queries is not None:
+                # same artifacts as the search, so positions and metadata rows agree
+                keep = k if diversity is None else len(positions)
+                positions, row_scores = rerank(artifacts.metadata, positions, row_scores, rerank_queries[row], keep)
+            if diversity is not None:
+                positions, row_scores = _diversify(artifacts, positions, row_scores, diversity, k)
+            results.append(
+                [
+                    SearchHit(pos, iid, score)
+                    for pos, iid, score in zip(positions.tolist(), ids[positions].tolist(), row_scores.tolist())
+                ]
+            )
+    return results
+
+
+def _blend(
+    artifacts: LoadedArtifacts,
+    text: str,
+    positions: np.ndarray,
+    scores: np.ndarray,
+    vector: np.ndarray,
+    cf_scores: np.ndarray,
+    cf_positions: np.ndarray,
+    rerank_query: Optional[RerankQuery],
+    keep: Optional[int],
+):
+    """The content candidates plus the student's collaborative ones, best ``keep`` (all if None) by the blend.
+
+    Collaborative candidates the content search did not return are scored
+    against the query vector, so every candidate has a content score
+    (re-ranked when ``rerank_query`` is given) and a collaborative score,
+    the inner product of the student's and the internship's vectors clipped
+    to [0, 1]. The blend is ``(1 - COLLAB_CONFIG['weight'])`` times the
+    first plus ``COLLAB_CONFIG['weight']`` times the second.
+    """
+    with stage("collaborative"):
+        extra = cf_positions[(cf_positions >= 0) & (cf_scores > 0)]
+        extra = extra[(artifacts.ids[extra] >= 0) & ~np.isin(extra, positions)]
+        if len(extra):
+            positions = np.concatenate([positions, extra])
+            scores = np.concatenate([scores, _query_scores(artifacts, text, extra)])
+        if rerank_query is not None:
+            positions, scores = rerank(artifacts.metadata, positions, scores, rerank_query, len(positions))
+        affinity = np.clip(artifacts.collaborative.item_vectors(positions) @ vector, 0.0, 1.0)
+        weight = COLLAB_CONFIG["weight"]
+        blended = (1 - weight) * scores.astype(np.float64) + weight * affinity
+        order = np.argsort(-blended, kind="stable")[:keep]
+        return positions[order], blended[order]
+
+
+def _diversify(artifacts: LoadedArtifacts, positions: np.ndarray, scores: np.ndarray, query: DiversityQuery, k: int):
+    with stage("diversify"):
+        similarities = None
+        if query.mode == "mmr" and len(positions):
+            similarities = pairwise_similarities(_candidate_vectors(artifacts, positions))
+        companies = None
+        if query.max_per_company and artifacts.metadata is not None:
+            companies = artifacts.metadata.company_codes(positions)
+        return diversify(positions, scores, query, k, similarities, companies)
+
+
+def popular_hits(domain: str, skills: Sequence[str], k: int) -> Optional[List[SearchHit]]:
+    """Precomputed unfiltered ``search_hits`` for a student's domain and canonical skills.
 
+    None when the active generation has no table entry for the query (or
+    no usable table); the caller then searches.
+    """
+    artifacts = _load_artifacts()
+    table = artifacts.popular
+    if table is None:
+        return None
+    found = table.lookup(query_hash(domain, skills), k)
+    if found is None:
+        return None
+    positions, scores = found
+    ids = artifacts.ids
+    return [
+        SearchHit(pos, iid, score)
+        for pos, iid, score in zip(positions.tolist(), ids[positions].tolist(), scores.tolist())
+    ]
@@ -0,0 +1,340 @@
+# Dense FAISS index split into shards, searched on a pool of worker processes
+"""
+A catalog can outgrow what one index searches fast enough on one core. With
+``SEARCH_CONFIG['shards']`` > 1 the build splits the dense index into that
+many FAISS indexes over disjoint sets of positions, assigned by a hash of
+``internship_id`` or by domain. Each shard is an ``IndexIDMap2`` whose IDs
+are global positions, like the unsharded index, so the IDs file, the
+metadata store and everything else keyed by position are unchanged. The
+shards live in ``shards/`` of a bundle::
+
+    layout.json       shard count, assignment rule, domain -> shard
+    shard_of.npy      int16 shard of each position
+    shard-000.faiss   one index file per shard
+
+A query is sent to every shard (with a filter, only to shards holding
+selected positions) and the per-shard top-k lists are merged with a heap.
+All shards are cloned from one trained index, so IVF and PQ shards share
+their quantizers and codebooks. Flat searches, and unfiltered IVF and PQ
+searches, return the scores the unsharded index returns; only the choice
+among equally scored hits for the last places can differ, which FAISS
+leaves to scan order anyway. Filtered IVF/PQ searches size their probes to
+each shard's share of the selection, and HNSW graphs are built per shard,
+so those agree approximately (usually finding at least as much).
+"""
+import heapq
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+from DB.VectorDB import AnnIndex
+from DB.VectorDB.MetadataStore import count_positions, domain_key, pack_positions
+
+SHARD_BY = ("hash", "domain")
+
+# (shard, packed selection bitmap or None, selected positions in the shard)
+ShardTask = Tuple[int, Optional[np.ndarray], int]
+
+
+def _shard_file(shard: int) -> str:
+    return f"shard-{shard:03d}.faiss"
+
+
+def _replace(path: Path, write) -> None:
+    # staged files may be hard links into the previous generation
+    tmp = path.with_name(f"{path.name}.tmp")
+    write(str(tmp))
+    os.replace(tmp, path)
+
+
+class ShardLayout:
+    """Which shard holds each position; grows as rows are assigned."""
+
+    def __init__(self, count: int, by: str, domains: Optional[Dict[str, int]] = None, shard_of: Optional[np.ndarray] = None):
+        if by not in SHARD_BY:
+            raise ValueError(f"Unknown shard_by {by!r}; expected one of {SHARD_BY}")
+        self.count = count
+        self.by = by
+        self.domains = dict(domains or {})
+        self._parts: List[np.ndarray] = [] if shard_of is None else [shard_of]
+
+    def add(self, rows: Sequence[tuple]) -> None:
+        """Assign internship ``rows`` to the positions following those already assigned."""
+        if self.by == "hash":
+            ids = np.fromiter((r[0] for r in rows), dtype=np.uint64, count=len(rows))
+            # Fibonacci hashing: spreads IDs that were issued in a pattern
+            shards = ((ids * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)) % np.uint64(self.count)
+        else:
+            # domains go round-robin in order of first appearance
+            shards = np.fromiter(
+                (self.domains.setdefault(domain_key(r[3]), len(self.domains) % self.count) for r in rows),
+                dtype=np.int64,
+                count=len(rows),
+            )
+        self._parts.append(shards.astype(np.int16))
+
+    @property
+    def shard_of(self) -> np.ndarray:
+        """Shard of every assigned position."""
+        if len(self._parts) != 1:
+            self._parts = [np.concatenate(self._parts) if self._parts else np.zeros(0, dtype=np.int16)]
+        return self._parts[0]
+
+    def bitmaps(self) -> np.ndarray:
+        """Packed position bitmap of each shard, one row per shard."""
+        shard_of = self.shard_of
+        return np.stack([pack_positions(shard_of == shard) for shard in range(self.count)])
+
+    def save(self, directory: Path) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+
+        def write_positions(tmp):
+            with open(tmp, "wb") as f:
+                np.save(f, self.shard_of)
+
+        _replace(directory / "shard_of.npy", write_positions)
+        layout = {"count": self.count, "by": self.by, "domains": self.domains}
+        _replace(directory / "layout.json", lambda tmp: Path(tmp).write_text(json.dumps(layout)))
+
+    @classmethod
+    def load(cls, directory: Path) -> "ShardLayout":
+        layout = json.loads((directory / "layout.json").read_text())
+        return cls(layout["count"], layout["by"], layout["domains"], np.load(directory / "shard_of.npy"))
+
+
+def _search_shard(index: faiss.Index, queries: np.ndarray, k: int, task: ShardTask, exact_max: int):
+    _, selection, count = task
+    if selection is None:
+        return index.search(queries, k)
+    return AnnIndex.search_filtered(index, queries, k, selection, count, exact_max)
+
+
+def _merge(results: List[Tuple[np.ndarray, np.ndarray]], n_queries: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row heap merge of per-shard top-k lists into (scores, positions) shaped like ``index.search``."""
+    scores = np.full((n_queries, k), -np.finfo(np.float32).max, dtype=np.float32)
+    found = np.full((n_queries, k), -1, dtype=np.int64)
+    for row in range(n_queries):
+        lists = []
+        for shard_scores, shard_found in results:
+            valid = shard_found[row] >= 0
+            lists.append(zip((-shard_scores[row][valid]).tolist(), shard_found[row][valid].tolist()))
+        # Like FAISS: of equal scores the lowest positions are kept, listed highest first
+        best = sorted(itertools.islice(heapq.merge(*lists), k), key=lambda hit: (hit[0], -hit[1]))
+        if best:
+            negated, positions = zip(*best)
+            scores[row, :len(best)] = np.negative(negated)
+            found[row, :len(best)] = positions
+    return scores, found
+
+
+# A worker's shards, by shard number
+_worker_shards: Dict[int, faiss.Index] = {}
+
+
+def _open_shards(directory: str, shards: List[int], mmap: bool, config: dict) -> None:
+    faiss.omp_set_num_threads(1)  # the parallelism comes from the processes
+    for shard in shards:
+        index = AnnIndex.read(str(Path(directory) / _shard_file(shard)), mmap=mmap)
+        _worker_shards[shard] = AnnIndex.configure_search(index, config)
+
+
+def _worker_size() -> int:
+    return sum(index.ntotal for index in _worker_shards.values())
+
+
+def _search_worker(queries: np.ndarray, k: int, tasks: List[ShardTask], exact_max: int):
+    return [_search_shard(_worker_shards[task[0]], queries, k, task, exact_max) for task in tasks]
+
+
+def _reconstruct_worker(shard: int, positions: np.ndarray) -> np.ndarray:
+    return AnnIndex.reconstruct(_worker_shards[shard], positions)
+
+
+def _shutdown(executors: List[ProcessPoolExecutor]) -> None:
+    for executor in executors:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _ShardPool:
+    """Worker processes that map the shard files; worker ``w`` of ``W`` holds shards ``w, w + W, ...``.
+
+    Each worker is its own single-process executor, so a task reaches the
+    process holding its shards. Workers are spawned, as in ``ChunkPool``,
+    and shut down once the pool is garbage collected (i.e. when the last
+    request using its generation finishes) or closed.
+    """
+
+    def __init__(self, directory: Path, count: int, workers: int, mmap: bool, config: dict):
+        workers = min(count, workers if workers > 0 else count)
+        context = multiprocessing.get_context("spawn")
+        self._owner = [shard % workers for shard in range(count)]
+        self._executors = [
+            ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=context,
+                initializer=_open_shards,
+                initargs=(str(directory.resolve()), list(range(worker, count, workers)), mmap, config),
+            )
+            for worker in range(workers)
+        ]
+        self._finalizer = weakref.finalize(self, _shutdown, self._executors)
+        # start the workers and map the shards now rather than on the first query
+        self.ntotal = sum(f.result() for f in [executor.submit(_worker_size) for executor in self._executors])
+
+    @property
+    def workers(self) -> int:
+        return len(self._executors)
+
+    def search(self, queries: np.ndarray, k: int, tasks: List[ShardTask], exact_max: int):
+        by_worker: Dict[int, List[ShardTask]] = {}
+        for task in tasks:
+            by_worker.setdefault(self._owner[task[0]], []).append(task)
+        futures = [
+            self._executors[worker].submit(_search_worker, queries, k, worker_tasks, exact_max)
+            for worker, worker_tasks in by_worker.items()
+        ]
+        return [result for future in futures for result in future.result()]
+
+    def reconstruct(self, shard: int, positions: np.ndarray):
+        """Future of ``AnnIndex.reconstruct`` of ``positions`` on ``shard``."""
+        return self._executors[self._owner[shard]].submit(_reconstruct_worker, shard, positions)
+
+    def close(self) -> None:
+        self._finalizer()
+
+
+class ShardedIndex:
+    """Shards of a dense index, searched as one index.
+
+    Either holds the shards in this process (builds, syncs, and serving with
+    ``shard_workers`` = 1, searching them one after another) or hands the
+    searches to a ``_ShardPool``. ``search`` and ``search_filtered`` return
+    (scores, positions) like ``faiss.Index.search``.
+    """
+
+    def __init__(self, layout: ShardLayout, shards: Optional[List[faiss.Index]] = None, pool: Optional[_ShardPool] = None):
+        self.layout = layout
+        self.shards = shards  # None when a pool holds them
+        self._pool = pool
+        self._bitmaps: Optional[np.ndarray] = None
+
+    @classmethod
+    def create(cls, trained: faiss.Index, layout: ShardLayout, n_items: int) -> "ShardedIndex":
+        """Empty shards cloned from the empty (trained, where needed) index ``trained``."""
+        per_shard = math.ceil(n_items / layout.count)
+        shards = [
+            faiss.IndexIDMap2(AnnIndex.reserve(faiss.clone_index(trained), per_shard)) for _ in range(layout.count)
+        ]
+        return cls(layout, shards)
+
+    @classmethod
+    def read(cls, directory: Path, mmap: bool = True, workers: int = 1, config: Optional[dict] = None) -> "ShardedIndex":
+        """Load the shards in ``directory``; ``workers`` != 1 serves them from a ``_ShardPool``.
+
+        ``config`` (search knobs, as for ``AnnIndex.configure_search``) is
+        applied in the workers; in-process shards are configured by the caller.
+        """
+        directory = Path(directory)
+        layout = ShardLayout.load(directory)
+        if workers == 1:
+            shards = [AnnIndex.read(str(directory / _shard_file(shard)), mmap=mmap) for shard in range(layout.count)]
+            return cls(layout, shards)
+        return cls(layout, pool=_ShardPool(directory, layout.count, workers, mmap, config or {}))
+
+    def write(self, directory: Path) -> None:
+        directory = Path(directory)
+        self.layout.save(directory)
+        for shard, index in enumerate(self.shards):
+            _replace(directory / _shard_file(shard), lambda tmp: faiss.write_index(index, tmp))
+
+    def configure_search(self, config: dict) -> "ShardedIndex":
+        for index in self.shards or ():
+            AnnIndex.configure_search(index, config)
+        return self
+
+    @property
+    def ntotal(self) -> int:
+        if self.shards is None:
+            return self._pool.ntotal
+        return sum(index.ntotal for index in self.shards)
+
+    @property
+    def workers(self) -> int:
+        """Worker processes serving the shards (0: searched in this process)."""
+        return self._pool.workers if self._pool is not None else 0
+
+    @property
+    def is_trained(self) -> bool:
+        return True  # shards are cloned from a trained index
+
+    def shard_sizes(self) -> List[int]:
+        """Vectors in each in-process shard."""
+        return [index.ntotal for index in self.shards]
+
+    def add_with_ids(self, vectors: np.ndarray, positions: np.ndarray) -> None:
+        """Add ``vectors`` under ``positions``, each to its shard (assigned beforehand with ``layout.add``)."""
+        shard_of = self.layout.shard_of[positions]
+        for shard in np.unique(shard_of).tolist():
+            rows = shard_of == shard
+            self.shards[shard].add_with_ids(np.ascontiguousarray(vectors[rows]), positions[rows])
+        self._bitmaps = None
+
+    def remove_ids(self, positions: np.ndarray) -> int:
+        shard_of = self.layout.shard_of[positions]
+        return sum(
+            AnnIndex.remove_ids(self.shards[shard], positions[shard_of == shard])
+            for shard in np.unique(shard_of).tolist()
+        )
+
+    def search(self, queries: np.ndarray, k: int):
+        return self._fan_out(queries, k, [(shard, None, 0) for shard in range(self.layout.count)], 0)
+
+    def search_filtered(self, queries: np.ndarray, k: int, bitmap: np.ndarray, exact_max: int):
+        """``AnnIndex.search_filtered`` on each shard holding selected positions, merged."""
+        if self._bitmaps is None:
+            self._bitmaps = self.layout.bitmaps()
+        tasks = []
+        for shard, shard_bitmap in enumerate(self._bitmaps):
+            selection = bitmap & shard_bitmap
+            count = count_positions(selection)
+            if count:
+                tasks.append((shard, selection, count))
+        return self._fan_out(queries, k, tasks, exact_max)
+
+    def reconstruct_batch(self, positions: np.ndarray) -> np.ndarray:
+        """``AnnIndex.reconstruct`` of ``positions``, each from its shard, in the given order."""
+        positions = np.asarray(positions, dtype=np.int64)
+        shard_of = self.layout.shard_of[positions]
+        rows = {shard: np.flatnonzero(shard_of == shard) for shard in np.unique(shard_of).tolist()}
+        if self._pool is not None:
+            futures = {shard: self._pool.reconstruct(shard, positions[r]) for shard, r in rows.items()}
+            parts = {shard: future.result() for shard, future in futures.items()}
+        else:
+            parts = {shard: AnnIndex.reconstruct(self.shards[shard], positions[r]) for shard, r in rows.items()}
+        if not parts:
+            return np.zeros((0, 0), dtype=np.float32)
+        vectors = np.empty((len(positions), next(iter(parts.values())).shape[1]), dtype=np.float32)
+        for shard, r in rows.items():
+            vectors[r] = parts[shard]
+        return vectors
+
+    def _fan_out(self, queries: np.ndarray, k: int, tasks: List[ShardTask], exact_max: int):
+        if self._pool is not None:
+            results = self._pool.search(queries, k, tasks, exact_max)
+        else:
+            results = [_search_shard(self.shards[task[0]], queries, k, task, exact_max) for task in tasks]
+        return _merge(results, len(queries), k)
+
+    def close(self) -> None:
+        """Stop the worker processes now instead of when the index is garbage collected."""
+        if self._pool is not None:
+            self._pool.close()
@@ -0,0 +1,131 @@
+# Sparse inverted-index search over TF-IDF vectors
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+
+class SparseIndex:
+    """Exact cosine search over L2-normalized TF-IDF rows without densifying.
+
+    The corpus is stored transposed as a term x document CSR matrix, i.e. an
+    inverted index: row ``t`` holds the postings (document, weight) of term
+    ``t``. A query only touches the postings of its own terms, so cost scales
+    with the number of documents sharing a term with the query rather than
+    with ``N x vocab_size``. ``search`` mirrors ``faiss.Index.search``.
+    """
+
+    _ARRAYS = ("data", "indices", "indptr")
+
+    def __init__(self, postings: sp.csr_matrix):
+        # copy=False keeps memory-mapped arrays mapped
+        self._postings = postings.astype(np.float32, copy=False).tocsr()
+        self.d, self.ntotal = self._postings.shape
+
+    @classmethod
+    def from_documents(cls, matrix) -> "SparseIndex":
+        """Build from an (N, vocab) matrix whose rows are already L2-normalized."""
+        return cls(sp.csr_matrix(matrix, dtype=np.float32).T.tocsr())
+
+    @classmethod
+    def read(cls, directory: str, mmap: bool = True) -> "SparseIndex":
+        """Load an index written by ``write``.
+
+        With ``mmap`` the CSR arrays are memory-mapped, so processes serving
+        the same files share one page-cache copy.
+        """
+        directory = Path(directory)
+        mode = "r" if mmap else None
+        data, indices, indptr = (np.load(directory / f"{name}.npy", mmap_mode=mode) for name in cls._ARRAYS)
+        shape = tuple(int(n) for n in np.load(directory / "shape.npy"))
+        return cls(sp.csr_matrix((data, indices, indptr), shape=shape, copy=False))
+
+    def write(self, directory: str) -> None:
+        """Write the postings as flat ``.npy`` arrays under ``directory``.
+
+        Each file is replaced atomically, never rewritten in place, so hard
+        links to a previous version of the directory stay intact.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        arrays = {name: getattr(self._postings, name) for name in self._ARRAYS}
+        arrays["shape"] = np.array(self._postings.shape, dtype=np.int64)
+        for name, array in arrays.items():
+            path = directory / f"{name}.npy"
+            tmp = path.with_name(f"{path.name}.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp, path)
+
+    def add(self, matrix) -> None:
+        """Append L2-normalized document rows at positions ntotal, ntotal+1, ..."""
+        new_postings = sp.csr_matrix(matrix, dtype=np.float32).T.tocsr()
+        self._postings = sp.hstack([self._postings, new_postings], format="csr")
+        self.d, self.ntotal = self._postings.shape
+
+    def remove(self, positions) -> None:
+        """Drop the postings of documents at ``positions``; their slots stay reserved."""
+        keep = np.ones(self.ntotal, dtype=np.float32)
+        keep[np.asarray(positions, dtype=np.int64)] = 0.0
+        self._postings = (self._postings @ sp.diags(keep)).tocsr()
+        self._postings.eliminate_zeros()
+
+    def reconstruct_batch(self, positions) -> sp.csr_matrix:
+        """The document rows at ``positions`` as a sparse (n, vocab) matrix, in the given order."""
+        return self._postings[:, np.asarray(positions, dtype=np.int64)].T.tocsr()
+
+    @property
+    def nbytes(self) -> int:
+        p = self._postings
+        return p.data.nbytes + p.indices.nbytes + p.indptr.nbytes
+
+    def search(self, queries, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return ``(scores, positions)`` arrays of shape (n_queries, k).
+
+        Documents sharing no term with a query score 0 and fill any remaining
+        slots in position order, as they would tie at 0 in the dense index.
+        Slots beyond ``ntotal`` are padded with position -1, like FAISS. With
+        a boolean ``mask`` over positions, only masked-in documents are
+        returned, and the padding starts after the last one.
+        """
+        queries = sp.csr_matrix(queries, dtype=np.float32)
+        hits = (queries @ self._postings).tocsr()
+        n_queries = queries.shape[0]
+        allowed = None
+        if mask is not None:
+            allowed = np.flatnonzero(mask)
+        k_eff = min(k, self.ntotal if allowed is None else len(allowed))
+
+        scores = np.full((n_queries, k), -np.finfo(np.float32).max, dtype=np.float32)
+        positions = np.full((n_queries, k), -1, dtype=np.int64)
+        for row in range(n_queries):
+            start, end = hits.indptr[row], hits.indptr[row + 1]
+            docs = hits.indices[start:end]
+            vals = hits.data[start:end]
+            if mask is not None:
+                keep = mask[docs]
+                docs, vals = docs[keep], vals[keep]
+            if len(vals) > k_eff:
+                top = np.argpartition(-vals, k_eff - 1)[:k_eff]
+                docs, vals = docs[top], vals[top]
+            order = np.lexsort((docs, -vals))
+            docs, vals = docs[order], vals[order]
+
+            n_hit = len(docs)
+            scores[row, :n_hit] = vals
+            positions[row, :n_hit] = docs
+            if n_hit < k_eff:
+                scores[row, n_hit:k_eff] = 0.0
+                positions[row, n_hit:k_eff] = _first_missing(docs, k_eff - n_hit, allowed)
+        return scores, positions
+
+
+def _first_missing(taken: np.ndarray, count: int, allowed: Optional[np.ndarray] = None) -> np.ndarray:
+    """The ``count`` smallest positions (of ``allowed``, if given) not present in ``taken``."""
+    if allowed is None:
+        candidates = np.arange(count + len(taken))
+    else:
+        candidates = allowed[: count + len(taken)]
+    return np.setdiff1d(candidates, taken, assume_unique=False)[:count]
@@ -0,0 +1,205 @@
+# Compact, memory-mappable TF-IDF vectorizer
+"""
+A fitted ``TfidfVectorizer`` stored without its Python dict vocabulary::
+
+    <directory>/
+        vocab.npy     # sorted terms, fixed-width UTF-8 bytes ("S<n>")
+        idf.npy       # float64 IDF weights, aligned with vocab.npy
+        params.json   # analyzer settings + stop words
+
+sklearn numbers features in sorted term order, so a term's position in
+``vocab.npy`` is its column, and lookups are a single vectorized binary
+search. Loading is two ``np.load(mmap_mode="r")`` calls, and workers
+mapping the same files share them.
+"""
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+FORMAT_VERSION = 1
+
+
+def _save_atomic(path: Path, write) -> None:
+    tmp = path.with_name(f"{path.name}.tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+class CompactTfidfVectorizer:
+    """Drop-in for a fitted ``TfidfVectorizer``'s ``transform`` (word analyzer only).
+
+    ``transform`` returns exactly what the source vectorizer returns: same
+    CSR structure and bit-identical float64 values.
+    """
+
+    def __init__(self, vocab: np.ndarray, idf: Optional[np.ndarray], params: dict):
+        self.vocab = vocab
+        self.idf = idf
+        self.params = params
+        self._token_re = re.compile(params["token_pattern"])
+        self._stop_words = frozenset(params["stop_words"] or ())
+        self._min_n, self._max_n = params["ngram_range"]
+        self._width = vocab.dtype.itemsize
+
+    @staticmethod
+    def _params(vectorizer) -> dict:
+        """Analyzer settings of a ``TfidfVectorizer``; rejects settings this class does not reproduce."""
+        unsupported = {
+            "analyzer": vectorizer.analyzer != "word",
+            "strip_accents": vectorizer.strip_accents is not None,
+            "preprocessor": vectorizer.preprocessor is not None,
+            "tokenizer": vectorizer.tokenizer is not None,
+            "binary": vectorizer.binary,
+            "input": vectorizer.input != "content",
+        }
+        bad = [name for name, flag in unsupported.items() if flag]
+        if bad:
+            raise ValueError(f"Unsupported TfidfVectorizer settings for the compact format: {bad}")
+        stop_words = vectorizer.get_stop_words()
+        return {
+            "format_version": FORMAT_VERSION,
+            "lowercase": bool(vectorizer.lowercase),
+            "token_pattern": vectorizer.token_pattern,
+            "stop_words": sorted(stop_words) if stop_words else None,
+            "ngram_range": list(vectorizer.ngram_range),
+            "norm": vectorizer.norm,
+            "sublinear_tf": bool(vectorizer.sublinear_tf),
+            "use_idf": bool(vectorizer.use_idf),
+        }
+
+    @classmethod
+    def from_sklearn(cls, vectorizer) -> "CompactTfidfVectorizer":
+        """Convert a fitted ``TfidfVectorizer``; rejects settings this class does not reproduce."""
+        params = cls._params(vectorizer)
+        terms = vectorizer.get_feature_names_out()
+        vocab = np.array([t.encode("utf-8") for t in terms], dtype=bytes)
+        if len(vocab) > 1 and not (vocab[:-1] < vocab[1:]).all():
+            raise ValueError("Vectorizer features are not in sorted term order")
+        idf = np.asarray(vectorizer.idf_, dtype=np.float64) if vectorizer.use_idf else None
+        return cls(vocab, idf, params)
+
+    @classmethod
+    def from_document_frequencies(cls, vectorizer, document_frequency: Dict[str, int], n_docs: int) -> "CompactTfidfVectorizer":
+        """What fitting the unfitted ``vectorizer`` on a corpus would produce, from its statistics.
+
+        ``document_frequency`` maps every term ``vectorizer.build_analyzer()``
+        yields on the corpus to the number of its ``n_docs`` documents
+        containing it, so a corpus can be counted in chunks (or in parallel)
+        instead of held in memory. Vocabulary and IDF weights are identical
+        to ``vectorizer.fit``; settings that prune the vocabulary are rejected.
+        """
+        params = cls._params(vectorizer)
+        pruning = {
+            "min_df": vectorizer.min_df > (1 if isinstance(vectorizer.min_df, int) else 0.0),
+            "max_df": vectorizer.max_df < (1.0 if isinstance(vectorizer.max_df, float) else n_docs),
+            "max_features": vectorizer.max_features is not None,
+            "vocabulary": vectorizer.vocabulary is not None,
+        }
+        bad = [name for name, flag in pruning.items() if flag]
+        if bad:
+            raise ValueError(f"Vocabulary pruning is not supported when fitting from frequencies: {bad}")
+        if not document_frequency:
+            raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+
+        terms = sorted(document_frequency)
+        vocab = np.array([t.encode("utf-8") for t in terms], dtype=bytes)
+        idf = None
+        if vectorizer.use_idf:
+            # sklearn's TfidfTransformer.fit, operation for operation
+            df = np.array([document_frequency[t] for t in terms], dtype=np.float64)
+            smooth = float(vectorizer.smooth_idf)
+            df += smooth
+            idf = np.log((n_docs + smooth) / df) + 1.0
+        return cls(vocab, idf, params)
+
+    @classmethod
+    def load(cls, directory, mmap: bool = True) -> "CompactTfidfVectorizer":
+        directory = Path(directory)
+        params = json.loads((directory / "params.json").read_text())
+        if params.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact vectorizer format in {directory}")
+        mode = "r" if mmap else None
+        vocab = np.load(directory / "vocab.npy", mmap_mode=mode).view(np.ndarray)
+        idf = np.load(directory / "idf.npy", mmap_mode=mode).view(np.ndarray) if params["use_idf"] else None
+        return cls(vocab, idf, params)
+
+    def save(self, directory) -> None:
+        """Write the files, each replaced atomically."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        _save_atomic(directory / "vocab.npy", lambda f: np.save(f, np.asarray(self.vocab)))
+        if self.idf is not None:
+            _save_atomic(directory / "idf.npy", lambda f: np.save(f, np.asarray(self.idf)))
+        else:
+            (directory / "idf.npy").unlink(missing_ok=True)
+        _save_atomic(directory / "params.json", lambda f: f.write(json.dumps(self.params).encode()))
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self.vocab)
+
+    def analyze(self, doc: str) -> List[str]:
+        """Terms of ``doc`` as sklearn's word analyzer yields them."""
+        if self.params["lowercase"]:
+            doc = doc.lower()
+        tokens = self._token_re.findall(doc)
+        if self._stop_words:
+            tokens = [t for t in tokens if t not in self._stop_words]
+        if self._max_n == 1:
+            return tokens
+        terms = list(tokens) if self._min_n == 1 else []
+        for n in range(max(2, self._min_n), min(self._max_n, len(tokens)) + 1):
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def lookup(self, terms: List[str]) -> np.ndarray:
+        """Column of each term, or -1 for out-of-vocabulary terms."""
+        if not terms:
+            return np.empty(0, dtype=np.int64)
+        encoded = [t.encode("utf-8") for t in terms]
+        # "S<n>" arrays truncate longer values, which could then collide
+        # with a vocabulary term; such terms can't be in the vocab anyway.
+        fits = np.fromiter((len(b) <= self._width for b in encoded), dtype=bool, count=len(encoded))
+        keys = np.array(encoded, dtype=self.vocab.dtype)
+        cols = np.searchsorted(self.vocab, keys)
+        cols[cols >= len(self.vocab)] = 0
+        found = fits & (self.vocab[cols] == keys)
+        return np.where(found, cols, -1)
+
+    def transform(self, raw_documents: Iterable[str]) -> sp.csr_matrix:
+        """TF-IDF rows for ``raw_documents``, identical to ``TfidfVectorizer.transform``."""
+        if isinstance(raw_documents, str):
+            raise ValueError("Iterable over raw text documents expected, string object received.")
+        term_lists = [self.analyze(doc) for doc in raw_documents]
+        n_docs = len(term_lists)
+        lengths = np.fromiter((len(t) for t in term_lists), dtype=np.int64, count=n_docs)
+        cols = self.lookup([term for terms in term_lists for term in terms])
+        rows = np.repeat(np.arange(n_docs, dtype=np.int64), lengths)
+        keep = cols >= 0
+
+        # duplicates are summed into term counts; indices come out sorted
+        counts = sp.csr_matrix(
+            (np.ones(int(keep.sum()), dtype=np.float64), (rows[keep], cols[keep])),
+            shape=(n_docs, len(self.vocab)),
+        )
+        counts.sum_duplicates()
+        if counts.indptr[-1] <= np.iinfo(np.int32).max:
+            counts.indices = counts.indices.astype(np.int32, copy=False)
+            counts.indptr = counts.indptr.astype(np.int32, copy=False)
+
+        if self.params["sublinear_tf"]:
+            np.log(counts.data, counts.data)
+            counts.data += 1.0
+        if self.idf is not None:
+            counts.data *= self.idf[counts.indices]
+        if self.params["norm"] is not None:
+            from sklearn.preprocessing import normalize  # build path only; sklearn is slow to import
+
+            counts = normalize(counts, norm=self.params["norm"], copy=False)
+        return counts
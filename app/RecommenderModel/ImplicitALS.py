@@ -0,0 +1,118 @@
+# Implicit-feedback matrix factorization (ALS with conjugate gradient)
+"""
+Factorizes a students x internships matrix of interaction weights into
+student and internship vectors whose inner products predict preference,
+following Hu, Koren & Volinsky, "Collaborative Filtering for Implicit
+Feedback Datasets": every cell has preference 1 if the student interacted
+with the internship and 0 otherwise, weighted by the confidence
+``1 + alpha * weight``. Each half-sweep solves all student (then all
+internship) vectors with a few conjugate gradient steps warm-started from
+the current ones (Takacs, Pilaszy & Tikk, "Applications of the conjugate
+gradient method for implicit feedback collaborative filtering").
+
+The CG steps run for every row at once: one step costs a pass over the
+non-zero cells (a gather, a row-wise dot product and a sparse matrix
+product) plus a dense ``(rows, f) @ (f, f)``, so a sweep is
+``O(nnz * f + (students + internships) * f^2)`` with no per-row Python loop
+and no ``f x f`` solve per row. Training time is therefore linear in the
+number of interactions for a fixed number of sweeps.
+"""
+import time
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+# non-zero cells per block of the row-wise dot products in a CG step: the two
+# gathered (block, f) float32 blocks stay in cache, about twice as fast as
+# gathering every cell at once
+_BLOCK = 4096
+
+
+def init_factors(rows: int, factors: int, rng: np.random.Generator) -> np.ndarray:
+    """Small random starting vectors (all zero would stay zero under CG)."""
+    return (rng.standard_normal((rows, factors)) * 0.01).astype(np.float32)
+
+
+def _cg_solve(
+    confidence: sp.csr_matrix, fixed: np.ndarray, solved: np.ndarray, regularization: float, steps: int
+) -> None:
+    """A few CG steps on every row of ``solved`` against the ``fixed`` side, in place.
+
+    Row ``u`` solves ``(F'F + F'(C_u - I)F + reg I) x_u = F' C_u 1`` where
+    ``C_u`` is the row's confidence, ``confidence`` holding ``c - 1`` on the
+    interacted cells.
+    """
+    gram = fixed.T @ fixed + regularization * np.eye(fixed.shape[1], dtype=np.float32)
+    rows = np.repeat(np.arange(confidence.shape[0], dtype=np.int64), np.diff(confidence.indptr))
+    cols = confidence.indices
+    extra = confidence.data  # c - 1
+
+    dots = np.empty(len(cols), dtype=np.float32)
+    left = np.empty((_BLOCK, fixed.shape[1]), dtype=np.float32)
+    right = np.empty_like(left)
+
+    def times_a(p: np.ndarray) -> np.ndarray:
+        # (F'F + reg I) p_u + sum_i (c_ui - 1) (f_i . p_u) f_i, for every row u
+        for start in range(0, len(cols), _BLOCK):
+            end = min(start + _BLOCK, len(cols))
+            a, b = left[: end - start], right[: end - start]
+            np.take(p, rows[start:end], axis=0, out=a)
+            np.take(fixed, cols[start:end], axis=0, out=b)
+            np.einsum("ij,ij->i", a, b, out=dots[start:end])
+        weighted = sp.csr_matrix((extra * dots, cols, confidence.indptr), shape=confidence.shape)
+        return p @ gram + weighted @ fixed
+
+    # right-hand side: sum_i c_ui f_i
+    rhs = sp.csr_matrix((extra + 1, cols, confidence.indptr), shape=confidence.shape) @ fixed
+    residual = rhs - times_a(solved)
+    direction = residual.copy()
+    norms = np.einsum("ij,ij->i", residual, residual)
+    for _ in range(steps):
+        a_direction = times_a(direction)
+        curvature = np.einsum("ij,ij->i", direction, a_direction)
+        step = np.divide(norms, curvature, out=np.zeros_like(norms), where=curvature > 0)
+        solved += step[:, None] * direction
+        residual -= step[:, None] * a_direction
+        new_norms = np.einsum("ij,ij->i", residual, residual)
+        ratio = np.divide(new_norms, norms, out=np.zeros_like(norms), where=norms > 0)
+        direction = residual + ratio[:, None] * direction
+        norms = new_norms
+
+
+def fit(
+    weights: sp.csr_matrix,
+    student_factors: np.ndarray,
+    item_factors: np.ndarray,
+    iterations: int,
+    alpha: float,
+    regularization: float,
+    cg_steps: int = 3,
+    max_seconds: Optional[float] = None,
+    progress: Optional[Callable[[int, float], None]] = None,
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Run up to ``iterations`` ALS sweeps over ``weights`` (students x internships).
+
+    ``student_factors`` / ``item_factors`` are the starting vectors: the
+    previous model's for an incremental run (rows for new students and
+    internships from ``init_factors``), so a couple of sweeps suffice.
+    Stops early once a sweep ends past ``max_seconds``. Returns the
+    factors and the number of sweeps run.
+    """
+    confidence = weights.astype(np.float32).tocsr()
+    confidence.data *= alpha
+    confidence_t = confidence.T.tocsr()
+    x = np.ascontiguousarray(student_factors, dtype=np.float32)
+    y = np.ascontiguousarray(item_factors, dtype=np.float32)
+    started = time.perf_counter()
+    done = 0
+    while done < iterations:
+        _cg_solve(confidence, y, x, regularization, cg_steps)
+        _cg_solve(confidence_t, x, y, regularization, cg_steps)
+        done += 1
+        elapsed = time.perf_counter() - started
+        if progress is not None:
+            progress(done, elapsed)
+        if max_seconds is not None and elapsed > max_seconds:
+            break
+    return x, y, done
@@ -0,0 +1,98 @@
+# Hot-path query encoding for search
+import threading
+from typing import List, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from RecommenderModel.CompactTfidf import CompactTfidfVectorizer
+
+# Dense batches up to this many rows reuse a per-thread buffer; larger
+# batches (the batch endpoint) get one fresh allocation instead.
+_BUFFER_ROWS = 16
+
+
+class QueryEncoder:
+    """L2-normalized float32 TF-IDF query vectors without sklearn's general path.
+
+    Same analyzer rules and weights as ``vectorizer.transform`` followed by
+    ``normalize``; terms are looked up and weighted in one vectorized pass
+    over the whole batch. Output is either CSR parts or a dense float32
+    buffer that is reused per thread, so a query allocates no vocab-width
+    temporaries.
+    """
+
+    def __init__(self, vectorizer: CompactTfidfVectorizer):
+        self.vectorizer = vectorizer
+        self.dim = vectorizer.vocabulary_size
+        self._sublinear_tf = vectorizer.params["sublinear_tf"]
+        self._local = threading.local()
+
+    def encode_parts(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """CSR ``(indptr, indices, values)`` of the normalized query rows."""
+        vec = self.vectorizer
+        n = len(texts)
+        term_lists = [vec.analyze(text) for text in texts]
+        lengths = np.fromiter((len(terms) for terms in term_lists), dtype=np.int64, count=n)
+        cols = vec.lookup([term for terms in term_lists for term in terms])
+        rows = np.repeat(np.arange(n, dtype=np.int64), lengths)
+        keep = cols >= 0
+
+        # (row, col) keys sort row-major, so unique() yields CSR order + term counts
+        keys, counts = np.unique(rows[keep] * self.dim + cols[keep], return_counts=True)
+        rows, cols = np.divmod(keys, self.dim)
+        weights = counts.astype(np.float64)
+        if self._sublinear_tf:
+            np.log(weights, weights)
+            weights += 1.0
+        if vec.idf is not None:
+            weights *= vec.idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n))
+        values = (weights / norms[rows]).astype(np.float32)
+
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return indptr, cols.astype(np.int32), values
+
+    def encode_csr(self, texts: List[str]) -> sp.csr_matrix:
+        indptr, indices, values = self.encode_parts(texts)
+        return sp.csr_matrix((values, indices, indptr), shape=(len(texts), self.dim), copy=False)
+
+    def encode_dense(self, texts: List[str]) -> np.ndarray:
+        """Dense ``(len(texts), dim)`` rows.
+
+        For small batches this is a view of a per-thread buffer, valid until
+        the same thread encodes again; consume it before the next call.
+        """
+        indptr, indices, values = self.encode_parts(texts)
+        rows = np.repeat(np.arange(len(texts)), np.diff(indptr))
+        if len(texts) > _BUFFER_ROWS:
+            out = np.zeros((len(texts), self.dim), dtype=np.float32)
+            out[rows, indices] = values
+            return out
+
+        local = self._local
+        if getattr(local, "buffer", None) is None:
+            local.buffer = np.zeros((_BUFFER_ROWS, self.dim), dtype=np.float32)
+            local.written = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32))
+        buffer = local.buffer
+        buffer[local.written] = 0.0  # clear only what the previous call set
+        buffer[rows, indices] = values
+        local.written = (rows, indices)
+        return buffer[: len(texts)]
+
+    def project(self, texts: List[str], components: np.ndarray) -> np.ndarray:
+        """Rows of ``encode_csr(texts) @ components.T``, L2-normalized.
+
+        Projects straight from the sparse terms (e.g. onto TruncatedSVD
+        components), touching only the component columns the queries use.
+        """
+        indptr, indices, values = self.encode_parts(texts)
+        out = np.zeros((len(texts), components.shape[0]), dtype=np.float32)
+        for row in range(len(texts)):
+            start, end = indptr[row], indptr[row + 1]
+            if start != end:
+                out[row] = components[:, indices[start:end]] @ values[start:end]
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
@@ -1,68 +1,124 @@
 import pickle
+from collections import Counter
 from pathlib import Path
-from typing import Iterable, List, Union
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Tuple, Union
 
-from sklearn.feature_extraction.text import TfidfVectorizer
+from Constants.config import BUILD_CONFIG, MODEL_CONFIG
+from DB.Postgres import fetch_chunks
+from RecommenderModel.CompactTfidf import CompactTfidfVectorizer
+from Utils.Parallel import ChunkPool
+from Utils.SkillNormalizer import skill_text
 
-from Constants.config import MODEL_CONFIG
-from DB.Postgres import fetch_all
+if TYPE_CHECKING:
+    # sklearn takes over a second to import (scipy.stats, pandas); serving
+    # never fits anything, so it is only imported by the build functions
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.feature_extraction.text import TfidfVectorizer
 
-_vectorizer: TfidfVectorizer | None = None
+_vectorizer: CompactTfidfVectorizer | None = None
 _VECTORIZER_PATH = Path(MODEL_CONFIG["vectorizer_path"])
-
-
-def _fetch_internship_corpus() -> List[str]:
-    """Pull internship text fields to build the TF-IDF corpus."""
-    query = (
-        "SELECT internship_title, company, domain, required_skills "
-        "FROM internships WHERE is_active = true"
-    )
-    rows = fetch_all(query)
-
-    corpus: List[str] = []
-    for title, company, domain, skills in rows:
-        parts: List[str] = []
-        for field in (title, company, domain, skills):
-            if field:
-                parts.append(str(field))
-        if parts:
-            corpus.append(" ".join(parts))
-
-    return corpus
-
-
-def train_and_save_vectorizer(force: bool = False) -> TfidfVectorizer:
-    """Train a TF-IDF vectorizer on DB data and persist it."""
+if _VECTORIZER_PATH.suffix == ".pkl":
+    # older configs point at the pickle; the compact form lives next to it
+    _VECTORIZER_PATH = _VECTORIZER_PATH.with_suffix("")
+_LEGACY_PICKLE_PATH = _VECTORIZER_PATH.with_suffix(".pkl")
+_CORPUS_QUERY = (
+    "SELECT internship_title, company, domain, required_skills "
+    "FROM internships WHERE is_active = true"
+)
+_analyzer = None  # per process, for build workers
+
+
+def _template() -> "TfidfVectorizer":
+    """The (unfitted) TF-IDF settings every vectorizer is fitted with."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    return TfidfVectorizer(stop_words="english")
+
+
+def _corpus_text(row) -> Optional[str]:
+    parts: List[str] = []
+    for field in (*row[:3], skill_text(row[3])):
+        if field:
+            parts.append(str(field))
+    return " ".join(parts) if parts else None
+
+
+def count_document_terms(rows: List[tuple]) -> Tuple[Counter, int, int]:
+    """Per-term document frequency over a chunk of (title, company, domain, skills) rows.
+
+    Returns the frequencies, the documents counted and the rows seen (rows
+    with no text are not documents).
+    """
+    global _analyzer
+
+    if _analyzer is None:
+        _analyzer = _template().build_analyzer()
+    frequency: Counter = Counter()
+    documents = 0
+    for row in rows:
+        text = _corpus_text(row)
+        if text is not None:
+            frequency.update(set(_analyzer(text)))
+            documents += 1
+    return frequency, documents, len(rows)
+
+
+def train_and_save_vectorizer(
+    force: bool = False, pool: Optional[ChunkPool] = None, progress: Optional[Callable[[int], None]] = None
+) -> CompactTfidfVectorizer:
+    """Train a TF-IDF vectorizer on DB data and persist it in compact form.
+
+    The table is streamed in ``BUILD_CONFIG['chunk_size']`` chunks and only
+    per-term document counts are kept, counted on ``pool`` when given; the
+    result is identical to fitting ``TfidfVectorizer`` on the whole corpus.
+    ``progress`` is called with the number of rows counted so far.
+    """
     global _vectorizer
 
     if _VECTORIZER_PATH.exists() and not force:
         return load_vectorizer()
 
-    corpus = _fetch_internship_corpus()
-    if not corpus:
+    chunks = fetch_chunks(_CORPUS_QUERY, chunk_size=BUILD_CONFIG["chunk_size"])
+    frequency: Counter = Counter()
+    documents = rows = 0
+    for chunk_frequency, chunk_documents, chunk_rows in (pool or ChunkPool(1)).map(count_document_terms, chunks):
+        frequency.update(chunk_frequency)
+        documents += chunk_documents
+        rows += chunk_rows
+        if progress is not None:
+            progress(rows)
+    if not documents:
         raise RuntimeError("No internship records found to train the vectorizer.")
 
-    vectorizer = TfidfVectorizer(stop_words="english")
-    vectorizer.fit(corpus)
-
-    _VECTORIZER_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(_VECTORIZER_PATH, "wb") as f:
-        pickle.dump(vectorizer, f)
+    CompactTfidfVectorizer.from_document_frequencies(_template(), frequency, documents).save(_VECTORIZER_PATH)
+    _vectorizer = CompactTfidfVectorizer.load(_VECTORIZER_PATH)
+    return _vectorizer
 
-    _vectorizer = vectorizer
-    return vectorizer
 
+def load_vectorizer(retrain_if_missing: bool = True, path: Path | None = None) -> CompactTfidfVectorizer:
+    """Load the compact vectorizer, training if absent.
 
-def load_vectorizer(retrain_if_missing: bool = True) -> TfidfVectorizer:
-    """Load the vectorizer from disk, training if absent."""
+    The single loader for build and search: without ``path`` it returns the
+    process-wide copy from ``MODEL_CONFIG['vectorizer_path']`` (converting a
+    legacy pickle once); with ``path`` (e.g. inside an artifact bundle) it
+    maps that copy instead.
+    """
     global _vectorizer
 
+    if path is not None:
+        return CompactTfidfVectorizer.load(path)
+
     if _vectorizer is not None:
         return _vectorizer
 
     if _VECTORIZER_PATH.exists():
-        with open(_VECTORIZER_PATH, "rb") as f:
-            _vectorizer = pickle.load(f)
+        _vectorizer = CompactTfidfVectorizer.load(_VECTORIZER_PATH)
+        return _vectorizer
+
+    if _LEGACY_PICKLE_PATH.exists():
+        with open(_LEGACY_PICKLE_PATH, "rb") as f:
+            CompactTfidfVectorizer.from_sklearn(pickle.load(f)).save(_VECTORIZER_PATH)
+        _vectorizer = CompactTfidfVectorizer.load(_VECTORIZER_PATH)
         return _vectorizer
 
     if retrain_if_missing:
@@ -71,10 +127,23 @@ def load_vectorizer(retrain_if_missing: bool = True) -> TfidfVectorizer:
     raise FileNotFoundError(f"Vectorizer not found at {_VECTORIZER_PATH}")
 
 
+def train_svd(tfidf_matrix, n_components: int) -> "TruncatedSVD":
+    """Fit a TruncatedSVD (LSA) reducer on the TF-IDF matrix.
+
+    Not persisted here: the build stores it in the bundle it belongs to
+    (``Artifacts.SVD_FILE``), the only copy searches and syncs load.
+    """
+    from sklearn.decomposition import TruncatedSVD
+
+    # SVD rank is bounded by the smaller matrix dimension.
+    n_components = max(1, min(n_components, min(tfidf_matrix.shape) - 1))
+    svd = TruncatedSVD(n_components=n_components, algorithm="randomized", random_state=42)
+    svd.fit(tfidf_matrix)
+    return svd
+
+
 def _to_text(skills: Union[str, Iterable[str]]) -> str:
-    if isinstance(skills, str):
-        return skills
-    return " ".join(skills)
+    return skill_text(skills)
 
 
 def vectorize_skills(skills: Union[str, Iterable[str]]):
@@ -0,0 +1,128 @@
+import asyncio
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from Constants.config import ADMIN_CONFIG
+from DB.Postgres import get_pool_stats
+from DB.VectorDB import CollaborativeTraining
+from DB.VectorDB.IndexSync import SyncInProgressError, get_last_report, sync_index
+from DB.VectorDB.Search import get_artifact_status, get_collaborative_model, get_metadata_store, get_popular_table
+from Services.Cache import get_cache
+from Services.Executor import get_executor
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+def has_admin_token(request: Request) -> bool:
+    """Whether the request carries ``ADMIN_TOKEN`` (always False while it is unset)."""
+    token = ADMIN_CONFIG["token"]
+    supplied = request.headers.get(ADMIN_CONFIG["header"], "")
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def require_admin_token(request: Request) -> None:
+    """Dependency of the mutating admin routes: the request must carry ``ADMIN_TOKEN``."""
+    if not ADMIN_CONFIG["token"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin actions are disabled; set ADMIN_TOKEN to enable them",
+        )
+    if not has_admin_token(request):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Missing or invalid {ADMIN_CONFIG['header']} header",
+        )
+
+
+@router.get("/db/pool", status_code=status.HTTP_200_OK)
+async def db_pool_stats():
+    """Connection pool sizing and usage counters."""
+    stats = get_pool_stats()
+    if stats is None:
+        return {"status": "idle", "detail": "No database query has opened the pool yet"}
+    return {"status": "open", **stats}
+
+
+@router.get("/executor", status_code=status.HTTP_200_OK)
+async def executor_stats():
+    """Request executor concurrency, queue depth and rejection counters."""
+    return get_executor().stats()
+
+
+@router.get("/metadata", status_code=status.HTTP_200_OK)
+async def metadata_stats():
+    """Metadata store size and hit/miss counters (misses fall back to the DB)."""
+    store = get_metadata_store()
+    if store is None:
+        return {"status": "missing", "detail": "Metadata store not built; details come from the DB"}
+    return {"status": "loaded", **store.stats()}
+
+
+@router.get("/popular", status_code=status.HTTP_200_OK)
+async def popular_query_stats():
+    """Precomputed popular query table size and hit rate since its generation was loaded."""
+    table = get_popular_table()
+    if table is None:
+        return {"status": "missing", "detail": "No usable popular query table; every request is searched"}
+    return {"status": "loaded", **table.stats()}
+
+
+@router.get("/cache", status_code=status.HTTP_200_OK)
+async def cache_stats():
+    """Recommendation cache hit ratio, size and eviction counters."""
+    return get_cache().stats()
+
+
+@router.post("/cache/clear", status_code=status.HTTP_200_OK, dependencies=[Depends(require_admin_token)])
+async def clear_cache():
+    """Drop every cached recommendation."""
+    get_cache().clear()
+    return {"status": "cleared"}
+
+
+@router.get("/artifacts", status_code=status.HTTP_200_OK)
+async def artifact_status():
+    """Active search artifact generation, when it was loaded and how long that took."""
+    return get_artifact_status()
+
+
+@router.post("/index/sync", status_code=status.HTTP_200_OK, dependencies=[Depends(require_admin_token)])
+async def run_index_sync(full: bool = False):
+    """Sync the search index with the internships table now.
+
+    Incremental by default; ``full=true`` forces a complete rebuild.
+    """
+    try:
+        return await asyncio.to_thread(sync_index, force_full=full, blocking=False)
+    except SyncInProgressError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+@router.get("/index/sync", status_code=status.HTTP_200_OK)
+async def last_index_sync():
+    """Report of the most recent index sync in this process."""
+    return get_last_report() or {"status": "never run"}
+
+
+@router.get("/collaborative", status_code=status.HTTP_200_OK)
+async def collaborative_status():
+    """The collaborative model being served and the report of this process's last training run."""
+    model = get_collaborative_model()
+    return {
+        "status": "loaded" if model is not None else "missing",
+        **(model.stats() if model is not None else {}),
+        "last_training": CollaborativeTraining.get_last_report(),
+    }
+
+
+@router.post("/collaborative/train", status_code=status.HTTP_200_OK, dependencies=[Depends(require_admin_token)])
+async def run_collaborative_training(full: bool = False):
+    """Train the collaborative model on the interactions logged since its last run.
+
+    ``full=true`` retrains from the whole interaction log.
+    """
+    try:
+        return await asyncio.to_thread(CollaborativeTraining.train_collaborative, full=full, blocking=False)
+    except CollaborativeTraining.TrainingInProgressError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
@@ -0,0 +1,85 @@
+from fastapi import APIRouter, HTTPException, Request, status
+from typing import List, Optional
+import asyncio
+import math
+
+from Constants.config import ADMIN_CONFIG, COLLAB_CONFIG
+from Routes.admin import has_admin_token
+from Schemas.Interaction import Interaction
+from Services.InteractionService import InteractionRateLimiter, record_interactions, verify_student_token
+
+router = APIRouter(prefix="/interactions", tags=["Interactions"])
+
+# events per request; front-ends flush their buffers well below this
+_MAX_EVENTS = 1000
+
+_limiter = InteractionRateLimiter(COLLAB_CONFIG["interactions_per_minute"])
+
+
+def is_trusted_student(request: Request, student_id: Optional[str]) -> bool:
+    """Whether the request may act as ``student_id``: it carries that student's token, or the admin token."""
+    if not student_id:
+        return False
+    token = request.headers.get(COLLAB_CONFIG["student_token_header"], "")
+    return verify_student_token(student_id, token) or has_admin_token(request)
+
+
+def _max_events() -> int:
+    # a batch larger than a client's whole bucket would get 429 on every retry
+    if _limiter.per_minute > 0:
+        return min(_MAX_EVENTS, _limiter.per_minute)
+    return _MAX_EVENTS
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def log_interactions(interactions: List[Interaction], request: Request):
+    """
+    Record students viewing or applying to internships.
+
+    The log trains the collaborative model: once it has been trained on a
+    student's interactions, recommendations requested with the same
+    ``student_id`` blend in what students with similar histories chose.
+
+    The events must all be one student's and carry that student's
+    ``X-Student-Token`` (see ``Services.InteractionService.student_token``),
+    or the request must carry the admin token; otherwise 401 (403 while
+    neither ``STUDENT_TOKEN_SECRET`` nor ``ADMIN_TOKEN`` is set). Each
+    client address may log ``INTERACTIONS_PER_MINUTE`` events a minute per
+    process; beyond that it gets 429. A request may carry at most 1000
+    events, and no more than that limit (400).
+    """
+    if not interactions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="interactions must not be empty"
+        )
+    max_events = _max_events()
+    if len(interactions) > max_events:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {max_events} interactions per request"
+        )
+    if not COLLAB_CONFIG["student_token_secret"] and not ADMIN_CONFIG["token"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Interaction logging is disabled; set STUDENT_TOKEN_SECRET or ADMIN_TOKEN to enable it",
+        )
+    student_ids = {i.student_id for i in interactions}
+    trusted = has_admin_token(request) or (
+        len(student_ids) == 1 and is_trusted_student(request, next(iter(student_ids)))
+    )
+    if not trusted:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Missing or invalid {COLLAB_CONFIG['student_token_header']} header for these interactions' student_id",
+        )
+    client = request.client.host if request.client else "unknown"
+    wait = _limiter.acquire(client, len(interactions))
+    if wait is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many interactions from this client; try again shortly",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+    recorded = await asyncio.to_thread(record_interactions, interactions)
+    return {"recorded": recorded}
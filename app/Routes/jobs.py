@@ -0,0 +1,168 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import List, Optional
+import asyncio
+
+from Constants.config import JOBS_CONFIG
+from Routes.admin import require_admin_token
+from Routes.recommendations import _build_diversity, _build_filters
+from Services.Jobs import (
+    FORMATS,
+    JobLimitError,
+    cancel_job,
+    discard_job,
+    get_job,
+    input_path,
+    iter_result_lines,
+    list_jobs,
+    new_job,
+    result_path,
+    submit_job,
+    upload_budget,
+)
+
+# Jobs hold whole cohorts' data and results, and take disk and worker time:
+# every route needs the admin token.
+router = APIRouter(prefix="/jobs", tags=["Jobs"], dependencies=[Depends(require_admin_token)])
+
+_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/json-lines": "jsonl",
+}
+
+
+def _input_format(request: Request, format: Optional[str]) -> str:
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        format = _CONTENT_TYPES.get(content_type)
+    if format not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Send the cohort as CSV or JSON lines: set format=csv|jsonl or "
+                   "Content-Type: text/csv | application/x-ndjson",
+        )
+    return format
+
+
+def _require_job(job_id: str) -> dict:
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.post("/", status_code=status.HTTP_202_ACCEPTED)
+async def submit_matching_job(
+    request: Request,
+    format: Optional[str] = None,
+    top_k: Optional[int] = 5,
+    domain: Optional[List[str]] = Query(None),
+    min_stipend: Optional[float] = None,
+    max_stipend: Optional[float] = None,
+    diversity: Optional[str] = None,
+    mmr_lambda: Optional[float] = None,
+    max_per_company: Optional[int] = None,
+):
+    """
+    Queue a matching run for a whole cohort; returns the job at once.
+
+    The request body is the cohort itself, streamed to disk as it arrives:
+    CSV with a header row (``name``, ``skills``, ``domain`` and optionally
+    ``student_id``; skills separated by ``;``, ``,`` or ``|``) or JSON lines
+    of ``StudentDetails``. Poll ``GET /jobs/{job_id}`` for progress and fetch
+    ``GET /jobs/{job_id}/results`` once it is done. Answers 429 while
+    ``JOBS_MAX_PENDING`` jobs are queued or running, or once the jobs' files
+    take ``JOBS_MAX_DISK_MB``.
+
+    Args:
+        format: ``csv`` or ``jsonl`` (default: from the Content-Type)
+        top_k: Number of top recommendations per student (default: 5)
+        domain, min_stipend, max_stipend, diversity, mmr_lambda, max_per_company:
+            Applied to every student, as for ``POST /recommendations/``
+    """
+    input_format = _input_format(request, format)
+    if top_k < 1 or top_k > 20:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="top_k must be between 1 and 20"
+        )
+    filters = _build_filters(domain, min_stipend, max_stipend)
+    diversity_query = _build_diversity(diversity, mmr_lambda, max_per_company)
+
+    try:
+        job_id = await asyncio.to_thread(new_job, input_format)
+    except JobLimitError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": "60"},
+        )
+    size = 0
+    try:
+        limit = await asyncio.to_thread(upload_budget)
+        with open(input_path(job_id, input_format), "wb") as f:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > limit:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Uploads are limited to {JOBS_CONFIG['max_upload_mb']} MB, and to what is "
+                               f"left of the {JOBS_CONFIG['max_disk_mb']} MB for job files",
+                    )
+                await asyncio.to_thread(f.write, chunk)
+        if not size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="The request body (the cohort) must not be empty"
+            )
+    except BaseException:
+        await asyncio.to_thread(discard_job, job_id)
+        raise
+    return await asyncio.to_thread(submit_job, job_id, input_format, top_k, filters, diversity_query)
+
+
+@router.get("/", status_code=status.HTTP_200_OK)
+async def get_jobs(limit: int = 50):
+    """The most recent jobs, newest first."""
+    return await asyncio.to_thread(list_jobs, max(1, min(limit, 1000)))
+
+
+@router.get("/{job_id}", status_code=status.HTTP_200_OK)
+async def get_job_status(job_id: str):
+    """A job's status (queued, running, done, failed, cancelled), progress and throughput."""
+    return await asyncio.to_thread(_require_job, job_id)
+
+
+@router.get("/{job_id}/results", status_code=status.HTTP_200_OK)
+async def get_job_results(job_id: str, format: str = "ndjson"):
+    """
+    Download a finished job's results.
+
+    ``ndjson`` (default) streams one ``StudentRecommendation`` per line in
+    input order, rendered from the spool as it is sent. ``npz`` is the
+    spool itself: NumPy arrays of internship IDs and scores per student,
+    for loading in bulk (see ``Services/Jobs.py`` for the columns).
+    """
+    job = await asyncio.to_thread(_require_job, job_id)
+    if job["status"] != "done":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} is {job['status']}; results are available once it is done"
+        )
+    if format == "npz":
+        return FileResponse(result_path(job_id), media_type="application/octet-stream", filename=f"{job_id}.npz")
+    if format != "ndjson":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="format must be ndjson or npz")
+    # a sync iterator: Starlette runs each step in its thread pool
+    return StreamingResponse(iter_result_lines(job_id), media_type="application/x-ndjson")
+
+
+@router.delete("/{job_id}", status_code=status.HTTP_200_OK)
+async def delete_job(job_id: str):
+    """Cancel a job if it is still queued or running, and delete its input and results."""
+    await asyncio.to_thread(_require_job, job_id)
+    await asyncio.to_thread(cancel_job, job_id)
+    await asyncio.to_thread(discard_job, job_id)
+    return {"job_id": job_id, "deleted": True}
@@ -1,39 +1,131 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
+from typing import List, Optional
+import asyncio
+import json
 import uuid
 
+from Constants.config import EXECUTOR_CONFIG, RESPONSE_CONFIG, SERVICE_CONFIG, STARTUP_CONFIG
+from DB.VectorDB.Diversity import DiversityQuery
+from DB.VectorDB.Search import SearchFilter
+from Routes.admin import has_admin_token
+from Routes.interactions import is_trusted_student
 from Schemas.StudentDetails import StudentDetails
 from Schemas.StudentRecommendation import StudentRecommendation
-from Services.RecommendationService import recommend_for_student
+from Services import Startup
+from Services.Executor import ServiceOverloadedError, get_executor
+from Services.RecommendationService import (
+    recommend_for_student,
+    recommend_for_student_json,
+    recommend_for_students,
+    recommend_for_students_json,
+)
 
 router = APIRouter(prefix="/recommendations", tags=["Recommendations"])
 
 
+def _build_filters(
+    domain: Optional[List[str]], min_stipend: Optional[float], max_stipend: Optional[float]
+) -> Optional[SearchFilter]:
+    if min_stipend is not None and max_stipend is not None and min_stipend > max_stipend:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="min_stipend must not exceed max_stipend"
+        )
+    return SearchFilter.create(domain, min_stipend, max_stipend)
+
+
+def _require_ready() -> None:
+    if not Startup.is_ready():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The search index is still loading; see GET /ready",
+            headers={"Retry-After": str(STARTUP_CONFIG["retry_after"])},
+        )
+
+
+def _build_diversity(
+    diversity: Optional[str], mmr_lambda: Optional[float], max_per_company: Optional[int]
+) -> Optional[DiversityQuery]:
+    try:
+        return DiversityQuery.create(diversity, mmr_lambda, max_per_company)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @router.post("/", response_model=StudentRecommendation, status_code=status.HTTP_200_OK)
-async def get_recommendations(student: StudentDetails, top_k: Optional[int] = 5):
+async def get_recommendations(
+    student: StudentDetails,
+    request: Request,
+    top_k: Optional[int] = 5,
+    domain: Optional[List[str]] = Query(None),
+    min_stipend: Optional[float] = None,
+    max_stipend: Optional[float] = None,
+    diversity: Optional[str] = None,
+    mmr_lambda: Optional[float] = None,
+    max_per_company: Optional[int] = None,
+):
     """
     Get internship recommendations for a student based on their skills and domain.
     
     Args:
-        student: Student details including name, skills and domain
+        student: Student details including name, skills and domain; its
+            ``student_id`` is kept (and personalizes the ranking) only with
+            that student's ``X-Student-Token`` or the admin token
         top_k: Number of top recommendations to return (default: 5)
+        domain: Only recommend internships in these domains (repeatable)
+        min_stipend: Only recommend internships paying at least this much
+        max_stipend: Only recommend internships paying at most this much
+        diversity: 'mmr' (Maximal Marginal Relevance) or 'company' (relevance
+            order, capped per company) to avoid near-duplicate postings
+        mmr_lambda: Weight of relevance against similarity to results
+            already chosen, 0-1 (MMR only; default DIVERSITY_MMR_LAMBDA)
+        max_per_company: Results per company, 0 = no cap (default
+            DIVERSITY_MAX_PER_COMPANY; with a diversity mode only)
         
     Returns:
         StudentRecommendation object with ranked internship recommendations
     """
     try:
+        _require_ready()
         if top_k < 1 or top_k > 20:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="top_k must be between 1 and 20"
             )
+        filters = _build_filters(domain, min_stipend, max_stipend)
+        diversity_query = _build_diversity(diversity, mmr_lambda, max_per_company)
         
-        # Auto-generate a student ID for this request (no persistence)
-        student.student_id = str(uuid.uuid4())[:8].upper()
+        # A kept ID personalizes the results once the collaborative model knows
+        # it, so keep the caller's only when the request vouches for it (the
+        # student's X-Student-Token or the admin token); otherwise generate one
+        # for this request.
+        if not is_trusted_student(request, student.student_id):
+            student.student_id = str(uuid.uuid4())[:8].upper()
         
-        recommendations = recommend_for_student(student, top_k=top_k)
+        # Vectorization, FAISS search and the DB lookup all block, so they run
+        # on the bounded executor to keep the event loop free.
+        if RESPONSE_CONFIG["preformatted"]:
+            # Already a StudentRecommendation document; skips response_model validation.
+            body = await get_executor().run(
+                recommend_for_student_json, student, top_k=top_k, filters=filters, diversity=diversity_query
+            )
+            Startup.mark_first_response()
+            return Response(content=body, media_type="application/json")
+        recommendations = await get_executor().run(
+            recommend_for_student, student, top_k=top_k, filters=filters, diversity=diversity_query
+        )
+        Startup.mark_first_response()
         return recommendations
         
+    except HTTPException:
+        raise
+    except ServiceOverloadedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(EXECUTOR_CONFIG["retry_after"])},
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -41,6 +133,103 @@ async def get_recommendations(student: StudentDetails, top_k: Optional[int] = 5)
         )
 
 
+@router.post("/batch", status_code=status.HTTP_200_OK)
+async def get_batch_recommendations(
+    students: List[StudentDetails],
+    request: Request,
+    top_k: Optional[int] = 5,
+    domain: Optional[List[str]] = Query(None),
+    min_stipend: Optional[float] = None,
+    max_stipend: Optional[float] = None,
+    diversity: Optional[str] = None,
+    mmr_lambda: Optional[float] = None,
+    max_per_company: Optional[int] = None,
+):
+    """
+    Get internship recommendations for many students in one call.
+
+    Students are processed in chunks of ``SERVICE_CONFIG['batch_size']``; each
+    chunk is vectorized and searched in one pass with a single DB lookup.
+    Results stream back as NDJSON, one ``StudentRecommendation`` per line in
+    input order, so large batches are never buffered whole.
+
+    Args:
+        students: List of student details; their ``student_id`` values are
+            echoed back, and personalize the ranking only with the admin token
+        top_k: Number of top recommendations per student (default: 5)
+        domain, min_stipend, max_stipend: Filters applied to every student,
+            as for ``POST /recommendations/``
+        diversity, mmr_lambda, max_per_company: Diversification of every
+            student's results, as for ``POST /recommendations/``
+    """
+    _require_ready()
+    if top_k < 1 or top_k > 20:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="top_k must be between 1 and 20"
+        )
+    if not students:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="students must not be empty"
+        )
+    filters = _build_filters(domain, min_stipend, max_stipend)
+    diversity_query = _build_diversity(diversity, mmr_lambda, max_per_company)
+
+    # Keep caller-supplied IDs (bulk imports reference them); fill in the rest.
+    # They only personalize the results when the request carries the admin token.
+    personalize = has_admin_token(request)
+    for student in students:
+        if not student.student_id:
+            student.student_id = str(uuid.uuid4())[:8].upper()
+
+    batch_size = max(1, SERVICE_CONFIG["batch_size"])
+    if RESPONSE_CONFIG["preformatted"]:
+        recommend, to_json = recommend_for_students_json, lambda body: body
+    else:
+        recommend, to_json = recommend_for_students, lambda rec: rec.model_dump_json().encode()
+    chunks = [students[i:i + batch_size] for i in range(0, len(students), batch_size)]
+
+    # The first chunk runs before the response starts so overload still maps to a 503.
+    try:
+        first = await get_executor().run(
+            recommend, chunks[0], top_k=top_k, filters=filters, diversity=diversity_query, personalize=personalize
+        )
+    except ServiceOverloadedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(EXECUTOR_CONFIG["retry_after"])},
+        )
+    Startup.mark_first_response()
+
+    async def stream():
+        results = first
+        for chunk in chunks[1:] + [None]:
+            yield b"".join(to_json(rec) + b"\n" for rec in results)
+            if chunk is None:
+                return
+            while True:
+                try:
+                    results = await get_executor().run(
+                        recommend,
+                        chunk,
+                        top_k=top_k,
+                        filters=filters,
+                        diversity=diversity_query,
+                        personalize=personalize,
+                    )
+                    break
+                except ServiceOverloadedError:
+                    # Headers are already sent; slow the stream down instead of failing it.
+                    await asyncio.sleep(EXECUTOR_CONFIG["retry_after"])
+                except Exception as e:
+                    yield json.dumps({"error": f"Error generating recommendations: {str(e)}"}) + "\n"
+                    return
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
 @router.get("/health", status_code=status.HTTP_200_OK)
 async def health_check():
     """Health check endpoint for the recommendation service."""
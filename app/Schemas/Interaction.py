@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import Annotated, Literal
+
+
+class Interaction(BaseModel):
+    student_id: Annotated[str, Field(..., min_length=1, description="Identifier of the student, as sent with recommendation requests")]
+    internship_id: Annotated[int, Field(..., description="Internship the student interacted with")]
+    kind: Annotated[Literal["view", "apply"], Field("view", description="What the student did: viewed or applied")]
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "student_id": "S1024",
+                "internship_id": 101,
+                "kind": "apply"
+            }
+        }
+    }
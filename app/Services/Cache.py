@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from Constants.config import SERVICE_CONFIG
+
+# Rough per-entry overhead (OrderedDict node, key tuple, bookkeeping) used
+# for the memory bound; values report their own payload size.
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+class RecommendationCache:
+    """Thread-safe LRU + TTL cache for search results, versioned by index generation.
+
+    Entries remember the index generation they were computed against and
+    are treated as misses once the generation moves on, so a rebuilt index
+    never serves stale results. Concurrent misses on the same key are
+    coalesced: one caller computes while the others wait for its result.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (value, generation, expires_at, size)
+        self._entries: "OrderedDict[Hashable, Tuple[object, int, float, int]]" = OrderedDict()
+        self._inflight: Dict[Tuple[Hashable, int], Future] = {}
+        self._bytes = 0
+        self._generation = None
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions_lru": 0,
+            "evictions_ttl": 0,
+            "evictions_generation": 0,
+        }
+
+    def _drop(self, key: Hashable, reason: str) -> None:
+        _, _, _, size = self._entries.pop(key)
+        self._bytes -= size
+        self._stats[f"evictions_{reason}"] += 1
+
+    def _lookup(self, key: Hashable, generation: int):
+        """Return the cached value or None; caller holds the lock."""
+        if generation != self._generation:
+            # New index generation: everything cached so far is stale.
+            self._stats["evictions_generation"] += len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            self._generation = generation
+            return None
+
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, _, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._drop(key, "ttl")
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key: Hashable, generation: int):
+        with self._lock:
+            value = self._lookup(key, generation)
+            self._stats["hits" if value is not None else "misses"] += 1
+            return value
+
+    def put(self, key: Hashable, generation: int, value, size: int = 0) -> None:
+        size += _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            replaced = self._entries.pop(key, None)
+            if replaced is not None:
+                self._bytes -= replaced[3]
+            self._entries[key] = (value, generation, time.monotonic() + self.ttl, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)), "lru")
+
+    def get_or_compute(self, key: Hashable, generation: int, compute: Callable[[], object], sizeof: Callable[[object], int]):
+        """Return the cached value for ``key`` or compute it exactly once."""
+        with self._lock:
+            value = self._lookup(key, generation)
+            if value is not None:
+                self._stats["hits"] += 1
+                return value
+            inflight_key = (key, generation)
+            future = self._inflight.get(inflight_key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[inflight_key] = future
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(inflight_key, None)
+        self.put(key, generation, value, sizeof(value))
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            snapshot = dict(self._stats)
+            lookups = snapshot["hits"] + snapshot["misses"] + snapshot["coalesced"]
+            snapshot.update(
+                {
+                    "enabled": SERVICE_CONFIG["enable_caching"],
+                    "entries": len(self._entries),
+                    "bytes": self._bytes,
+                    "max_entries": self.max_entries,
+                    "max_bytes": self.max_bytes,
+                    "ttl": self.ttl,
+                    "generation": self._generation,
+                    "hit_ratio": round((snapshot["hits"] + snapshot["coalesced"]) / lookups, 4) if lookups else 0.0,
+                }
+            )
+        return snapshot
+
+
+_cache: Optional[RecommendationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> RecommendationCache:
+    """Return the process-wide recommendation cache, creating it on first use."""
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RecommendationCache(
+                    max_entries=SERVICE_CONFIG["cache_max_entries"],
+                    max_bytes=SERVICE_CONFIG["cache_max_bytes"],
+                    ttl=SERVICE_CONFIG["cache_ttl"],
+                )
+    return _cache
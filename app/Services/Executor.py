@@ -0,0 +1,115 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from Constants.config import EXECUTOR_CONFIG
+from Utils.Tracing import record
+
+
+class ServiceOverloadedError(RuntimeError):
+    """Raised when the executor queue is full and new work is rejected."""
+
+
+class BoundedExecutor:
+    """Runs blocking recommendation work off the event loop with back-pressure.
+
+    At most ``max_workers`` calls execute concurrently and at most
+    ``max_queue`` more wait for a worker. Anything beyond that is rejected
+    immediately with ``ServiceOverloadedError`` so the route can answer 503
+    instead of letting latency grow without bound.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        if max_workers < 1 or max_queue < 0:
+            raise ValueError("max_workers must be >= 1 and max_queue >= 0")
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recommender")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in the worker pool and await the result."""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise ServiceOverloadedError(
+                    f"Too many requests in flight ({self._pending}); try again shortly"
+                )
+            self._pending += 1
+            self._stats["submitted"] += 1
+
+        # run in a copy of the caller's context so the request trace follows the work
+        context = contextvars.copy_context()
+        submitted = time.perf_counter()
+
+        def call():
+            record("queue", time.perf_counter() - submitted)
+            return fn(*args, **kwargs)
+
+        try:
+            future = self._executor.submit(context.run, call)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+                self._stats["failed"] += 1
+            raise
+        # Released when the work itself ends, not when the caller stops waiting:
+        # a cancelled request (e.g. a client leaving a streamed batch) leaves its
+        # call running in the worker, and it still counts against the bound.
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future) -> None:
+        failed = future.cancelled() or future.exception() is not None
+        with self._lock:
+            self._pending -= 1
+            self._stats["failed" if failed else "completed"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot.update(
+                {
+                    "max_workers": self.max_workers,
+                    "max_queue": self.max_queue,
+                    "in_flight": self._pending,
+                    "queued": max(0, self._pending - self.max_workers),
+                }
+            )
+        return snapshot
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+
+_executor: BoundedExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> BoundedExecutor:
+    """Return the process-wide executor, creating it on first use."""
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = BoundedExecutor(
+                    max_workers=EXECUTOR_CONFIG["max_workers"],
+                    max_queue=EXECUTOR_CONFIG["max_queue"],
+                )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Shut down the process-wide executor if it was created."""
+    global _executor
+
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
@@ -0,0 +1,82 @@
+import hashlib
+import hmac
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+from Constants.config import COLLAB_CONFIG
+from DB.Postgres import execute_many
+from Schemas.Interaction import Interaction
+
+# clients tracked before idle ones are dropped
+_MAX_CLIENTS = 10000
+
+
+def record_interactions(interactions: Sequence[Interaction]) -> int:
+    """Append ``interactions`` to the interaction log in one transaction; returns how many.
+
+    The log feeds the collaborative model
+    (``DB.VectorDB.CollaborativeTraining``); ``interaction_id`` and
+    ``created_at`` are filled in by the database.
+    """
+    return execute_many(
+        """
+        INSERT INTO interactions (student_id, internship_id, kind)
+        VALUES (%s, %s, %s)
+        """,
+        [(i.student_id, i.internship_id, i.kind) for i in interactions],
+    )
+
+
+def student_token(student_id: str) -> str:
+    """The ``X-Student-Token`` value for ``student_id``: its HMAC-SHA256 under ``STUDENT_TOKEN_SECRET``, in hex.
+
+    The front-end's backend, which authenticates the student, computes it
+    and sends it with that student's requests; changing the secret revokes
+    every token.
+    """
+    secret = COLLAB_CONFIG["student_token_secret"].encode()
+    return hmac.new(secret, student_id.encode(), hashlib.sha256).hexdigest()
+
+
+def verify_student_token(student_id: str, token: str) -> bool:
+    """Whether ``token`` is ``student_token(student_id)``; always False while no secret is set."""
+    if not COLLAB_CONFIG["student_token_secret"]:
+        return False
+    return hmac.compare_digest(token.encode(), student_token(student_id).encode())
+
+
+class InteractionRateLimiter:
+    """Token bucket per client: ``per_minute`` events, refilled continuously.
+
+    A backstop against one caller flooding the log (and so steering the
+    collaborative model); it is per process and keyed by client address,
+    so it does not replace authenticating the callers.
+    """
+
+    def __init__(self, per_minute: int):
+        self.per_minute = per_minute
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # client -> (tokens, last refill)
+        self._lock = threading.Lock()
+
+    def acquire(self, client: str, events: int) -> Optional[float]:
+        """Take ``events`` from ``client``'s bucket; None if allowed, else seconds until they would be."""
+        if self.per_minute <= 0:
+            return None
+        rate = self.per_minute / 60.0
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(client, (float(self.per_minute), now))
+            tokens = min(float(self.per_minute), tokens + (now - last) * rate)
+            if events > tokens:
+                self._buckets[client] = (tokens, now)
+                return (min(events, self.per_minute) - tokens) / rate
+            self._buckets[client] = (tokens - events, now)
+            if len(self._buckets) > _MAX_CLIENTS:
+                self._drop_idle(now)
+        return None
+
+    def _drop_idle(self, now: float) -> None:
+        # a bucket idle for a minute is full again, the same as a new one
+        for client in [c for c, (_, last) in self._buckets.items() if now - last >= 60.0]:
+            del self._buckets[client]
@@ -0,0 +1,529 @@
+# Asynchronous matching jobs: SQLite queue, chunked workers, NPZ result spool
+"""
+A job matches a whole cohort of students, uploaded as CSV or JSON lines,
+against the catalog in the background. Everything lives under
+``JOBS_CONFIG['directory']``::
+
+    jobs.sqlite              the queue: one row per job (status, progress, params)
+    <job_id>/
+        input.csv | input.jsonl
+        part-000000.npz      results of chunk 0, 1, ... while the job runs
+        results.npz          all results once done (the parts are merged and removed)
+
+The queue is a SQLite database, so every process serving the API shares it
+and a job is claimed by exactly one worker thread. Workers read the input
+``chunk_size`` students at a time and match each chunk with one vectorizer
+call and one multi-row index search (``search_hits``, re-ranked and
+diversified like the API). Each chunk's results are written as a part
+before the progress counter moves past it, so a job interrupted by a
+restart resumes at its last part, in whichever process picks it up.
+
+``results.npz`` is columnar, one row per valid input record: ``row`` (its
+index in the input), ``student_id``, ``name``, ``skills`` (JSON list),
+``domain``, and ``internship_id`` / ``position`` / ``score``, each
+``(students, top_k)`` with -1 (score 0) after a student's last hit.
+Records that fail validation are counted in ``skipped`` and left out.
+"""
+import csv
+import itertools
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from Constants.config import JOBS_CONFIG, RERANK_CONFIG, SERVICE_CONFIG
+from DB.VectorDB.Diversity import DiversityQuery
+from DB.VectorDB.Search import SearchFilter, SearchHit, search_hits
+from Schemas.StudentDetails import StudentDetails
+from Services.RecommendationService import _build_query_text, _render_recommendation, _rerank_query, _resolve_fragments
+
+FORMATS = ("csv", "jsonl")
+RESULT_FILE = "results.npz"
+COLUMNS = ("row", "student_id", "name", "skills", "domain", "internship_id", "position", "score")
+_FINISHED = ("done", "failed", "cancelled")
+
+
+class JobLimitError(RuntimeError):
+    """Raised by ``new_job`` when ``JOBS_MAX_PENDING`` jobs are waiting or ``JOBS_MAX_DISK_MB`` is used up."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,  -- queued, running, done, failed, cancelled
+    input_format TEXT NOT NULL,
+    params TEXT NOT NULL,  -- JSON: top_k, filters, diversity, chunk_size
+    total INTEGER,  -- records in the input, once counted
+    processed INTEGER NOT NULL DEFAULT 0,  -- records matched and spooled (valid or skipped)
+    skipped INTEGER NOT NULL DEFAULT 0,
+    skip_reason TEXT,  -- why the first skipped record was skipped
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    heartbeat_at REAL,
+    finished_at REAL
+)
+"""
+
+
+class JobStore:
+    """The job queue: a SQLite table shared by every process and thread.
+
+    Each call opens its own connection, so the store needs no locking of
+    its own; claims run in an immediate transaction so two workers never
+    take the same job.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / "jobs.sqlite"
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def create(self, job_id: str, input_format: str, params: dict) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, status, input_format, params, created_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, input_format, json.dumps(params), time.time()),
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def pending(self) -> int:
+        """Jobs queued or running."""
+        with self._connect() as conn:
+            return conn.execute("SELECT count(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+
+    def recent(self, limit: int) -> List[dict]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim(self, stale_before: float) -> Optional[dict]:
+        """Take the oldest queued job, or a running one whose worker went silent before ``stale_before``."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' OR (status = 'running' AND heartbeat_at < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (stale_before,),
+            ).fetchone()
+            if row is not None:
+                now = time.time()
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = COALESCE(started_at, ?), heartbeat_at = ? "
+                    "WHERE job_id = ?",
+                    (now, now, row["job_id"]),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return dict(row) if row is not None else None
+
+    def progress(self, job_id: str, **counts) -> bool:
+        """Record ``counts`` (total / processed / skipped / skip_reason); False once the job is no longer running."""
+        assignments = "".join(f", {column} = ?" for column in counts)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ?{assignments} WHERE job_id = ? AND status = 'running'",
+                (time.time(), *counts.values(), job_id),
+            )
+        return cursor.rowcount == 1
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE job_id = ? AND status = 'running'",
+                (status, error, time.time(), job_id),
+            )
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; False if it already finished (or does not exist)."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE job_id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id),
+            )
+        return cursor.rowcount == 1
+
+    def delete(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def expired(self, finished_before: float) -> List[str]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_id FROM jobs WHERE status IN ('done', 'failed', 'cancelled') AND finished_at < ?",
+                (finished_before,),
+            ).fetchall()
+        return [row["job_id"] for row in rows]
+
+
+_store: Optional[JobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    global _store
+
+    with _store_lock:
+        if _store is None or _store.directory != Path(JOBS_CONFIG["directory"]):
+            _store = JobStore(Path(JOBS_CONFIG["directory"]))
+        return _store
+
+
+def job_dir(job_id: str) -> Path:
+    return Path(JOBS_CONFIG["directory"]) / job_id
+
+
+def input_path(job_id: str, input_format: str) -> Path:
+    return job_dir(job_id) / f"input.{input_format}"
+
+
+def disk_usage() -> int:
+    """Bytes of every job's input and results under ``JOBS_CONFIG['directory']``."""
+    directory = Path(JOBS_CONFIG["directory"])
+    if not directory.exists():
+        return 0
+    return sum(path.stat().st_size for path in directory.glob("*/*") if path.is_file())
+
+
+def upload_budget() -> int:
+    """Bytes the next upload may take: ``JOBS_MAX_UPLOAD_MB``, or less when the disk budget is nearly spent."""
+    remaining = JOBS_CONFIG["max_disk_mb"] * 2**20 - disk_usage()
+    return max(0, min(JOBS_CONFIG["max_upload_mb"] * 2**20, remaining))
+
+
+def new_job(input_format: str) -> str:
+    """A fresh job ID with an empty directory for its input (the job is queued by ``submit_job``).
+
+    Raises ``JobLimitError`` while ``JOBS_CONFIG['max_pending']`` jobs are
+    queued or running, or when the jobs' files use up
+    ``JOBS_CONFIG['max_disk_mb']``. Both are checked as an upload starts, so
+    uploads running at the same time can overshoot them by one upload each.
+    """
+    if input_format not in FORMATS:
+        raise ValueError(f"Unknown input format {input_format!r}; expected one of {FORMATS}")
+    if get_job_store().pending() >= JOBS_CONFIG["max_pending"]:
+        raise JobLimitError(f"{JOBS_CONFIG['max_pending']} jobs are already queued or running; retry later")
+    if upload_budget() <= 0:
+        raise JobLimitError(f"Job files use the {JOBS_CONFIG['max_disk_mb']} MB allowed; delete finished jobs")
+    job_id = uuid.uuid4().hex
+    job_dir(job_id).mkdir(parents=True)
+    return job_id
+
+
+def submit_job(
+    job_id: str,
+    input_format: str,
+    top_k: int,
+    filters: Optional[SearchFilter] = None,
+    diversity: Optional[DiversityQuery] = None,
+) -> dict:
+    """Queue the job whose input was written to ``input_path(job_id, input_format)``."""
+    params = {
+        "top_k": top_k,
+        "filters": list(filters) if filters is not None else None,
+        "diversity": list(diversity) if diversity is not None else None,
+        # parts are numbered by chunk, so a resumed job keeps its chunk size
+        "chunk_size": max(1, JOBS_CONFIG["chunk_size"]),
+    }
+    get_job_store().create(job_id, input_format, params)
+    _wake.set()
+    return get_job(job_id)
+
+
+def discard_job(job_id: str) -> None:
+    """Remove a job's files and queue entry."""
+    get_job_store().delete(job_id)
+    shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """The job's status, progress and parameters, or None if there is no such job."""
+    job = get_job_store().get(job_id)
+    if job is None:
+        return None
+    params = json.loads(job.pop("params"))
+    job.pop("heartbeat_at")
+    job["params"] = {key: params[key] for key in ("top_k", "filters", "diversity")}
+    if job["status"] == "done":
+        job["progress"] = 1.0
+    else:
+        job["progress"] = round(job["processed"] / job["total"], 4) if job["total"] else 0.0
+    if job["started_at"] is not None and job["processed"]:
+        elapsed = (job["finished_at"] or time.time()) - job["started_at"]
+        job["students_per_second"] = round(job["processed"] / max(elapsed, 1e-9), 1)
+    return job
+
+
+def list_jobs(limit: int = 50) -> List[dict]:
+    return [get_job(job["job_id"]) for job in get_job_store().recent(limit)]
+
+
+def cancel_job(job_id: str) -> bool:
+    """Stop a queued or running job (a running one stops after its current chunk)."""
+    return get_job_store().cancel(job_id)
+
+
+def result_path(job_id: str) -> Path:
+    return job_dir(job_id) / RESULT_FILE
+
+
+# --- input -----------------------------------------------------------------
+
+_SKILL_SEPARATORS = re.compile(r"[;,|]")
+
+
+def _records(path: Path, input_format: str) -> Iterator:
+    """The input's records: dicts for CSV (header row first), raw lines for JSON lines."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if input_format == "csv":
+            yield from csv.DictReader(f)
+        else:
+            yield from (line for line in f if line.strip())
+
+
+def _student(record) -> StudentDetails:
+    """Validate one record; raises ``ValueError`` (pydantic's ``ValidationError`` included)."""
+    if isinstance(record, str):
+        data = json.loads(record)
+        if not isinstance(data, dict):
+            raise ValueError("expected a JSON object")
+    else:
+        # CSV skills are one field: "python; sql" or a quoted "python, sql"
+        skills = record.get("skills") or ""
+        data = {
+            "student_id": record.get("student_id"),
+            "name": record.get("name"),
+            "skills": [s.strip() for s in _SKILL_SEPARATORS.split(skills) if s.strip()],
+            "domain": record.get("domain"),
+        }
+    return StudentDetails.model_validate(data)
+
+
+# --- spool -----------------------------------------------------------------
+
+
+def _part_path(directory: Path, chunk: int) -> Path:
+    return directory / f"part-{chunk:06d}.npz"
+
+
+def _write_part(
+    path: Path, rows: List[int], students: Sequence[StudentDetails], hit_lists: List[List[SearchHit]], top_k: int
+) -> None:
+    internship_ids = np.full((len(students), top_k), -1, dtype=np.int64)
+    positions = np.full((len(students), top_k), -1, dtype=np.int64)
+    scores = np.zeros((len(students), top_k))
+    for i, hits in enumerate(hit_lists):
+        if hits:
+            positions[i, :len(hits)], internship_ids[i, :len(hits)], scores[i, :len(hits)] = zip(*hits)
+    columns = {
+        "row": np.array(rows, dtype=np.int64),
+        "student_id": np.array([s.student_id for s in students], dtype=str),
+        "name": np.array([s.name for s in students], dtype=str),
+        "skills": np.array([json.dumps(s.skills) for s in students], dtype=str),
+        "domain": np.array([s.domain for s in students], dtype=str),
+        "internship_id": internship_ids,
+        "position": positions,
+        "score": scores,
+    }
+    tmp = path.with_name(f"{path.name}.tmp")
+    with open(tmp, "wb") as f:
+        np.savez(f, **columns)
+    os.replace(tmp, path)
+
+
+def _merge_parts(directory: Path, top_k: int) -> None:
+    """Concatenate the parts into ``results.npz`` one column at a time, then remove them."""
+    parts = sorted(directory.glob("part-*.npz"))
+    if not parts:
+        # nothing valid in the input: an empty result of the same layout
+        _write_part(_part_path(directory, 0), [], [], [], top_k)
+        parts = [_part_path(directory, 0)]
+    tmp = directory / f"{RESULT_FILE}.tmp"
+    with zipfile.ZipFile(tmp, "w", allowZip64=True) as archive:
+        for name in COLUMNS:
+            arrays = []
+            for part in parts:
+                with np.load(part) as columns:
+                    arrays.append(columns[name])
+            column = np.concatenate(arrays)
+            with archive.open(f"{name}.npy", "w", force_zip64=True) as member:
+                np.lib.format.write_array(member, column, allow_pickle=False)
+    os.replace(tmp, directory / RESULT_FILE)
+    for part in parts:
+        part.unlink()
+
+
+def iter_result_lines(job_id: str) -> Iterator[bytes]:
+    """A finished job's results as NDJSON, one ``StudentRecommendation`` per line in input order.
+
+    Rendered ``SERVICE_CONFIG['batch_size']`` students at a time from the
+    spool, with internship details from the metadata store (DB fallback).
+    """
+    with np.load(result_path(job_id)) as results:
+        columns = {name: results[name] for name in COLUMNS}
+    batch_size = max(1, SERVICE_CONFIG["batch_size"])
+    for start in range(0, len(columns["row"]), batch_size):
+        batch = slice(start, start + batch_size)
+        students = [
+            StudentDetails.model_construct(student_id=sid, name=name, skills=json.loads(skills), domain=domain)
+            for sid, name, skills, domain in zip(
+                *(columns[key][batch].tolist() for key in ("student_id", "name", "skills", "domain"))
+            )
+        ]
+        hit_lists = [
+            [SearchHit(p, iid, score) for p, iid, score in zip(positions, ids, scores) if iid >= 0]
+            for positions, ids, scores in zip(
+                *(columns[key][batch].tolist() for key in ("position", "internship_id", "score"))
+            )
+        ]
+        fragments = _resolve_fragments([hit for hits in hit_lists for hit in hits])
+        yield b"".join(_render_recommendation(s, hits, fragments) + b"\n" for s, hits in zip(students, hit_lists))
+
+
+# --- workers ---------------------------------------------------------------
+
+
+def _match(
+    students: Sequence[StudentDetails], student_ids: Sequence[Optional[str]], top_k: int, filters, diversity
+) -> List[List[SearchHit]]:
+    """Search hits for one chunk: one vectorizer call and one multi-row search.
+
+    ``student_ids`` are the IDs given in the input (None where the record
+    had none), for the collaborative model. Bypasses the recommendation
+    cache and the query log, which a cohort would only flood.
+    """
+    return search_hits(
+        [_build_query_text(s) for s in students],
+        k=top_k,
+        filters=filters,
+        rerank_queries=[_rerank_query(s) for s in students] if RERANK_CONFIG["enabled"] else None,
+        diversity=diversity,
+        student_ids=student_ids,
+    )
+
+
+def _run(store: JobStore, job: dict) -> None:
+    job_id = job["job_id"]
+    params = json.loads(job["params"])
+    top_k, chunk_size = params["top_k"], params["chunk_size"]
+    filters = SearchFilter(tuple(params["filters"][0]), *params["filters"][1:]) if params["filters"] else None
+    diversity = DiversityQuery(*params["diversity"]) if params["diversity"] else None
+    directory = job_dir(job_id)
+    path = input_path(job_id, job["input_format"])
+
+    if job["total"] is None:
+        total = sum(1 for _ in _records(path, job["input_format"]))
+        if not store.progress(job_id, total=total):
+            return
+    processed, skipped, skip_reason = job["processed"], job["skipped"], job["skip_reason"]
+    records = itertools.islice(_records(path, job["input_format"]), processed, None)
+    while True:
+        chunk = list(itertools.islice(records, chunk_size))
+        if not chunk:
+            break
+        rows, students, student_ids = [], [], []
+        for row, record in enumerate(chunk, start=processed):
+            try:
+                student = _student(record)
+            except ValueError as e:
+                skipped += 1
+                skip_reason = skip_reason or f"record {row + 1}: {e}"
+                continue
+            student_ids.append(student.student_id or None)
+            if not student.student_id:
+                student.student_id = str(row + 1)  # its record number in the input
+            students.append(student)
+            rows.append(row)
+        hit_lists = _match(students, student_ids, top_k, filters, diversity) if students else []
+        _write_part(_part_path(directory, processed // chunk_size), rows, students, hit_lists, top_k)
+        processed += len(chunk)
+        if not store.progress(job_id, processed=processed, skipped=skipped, skip_reason=skip_reason):
+            return  # cancelled
+    _merge_parts(directory, top_k)
+    store.finish(job_id, "done")
+
+
+def _remove_expired(store: JobStore) -> None:
+    for job_id in store.expired(time.time() - JOBS_CONFIG["keep_days"] * 86400):
+        store.delete(job_id)
+        shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+
+class _JobWorker(threading.Thread):
+    def __init__(self, number: int):
+        super().__init__(name=f"match-job-{number}", daemon=True)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                store = get_job_store()
+                job = store.claim(time.time() - JOBS_CONFIG["stale_seconds"])
+                if job is None:
+                    _remove_expired(store)
+                    _wake.wait(JOBS_CONFIG["poll_interval"])
+                    _wake.clear()
+                    continue
+                print(f"[jobs] Job {job['job_id']} started")
+                try:
+                    _run(store, job)
+                except Exception as e:
+                    store.finish(job["job_id"], "failed", str(e))
+                    print(f"[jobs] Job {job['job_id']} failed: {e}")
+                else:
+                    print(f"[jobs] Job {job['job_id']} {store.get(job['job_id'])['status']}")
+            except Exception as e:
+                # e.g. the queue database is locked for longer than its timeout
+                print(f"[jobs] Worker error: {e}")
+                self._stop_event.wait(JOBS_CONFIG["poll_interval"])
+
+    def stop(self):
+        self._stop_event.set()
+
+
+# Set when a job is queued in this process, so an idle worker starts at once.
+_wake = threading.Event()
+_workers: List[_JobWorker] = []
+
+
+def start_job_workers() -> None:
+    """Start ``JOBS_CONFIG['workers']`` threads processing queued jobs (none if 0)."""
+    if _workers:
+        return
+    for number in range(JOBS_CONFIG["workers"]):
+        worker = _JobWorker(number)
+        worker.start()
+        _workers.append(worker)
+
+
+def stop_job_workers() -> None:
+    """Stop the workers; a running job is picked up again (from its last chunk) once its heartbeat goes stale."""
+    for worker in _workers:
+        worker.stop()
+    _wake.set()
+    _workers.clear()
@@ -1,65 +1,218 @@
-from typing import List
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from Constants.config import POPULAR_CONFIG, RERANK_CONFIG, SERVICE_CONFIG
 from Schemas.StudentDetails import StudentDetails
 from Schemas.StudentRecommendation import RecommendationResponse, StudentRecommendation
-from DB.VectorDB.Search import search_with_scores
+from DB.VectorDB.Diversity import DiversityQuery
+from DB.VectorDB.MetadataStore import InternshipMeta, domain_key, meta_from_row, response_fragments
+from DB.VectorDB.PopularQueries import get_query_log
+from DB.VectorDB.Reranker import RerankQuery
+from DB.VectorDB.Search import (
+    SearchFilter,
+    SearchHit,
+    collaborative_students,
+    get_generation,
+    get_metadata_store,
+    popular_hits,
+    search_hits,
+)
 from DB.Postgres import fetch_all
+from Services.Cache import get_cache
+from Utils.Json import dumps
+from Utils.SkillNormalizer import canonical_skills
+from Utils.Tracing import stage
+
+# Approximate footprint of one cached SearchHit (tuple + three boxed numbers).
+_HIT_BYTES = 160
 
 
 def _build_query_text(student: StudentDetails) -> str:
     parts: List[str] = []
     if student.domain:
         parts.append(student.domain)
-    if student.skills:
-        parts.extend(student.skills)
+    # canonical skills, so "ML" and "machine-learning" build the same query
+    parts.extend(canonical_skills(student.skills))
     return " ".join(parts)
 
 
+def _rerank_query(student: StudentDetails) -> Optional[RerankQuery]:
+    if not RERANK_CONFIG["enabled"]:
+        return None
+    return RerankQuery(domain_key(student.domain), tuple(canonical_skills(student.skills)))
+
+
+def _normalize_query(query_text: str) -> str:
+    """Cache key form of a query: TF-IDF lowercases and ignores spacing anyway."""
+    return " ".join(query_text.lower().split())
+
+
+def _sizeof_hits(hits) -> int:
+    return len(hits) * _HIT_BYTES
+
+
+def _popular_search_hits(
+    students: Sequence[StudentDetails], top_k: int, personal: Sequence[Optional[str]]
+) -> List[Optional[List[SearchHit]]]:
+    """Results from the generation's precomputed popular query table (None where it has none).
+
+    Students with a collaborative vector (``personal``) get their own
+    results, not the table's. Also records each query in the query log,
+    when one is configured, for the next build to mine.
+    """
+    log = get_query_log()
+    results: List[Optional[List[SearchHit]]] = []
+    for student, student_id in zip(students, personal):
+        skills = canonical_skills(student.skills)
+        if log is not None:
+            log.record(student.domain, skills)
+        lookup = POPULAR_CONFIG["enabled"] and student_id is None
+        results.append(popular_hits(student.domain, skills, top_k) if lookup else None)
+    return results
+
+
+def _cached_search_hits(
+    students: Sequence[StudentDetails],
+    top_k: int,
+    filters: Optional[SearchFilter] = None,
+    diversity: Optional[DiversityQuery] = None,
+    personalize: bool = True,
+) -> List[List[SearchHit]]:
+    """``search_hits`` (re-ranked when enabled) through the popular query table and the recommendation cache.
+
+    Unfiltered, undiversified queries found in the table skip the search;
+    the rest go through the cache when caching is enabled. Unless
+    ``personalize`` is False, students the collaborative model knows (by
+    ``student_id``) are ranked with it.
+    """
+    if personalize:
+        personal = collaborative_students([s.student_id for s in students])
+    else:
+        personal = [None] * len(students)
+    results: List[Optional[List[SearchHit]]] = [None] * len(students)
+    if filters is None and diversity is None:
+        results = _popular_search_hits(students, top_k, personal)
+    rows = [i for i, hits in enumerate(results) if hits is None]
+    if not rows:
+        return results
+
+    query_texts = {i: _build_query_text(students[i]) for i in rows}
+    rerank_queries = {i: _rerank_query(students[i]) for i in rows}
+
+    def search(subset: List[int]) -> List[List[SearchHit]]:
+        return search_hits(
+            [query_texts[i] for i in subset],
+            k=top_k,
+            filters=filters,
+            rerank_queries=[rerank_queries[i] for i in subset] if RERANK_CONFIG["enabled"] else None,
+            diversity=diversity,
+            student_ids=[personal[i] for i in subset],
+        )
+
+    if not SERVICE_CONFIG["enable_caching"]:
+        for i, hits in zip(rows, search(rows)):
+            results[i] = hits
+        return results
+
+    cache = get_cache()
+    generation = get_generation()
+    # the re-rank query carries the domain and skills separately from the text;
+    # personalized results are the student's own
+    keys = {i: (_normalize_query(query_texts[i]), top_k, filters, rerank_queries[i], diversity, personal[i]) for i in rows}
+
+    if len(rows) == 1:
+        # Single requests coalesce with identical in-flight misses.
+        i = rows[0]
+        results[i] = list(cache.get_or_compute(keys[i], generation, lambda: tuple(search([i])[0]), _sizeof_hits))
+        return results
+
+    for i in rows:
+        cached = cache.get(keys[i], generation)
+        if cached is not None:
+            results[i] = list(cached)
+    missing = [i for i in rows if results[i] is None]
+    if missing:
+        for i, hits in zip(missing, search(missing)):
+            results[i] = hits
+            cache.put(keys[i], generation, tuple(hits), _sizeof_hits(hits))
+    return results
+
+
 def _fetch_internships_by_ids(ids: List[int]):
     if not ids:
         return []
 
-    rows = fetch_all(
-        """
-        SELECT internship_id, internship_title, company, domain, required_skills, stipend
-        FROM internships
-        WHERE internship_id = ANY(%s)
-        """,
-        (ids,),
-    )
+    with stage("db"):
+        rows = fetch_all(
+            """
+            SELECT internship_id, internship_title, company, domain, required_skills, stipend
+            FROM internships
+            WHERE internship_id = ANY(%s)
+            """,
+            (ids,),
+        )
     return rows
 
 
-def recommend_for_student(student: StudentDetails, top_k: int = 5) -> StudentRecommendation:
-    """Generate internship recommendations for a student using the FAISS vector DB."""
-    query_text = _build_query_text(student)
-    scored = search_with_scores(query_text, k=top_k)
-    if not scored:
-        return StudentRecommendation(
-            student_id=student.student_id,
-            student_name=student.name,
-            student_skills=student.skills,
-            recommendatons=[],
-            total_recommendations=0,
-        )
+def _resolve_details(hits: List[SearchHit]) -> Dict[int, InternshipMeta]:
+    """Internship details for ``hits``, from the metadata store with a DB fallback.
+
+    The DB is only queried for hits the store cannot serve (store not built
+    yet, or out of step with the index).
+    """
+    store = get_metadata_store()
+    details: Dict[int, InternshipMeta] = {}
+    missing: List[int] = []
+    for hit in hits:
+        if hit.internship_id in details:
+            continue
+        meta = store.get(hit.position, hit.internship_id) if store is not None else None
+        if meta is None:
+            missing.append(hit.internship_id)
+        else:
+            details[hit.internship_id] = meta
 
-    ids = [iid for iid, _ in scored]
-    score_map = {iid: score for iid, score in scored}
+    for row in _fetch_internships_by_ids(missing):
+        details[row[0]] = meta_from_row(row)
+    return details
 
-    rows = _fetch_internships_by_ids(ids)
 
+def _resolve_fragments(hits: List[SearchHit]) -> Dict[int, Tuple[bytes, bytes]]:
+    """``_resolve_details`` for the preformatted path: each hit's stored JSON fragments."""
+    store = get_metadata_store()
+    fragments: Dict[int, Tuple[bytes, bytes]] = {}
+    missing: List[int] = []
+    for hit in hits:
+        if hit.internship_id in fragments:
+            continue
+        found = store.fragments(hit.position, hit.internship_id) if store is not None else None
+        if found is None:
+            missing.append(hit.internship_id)
+        else:
+            fragments[hit.internship_id] = found
+
+    for row in _fetch_internships_by_ids(missing):
+        fragments[row[0]] = response_fragments(meta_from_row(row))
+    return fragments
+
+
+def _build_recommendation(
+    student: StudentDetails, hits: List[SearchHit], details: Dict[int, InternshipMeta]
+) -> StudentRecommendation:
     recs: List[RecommendationResponse] = []
-    for iid, title, company, domain, skills, stipend in rows:
+    for hit in hits:
+        meta = details.get(hit.internship_id)
+        if meta is None:
+            continue
         recs.append(
             RecommendationResponse(
                 rank=0,  # temporary; will sort and fill ranks next
-                internship_id=str(iid),
-                internship_title=title,
-                company=company,
-                similarity_score=float(score_map.get(iid, 0.0)),
-                required_skills=[s.strip() for s in str(skills).split(",") if s.strip()],
-                stipend=float(stipend) if stipend is not None else 0.0,
-                domain=domain,
+                internship_id=str(meta.internship_id),
+                internship_title=meta.internship_title,
+                company=meta.company,
+                similarity_score=float(hit.score),
+                required_skills=meta.required_skills,
+                stipend=meta.stipend,
+                domain=meta.domain,
             )
         )
 
@@ -74,3 +227,119 @@ def recommend_for_student(student: StudentDetails, top_k: int = 5) -> StudentRec
         recommendatons=recs,
         total_recommendations=len(recs),
     )
+
+
+def _render_recommendation(
+    student: StudentDetails, hits: List[SearchHit], fragments: Dict[int, Tuple[bytes, bytes]]
+) -> bytes:
+    """``_build_recommendation(...).model_dump_json()``, concatenated from stored fragments."""
+    found = [hit for hit in hits if hit.internship_id in fragments]
+    found.sort(key=lambda hit: hit.score, reverse=True)
+    recs = []
+    for rank, hit in enumerate(found, start=1):
+        head, tail = fragments[hit.internship_id]
+        recs.append(b'{"rank":%d,%s"similarity_score":%s,%s}' % (rank, head, dumps(float(hit.score)), tail))
+    return b'{"student_id":%s,"student_name":%s,"student_skills":%s,"recommendatons":[%s],"total_recommendations":%d}' % (
+        dumps(student.student_id),
+        dumps(student.name),
+        dumps(student.skills),
+        b",".join(recs),
+        len(recs),
+    )
+
+
+def recommend_for_student(
+    student: StudentDetails,
+    top_k: int = 5,
+    filters: Optional[SearchFilter] = None,
+    diversity: Optional[DiversityQuery] = None,
+) -> StudentRecommendation:
+    """Generate internship recommendations for a student using the FAISS vector DB.
+
+    ``filters`` (domain / stipend range) are applied inside the search, so up
+    to ``top_k`` matching internships come back. With ``RERANK_CONFIG``
+    enabled, the scores are the re-ranker's blend of cosine similarity,
+    required-skill coverage and domain match. With ``diversity`` the
+    ``top_k`` are chosen among a larger candidate pool to avoid near-duplicate
+    postings (see ``Diversity.diversify``). Students with a ``student_id``
+    the collaborative model was trained on get scores blended with it.
+    """
+    with stage("recommend"):
+        hits = _cached_search_hits([student], top_k, filters, diversity)[0]
+        with stage("details"):
+            details = _resolve_details(hits)
+        with stage("response"):
+            return _build_recommendation(student, hits, details)
+
+
+def recommend_for_students(
+    students: Sequence[StudentDetails],
+    top_k: int = 5,
+    filters: Optional[SearchFilter] = None,
+    diversity: Optional[DiversityQuery] = None,
+    personalize: bool = True,
+) -> List[StudentRecommendation]:
+    """Batched ``recommend_for_student`` for one chunk of students.
+
+    All queries are vectorized together and searched in a single multi-row
+    index search, and details for the union of hits are resolved together
+    (at most one DB query, only for metadata-store misses). Callers chunk
+    large batches by ``SERVICE_CONFIG['batch_size']``. With ``personalize``
+    False the ``student_id`` values are only echoed back, not used for ranking.
+    """
+    if not students:
+        return []
+
+    with stage("recommend"):
+        hit_lists = _cached_search_hits(students, top_k, filters, diversity, personalize)
+        with stage("details"):
+            details = _resolve_details([hit for hits in hit_lists for hit in hits])
+
+        with stage("response"):
+            return [
+                _build_recommendation(student, hits, details)
+                for student, hits in zip(students, hit_lists)
+            ]
+
+
+def recommend_for_student_json(
+    student: StudentDetails,
+    top_k: int = 5,
+    filters: Optional[SearchFilter] = None,
+    diversity: Optional[DiversityQuery] = None,
+) -> bytes:
+    """``recommend_for_student`` serialized as a ``StudentRecommendation`` JSON document.
+
+    The internship fields come preformatted from the metadata store, so no
+    per-row model is built or validated; only the scores, ranks and student
+    fields are encoded per request.
+    """
+    with stage("recommend"):
+        hits = _cached_search_hits([student], top_k, filters, diversity)[0]
+        with stage("details"):
+            fragments = _resolve_fragments(hits)
+        with stage("response"):
+            return _render_recommendation(student, hits, fragments)
+
+
+def recommend_for_students_json(
+    students: Sequence[StudentDetails],
+    top_k: int = 5,
+    filters: Optional[SearchFilter] = None,
+    diversity: Optional[DiversityQuery] = None,
+    personalize: bool = True,
+) -> List[bytes]:
+    """Batched ``recommend_for_student_json``, as ``recommend_for_students`` batches."""
+    if not students:
+        return []
+
+    with stage("recommend"):
+        hit_lists = _cached_search_hits(students, top_k, filters, diversity, personalize)
+        with stage("details"):
+            fragments = _resolve_fragments([hit for hits in hit_lists for hit in hits])
+
+        with stage("response"):
+            return [
+                _render_recommendation(student, hits, fragments)
+                for student, hits in zip(students, hit_lists)
+            ]
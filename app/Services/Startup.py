@@ -0,0 +1,185 @@
+# Startup pipeline and readiness
+"""
+What the API does before it serves, in order: build the index if no
+generation is published, load the published generation (artifacts in
+parallel, then warm-up searches; see ``Search.load_generation`` and
+``Search.warm_up``), then start the background work (artifact watcher,
+index sync and collaborative training schedulers, matching job workers).
+Only then is the process *ready*: ``GET /ready`` answers 200 and the
+recommendation routes serve.
+
+With an index already published this runs inside the lifespan, which is
+quick: the artifacts are memory-mapped. A first build can take minutes, so
+with ``STARTUP_CONFIG['background_build']`` it runs on a thread instead and
+the process answers ``/health`` (and ``/ready`` with 503) meanwhile.
+
+``/ready`` reports how long each step took and, counted from the start of
+the process (so imports are included), when the process became ready and
+when it sent its first recommendation response.
+"""
+import os
+import threading
+import time
+from typing import Optional
+
+from Constants.config import STARTUP_CONFIG
+from DB.VectorDB import Artifacts
+from DB.VectorDB.CollaborativeTraining import start_training_scheduler, stop_training_scheduler
+from DB.VectorDB.IndexSync import start_scheduler, stop_scheduler
+from DB.VectorDB.Search import get_artifact_status, preload_artifacts, start_watcher, stop_watcher
+from Services.Jobs import start_job_workers, stop_job_workers
+
+
+def _process_age() -> float:
+    """Seconds since this process started (from ``/proc``; 0 where that is unavailable)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # fields after the parenthesized command name; starttime is the 22nd field overall
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+_PROCESS_STARTED = time.perf_counter() - _process_age()
+
+_ready = threading.Event()
+_lock = threading.Lock()
+_state = {"phase": "starting", "error": None, "timings": {}, "first_response_seconds": None}
+
+
+def _since_start() -> float:
+    return round(time.perf_counter() - _PROCESS_STARTED, 4)
+
+
+def _step(phase: str, run) -> None:
+    with _lock:
+        _state["phase"] = phase
+    started = time.perf_counter()
+    run()
+    with _lock:
+        _state["timings"][f"{phase}_seconds"] = round(time.perf_counter() - started, 4)
+
+
+def _build_if_missing() -> None:
+    if Artifacts.is_usable(Artifacts.current_generation()):
+        return
+    # BuildIndex (and sklearn behind it) is only imported when a build runs
+    from DB.VectorDB.BuildIndex import ensure_index_built
+
+    ensure_index_built()
+
+
+def _start_serving(stop_event: Optional[threading.Event] = None) -> None:
+    """Every startup step; raises if one fails (the process is then not ready).
+
+    Returns early, without becoming ready, once ``stop_event`` is set: it is
+    checked between the steps and before each background service starts.
+    """
+    def stopping() -> bool:
+        return stop_event is not None and stop_event.is_set()
+
+    with _lock:
+        _state["timings"]["startup_began_after"] = _since_start()
+    for phase, run in (("build", _build_if_missing), ("load", preload_artifacts)):
+        if stopping():
+            return
+        _step(phase, run)
+    artifacts = get_artifact_status()
+    with _lock:
+        _state["timings"]["artifact_load_seconds"] = artifacts.get("load_seconds")
+        _state["timings"]["warmup_seconds"] = artifacts.get("warmup_seconds")
+    for start_service in (start_watcher, start_scheduler, start_training_scheduler, start_job_workers):
+        if stopping():
+            return
+        start_service()
+    if stopping():
+        return
+    with _lock:
+        _state["phase"] = "ready"
+        _state["error"] = None
+        _state["timings"]["ready_after"] = _since_start()
+    _ready.set()
+    print(f"[startup] Ready {_state['timings']['ready_after']:.3f}s after the process started")
+
+
+class _BackgroundStartup(threading.Thread):
+    def __init__(self, retry_interval: float):
+        super().__init__(name="startup", daemon=True)
+        self.retry_interval = retry_interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                _start_serving(self._stop_event)
+                return
+            except Exception as e:
+                with _lock:
+                    _state["error"] = f"{_state['phase']}: {e}"
+                print(f"[startup] Error during {_state['phase']}: {e}; retrying in {self.retry_interval:.0f}s")
+                self._stop_event.wait(self.retry_interval)
+
+    def stop(self):
+        """Stop retrying and wait for the step in progress (a build runs to completion)."""
+        self._stop_event.set()
+        self.join()
+
+
+_background: Optional[_BackgroundStartup] = None
+
+
+def start() -> None:
+    """Run the startup steps, on a background thread if a first build is needed and allowed to run there."""
+    global _background
+
+    if STARTUP_CONFIG["background_build"] and not Artifacts.is_usable(Artifacts.current_generation()):
+        print("[startup] No published index; building it in the background (GET /ready reports progress)")
+        _background = _BackgroundStartup(STARTUP_CONFIG["retry_interval"])
+        _background.start()
+        return
+    _start_serving()
+
+
+def stop() -> None:
+    """Stop the background startup (if still running) and everything startup started."""
+    global _background
+
+    # the background startup goes first: once it has returned it starts nothing
+    # more, so what it did start is stopped below
+    if _background is not None:
+        _background.stop()
+        _background = None
+    _ready.clear()
+    with _lock:
+        _state["phase"] = "stopped"
+    stop_job_workers()
+    stop_training_scheduler()
+    stop_scheduler()
+    stop_watcher()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def mark_first_response() -> None:
+    """Record when the first recommendation response went out (cheap after the first call)."""
+    if _state["first_response_seconds"] is None:
+        with _lock:
+            if _state["first_response_seconds"] is None:
+                _state["first_response_seconds"] = _since_start()
+
+
+def get_status() -> dict:
+    """Readiness, the current startup phase, its last error and step timings (seconds)."""
+    with _lock:
+        return {
+            "ready": _ready.is_set(),
+            "phase": _state["phase"],
+            "error": _state["error"],
+            "timings": dict(_state["timings"]),
+            "first_response_after": _state["first_response_seconds"],
+        }
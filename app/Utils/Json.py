@@ -0,0 +1,17 @@
+# JSON encoding for response bodies: orjson when installed, the stdlib otherwise
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: same documents, several times slower to encode
+    orjson = None
+
+
+def dumps(value) -> bytes:
+    """Compact UTF-8 JSON of ``value``, as FastAPI's ``JSONResponse`` renders it.
+
+    Floats must be plain ``float`` (orjson rejects numpy scalars).
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,60 @@
+# Process pool for streaming, chunked offline work (index builds)
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+
+class ChunkPool:
+    """Maps a function over a stream of chunks on worker processes.
+
+    With ``workers`` <= 1 the work runs in this process instead. Workers are
+    spawned rather than forked: the parent may be a server with FAISS/OpenMP
+    and executor threads running, which a fork would copy mid-flight. Task
+    functions must be importable module-level functions.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._executor = None
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    @classmethod
+    def for_tasks(cls, requested: int, tasks: int) -> "ChunkPool":
+        """A pool of ``requested`` workers (0 = one per CPU), but no more than there are ``tasks``."""
+        workers = requested if requested > 0 else (os.cpu_count() or 1)
+        return cls(min(workers, tasks))
+
+    def map(self, fn: Callable, items: Iterable) -> Iterator:
+        """``map(fn, items)`` in input order.
+
+        Unlike ``Executor.map`` the input is consumed lazily: at most two
+        chunks per worker are submitted but not yet yielded, so a streamed
+        input (e.g. DB cursor chunks) never piles up in memory.
+        """
+        if self._executor is None:
+            for item in items:
+                yield fn(item)
+            return
+        pending = deque()
+        for item in items:
+            pending.append(self._executor.submit(fn, item))
+            if len(pending) >= 2 * self.workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def __enter__(self) -> "ChunkPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
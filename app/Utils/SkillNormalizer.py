@@ -0,0 +1,114 @@
+# Skill canonicalization for index text and student queries
+import hashlib
+import json
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Union
+
+from Constants.config import SKILL_CONFIG
+
+# hyphens, underscores and whitespace runs all separate the words of a skill
+_SEPARATORS = re.compile(r"[\s\-_]+")
+# '.' is only stripped from the end: ".net" keeps its leading dot
+_EDGE_PUNCTUATION = " ,;:'\"()[]{}"
+# Raw spellings already resolved, per process. Skills repeat heavily across
+# rows and queries; the memo is dropped wholesale once it reaches this size.
+_MEMO_LIMIT = 1 << 16
+# SKILL_CONFIG keys that change the output, and so the fingerprint
+_RULE_KEYS = ("normalize", "lowercase", "min_skill_length")
+
+_canonicalizer: "SkillCanonicalizer | None" = None
+
+
+def load_alias_table(path) -> Dict[str, List[str]]:
+    """``{canonical: [aliases, ...]}`` from a JSON file; an empty path means no aliases."""
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        table = json.load(f)
+    if not isinstance(table, dict) or not all(isinstance(v, list) for v in table.values()):
+        raise ValueError(f"Skill alias table {path} must map canonical names to lists of aliases.")
+    return table
+
+
+class SkillCanonicalizer:
+    """Maps every spelling of a skill to one canonical form.
+
+    The alias table is compiled once into a hash map keyed by the normalized
+    spelling (``SKILL_CONFIG``: NFKC, lowercasing, hyphen/underscore/space runs
+    collapsed), so resolving a skill costs one normalization and one dict
+    lookup. Skills missing from the table pass through normalized; those
+    shorter than ``min_skill_length`` are dropped unless the table names them.
+    """
+
+    def __init__(self, aliases: Dict[str, List[str]], config: Optional[dict] = None):
+        self.config = {**SKILL_CONFIG, **(config or {})}
+        self.table: Dict[str, str] = {}
+        for canonical, spellings in aliases.items():
+            target = self.normalize(canonical)
+            for spelling in (canonical, *spellings):
+                key = self.normalize(spelling)
+                existing = self.table.setdefault(key, target)
+                if existing != target:
+                    raise ValueError(f"Skill alias {spelling!r} maps to both {existing!r} and {target!r}.")
+        rules = {key: self.config[key] for key in _RULE_KEYS}
+        payload = json.dumps([sorted(self.table.items()), rules], separators=(",", ":"))
+        # recorded in bundle manifests: an index is only extended under the same table
+        self.fingerprint = hashlib.sha256(payload.encode()).hexdigest()[:16]
+        self._memo: Dict[str, Optional[str]] = {}
+
+    def normalize(self, skill: str) -> str:
+        text = str(skill)
+        if self.config["normalize"]:
+            text = unicodedata.normalize("NFKC", text)
+            text = _SEPARATORS.sub(" ", text).strip(_EDGE_PUNCTUATION).rstrip(".")
+        else:
+            text = text.strip()
+        if self.config["lowercase"]:
+            text = text.lower()
+        return text
+
+    def canonicalize(self, skill: str) -> Optional[str]:
+        """Canonical form of one skill, or None if it should be dropped."""
+        memo = self._memo
+        if skill in memo:
+            return memo[skill]
+        key = self.normalize(skill)
+        canonical = self.table.get(key)
+        if canonical is None and len(key) >= self.config["min_skill_length"]:
+            canonical = key
+        if len(memo) >= _MEMO_LIMIT:
+            memo.clear()
+        memo[skill] = canonical
+        return canonical
+
+    def canonicalize_all(self, skills: Union[str, Iterable[str], None]) -> List[str]:
+        """Canonical skills of a list, or of a comma-separated ``required_skills`` value."""
+        if not skills:
+            return []
+        if isinstance(skills, str):
+            skills = skills.split(",")
+        out = [c for c in map(self.canonicalize, skills) if c]
+        if self.config["remove_duplicates"]:
+            out = list(dict.fromkeys(out))
+        return out
+
+    def skill_text(self, skills: Union[str, Iterable[str], None]) -> str:
+        return " ".join(self.canonicalize_all(skills))
+
+
+def get_skill_canonicalizer() -> SkillCanonicalizer:
+    """Process-wide canonicalizer compiled from ``SKILL_CONFIG['aliases_path']``."""
+    global _canonicalizer
+    if _canonicalizer is None:
+        _canonicalizer = SkillCanonicalizer(load_alias_table(SKILL_CONFIG["aliases_path"]))
+    return _canonicalizer
+
+
+def canonical_skills(skills: Union[str, Iterable[str], None]) -> List[str]:
+    return get_skill_canonicalizer().canonicalize_all(skills)
+
+
+def skill_text(skills: Union[str, Iterable[str], None]) -> str:
+    """Canonical skills joined for TF-IDF text, used for both corpus rows and queries."""
+    return get_skill_canonicalizer().skill_text(skills)
@@ -0,0 +1,300 @@
+# Per-stage request timing, Prometheus metrics and the slow-request profiler
+import asyncio
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from Constants.config import TRACING_CONFIG
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Trace:
+    """Stage timings of one HTTP request, shared with the threads working on it."""
+
+    __slots__ = ("started", "stages", "active", "samples")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}  # seconds, summed over repeats
+        self.active: Dict[int, int] = {}  # thread ident -> open stages; what the profiler samples
+        self.samples: Optional[Counter] = None  # folded stack -> count, while profiled
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in self.stages.items())
+
+
+# Set by the middleware; the executor copies the context into its workers.
+_current: ContextVar[Optional[Trace]] = ContextVar("recommender_trace", default=None)
+
+
+class Histogram:
+    """Prometheus-style latency histogram with one series per label value."""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series: Dict[str, list] = {}  # label value -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: str, seconds: float) -> None:
+        slot = bisect_left(self.buckets, seconds)  # first bucket with seconds <= le
+        with self._lock:
+            series = self._series.get(value)
+            if series is None:
+                series = self._series[value] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += seconds
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = {value: (list(counts), total) for value, (counts, total) in self._series.items()}
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        bounds = [f"{b:g}" for b in self.buckets] + ["+Inf"]
+        for value, (counts, total) in sorted(snapshot.items()):
+            labels = f'{self.label}="{value}"'
+            cumulative = 0
+            for le, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+STAGE_SECONDS = Histogram(
+    "recommender_stage_seconds", "Time spent in each stage of serving recommendations.", "stage", TRACING_CONFIG["buckets"]
+)
+REQUEST_SECONDS = Histogram(
+    "recommender_request_seconds", "HTTP request latency by route.", "route", TRACING_CONFIG["buckets"]
+)
+_profiles_written = 0
+_profiles_lock = threading.Lock()
+
+
+def record(name: str, seconds: float) -> None:
+    """Count ``seconds`` towards stage ``name`` (histogram and the current request's trace)."""
+    if not TRACING_CONFIG["enabled"]:
+        return
+    STAGE_SECONDS.observe(name, seconds)
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+class _Stage:
+    __slots__ = ("name", "trace", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.trace = trace = _current.get()
+        if trace is not None and trace.samples is not None:
+            ident = threading.get_ident()
+            trace.active[ident] = trace.active.get(ident, 0) + 1
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.started
+        STAGE_SECONDS.observe(self.name, seconds)
+        trace = self.trace
+        if trace is not None:
+            trace.add(self.name, seconds)
+            if trace.samples is not None:
+                ident = threading.get_ident()
+                depth = trace.active.get(ident, 1) - 1
+                if depth:
+                    trace.active[ident] = depth
+                else:
+                    trace.active.pop(ident, None)
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str):
+    """Context manager timing one stage of the hot path.
+
+    Returns a shared no-op when tracing is disabled, so an instrumented
+    call costs one dict lookup.
+    """
+    if not TRACING_CONFIG["enabled"]:
+        return _NO_STAGE
+    return _Stage(name)
+
+
+def _fold(frame) -> str:
+    """``frame``'s stack, outermost first, in flamegraph folded form."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _Sampler(threading.Thread):
+    """Periodically samples the stacks of threads inside a stage of a traced request."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self._traces: set = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def watch(self, trace: Trace) -> None:
+        trace.samples = Counter()
+        with self._lock:
+            self._traces.add(trace)
+
+    def unwatch(self, trace: Trace) -> None:
+        with self._lock:
+            self._traces.discard(trace)
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            with self._lock:
+                traces = list(self._traces)
+            if not traces:
+                continue
+            frames = sys._current_frames()
+            for trace in traces:
+                for ident in list(trace.active):
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        trace.samples[_fold(frame)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_sampler: Optional[_Sampler] = None
+_sampler_lock = threading.Lock()
+
+
+def _get_sampler() -> Optional[_Sampler]:
+    """The process-wide profiler, started on first use; None unless a threshold is set."""
+    global _sampler
+
+    if TRACING_CONFIG["profile_threshold_ms"] <= 0:
+        return None
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = _Sampler(TRACING_CONFIG["profile_interval_ms"] / 1000.0)
+                _sampler.start()
+    return _sampler
+
+
+def stop_profiler() -> None:
+    global _sampler
+
+    with _sampler_lock:
+        sampler, _sampler = _sampler, None
+    if sampler is not None:
+        sampler.stop()
+
+
+def _dump_profile(trace: Trace, route: str, seconds: float) -> Optional[Path]:
+    """Write ``trace``'s samples as folded stacks; returns the file, if any samples were taken.
+
+    Blocking file I/O: the middleware runs it on a worker thread.
+    """
+    global _profiles_written
+
+    if not trace.samples:
+        return None
+    directory = Path(TRACING_CONFIG["profile_dir"])
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", route).strip("-") or "root"
+    path = directory / f"{time.strftime('%Y%m%dT%H%M%S')}-{slug}-{seconds * 1000:.0f}ms-{id(trace):x}.folded"
+    path.write_text("".join(f"{stack} {count}\n" for stack, count in trace.samples.most_common()))
+    with _profiles_lock:
+        _profiles_written += 1
+    return path
+
+
+class TracingMiddleware:
+    """ASGI middleware timing every HTTP request.
+
+    Starts a ``Trace`` that the stage timers of the request fill in, adds
+    them as a ``Server-Timing`` header (stages finished before the response
+    starts, plus ``app`` for the time until then) and records the request
+    duration per route. With ``profile_threshold_ms`` set, the threads
+    working on the request are sampled and slow requests dump their stacks.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACING_CONFIG["enabled"]:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        token = _current.set(trace)
+        sampler = _get_sampler()
+        if sampler is not None:
+            sampler.watch(trace)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and TRACING_CONFIG["server_timing"]:
+                trace.add("app", time.perf_counter() - trace.started)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            seconds = time.perf_counter() - trace.started
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(route, seconds)
+            if sampler is not None:
+                sampler.unwatch(trace)
+                if seconds * 1000 >= TRACING_CONFIG["profile_threshold_ms"]:
+                    # off the event loop, which is busy enough when requests are slow
+                    await asyncio.to_thread(_dump_profile, trace, route, seconds)
+
+
+def render_metrics() -> str:
+    """Every tracing metric in the Prometheus text exposition format."""
+    lines = STAGE_SECONDS.render() + REQUEST_SECONDS.render()
+    lines += [
+        "# HELP recommender_slow_request_profiles_total Folded-stack profiles written for slow requests.",
+        "# TYPE recommender_slow_request_profiles_total counter",
+        f"recommender_slow_request_profiles_total {_profiles_written}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -2,10 +2,17 @@ import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from dotenv import load_dotenv
-from DB.VectorDB.BuildIndex import ensure_index_built
+from DB.Postgres import close_pool
 
+from Routes.admin import router as admin_router
+from Routes.interactions import router as interactions_router
+from Routes.jobs import router as jobs_router
 from Routes.recommendations import router as recommendations_router
+from Services import Startup
+from Services.Executor import shutdown_executor
+from Utils.Tracing import CONTENT_TYPE, TracingMiddleware, render_metrics, stop_profiler
 
 # Load environment variables
 load_dotenv()
@@ -14,16 +21,23 @@ load_dotenv()
 async def lifespan(app: FastAPI):
     """FastAPI lifespan for startup/shutdown tasks.
 
-    Ensures FAISS index is available before serving requests.
+    Loads and warms up the published search artifacts before serving, then
+    starts the artifact watcher, index sync and collaborative training
+    schedulers and job workers (see ``Services.Startup``). Without a
+    published index the first build runs in the background and ``/ready``
+    stays 503 until it is served.
     """
     try:
-        ensure_index_built()
+        Startup.start()
     except Exception as e:
         # Fail fast so the API doesn't run without a usable index
-        print(f"[startup] Error ensuring FAISS index: {e}")
+        print(f"[startup] Error loading the search index: {e}")
         raise
     yield
-    # Add optional shutdown tasks here
+    Startup.stop()
+    shutdown_executor()
+    stop_profiler()
+    close_pool()
 
 
 app = FastAPI(
@@ -43,12 +57,18 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_methods=["GET", "POST", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+# Outermost, so request durations include the other middleware
+app.add_middleware(TracingMiddleware)
 
 # Include routers
 app.include_router(recommendations_router)
+app.include_router(admin_router)
+app.include_router(jobs_router)
+app.include_router(interactions_router)
 
 
 @app.get("/", tags=["Root"])
@@ -61,12 +81,25 @@ async def root():
     }
 
 
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage and per-route latency histograms in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+
 @app.get("/health", tags=["Health"])
 async def health():
     """Health check endpoint."""
     return {"status": "healthy"}
 
 
+@app.get("/ready", tags=["Health"])
+async def ready():
+    """Readiness: 200 once the index is loaded and warmed up, 503 before; with startup timings."""
+    status = Startup.get_status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
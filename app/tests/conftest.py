@@ -0,0 +1,35 @@
+# Shared fixtures: a fitted vectorizer and indexed documents over the synthetic catalog
+import numpy as np
+import pytest
+from sklearn.preprocessing import normalize
+
+from Benchmarks import Standin
+from RecommenderModel.CompactTfidf import CompactTfidfVectorizer
+from RecommenderModel.Vectorizer import _template
+
+
+@pytest.fixture(scope="session")
+def texts():
+    return Standin.synthetic_texts(600, extra_vocab=800)
+
+
+@pytest.fixture(scope="session")
+def queries():
+    # service-shaped queries plus an empty one and one with no known terms
+    return Standin.synthetic_queries(40) + ["", "zzzunknown qqqnothing", "Python python PYTHON sql"]
+
+
+@pytest.fixture(scope="session")
+def sklearn_vectorizer(texts):
+    return _template().fit(texts)
+
+
+@pytest.fixture(scope="session")
+def vectorizer(sklearn_vectorizer):
+    return CompactTfidfVectorizer.from_sklearn(sklearn_vectorizer)
+
+
+@pytest.fixture(scope="session")
+def documents(sklearn_vectorizer, texts):
+    """L2-normalized float32 TF-IDF rows of ``texts``, as the build indexes them."""
+    return normalize(sklearn_vectorizer.transform(texts)).astype(np.float32)
@@ -0,0 +1,40 @@
+import numpy as np
+from collections import Counter
+
+from RecommenderModel.CompactTfidf import CompactTfidfVectorizer
+from RecommenderModel.Vectorizer import _template
+
+
+def _assert_same_csr(actual, expected):
+    assert actual.shape == expected.shape
+    assert np.array_equal(actual.indptr, expected.indptr)
+    assert np.array_equal(actual.indices, expected.indices)
+    assert np.array_equal(actual.data, expected.data)  # bit-identical, not just close
+
+
+def test_transform_matches_sklearn(sklearn_vectorizer, vectorizer, texts, queries):
+    for docs in (texts[:100], queries):
+        _assert_same_csr(vectorizer.transform(docs), sklearn_vectorizer.transform(docs))
+
+
+def test_save_and_mapped_load_round_trip(tmp_path, sklearn_vectorizer, vectorizer, queries):
+    vectorizer.save(tmp_path)
+    loaded = CompactTfidfVectorizer.load(tmp_path, mmap=True)
+    assert isinstance(loaded.vocab, np.ndarray)
+    _assert_same_csr(loaded.transform(queries), sklearn_vectorizer.transform(queries))
+
+
+def test_fit_from_document_frequencies_matches_fit(vectorizer, texts):
+    analyzer = _template().build_analyzer()
+    frequency = Counter()
+    for text in texts:
+        frequency.update(set(analyzer(text)))
+    counted = CompactTfidfVectorizer.from_document_frequencies(_template(), frequency, len(texts))
+    assert np.array_equal(counted.vocab, vectorizer.vocab)
+    assert np.array_equal(counted.idf, vectorizer.idf)
+
+
+def test_lookup_marks_unknown_and_overlong_terms(vectorizer):
+    known = vectorizer.vocab[3].decode()
+    cols = vectorizer.lookup([known, "zzzunknown", known + "x" * vectorizer.vocab.dtype.itemsize])
+    assert cols.tolist() == [3, -1, -1]
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from DB.VectorDB.Diversity import DiversityQuery, diversify, pairwise_similarities
+
+
+def _reference_mmr(relevance, similarities, k, mmr_lambda):
+    """Textbook MMR, one candidate at a time."""
+    picked = []
+    candidates = list(range(len(relevance)))
+    while candidates and len(picked) < k:
+        def gain(i):
+            redundancy = max((similarities[i, j] for j in picked), default=0.0)
+            return mmr_lambda * relevance[i] - (1 - mmr_lambda) * max(redundancy, 0.0)
+
+        best = max(candidates, key=gain)  # first on ties, as argmax
+        picked.append(best)
+        candidates.remove(best)
+    return picked
+
+
+@pytest.fixture(scope="module")
+def candidates():
+    rng = np.random.default_rng(0)
+    vectors = rng.random((40, 12)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = np.sort(rng.random(40))[::-1].astype(np.float32)
+    return np.arange(100, 140), scores, vectors
+
+
+@pytest.mark.parametrize("mmr_lambda", [0.0, 0.3, 0.7])
+def test_mmr_matches_reference(candidates, mmr_lambda):
+    positions, scores, vectors = candidates
+    similarities = pairwise_similarities(vectors)
+    chosen, chosen_scores = diversify(positions, scores, DiversityQuery.create("mmr", mmr_lambda), 10, similarities)
+    expected = _reference_mmr(scores.astype(np.float64), similarities, 10, mmr_lambda)
+    assert (chosen - 100).tolist() == expected
+    np.testing.assert_array_equal(chosen_scores, scores[expected])  # hits keep their relevance
+
+
+def test_mmr_with_lambda_one_is_relevance_order(candidates):
+    positions, scores, vectors = candidates
+    chosen, _ = diversify(positions, scores, DiversityQuery.create("mmr", 1.0), 10, pairwise_similarities(vectors))
+    np.testing.assert_array_equal(chosen, positions[:10])
+
+
+def test_mmr_skips_near_duplicates():
+    vectors = np.array([[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+    scores = np.array([0.9, 0.89, 0.5], dtype=np.float32)
+    chosen, _ = diversify(np.arange(3), scores, DiversityQuery.create("mmr", 0.5), 2, pairwise_similarities(vectors))
+    assert chosen.tolist() == [0, 2]
+
+
+def test_company_cap_with_and_without_mmr(candidates):
+    positions, scores, vectors = candidates
+    companies = np.arange(40) % 3
+    companies[::7] = -1  # no company: never capped
+    for mode in ("mmr", "company"):
+        query = DiversityQuery.create(mode, 0.7, max_per_company=2)
+        chosen, chosen_scores = diversify(positions, scores, query, 10, pairwise_similarities(vectors), companies)
+        counts = np.bincount(companies[chosen - 100][companies[chosen - 100] >= 0])
+        assert counts.max() <= 2
+        if mode == "company":
+            assert (np.diff(chosen_scores) <= 0).all()  # relevance order kept
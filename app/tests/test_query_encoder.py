@@ -0,0 +1,28 @@
+import numpy as np
+from sklearn.preprocessing import normalize
+
+from RecommenderModel.QueryEncoder import _BUFFER_ROWS, QueryEncoder
+
+
+def test_csr_matches_transform_and_normalize(sklearn_vectorizer, vectorizer, queries):
+    expected = normalize(sklearn_vectorizer.transform(queries)).astype(np.float32)
+    actual = QueryEncoder(vectorizer).encode_csr(queries)
+    assert np.array_equal(actual.indptr, expected.indptr)
+    assert np.array_equal(actual.indices, expected.indices)
+    np.testing.assert_allclose(actual.data, expected.data, rtol=1e-6)
+
+
+def test_dense_buffer_is_cleared_between_calls(vectorizer, queries):
+    encoder = QueryEncoder(vectorizer)
+    for batch in (queries[:3], queries[3:4], queries[-3:], queries[:_BUFFER_ROWS + 1]):
+        dense = encoder.encode_dense(batch)
+        np.testing.assert_array_equal(dense, encoder.encode_csr(batch).toarray())
+
+
+def test_project_matches_dense_product(vectorizer, queries):
+    encoder = QueryEncoder(vectorizer)
+    components = np.random.default_rng(0).standard_normal((16, vectorizer.vocabulary_size)).astype(np.float32)
+    expected = encoder.encode_csr(queries) @ components.T
+    norms = np.linalg.norm(expected, axis=1, keepdims=True)
+    expected = np.divide(expected, norms, out=np.zeros_like(expected), where=norms > 0)
+    np.testing.assert_allclose(encoder.project(queries, components), expected, rtol=1e-4, atol=1e-5)
@@ -0,0 +1,66 @@
+import faiss
+import numpy as np
+import pytest
+
+from Benchmarks import Standin
+from DB.VectorDB import AnnIndex
+from DB.VectorDB.MetadataStore import pack_positions
+from DB.VectorDB.ShardedIndex import ShardedIndex, ShardLayout
+from RecommenderModel.QueryEncoder import QueryEncoder
+
+CONFIG = {"index_type": "flat"}
+
+
+@pytest.fixture(scope="module")
+def vectors(documents):
+    return np.ascontiguousarray(documents.toarray())
+
+
+@pytest.fixture(scope="module")
+def unsharded(vectors):
+    return AnnIndex.build(vectors, CONFIG, ids=np.arange(len(vectors), dtype=np.int64))
+
+
+def _sharded(vectors, by):
+    rows = Standin.synthetic_internships(len(vectors))
+    layout = ShardLayout(3, by)
+    layout.add(rows)
+    index = ShardedIndex.create(AnnIndex.create_index(vectors.shape[1], len(vectors), CONFIG), layout, len(vectors))
+    index.add_with_ids(vectors, np.arange(len(vectors), dtype=np.int64))
+    return index
+
+
+@pytest.mark.parametrize("by", ["hash", "domain"])
+def test_sharded_search_equals_unsharded(by, vectors, unsharded, vectorizer, queries):
+    k = 10
+    encoded = QueryEncoder(vectorizer).encode_dense(queries)
+    index = _sharded(vectors, by)
+    assert index.ntotal == len(vectors) and all(index.shard_sizes())
+
+    expected_scores, expected_positions = unsharded.search(encoded, k)
+    scores, positions = index.search(encoded, k)
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-5, atol=1e-6)
+    # among equal scores FAISS may order hits differently; the positions must carry the same scores
+    np.testing.assert_allclose(np.take_along_axis(encoded @ vectors.T, positions, 1), scores, rtol=1e-5, atol=1e-6)
+    np.testing.assert_array_equal(index.reconstruct_batch(expected_positions[0]), vectors[expected_positions[0]])
+
+
+def test_sharded_filtered_search_equals_unsharded(vectors, unsharded, vectorizer, queries):
+    k = 10
+    encoded = QueryEncoder(vectorizer).encode_dense(queries)
+    mask = np.random.default_rng(1).random(len(vectors)) < 0.2
+    bitmap = pack_positions(mask)
+    expected_scores, _ = AnnIndex.search_filtered(unsharded, encoded, k, bitmap, int(mask.sum()), exact_max=0)
+    scores, positions = _sharded(vectors, "hash").search_filtered(encoded, k, bitmap, exact_max=0)
+    assert mask[positions[positions >= 0]].all()
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-5, atol=1e-6)
+
+
+def test_removed_positions_are_not_returned(vectors, vectorizer, queries):
+    encoded = QueryEncoder(vectorizer).encode_dense(queries)
+    index = _sharded(vectors, "hash")
+    _, before = index.search(encoded, 5)
+    removed = np.unique(before[:, 0])
+    assert index.remove_ids(removed) == len(removed)
+    _, after = index.search(encoded, 5)
+    assert not np.isin(after, removed).any()
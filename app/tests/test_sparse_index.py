@@ -0,0 +1,57 @@
+import faiss
+import numpy as np
+
+from DB.VectorDB.SparseIndex import SparseIndex
+from RecommenderModel.QueryEncoder import QueryEncoder
+
+
+def _dense_search(documents, queries, k, mask=None):
+    scores = queries.toarray() @ documents.toarray().T
+    if mask is not None:
+        scores[:, ~mask] = -np.inf
+    return scores
+
+
+def _check_against_dense(scores, positions, dense, k):
+    for row in range(len(dense)):
+        valid = positions[row] >= 0
+        expected = np.sort(dense[row][np.isfinite(dense[row])])[::-1][:k]
+        np.testing.assert_allclose(scores[row][valid], expected, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(dense[row][positions[row][valid]], scores[row][valid], rtol=1e-5, atol=1e-6)
+
+
+def test_sparse_search_equals_dense(vectorizer, documents, queries):
+    k = 10
+    encoded = QueryEncoder(vectorizer).encode_csr(queries)
+    scores, positions = SparseIndex.from_documents(documents).search(encoded, k)
+    _check_against_dense(scores, positions, _dense_search(documents, encoded, k), k)
+
+    flat = faiss.IndexFlatIP(documents.shape[1])
+    flat.add(documents.toarray())
+    flat_scores, _ = flat.search(encoded.toarray(), k)
+    np.testing.assert_allclose(scores, flat_scores, rtol=1e-5, atol=1e-6)
+
+
+def test_masked_search_and_removal(vectorizer, documents, queries):
+    k = 10
+    encoded = QueryEncoder(vectorizer).encode_csr(queries)
+    index = SparseIndex.from_documents(documents)
+    mask = np.random.default_rng(0).random(documents.shape[0]) < 0.1
+    scores, positions = index.search(encoded, k, mask=mask)
+    assert mask[positions[positions >= 0]].all()
+    _check_against_dense(scores, positions, _dense_search(documents, encoded, k, mask), k)
+
+    removed = np.flatnonzero(mask)
+    index.remove(removed)
+    assert index.reconstruct_batch(removed).nnz == 0
+    _, positions = index.search(encoded, k, mask=mask)
+    assert (positions[:, : min(k, mask.sum())] >= 0).all()  # still padded in position order
+
+
+def test_write_read_round_trip(tmp_path, vectorizer, documents, queries):
+    encoded = QueryEncoder(vectorizer).encode_csr(queries)
+    index = SparseIndex.from_documents(documents)
+    index.write(str(tmp_path))
+    loaded = SparseIndex.read(str(tmp_path), mmap=True)
+    for a, b in zip(index.search(encoded, 5), loaded.search(encoded, 5)):
+        np.testing.assert_array_equal(a, b)